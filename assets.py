@@ -0,0 +1,110 @@
+import logging
+import os
+
+# Rendered images for the UI. Each (source, size, theme) is decoded and resized
+# once per run and kept as a ready PhotoImage; the resized PNG is also written
+# to cache_dir, so later runs skip the resize. Cached files are named after the
+# source's modification time, so an edited source is rendered afresh. Pillow is
+# imported on the first render; without it every image is None and callers fall
+# back to text.
+
+
+class AssetCache:
+    """PhotoImages for icons and gradients, rendered once and reused.
+
+    image(path, size, theme) uses "<name>-<theme><ext>" next to path when such
+    a variant exists, and path otherwise. gradient(start, end, size) is a
+    vertical gradient between two "#rrggbb" colours. The cache holds the
+    references Tk needs to keep the images alive, so callers need not.
+    PhotoImages may only be made on the Tk thread.
+    """
+
+    def __init__(self, cache_dir="asset_cache"):
+        self.cache_dir = cache_dir
+        self._photos = {}
+        self._counters = {"hits": 0, "disk_hits": 0, "renders": 0}
+
+    def image(self, path, size, theme="light"):
+        """A PhotoImage of path resized to size (width, height), or None if it cannot be read."""
+        key = (path, tuple(size), theme)
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._counters["hits"] += 1
+            return photo
+        stem, ext = os.path.splitext(path)
+        variant = f"{stem}-{theme}{ext}"
+        source = variant if os.path.exists(variant) else path
+        try:
+            from PIL import ImageTk
+            rendered = self._rendered(
+                f"{os.path.basename(stem)}-{theme}-{size[0]}x{size[1]}-{os.stat(source).st_mtime_ns}.png",
+                lambda: _resized(source, size)
+            )
+        except (ImportError, OSError) as e:
+            logging.warning(f"Cannot load image {source}: {e}")
+            return None
+        photo = self._photos[key] = ImageTk.PhotoImage(rendered)
+        return photo
+
+    def gradient(self, start, end, size, theme="light"):
+        """A PhotoImage of size (width, height) fading from start at the top to end at the bottom, or None."""
+        key = ("gradient", start, end, tuple(size), theme)
+        photo = self._photos.get(key)
+        if photo is not None:
+            self._counters["hits"] += 1
+            return photo
+        try:
+            from PIL import Image, ImageTk
+        except ImportError:
+            return None
+        width, height = size
+
+        def render():
+            top, bottom = _rgb(start), _rgb(end)
+            column = Image.new("RGB", (1, height))
+            column.putdata([
+                tuple(a + (b - a) * row // height for a, b in zip(top, bottom))
+                for row in range(height)
+            ])
+            return column.resize((width, height), Image.Resampling.NEAREST)
+
+        rendered = self._rendered(f"gradient-{start[1:]}-{end[1:]}-{width}x{height}.png", render)
+        photo = self._photos[key] = ImageTk.PhotoImage(rendered)
+        return photo
+
+    def _rendered(self, name, render):
+        from PIL import Image
+        cached = os.path.join(self.cache_dir, name)
+        try:
+            with Image.open(cached) as image:
+                image.load()
+                self._counters["disk_hits"] += 1
+                return image.copy()
+        except OSError:
+            pass
+        image = render()
+        self._counters["renders"] += 1
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Written under a temporary name and renamed, so a reader never sees half a file.
+            partial = f"{cached}.{os.getpid()}.tmp"
+            image.save(partial, format="PNG")
+            os.replace(partial, cached)
+        except OSError as e:
+            logging.warning(f"Cannot write asset cache file {cached}: {e}")
+        return image
+
+    def stats(self):
+        snapshot = dict(self._counters)
+        snapshot["images"] = len(self._photos)
+        return snapshot
+
+
+def _resized(path, size):
+    from PIL import Image
+    with Image.open(path) as image:
+        return image.resize(size, Image.Resampling.LANCZOS)
+
+
+def _rgb(color):
+    return tuple(int(color[i:i + 2], 16) for i in (1, 3, 5))
@@ -0,0 +1,190 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import mysql.connector
+
+# Application-side audit pipeline. Producers (utils.format_audit_log) put
+# entries on a bounded in-memory queue; a background thread writes them to
+# audit_logs as multi-row INSERTs, outside the transaction that caused them.
+# Entries the database cannot take right now are appended to a JSONL spill
+# file and replayed once it is reachable again.
+
+DEFAULT_SPILL_PATH = "audit_spill.jsonl"
+COLUMNS = ("table_name", "action", "record_id", "user_id", "change_details", "timestamp")
+ROW_SQL = "(" + ", ".join(["%s"] * len(COLUMNS)) + ")"
+
+_spill_lock = threading.Lock()
+_writer = None
+
+
+def install(writer):
+    global _writer
+    _writer = writer
+
+
+def submit(entry):
+    """Queue an audit entry for the installed writer, or spill it if there is none."""
+    if _writer is not None:
+        _writer.submit(entry)
+    else:
+        spill([entry], DEFAULT_SPILL_PATH)
+
+
+def spill(entries, path):
+    with _spill_lock:
+        with open(path, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def insert_entries(db, entries, batch_size):
+    cursor = db.cursor()
+    try:
+        for start in range(0, len(entries), batch_size):
+            batch = entries[start:start + batch_size]
+            cursor.execute(
+                f"INSERT INTO audit_logs ({', '.join(COLUMNS)}) VALUES " + ", ".join([ROW_SQL] * len(batch)),
+                [entry.get(column) for entry in batch for column in COLUMNS]
+            )
+    finally:
+        cursor.close()
+
+
+class AuditWriter:
+    """Background writer that batches audit entries into multi-row INSERTs.
+
+    A batch is flushed once it reaches batch_size entries or its oldest entry
+    has waited flush_interval seconds. If the queue is full or a flush fails,
+    entries go to spill_path instead of being dropped; the spill file is
+    replayed in a single transaction before the next successful flush.
+    Delivery is at least once: a commit lost in transit can repeat a batch.
+    """
+
+    def __init__(self, db_pool, max_queue=10000, batch_size=200, flush_interval=1.0,
+                 spill_path=DEFAULT_SPILL_PATH):
+        self.db_pool = db_pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = {"submitted": 0, "written": 0, "batches": 0, "spilled": 0, "replayed": 0, "failures": 0}
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, entry):
+        self._count("submitted")
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            logging.warning("Audit queue is full; spilling entry to disk.")
+            self._spill([entry])
+
+    def _run(self):
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._collect()
+            if not batch:
+                continue
+            try:
+                self._flush(batch)
+            except Exception as e:
+                # Keep the writer alive; the batch is safer on disk than lost with the thread.
+                logging.error(f"Unexpected audit writer error: {e}")
+                self._spill(batch)
+
+    def _collect(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            # Once the deadline passes (or on shutdown) only take what is already queued.
+            remaining = 0 if self._stopping.is_set() else deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _flush(self, batch):
+        try:
+            db = self.db_pool.get_connection()
+        except mysql.connector.Error as err:
+            logging.warning(f"Audit flush deferred, database unavailable: {err}")
+            self._spill(batch)
+            return
+        try:
+            self._replay_spill(db)
+            insert_entries(db, batch, self.batch_size)
+            db.commit()
+            with self._lock:
+                self._counters["written"] += len(batch)
+                self._counters["batches"] += 1
+        except mysql.connector.Error as err:
+            logging.warning(f"Audit flush failed, spilling {len(batch)} entries: {err}")
+            try:
+                db.rollback()
+            except mysql.connector.Error:
+                pass
+            self._count("failures")
+            self._spill(batch)
+        finally:
+            db.close()
+
+    def _spill(self, entries):
+        spill(entries, self.spill_path)
+        with self._lock:
+            self._counters["spilled"] += len(entries)
+
+    def _replay_spill(self, db):
+        """Write back spilled entries in one transaction; the file is removed only after commit."""
+        replay_path = self.spill_path + ".replay"
+        with _spill_lock:
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spill_path):
+                    return
+                os.replace(self.spill_path, replay_path)
+        entries = []
+        with open(replay_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # A line torn by a crash mid-write; nothing after it is affected.
+                    logging.warning(f"Skipping unreadable line in {replay_path}.")
+        insert_entries(db, entries, self.batch_size)
+        db.commit()
+        os.remove(replay_path)
+        with self._lock:
+            self._counters["replayed"] += len(entries)
+        logging.info(f"Replayed {len(entries)} spilled audit entries.")
+
+    def close(self, timeout=5.0):
+        """Flush what is queued and stop; whatever cannot be written in time is spilled."""
+        self._stopping.set()
+        self._thread.join(timeout)
+        leftover = []
+        while True:
+            try:
+                leftover.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self._spill(leftover)
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._counters)
+        snapshot["queued"] = self._queue.qsize()
+        return snapshot
@@ -0,0 +1,240 @@
+import logging
+import re
+import sys
+from datetime import date
+
+# audit_logs is range-partitioned by month on MySQL: one partition pYYYYMM
+# per month plus a catch-all pmax. Expired months are removed a whole
+# partition at a time, never with a DELETE over the table.
+#
+# Partitioning an existing table rewrites all of it, so it is not done at
+# startup but once, by an administrator:
+#
+#     python audit_retention.py --partition
+#
+# After that the app keeps partitions ahead of the clock and retires expired
+# ones in the background (maintain_partitions), which only ever splits an
+# empty pmax and swaps or drops whole partitions.
+
+PARTITION_NAME = re.compile(r"^p(\d{4})(\d{2})$")
+
+
+def month_start(day):
+    return date(day.year, day.month, 1)
+
+
+def add_months(month, count):
+    years, index = divmod(month.month - 1 + count, 12)
+    return date(month.year + years, index + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def archive_table(month):
+    return f"audit_logs_archive_{month:%Y%m}"
+
+
+def retention_cutoff(retention_months, today=None):
+    """First day of the oldest month kept; rows before it are archived or dropped."""
+    return add_months(month_start(today or date.today()), -retention_months)
+
+
+def read_partitions(cursor):
+    """Months that have their own partition, oldest first, or None if audit_logs is not partitioned."""
+    cursor.execute("""
+        SELECT PARTITION_NAME FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'audit_logs'
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """)
+    names = [row[0] for row in cursor.fetchall()]
+    if not names or names[0] is None:
+        return None
+    months = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months.append(date(int(match.group(1)), int(match.group(2)), 1))
+    return months
+
+
+def partition_definitions(months):
+    definitions = [
+        f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{add_months(month, 1)}'))"
+        for month in months
+    ]
+    definitions.append("PARTITION pmax VALUES LESS THAN MAXVALUE")
+    return ", ".join(definitions)
+
+
+def add_partitions(cursor, months):
+    """Split the new months off the front of pmax; cheap while pmax holds no rows."""
+    cursor.execute(f"ALTER TABLE audit_logs REORGANIZE PARTITION pmax INTO ({partition_definitions(months)})")
+
+
+def months_through(first, last):
+    months = []
+    while first <= last:
+        months.append(first)
+        first = add_months(first, 1)
+    return months
+
+
+def partition_table(db, future_months=3, today=None):
+    """Partition audit_logs by month, one partition for every month it holds rows for.
+
+    This rewrites the table and is run by hand (see the top of this file).
+    Each step checks whether it already took effect, so a run that was
+    interrupted can simply be repeated. Returns the months partitioned, or []
+    when audit_logs already has its monthly partitions.
+    """
+    current = month_start(today or date.today())
+    cursor = db.cursor()
+    try:
+        months = read_partitions(cursor)
+        if months:
+            return []
+        cursor.execute("SELECT MIN(timestamp) FROM audit_logs")
+        oldest = cursor.fetchone()[0]
+        first = min(month_start(oldest), current) if oldest else current
+        added = months_through(first, add_months(current, future_months))
+        if months == []:
+            # Partitioned with pmax alone: the rows all sit there and are split out.
+            add_partitions(cursor, added)
+            return added
+
+        # Partitioned tables cannot have foreign keys, and every unique key
+        # must include the partitioning column.
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.TABLE_CONSTRAINTS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'audit_logs'
+              AND CONSTRAINT_NAME = 'audit_logs_ibfk_1' AND CONSTRAINT_TYPE = 'FOREIGN KEY'
+        """)
+        if cursor.fetchone()[0]:
+            cursor.execute("ALTER TABLE audit_logs DROP FOREIGN KEY audit_logs_ibfk_1")
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.KEY_COLUMN_USAGE
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'audit_logs'
+              AND CONSTRAINT_NAME = 'PRIMARY' AND COLUMN_NAME = 'timestamp'
+        """)
+        rekey = "" if cursor.fetchone()[0] else """
+            MODIFY timestamp DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            DROP PRIMARY KEY,
+            ADD PRIMARY KEY (id, timestamp)"""
+        # One statement, so the table is rewritten once.
+        cursor.execute(f"ALTER TABLE audit_logs {rekey} "
+                       f"PARTITION BY RANGE (TO_DAYS(timestamp)) ({partition_definitions(added)})")
+        return added
+    finally:
+        cursor.close()
+
+
+def table_exists(cursor, table):
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def archive_partition(cursor, month):
+    """Swap the partition's rows into a standalone table, then drop the emptied partition.
+
+    EXCHANGE PARTITION only relinks tablespaces. If an earlier run stopped
+    after the exchange, the archive table already holds the rows and only the
+    drop is left to do.
+    """
+    name, table = partition_name(month), archive_table(month)
+    if not table_exists(cursor, table):
+        cursor.execute(f"CREATE TABLE {table} LIKE audit_logs")
+        cursor.execute(f"ALTER TABLE {table} REMOVE PARTITIONING")
+        cursor.execute(f"ALTER TABLE audit_logs EXCHANGE PARTITION {name} WITH TABLE {table}")
+    else:
+        cursor.execute(f"SELECT 1 FROM audit_logs PARTITION ({name}) LIMIT 1")
+        if cursor.fetchall():
+            logging.warning(f"Archive table {table} already exists and partition {name} is not empty; "
+                            f"leaving it for manual review.")
+            return False
+    cursor.execute(f"ALTER TABLE audit_logs DROP PARTITION {name}")
+    return True
+
+
+def maintain_partitions(db, retention_months=12, future_months=3, archive=True, today=None):
+    """Keep monthly partitions ahead of the clock and retire those past retention.
+
+    Partitions exist up to future_months ahead of the current month. Months
+    older than retention_months before the current one are archived to
+    audit_logs_archive_YYYYMM tables, or dropped outright if archive is False.
+    """
+    current = month_start(today or date.today())
+    cursor = db.cursor()
+    try:
+        months = read_partitions(cursor)
+        if not months:
+            logging.warning("audit_logs has no monthly partitions yet; skipping partition maintenance. "
+                            "Run python audit_retention.py --partition to create them.")
+            return {"added": [], "retired": []}
+
+        added = months_through(add_months(months[-1], 1), add_months(current, future_months))
+        if added:
+            add_partitions(cursor, added)
+            logging.info(f"Added audit_logs partitions {partition_name(added[0])}..{partition_name(added[-1])}.")
+
+        cutoff = retention_cutoff(retention_months, current)
+        retired = []
+        for month in months + added:
+            if month >= cutoff:
+                break
+            if archive:
+                if not archive_partition(cursor, month):
+                    continue
+            else:
+                cursor.execute(f"ALTER TABLE audit_logs DROP PARTITION {partition_name(month)}")
+            retired.append(month)
+        if retired:
+            logging.info(f"{'Archived' if archive else 'Dropped'} {len(retired)} expired audit_logs partition(s).")
+        return {"added": added, "retired": retired}
+    finally:
+        cursor.close()
+
+
+def purge_expired(db, retention_months=12, future_months=3, archive=True, today=None):
+    """SQLite has no partitioning: move rows past retention with a range delete on the timestamp index."""
+    cutoff = retention_cutoff(retention_months, today)
+    cursor = db.cursor()
+    try:
+        if archive:
+            cursor.execute("INSERT INTO audit_logs_archive SELECT * FROM audit_logs WHERE timestamp < %s", (cutoff,))
+        cursor.execute("DELETE FROM audit_logs WHERE timestamp < %s", (cutoff,))
+        retired = cursor.rowcount
+        db.commit()
+        if retired:
+            logging.info(f"{'Archived' if archive else 'Deleted'} {retired} expired audit_logs row(s).")
+        return {"added": [], "retired": retired}
+    finally:
+        cursor.close()
+
+
+def main(argv):
+    import mysql.connector
+    from db import AUDIT_RETENTION, DB_CONFIG
+
+    db = mysql.connector.connect(**DB_CONFIG)
+    try:
+        if "--partition" in argv:
+            months = partition_table(db, AUDIT_RETENTION["future_months"])
+            if months:
+                print(f"Partitioned audit_logs into {partition_name(months[0])}..{partition_name(months[-1])}.")
+            else:
+                print("audit_logs is already partitioned by month.")
+        result = maintain_partitions(db, **AUDIT_RETENTION)
+        print(f"Added {len(result['added'])} and retired {len(result['retired'])} partition(s).")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main(sys.argv[1:]))
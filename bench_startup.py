@@ -0,0 +1,123 @@
+"""Measure how long importing the app takes, using python -X importtime.
+
+Usage: python bench_startup.py [--runs N] [--top N] [--budget-ms MS] [--gui]
+
+Imports main in fresh interpreters (main builds no window on import) and
+reports the median total import time and the modules that cost the most,
+by their own (not cumulative) time. With --budget-ms the exit status is 1
+when the median is over budget, so the number can be tracked in CI.
+
+--gui also builds the real window, against a scratch SQLite database: the
+time from starting Tk until the login window has been drawn (the dashboard
+is built by then, hidden), the widgets alive at that point, and what
+building every on-demand dashboard frame up front would add to both. It
+needs a display; without $DISPLAY it runs itself under xvfb-run.
+"""
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def measure():
+    """{module: (self_us, cumulative_us)} for one cold import of main."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"Importing main failed:\n{result.stderr[-2000:]}")
+    timings = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            timings[match.group(3)] = (int(match.group(1)), int(match.group(2)))
+    return timings
+
+
+def build_window():
+    """Child process for --gui: prints the window measurements as JSON."""
+    import tkinter as tk
+    import main
+    from frame_registry import count_widgets
+
+    started = time.perf_counter()
+    root = tk.Tk()
+    app = main.PasswordManagerApp(root)
+    root.update()
+    window_ms = (time.perf_counter() - started) * 1000
+    widgets = count_widgets(root)
+
+    registry = app.frame_registry
+    started = time.perf_counter()
+    for name in registry.registered():
+        registry.get(name)
+    root.update()
+    frames_ms = (time.perf_counter() - started) * 1000
+    print(json.dumps({"window_ms": window_ms, "widgets": widgets, "frames_ms": frames_ms,
+                      "frames_widgets": count_widgets(root) - widgets, "frames": len(registry.registered())}))
+    app.on_close()
+
+
+def measure_window():
+    command = [sys.executable, os.path.abspath(__file__), "--build-window"]
+    if not os.environ.get("DISPLAY"):
+        if shutil.which("xvfb-run") is None:
+            sys.exit("--gui needs a display: set DISPLAY or install xvfb-run.")
+        command = ["xvfb-run", "-a", "-s", "-screen 0 1920x1080x24"] + command
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ, PASSVAULT_DB_BACKEND="sqlite", PASSVAULT_SQLITE_PATH=os.path.join(scratch, "bench.db"))
+        result = subprocess.run(command, capture_output=True, text=True, env=env)
+    if result.returncode != 0:
+        sys.exit(f"Building the window failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv):
+    runs, top, budget_ms = 5, 15, None
+    if "--runs" in argv:
+        runs = int(argv[argv.index("--runs") + 1])
+    if "--top" in argv:
+        top = int(argv[argv.index("--top") + 1])
+    if "--budget-ms" in argv:
+        budget_ms = float(argv[argv.index("--budget-ms") + 1])
+
+    samples = [measure() for _ in range(runs)]
+    total_ms = statistics.median(sample["main"][1] for sample in samples) / 1000
+    self_ms = {
+        module: statistics.median(sample.get(module, (0, 0))[0] for sample in samples) / 1000
+        for module in samples[-1]
+    }
+
+    print(f"import main: {total_ms:.1f} ms (median of {runs} runs)\n")
+    print(f"{'self ms':>9}  module")
+    for module, ms in sorted(self_ms.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{ms:9.1f}  {module}")
+
+    if "--gui" in argv:
+        windows = [measure_window() for _ in range(runs)]
+        window_ms = statistics.median(window["window_ms"] for window in windows)
+        frames_ms = statistics.median(window["frames_ms"] for window in windows)
+        widgets, frames_widgets = windows[-1]["widgets"], windows[-1]["frames_widgets"]
+        print(f"\nlogin window drawn: {window_ms:.1f} ms, {widgets} widgets (median of {runs} runs)")
+        print(f"building the {windows[-1]['frames']} on-demand frames up front would add {frames_ms:.1f} ms "
+              f"and {frames_widgets} widgets: {window_ms + frames_ms:.1f} ms, {widgets + frames_widgets} widgets")
+
+    if budget_ms is not None and total_ms > budget_ms:
+        print(f"\nOver budget: {total_ms:.1f} ms > {budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    if "--build-window" in sys.argv:
+        sys.path.insert(0, os.getcwd())
+        build_window()
+    else:
+        sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Read-through cache for per-user data that rarely changes: identity, profile,
+# settings and preferences. Keys are (kind, user_id). Repository write paths
+# invalidate the exact keys they change once their transaction commits; the TTL
+# only bounds how long a change made outside the app (or by another client) can
+# go unseen.
+
+_cache = None
+
+
+def install(cache):
+    global _cache
+    _cache = cache
+
+
+def get_or_load(key, load):
+    if _cache is None:
+        return load()
+    return _cache.get_or_load(key, load)
+
+
+def invalidate(*keys):
+    if _cache is not None:
+        for key in keys:
+            _cache.invalidate(key)
+
+
+def clear():
+    if _cache is not None:
+        _cache.clear()
+
+
+class ReadThroughCache:
+    """TTL- and LRU-bounded map of loaded values with hit/miss counters.
+
+    A load that overlaps an invalidation is returned to its caller but not
+    stored, so a value read just before a write commits cannot outlive the
+    invalidation that follows it. None results (missing rows) are not cached.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._invalidations = 0
+        self._counters = {"hits": 0, "misses": 0, "expired": 0, "evicted": 0, "invalidated": 0}
+
+    def get_or_load(self, key, load):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._counters["expired"] += 1
+            self._counters["misses"] += 1
+            seen = self._invalidations
+        value = load()
+        if value is None:
+            return value
+        with self._lock:
+            if self._invalidations == seen:
+                self._entries[key] = (value, time.monotonic() + self.ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._counters["evicted"] += 1
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._invalidations += 1
+            if self._entries.pop(key, None) is not None:
+                self._counters["invalidated"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._invalidations += 1
+            self._counters["invalidated"] += len(self._entries)
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot["size"] = len(self._entries)
+        lookups = snapshot["hits"] + snapshot["misses"]
+        snapshot["hit_rate"] = snapshot["hits"] / lookups if lookups else 0.0
+        return snapshot
@@ -0,0 +1,101 @@
+"""Run EXPLAIN on every SQL query in the app and fail on full scans or filesorts.
+
+Usage: python check_query_plans.py [--user-id N]
+
+Queries are collected from the string literals in repositories.py,
+features/*.py, ui.py and main.py, so a new query is checked as soon as it is written. Queries that are
+assembled at runtime come from the repository that builds them (AuditRepo.list_statements).
+"""
+import ast
+import glob
+import os
+import re
+import sys
+import mysql.connector
+from db import DB_CONFIG
+from repositories import AuditRepo
+
+SOURCE_FILES = ["repositories.py"] + sorted(glob.glob("features/*.py")) + ["ui.py", "main.py"]
+
+SQL_START = re.compile(r"^\s*(SELECT\s.+?\sFROM\s|UPDATE\s+\w+\s+SET\s|DELETE\s+FROM\s)", re.DOTALL)
+DATE_PARAM = re.compile(r"(timestamp|_at|_time|_date)\s*(=|<|>|<=|>=|!=)\s*%s$", re.IGNORECASE)
+
+# Lookups on these tables are bounded by their primary key and never worth an index.
+SMALL_TABLES = {"schema_version", "schema_routines"}
+
+
+def collect_queries():
+    queries = []
+    for path in SOURCE_FILES:
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Constant) and isinstance(node.value, str) and SQL_START.match(node.value):
+                queries.append((f"{path}:{node.lineno}", node.value))
+    queries.extend(("repositories.py:AuditRepo.list", sql) for sql in AuditRepo.list_statements())
+    return queries
+
+
+def bind_sample_params(sql, user_id):
+    """Inline representative literals for each %s so EXPLAIN sees realistic types."""
+    parts = sql.split("%s")
+    bound = parts[0]
+    for part in parts[1:]:
+        if re.search(r"LIMIT\s*$", bound, re.IGNORECASE):
+            bound += "1"
+        elif DATE_PARAM.search(bound + "%s"):
+            bound += "'2000-01-01'"
+        elif re.search(r"(user_id|record_id|\bid)\s*(=|!=)\s*$", bound, re.IGNORECASE):
+            bound += str(user_id)
+        else:
+            bound += "'x'"
+        bound += part
+    return bound
+
+
+def plan_problems(rows):
+    problems = []
+    for row in rows:
+        table = row.get("table") or ""
+        extra = row.get("Extra") or ""
+        if table in SMALL_TABLES:
+            continue
+        if row.get("type") == "ALL":
+            problems.append(f"full table scan on {table}")
+        if "Using filesort" in extra:
+            problems.append(f"filesort on {table}")
+    return problems
+
+
+def main(argv):
+    user_id = 1
+    if "--user-id" in argv:
+        user_id = int(argv[argv.index("--user-id") + 1])
+
+    db = mysql.connector.connect(**DB_CONFIG)
+    cursor = db.cursor(dictionary=True)
+    failures = 0
+    try:
+        for location, sql in collect_queries():
+            statement = " ".join(bind_sample_params(sql, user_id).split())
+            try:
+                cursor.execute("EXPLAIN " + statement)
+                problems = plan_problems(cursor.fetchall())
+            except mysql.connector.Error as err:
+                problems = [f"EXPLAIN failed: {err}"]
+            status = "FAIL" if problems else "ok"
+            print(f"[{status}] {location}: {statement[:100]}")
+            for problem in problems:
+                print(f"       - {problem}")
+            failures += bool(problems)
+    finally:
+        cursor.close()
+        db.close()
+
+    print(f"\n{failures} query plan(s) need attention.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    sys.exit(main(sys.argv[1:]))
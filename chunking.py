@@ -0,0 +1,128 @@
+import hashlib
+
+# Content-defined chunking in the style of FastCDC (Xia et al., 2016). A cut
+# point is placed where a gear hash of the preceding bytes matches a mask, so
+# boundaries follow the content: an insertion early in a file shifts only the
+# chunks around it, and the rest still match chunks stored before. Normalised
+# chunking uses a stricter mask before the average size and a looser one after
+# it, which keeps chunk sizes close to the average. No cut is looked for in the
+# first min_size bytes of a chunk, and max_size forces one.
+#
+# The gear hash shifts left by one bit per byte, so after 64 bytes it is the
+# sum of gear[b] << k over the last 64 bytes and nothing else. With numpy that
+# sum is built for a whole block of positions at once, in six shift-and-add
+# passes, which searches for cut points an order of magnitude faster than
+# the byte-at-a-time loop in cut_point(). Both find the same boundaries;
+# without numpy the loop is used.
+
+_MASK64 = (1 << 64) - 1
+
+# Positions hashed per numpy pass; a cut usually comes within a few blocks.
+BLOCK_SIZE = 16 * 1024
+
+_np = False  # not imported yet
+
+
+def _numpy():
+    """numpy, imported on first use to keep it off the startup path, or None if it is not installed."""
+    global _np
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np = numpy
+    return _np
+
+
+def gear_table(key):
+    """The 256 gear values, derived from key so boundaries reveal nothing about content to anyone without it."""
+    return [int.from_bytes(hashlib.blake2b(bytes([i]), digest_size=8, key=key).digest(), "big")
+            for i in range(256)]
+
+
+def _masks(avg_size):
+    # Cut conditions test the high bits, which depend on the last 64 bytes; the
+    # low bits of a left-shifting gear hash only depend on the last few.
+    bits = avg_size.bit_length() - 1
+    return (((1 << (bits + 1)) - 1) << (63 - bits)) & _MASK64, ((1 << (bits - 1)) - 1) << (65 - bits)
+
+
+def cut_point(data, gear, min_size, avg_size, max_size, masks):
+    """Length of the first chunk of data: up to its first cut point, max_size, or all of data if shorter."""
+    length = len(data)
+    if length <= min_size:
+        return length
+    mask_strict, mask_loose = masks
+    normal = min(avg_size, length)
+    end = min(max_size, length)
+    mask64 = _MASK64
+    h = 0
+    for position, byte in enumerate(data[min_size:normal], min_size + 1):
+        h = ((h << 1) + gear[byte]) & mask64
+        if not h & mask_strict:
+            return position
+    for position, byte in enumerate(data[normal:end], normal + 1):
+        h = ((h << 1) + gear[byte]) & mask64
+        if not h & mask_loose:
+            return position
+    return end
+
+
+def _window_hashes(np, values):
+    """Gear hash at each position of a block, given gear values of its bytes and the 63 before it."""
+    hashes = values.copy()
+    for shift in (1, 2, 4, 8, 16, 32):
+        hashes[shift:] += hashes[:-shift] << np.uint64(shift)
+    return hashes
+
+
+def cut_point_vectorised(data, gear, min_size, avg_size, max_size, masks, np):
+    """cut_point() computed a block at a time with numpy; gear is the table as a uint64 array."""
+    length = len(data)
+    if length <= min_size:
+        return length
+    mask_strict, mask_loose = (np.uint64(mask) for mask in masks)
+    normal = min(avg_size, length)
+    end = min(max_size, length)
+    for first, last, mask in ((min_size, normal, mask_strict), (normal, end, mask_loose)):
+        for start in range(first, last, BLOCK_SIZE):
+            stop = min(start + BLOCK_SIZE, last)
+            # The hash starts afresh at min_size, so no byte before it is part of the window.
+            context = max(min_size, start - 63)
+            values = gear[np.frombuffer(data[context:stop], dtype=np.uint8)]
+            hits = np.flatnonzero((_window_hashes(np, values)[start - context:] & mask) == 0)
+            if hits.size:
+                return start + int(hits[0]) + 1
+    return end
+
+
+def chunks(stream, gear, min_size=16 * 1024, avg_size=64 * 1024, max_size=256 * 1024):
+    """Yield the content-defined chunks of a binary stream; an empty stream yields one empty chunk.
+
+    Only a few times max_size bytes of the stream are held at once, whatever its length.
+    """
+    masks = _masks(avg_size)
+    np = _numpy()
+    if np is not None:
+        gear_values = np.array(gear, dtype=np.uint64)
+    read_size = 4 * max_size
+    buffer, offset, eof = b"", 0, False
+    empty = True
+    while True:
+        if not eof and len(buffer) - offset < max_size:
+            more = stream.read(read_size)
+            eof = not more
+            buffer, offset = buffer[offset:] + more, 0
+        if offset == len(buffer):
+            if empty:
+                yield b""
+            return
+        view = memoryview(buffer)[offset:offset + max_size]
+        if np is None:
+            length = cut_point(view, gear, min_size, avg_size, max_size, masks)
+        else:
+            length = cut_point_vectorised(view, gear_values, min_size, avg_size, max_size, masks, np)
+        yield bytes(view[:length])
+        offset += length
+        empty = False
@@ -1,6 +1,9 @@
 COLORS = {
     "background": "#F8FAFC",  # Softer white for light mode
     "dark_bg": "#121826",     # Charcoal for dark mode
+    "dark_card_bg": "#1F2937",  # Slate for cards and tables in dark mode
+    "dark_table_alt": "#273449",  # Alternate row color in dark mode
+    "dark_border": "#374151",   # Border color in dark mode
     "card_bg": "#FFFFFF",     # Pure white for cards
     "table_bg": "#F9FAFB",    # Soft gray for tables
     "table_alt": "#E5E7EB",   # Alternate row color
@@ -52,4 +55,36 @@ FONTS = {
     "chart_label": ("Poppins", 12, "medium"),
     "notification": ("Poppins", 13, "medium"),
     "breadcrumb": ("Poppins", 14, "normal"),
-}
\ No newline at end of file
+}
+# Dashboard frames built on demand (see frame_registry.py).
+FRAME_REGISTRY_CONFIG = {
+    "max_widgets": None,  # evict least recently shown feature frames above this many widgets; None keeps all
+}
+
+# Rendered images (see assets.py).
+ASSET_CONFIG = {
+    "cache_dir": "asset_cache",  # resized PNGs kept between runs
+}
+
+FILE_VAULT_CONFIG = {
+    # Content-defined chunk sizes: smaller chunks find more duplicates, larger ones mean fewer rows
+    "min_chunk": 16 * 1024,
+    "avg_chunk": 64 * 1024,
+    "max_chunk": 256 * 1024,
+    # Codec for new chunks before encryption: "zlib", "lzma" (smaller, several times slower) or "none"
+    "compression": "zlib",
+    "compression_level": 6,
+}
+
+# Bulk uploads (see upload_queue.py).
+UPLOAD_QUEUE_CONFIG = {
+    "workers": 3,  # files uploaded at once; each holds a pooled connection while it runs
+    "batch_files": 16,  # small files committed together in one transaction, at most this many
+    "batch_bytes": 1024 * 1024,  # and at most this much; larger files get a transaction each
+    "max_bytes_per_second": 8 * 1024 * 1024,  # cap on what uploads send to the database together; None for no cap
+}
+
+KEYRING_CONFIG = {
+    "scrypt_n": 2 ** 15,  # scrypt cost for deriving each user's key-encryption key at login (32 MiB, ~0.1 s)
+    "cache_size": 1024,  # unwrapped data keys kept in memory, least recently used evicted first
+}
@@ -0,0 +1,43 @@
+import importlib.util
+import logging
+import sys
+
+# Third-party packages, by import name, with the name to pip install them by.
+# Presence is checked with find_spec, which locates a package without
+# importing it, so the check costs nothing on the startup path; the packages
+# themselves are imported where they are first used.
+REQUIRED = {
+    "mysql.connector": "mysql-connector-python",
+    "bcrypt": "bcrypt",
+    "cryptography": "cryptography",
+}
+
+# Missing optional packages only disable a feature.
+OPTIONAL = {
+    "PIL": ("Pillow", "logo and avatar images and dialog gradients"),
+    "qrcode": ("qrcode", "QR code images"),
+    "numpy": ("numpy", "fast chunk boundary searches for vault uploads"),
+}
+
+
+def _installed(module):
+    try:
+        return importlib.util.find_spec(module) is not None
+    except ModuleNotFoundError:
+        # find_spec imports the parent package of a dotted name, which may itself be missing.
+        return False
+
+
+def missing_required():
+    return [package for module, package in REQUIRED.items() if not _installed(module)]
+
+
+def require():
+    """Exit with install instructions if a required package is missing; warn about optional ones."""
+    missing = missing_required()
+    if missing:
+        sys.exit(f"PassVault cannot start: missing package(s) {', '.join(missing)}.\n"
+                 f"Install them with: {sys.executable} -m pip install {' '.join(missing)}")
+    for module, (package, feature) in OPTIONAL.items():
+        if not _installed(module):
+            logging.warning(f"{package} is not installed; {feature} are disabled.")
@@ -0,0 +1,69 @@
+import mysql.connector
+import audit_retention
+import migrations
+import sqlite_backend
+import sqlite_schema
+
+# The few places where the storage engines differ. Every pooled connection
+# carries its pool's dialect as db.dialect.
+
+
+class MySQLDialect:
+    name = "mysql"
+    concurrent_writes = True
+
+    def call_procedure(self, db, name, params):
+        sql = f"CALL {name}({', '.join(['%s'] * len(params))})"
+        db.prepared_cursor(sql).execute(sql, params)
+
+    def hours_ago(self, hours):
+        return f"NOW() - INTERVAL {int(hours)} HOUR"
+
+    def replica_lag(self, db):
+        """Seconds the replica is behind its source, 0 for a standalone copy, None if replication is stopped."""
+        cursor = db.cursor()
+        try:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except mysql.connector.ProgrammingError:
+                cursor.execute("SHOW SLAVE STATUS")  # servers before 8.0.22
+            row = cursor.fetchone()
+            if row is None:
+                return 0.0
+            status = dict(zip([column[0] for column in cursor.description], row))
+            lag = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+            return None if lag is None else float(lag)
+        finally:
+            cursor.close()
+
+    def migrate(self, db):
+        return migrations.migrate(db)
+
+    def maintain_audit_logs(self, db, **retention):
+        return audit_retention.maintain_partitions(db, **retention)
+
+
+class SQLiteDialect:
+    name = "sqlite"
+    concurrent_writes = False  # one write transaction holds the whole database file at a time
+
+    def call_procedure(self, db, name, params):
+        sqlite_backend.call_procedure(db, name, params)
+
+    def hours_ago(self, hours):
+        return f"datetime('now', 'localtime', '-{int(hours)} hours')"
+
+    def replica_lag(self, db):
+        # A replica here is a copied database file; there is no replication stream to measure.
+        return 0.0
+
+    def migrate(self, db):
+        return sqlite_schema.migrate(db)
+
+    def maintain_audit_logs(self, db, **retention):
+        return audit_retention.purge_expired(db, **retention)
+
+
+MYSQL = MySQLDialect()
+SQLITE = SQLiteDialect()
+DIALECTS = {dialect.name: dialect for dialect in (MYSQL, SQLITE)}
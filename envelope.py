@@ -0,0 +1,165 @@
+import os
+import threading
+from collections import OrderedDict
+
+# Envelope encryption for the file vault. Each user has a key-encryption key
+# (KEK) derived from their password with scrypt when they log in, and held in
+# memory only until they log out. What actually seals data are random data
+# keys, stored in vault_keys wrapped by the KEK (AES key wrap, RFC 3394); the
+# user's index key, which keys chunk digests and boundaries, is wrapped the
+# same way in user_keys. Changing the KEK therefore re-wraps 40 bytes per key
+# and leaves the ciphertext those keys protect untouched.
+#
+# Unwrapped data keys are kept in a bounded least-recently-used cache, and a
+# user's are dropped when they log out.
+
+
+class KeyUnavailable(Exception):
+    """A key that cannot be used: the user is not logged in, or it does not unwrap."""
+
+
+class KeyRing:
+    """Unwrapped keys for the logged-in users, backed by the wrapped keys in the database.
+
+    unlock() and rotate() register their in-memory changes to run when the
+    caller's transaction commits, so a rolled-back unit of work leaves the
+    ring as it was.
+    """
+
+    def __init__(self, repos, scrypt_n=2 ** 15, cache_size=1024):
+        self.repos = repos
+        self.scrypt_n = scrypt_n
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._keks = {}
+        self._index_keys = {}
+        self._data_keys = OrderedDict()  # (user_id, key_id) -> key, least recently used first
+        self._counters = {"unlocks": 0, "rotations": 0, "keys_created": 0, "keys_rewrapped": 0, "hits": 0,
+                          "unwraps": 0, "evictions": 0}
+
+    @staticmethod
+    def _derive(password, salt, n):
+        from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
+        return Scrypt(salt=salt, length=32, n=n, r=8, p=1).derive(password.encode("utf-8"))
+
+    @staticmethod
+    def _unwrap(kek, wrapped):
+        from cryptography.hazmat.primitives.keywrap import InvalidUnwrap, aes_key_unwrap
+        try:
+            return aes_key_unwrap(kek, bytes(wrapped))
+        except InvalidUnwrap:
+            raise KeyUnavailable("A stored key does not unwrap with this password.") from None
+
+    @staticmethod
+    def _wrap(kek, key):
+        from cryptography.hazmat.primitives.keywrap import aes_key_wrap
+        return aes_key_wrap(kek, key)
+
+    def unlock(self, user_id, password, db):
+        """Derive user_id's KEK from their password, creating their keys on first use."""
+        row = self.repos.keys.user_key(user_id, db=db)
+        if row is None:
+            salt = os.urandom(16)
+            kek = self._derive(password, salt, self.scrypt_n)
+            index_key = os.urandom(32)
+            self.repos.keys.create_user_key(user_id, salt, self.scrypt_n, self._wrap(kek, index_key), db=db)
+        else:
+            salt, n, wrapped_index_key = row
+            kek = self._derive(password, bytes(salt), n)
+            index_key = self._unwrap(kek, wrapped_index_key)
+        db.after_commit(lambda: self._install(user_id, kek, index_key, "unlocks"))
+
+    def lock(self, user_id):
+        """Forget user_id's KEK, index key and cached data keys."""
+        with self._lock:
+            self._keks.pop(user_id, None)
+            self._index_keys.pop(user_id, None)
+            for cached in [cached for cached in self._data_keys if cached[0] == user_id]:
+                del self._data_keys[cached]
+
+    def rotate(self, user_id, password, new_password, db):
+        """Re-wrap user_id's keys under a KEK derived from new_password; returns how many data keys were re-wrapped."""
+        row = self.repos.keys.user_key(user_id, db=db)
+        if row is None:
+            return 0
+        salt, n, wrapped_index_key = row
+        old_kek = self._derive(password, bytes(salt), n)
+        index_key = self._unwrap(old_kek, wrapped_index_key)
+        new_salt = os.urandom(16)
+        new_kek = self._derive(new_password, new_salt, self.scrypt_n)
+        self.repos.keys.update_user_key(user_id, new_salt, self.scrypt_n, self._wrap(new_kek, index_key), db=db)
+        data_keys = self.repos.keys.data_keys(user_id, db=db)
+        for key_id, wrapped_key in data_keys:
+            self.repos.keys.update_data_key(key_id, self._wrap(new_kek, self._unwrap(old_kek, wrapped_key)), db=db)
+
+        def rotated():
+            self._install(user_id, new_kek, index_key, "rotations")
+            self._count(keys_rewrapped=len(data_keys))
+        db.after_commit(rotated)
+        return len(data_keys)
+
+    def _install(self, user_id, kek, index_key, counter):
+        with self._lock:
+            self._keks[user_id] = kek
+            self._index_keys[user_id] = index_key
+            self._counters[counter] += 1
+
+    def _kek(self, user_id):
+        with self._lock:
+            kek = self._keks.get(user_id)
+        if kek is None:
+            raise KeyUnavailable("Encryption keys are locked; log in again to unlock them.")
+        return kek
+
+    def index_key(self, user_id):
+        with self._lock:
+            index_key = self._index_keys.get(user_id)
+        if index_key is None:
+            raise KeyUnavailable("Encryption keys are locked; log in again to unlock them.")
+        return index_key
+
+    def new_data_key(self, user_id, db):
+        """(key_id, key) of a fresh data key, stored wrapped."""
+        key = os.urandom(32)
+        key_id = self.repos.keys.add_data_key(user_id, self._wrap(self._kek(user_id), key), db=db)
+        self._count(keys_created=1)
+        db.after_commit(lambda: self._cache(user_id, key_id, key))
+        return key_id, key
+
+    def data_key(self, user_id, key_id, db):
+        with self._lock:
+            key = self._data_keys.get((user_id, key_id))
+            if key is not None:
+                self._data_keys.move_to_end((user_id, key_id))
+                self._counters["hits"] += 1
+                return key
+        kek = self._kek(user_id)
+        wrapped = self.repos.keys.data_key(user_id, key_id, db=db)
+        if wrapped is None:
+            raise KeyUnavailable(f"Data key {key_id} does not exist.")
+        key = self._unwrap(kek, wrapped)
+        self._count(unwraps=1)
+        self._cache(user_id, key_id, key)
+        return key
+
+    def _cache(self, user_id, key_id, key):
+        with self._lock:
+            if user_id not in self._keks:
+                return  # logged out meanwhile
+            self._data_keys[(user_id, key_id)] = key
+            self._data_keys.move_to_end((user_id, key_id))
+            while len(self._data_keys) > self.cache_size:
+                self._data_keys.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self._counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot["unlocked_users"] = len(self._keks)
+            snapshot["cached_keys"] = len(self._data_keys)
+            return snapshot
@@ -1,10 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
-import mysql.connector
 from datetime import datetime
 from constants import COLORS, FONTS
-from utils import truncate_text, show_loading, hide_loading
+from utils import truncate_text
+from virtual_table import VirtualTable
 
 def create_activity_history_frame(parent, app):
     frame = tk.Frame(parent, bg=COLORS["background"])
@@ -46,123 +46,75 @@ def create_activity_history_frame(parent, app):
     tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
     columns = ("ID", "Table", "Action", "Record ID", "Change Details", "Timestamp")
-    tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
-    tree.heading("ID", text="ID")
-    tree.heading("Table", text="Table")
-    tree.heading("Action", text="Action")
-    tree.heading("Record ID", text="Record ID")
-    tree.heading("Change Details", text="Change Details")
-    tree.heading("Timestamp", text="Timestamp")
-    tree.column("ID", width=50)
-    tree.column("Table", width=120)
-    tree.column("Action", width=80)
-    tree.column("Record ID", width=80)
-    tree.column("Change Details", width=300)
-    tree.column("Timestamp", width=150)
-
-    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-    tree.configure(yscrollcommand=scrollbar.set)
-    tree.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
+    table = VirtualTable(tree_frame, app, columns,
+                         fetch=lambda **params: app.executor.run(
+                             "load_activity_history", lambda db: app.repos.audit.list(db=db, **params)),
+                         key=lambda log: (log[5], log[0]), descending=True,
+                         format_row=lambda log: (
+                             log[0],
+                             truncate_text(log[1]),
+                             log[2],
+                             log[3],
+                             truncate_text(str(log[4]), 50),
+                             log[5]
+                         ),
+                         owner=frame, on_error=lambda e: load_failed(e), height=15)
+    table.pack(fill="both", expand=True)
+    table.heading("ID", text="ID")
+    table.heading("Table", text="Table")
+    table.heading("Action", text="Action")
+    table.heading("Record ID", text="Record ID")
+    table.heading("Change Details", text="Change Details")
+    table.heading("Timestamp", text="Timestamp")
+    table.column("ID", width=50)
+    table.column("Table", width=120)
+    table.column("Action", width=80)
+    table.column("Record ID", width=80)
+    table.column("Change Details", width=300)
+    table.column("Timestamp", width=150)
 
     def load_logs():
-        for item in tree.get_children():
-            tree.delete(item)
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(frame)
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-
-                query = """
-                    SELECT id, table_name, action, record_id, change_details, timestamp
-                    FROM audit_logs
-                    WHERE user_id = %s
-                """
-                params = [app.current_user_id]
-                conditions = []
-
-                action_type = combo_action_type.get()
-                if action_type != "All":
-                    conditions.append("action = %s")
-                    params.append(action_type)
-
-                start_date = entry_start_date.get().strip()
-                end_date = entry_end_date.get().strip()
-                try:
-                    if start_date and start_date != "YYYY-MM-DD":
-                        datetime.strptime(start_date, "%Y-%m-%d")
-                        conditions.append("timestamp >= %s")
-                        params.append(start_date)
-                    if end_date and end_date != "YYYY-MM-DD":
-                        datetime.strptime(end_date, "%Y-%m-%d")
-                        conditions.append("timestamp <= %s")
-                        params.append(end_date)
-                except ValueError:
-                    messagebox.showerror("Error", "Invalid date format (use YYYY-MM-DD).")
-                    return
-
-                if conditions:
-                    query += " AND " + " AND ".join(conditions)
-                query += " ORDER BY timestamp DESC LIMIT 50"
-
-                cursor.execute(query, params)
-                logs = cursor.fetchall()
-                for log in logs:
-                    tree.insert("", "end", values=(
-                        log[0],
-                        truncate_text(log[1]),
-                        log[2],
-                        log[3],
-                        truncate_text(str(log[4]), 50),
-                        log[5]
-                    ))
-                db.commit()
-                break
-            except mysql.connector.Error as e:
-                logging.error(f"Load logs error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    messagebox.showerror("Error", f"Failed to load activity logs after retries: {e}")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        action_type = combo_action_type.get()
+        start_date = entry_start_date.get().strip()
+        end_date = entry_end_date.get().strip()
+        if start_date == "YYYY-MM-DD":
+            start_date = ""
+        if end_date == "YYYY-MM-DD":
+            end_date = ""
+        try:
+            if start_date:
+                datetime.strptime(start_date, "%Y-%m-%d")
+            if end_date:
+                datetime.strptime(end_date, "%Y-%m-%d")
+        except ValueError:
+            messagebox.showerror("Error", "Invalid date format (use YYYY-MM-DD).")
+            return
+
+        table.reload(
+            user_id=app.current_user_id,
+            action=None if action_type == "All" else action_type,
+            start_date=start_date or None,
+            end_date=end_date or None
+        )
+
+    def load_failed(e):
+        logging.error(f"Load logs error: {e}")
+        messagebox.showerror("Error", f"Failed to load activity logs: {e}")
 
     def clear_logs():
         if messagebox.askyesno("Confirm", "Are you sure you want to clear all activity logs?"):
-            max_retries = 3
-            retry_count = 0
-            loading = show_loading(frame)
-            while retry_count < max_retries:
-                try:
-                    db = app.db_pool.get_connection()
-                    cursor = db.cursor()
-                    db.start_transaction()
-                    cursor.execute("DELETE FROM audit_logs WHERE user_id=%s", (app.current_user_id,))
-                    db.commit()
-                    load_logs()
-                    messagebox.showinfo("Success", "Activity logs cleared successfully!")
-                    break
-                except mysql.connector.Error as e:
-                    logging.error(f"Clear logs error (attempt {retry_count + 1}): {e}")
-                    if 'db' in locals():
-                        db.rollback()
-                    retry_count += 1
-                    if retry_count == max_retries:
-                        messagebox.showerror("Error", f"Failed to clear logs after retries: {e}")
-                finally:
-                    hide_loading(loading)
-                    if 'cursor' in locals():
-                        cursor.close()
-                    if 'db' in locals():
-                        db.close()
+            user_id = app.current_user_id
+
+            def done(cleared):
+                table.clear()
+                messagebox.showinfo("Success", "Activity logs cleared successfully!")
+
+            def failed(e):
+                logging.error(f"Clear logs error: {e}")
+                messagebox.showerror("Error", f"Failed to clear logs: {e}")
+
+            app.tasks.submit(lambda: app.executor.run(
+                "clear_activity_history", lambda db: app.repos.audit.clear(user_id, db=db), write=True
+            ), done, failed, loading=frame)
 
     return frame
\ No newline at end of file
@@ -1,9 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
-from datetime import datetime
 from constants import COLORS, FONTS
-from utils import truncate_text, show_loading, hide_loading
+from utils import truncate_text
+from virtual_table import VirtualTable
 
 def create_connected_devices_frame(parent, app):
     frame = tk.Frame(parent, bg=COLORS["background"])
@@ -40,47 +40,40 @@ def create_connected_devices_frame(parent, app):
                           highlightbackground=COLORS["border"])
     tree_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-    tree = ttk.Treeview(tree_frame, columns=("Device Name", "Device Type", "Status", "Last Seen", "Created At", "Updated At"), show="headings",
-                        style="Treeview")
-    tree.heading("Device Name", text="Device Name")
-    tree.heading("Device Type", text="Device Type")
-    tree.heading("Status", text="Status")
-    tree.heading("Last Seen", text="Last Seen")
-    tree.heading("Created At", text="Created At")
-    tree.heading("Updated At", text="Updated At")
-    tree.column("Device Name", width=150)
-    tree.column("Device Type", width=150)
-    tree.column("Status", width=150)
-    tree.column("Last Seen", width=150)
-    tree.column("Created At", width=150)
-    tree.column("Updated At", width=150)
-
-    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-    tree.configure(yscrollcommand=scrollbar.set)
-    tree.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    def on_row_select(event):
-        selected_item = tree.selection()
-        if selected_item:
-            item = tree.item(selected_item)
-            entry_device_name.delete(0, tk.END)
-            entry_device_name.insert(0, item["values"][0])
-            entry_device_type.delete(0, tk.END)
-            entry_device_type.insert(0, item["values"][1])
-            entry_status.delete(0, tk.END)
-            entry_status.insert(0, item["values"][2])
-
-    tree.bind("<<TreeviewSelect>>", on_row_select)
-
-    def alternate_row_colors():
-        for i, item in enumerate(tree.get_children()):
-            if i % 2 == 0:
-                tree.item(item, tags=("even",))
-            else:
-                tree.item(item, tags=("odd",))
-        tree.tag_configure("even", background=COLORS["table_bg"])
-        tree.tag_configure("odd", background=COLORS["table_alt"])
+    table = VirtualTable(tree_frame, app, ("Device Name", "Device Type", "Status", "Last Seen", "Created At", "Updated At"),
+                         fetch=lambda **params: app.executor.run(
+                             "load_devices", lambda db: app.repos.devices.list(db=db, **params)),
+                         key=lambda row: (row[0], row[6]),
+                         format_row=lambda row: (
+                             truncate_text(row[0]),
+                             truncate_text(row[1]),
+                             truncate_text(row[2]),
+                             truncate_text(str(row[3])),
+                             truncate_text(str(row[4])),
+                             truncate_text(str(row[5]))
+                         ),
+                         owner=frame, on_select=lambda row: on_row_select(row), on_error=lambda e: load_failed(e))
+    table.pack(fill="both", expand=True)
+    table.heading("Device Name", text="Device Name")
+    table.heading("Device Type", text="Device Type")
+    table.heading("Status", text="Status")
+    table.heading("Last Seen", text="Last Seen")
+    table.heading("Created At", text="Created At")
+    table.heading("Updated At", text="Updated At")
+    table.column("Device Name", width=150)
+    table.column("Device Type", width=150)
+    table.column("Status", width=150)
+    table.column("Last Seen", width=150)
+    table.column("Created At", width=150)
+    table.column("Updated At", width=150)
+
+    def on_row_select(row):
+        entry_device_name.delete(0, tk.END)
+        entry_device_name.insert(0, row[0])
+        entry_device_type.delete(0, tk.END)
+        entry_device_type.insert(0, row[1] or "")
+        entry_status.delete(0, tk.END)
+        entry_status.insert(0, row[2] or "")
 
     def add_device():
         device_name = entry_device_name.get().strip()
@@ -91,89 +84,50 @@ def create_connected_devices_frame(parent, app):
             messagebox.showerror("Error", "Device Name and Device Type are required.")
             return
 
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        loading = show_loading(frame)
-        try:
-            db = app.db_pool.get_connection()
-            cursor = db.cursor()
-            cursor.execute(
-                "INSERT INTO connected_devices (user_id, device_name, device_type, status, last_seen, created_at, updated_at) "
-                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
-                (app.current_user_id, device_name, device_type, status, current_time, current_time, current_time)
-            )
-            db.commit()
-            load_devices()
+        user_id = app.current_user_id
+
+        def done(row):
+            table.upsert(row)
             entry_device_name.delete(0, tk.END)
             entry_device_type.delete(0, tk.END)
             entry_status.delete(0, tk.END)
             messagebox.showinfo("Success", "Device added successfully!")
-        except Exception as e:
+
+        def failed(e):
             logging.error(f"Add device error: {e}")
             messagebox.showerror("Error", "Failed to add device.")
-        finally:
-            hide_loading(loading)
-            if 'db' in locals():
-                db.close()
+
+        app.tasks.submit(lambda: app.repos.devices.add(user_id, device_name, device_type, status),
+                         done, failed, loading=frame)
 
     def delete_record():
-        selected_item = tree.selection()
-        if not selected_item:
+        row = table.selected_row()
+        if row is None:
             messagebox.showerror("Error", "Please select a device to delete.")
             return
 
-        device_name = tree.item(selected_item)["values"][0]
+        device_name, device_id = row[0], row[6]
         if messagebox.askyesno("Confirm", f"Are you sure you want to delete device '{device_name}'?"):
-            loading = show_loading(frame)
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                cursor.execute(
-                    "DELETE FROM connected_devices WHERE user_id=%s AND device_name=%s",
-                    (app.current_user_id, device_name)
-                )
-                db.commit()
-                load_devices()
+            user_id = app.current_user_id
+
+            def done(deleted):
+                table.remove(device_id)
                 entry_device_name.delete(0, tk.END)
                 entry_device_type.delete(0, tk.END)
                 entry_status.delete(0, tk.END)
                 messagebox.showinfo("Success", "Device deleted successfully!")
-            except Exception as e:
+
+            def failed(e):
                 logging.error(f"Delete device error: {e}")
                 messagebox.showerror("Error", "Failed to delete device.")
-            finally:
-                hide_loading(loading)
-                if 'db' in locals():
-                    db.close()
+
+            app.tasks.submit(lambda: app.repos.devices.delete(user_id, device_id), done, failed, loading=frame)
 
     def load_devices():
-        for item in tree.get_children():
-            tree.delete(item)
-        loading = show_loading(frame)
-        try:
-            db = app.db_pool.get_connection()
-            cursor = db.cursor()
-            cursor.execute(
-                "SELECT device_name, device_type, status, last_seen, created_at, updated_at "
-                "FROM connected_devices WHERE user_id=%s",
-                (app.current_user_id,)
-            )
-            for row in cursor.fetchall():
-                tree.insert("", "end", values=(
-                    truncate_text(row[0]),
-                    truncate_text(row[1]),
-                    truncate_text(row[2]),
-                    truncate_text(str(row[3])),
-                    truncate_text(str(row[4])),
-                    truncate_text(str(row[5]))
-                ))
-            alternate_row_colors()
-        except Exception as e:
-            logging.error(f"Load devices error: {e}")
-            messagebox.showerror("Error", "Failed to load devices.")
-        finally:
-            hide_loading(loading)
-            if 'db' in locals():
-                db.close()
+        table.reload(user_id=app.current_user_id)
+
+    def load_failed(e):
+        logging.error(f"Load devices error: {e}")
+        messagebox.showerror("Error", "Failed to load devices.")
 
     return frame
\ No newline at end of file
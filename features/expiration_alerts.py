@@ -1,9 +1,9 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import messagebox
 import logging
-from datetime import datetime, timedelta
 from constants import COLORS, FONTS
-from utils import truncate_text, show_loading, hide_loading
+from utils import truncate_text
+from virtual_table import VirtualTable
 
 def create_expiration_alerts_frame(parent, app):
     frame = tk.Frame(parent, bg=COLORS["background"])
@@ -25,124 +25,64 @@ def create_expiration_alerts_frame(parent, app):
                           highlightbackground=COLORS["border"])
     tree_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-    tree = ttk.Treeview(tree_frame, columns=("Service", "Expiration Date", "Status", "Password ID", "Created At", "Updated At"), show="headings",
-                        style="Treeview")
-    tree.heading("Service", text="Service")
-    tree.heading("Expiration Date", text="Expiration Date")
-    tree.heading("Status", text="Status")
-    tree.heading("Password ID", text="Password ID")
-    tree.heading("Created At", text="Created At")
-    tree.heading("Updated At", text="Updated At")
-    tree.column("Service", width=150)
-    tree.column("Expiration Date", width=150)
-    tree.column("Status", width=150)
-    tree.column("Password ID", width=100)
-    tree.column("Created At", width=150)
-    tree.column("Updated At", width=150)
-
-    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-    tree.configure(yscrollcommand=scrollbar.set)
-    tree.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    def alternate_row_colors():
-        for i, item in enumerate(tree.get_children()):
-            if i % 2 == 0:
-                tree.item(item, tags=("even",))
-            else:
-                tree.item(item, tags=("odd",))
-        tree.tag_configure("even", background=COLORS["table_bg"])
-        tree.tag_configure("odd", background=COLORS["table_alt"])
+    def fetch_alerts(user_id, after=None, limit=None):
+        # Bring the alerts up to date before the first page; later pages just continue the listing.
+        if after is None:
+            app.executor.run("refresh_expiration_alerts",
+                             lambda db: app.repos.alerts.refresh(user_id, db=db), write=True)
+        return app.executor.run("load_expiration_alerts",
+                                lambda db: app.repos.alerts.list(user_id, after=after, limit=limit, db=db))
+
+    table = VirtualTable(tree_frame, app, ("Service", "Expiration Date", "Status", "Password ID", "Created At", "Updated At"),
+                         fetch=fetch_alerts, key=lambda row: (row[3],),
+                         format_row=lambda row: (
+                             truncate_text(row[0]),
+                             truncate_text(str(row[1])),
+                             truncate_text(row[2]),
+                             truncate_text(str(row[3])),
+                             truncate_text(str(row[4])),
+                             truncate_text(str(row[5]))
+                         ),
+                         owner=frame, on_error=lambda e: load_failed(e))
+    table.pack(fill="both", expand=True)
+    table.heading("Service", text="Service")
+    table.heading("Expiration Date", text="Expiration Date")
+    table.heading("Status", text="Status")
+    table.heading("Password ID", text="Password ID")
+    table.heading("Created At", text="Created At")
+    table.heading("Updated At", text="Updated At")
+    table.column("Service", width=150)
+    table.column("Expiration Date", width=150)
+    table.column("Status", width=150)
+    table.column("Password ID", width=100)
+    table.column("Created At", width=150)
+    table.column("Updated At", width=150)
 
     def delete_record():
-        selected_item = tree.selection()
-        if not selected_item:
+        row = table.selected_row()
+        if row is None:
             messagebox.showerror("Error", "Please select an alert to delete.")
             return
 
-        password_id = tree.item(selected_item)["values"][3]
-        service = tree.item(selected_item)["values"][0]
+        service, password_id = row[0], row[3]
         if messagebox.askyesno("Confirm", f"Are you sure you want to delete the alert for '{service}'?"):
-            loading = show_loading(frame)
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                cursor.execute(
-                    "DELETE FROM expiration_alerts WHERE user_id=%s AND password_id=%s",
-                    (app.current_user_id, password_id)
-                )
-                db.commit()
-                load_alerts()
+            user_id = app.current_user_id
+
+            def done(deleted):
+                table.remove(password_id)
                 messagebox.showinfo("Success", "Alert deleted successfully!")
-            except Exception as e:
+
+            def failed(e):
                 logging.error(f"Delete alert error: {e}")
                 messagebox.showerror("Error", "Failed to delete alert.")
-            finally:
-                hide_loading(loading)
-                if 'db' in locals():
-                    db.close()
+
+            app.tasks.submit(lambda: app.repos.alerts.delete(user_id, password_id), done, failed, loading=frame)
 
     def load_alerts():
-        for item in tree.get_children():
-            tree.delete(item)
-        loading = show_loading(frame)
-        try:
-            db = app.db_pool.get_connection()
-            cursor = db.cursor()
-
-            # Clear existing alerts
-            cursor.execute("DELETE FROM expiration_alerts WHERE user_id=%s", (app.current_user_id,))
-
-            # Check passwords table for expiration status
-            cursor.execute(
-                "SELECT id, service, expiration_date FROM passwords WHERE user_id=%s AND expiration_date IS NOT NULL",
-                (app.current_user_id,)
-            )
-            current_time = datetime.now()
-            threshold = current_time + timedelta(days=7)
-
-            for row in cursor.fetchall():
-                password_id, service, exp_date = row
-                exp_date = datetime.strptime(str(exp_date), "%Y-%m-%d")
-                if exp_date < current_time:
-                    status = "Expired"
-                elif exp_date <= threshold:
-                    status = "Expiring Soon"
-                else:
-                    continue  # Skip passwords not nearing expiration
-
-                updated_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
-                cursor.execute(
-                    "INSERT INTO expiration_alerts (user_id, password_id, service, expiration_date, status, created_at, updated_at) "
-                    "VALUES (%s, %s, %s, %s, %s, %s, %s)",
-                    (app.current_user_id, password_id, service, exp_date, status, updated_time, updated_time)
-                )
-                # Notification is now handled by DB trigger, so no need to insert here
-
-            db.commit()
-
-            # Load alerts into table
-            cursor.execute(
-                "SELECT service, expiration_date, status, password_id, created_at, updated_at "
-                "FROM expiration_alerts WHERE user_id=%s",
-                (app.current_user_id,)
-            )
-            for row in cursor.fetchall():
-                tree.insert("", "end", values=(
-                    truncate_text(row[0]),
-                    truncate_text(str(row[1])),
-                    truncate_text(row[2]),
-                    truncate_text(str(row[3])),
-                    truncate_text(str(row[4])),
-                    truncate_text(str(row[5]))
-                ))
-            alternate_row_colors()
-        except Exception as e:
-            logging.error(f"Load alerts error: {e}")
-            messagebox.showerror("Error", "Failed to load alerts.")
-        finally:
-            hide_loading(loading)
-            if 'db' in locals():
-                db.close()
+        table.reload(user_id=app.current_user_id)
+
+    def load_failed(e):
+        logging.error(f"Load alerts error: {e}")
+        messagebox.showerror("Error", "Failed to load alerts.")
 
     return frame
\ No newline at end of file
@@ -3,18 +3,17 @@ from tkinter import ttk, messagebox, filedialog
 import logging
 from datetime import datetime
 import os
-import mysql.connector
-from cryptography.fernet import Fernet
+import time
 from constants import COLORS, FONTS
-from utils import truncate_text, show_loading, hide_loading
+from utils import truncate_text
+from virtual_table import VirtualTable
+
+UPLOAD_ROWS = 6  # files shown with their own progress bar; the rest are counted in the summary line
+UPLOAD_POLL_MS = 100
 
 def create_file_manager_frame(parent, app):
     frame = tk.Frame(parent, bg=COLORS["background"])
-    frame.load = lambda: load_files()
-
-    # Generate encryption key (in production, store per user securely)
-    encryption_key = Fernet.generate_key()
-    cipher = Fernet(encryption_key)
+    frame.load = lambda: load()
 
     content = tk.Frame(frame, bg=COLORS["card_bg"], bd=0, highlightthickness=2, highlightbackground=COLORS["border"])
     content.pack(pady=60, padx=60, fill="both", expand=True)
@@ -26,15 +25,11 @@ def create_file_manager_frame(parent, app):
     input_frame = tk.Frame(content, bg=COLORS["card_bg"])
     input_frame.pack(pady=20, padx=20, fill="x")
 
-    tk.Label(input_frame, text="File", font=FONTS["small"], bg=COLORS["card_bg"]).pack(side="left", padx=10)
-    entry_file = ttk.Entry(input_frame, width=30)
-    entry_file.pack(side="left", padx=10)
+    tk.Button(input_frame, text="Upload Files", bg=COLORS["primary"], fg=COLORS["dark_fg"],
+              font=FONTS["button"], command=lambda: upload_files(), relief="flat").pack(side="left", padx=20)
 
-    tk.Button(input_frame, text="Browse", bg=COLORS["secondary"], fg=COLORS["dark_fg"],
-              font=FONTS["button"], command=lambda: browse_file(), relief="flat").pack(side="left", padx=10)
-
-    tk.Button(input_frame, text="Upload File", bg=COLORS["primary"], fg=COLORS["dark_fg"],
-              font=FONTS["button"], command=lambda: upload_file(), relief="flat").pack(side="left", padx=20)
+    tk.Button(input_frame, text="Upload Folder", bg=COLORS["primary"], fg=COLORS["dark_fg"],
+              font=FONTS["button"], command=lambda: upload_folder(), relief="flat").pack(side="left", padx=20)
 
     tk.Button(input_frame, text="Download File", bg=COLORS["primary"], fg=COLORS["dark_fg"],
               font=FONTS["button"], command=lambda: download_file(), relief="flat").pack(side="left", padx=20)
@@ -42,215 +37,213 @@ def create_file_manager_frame(parent, app):
     tk.Button(input_frame, text="Delete File", bg=COLORS["danger"], fg=COLORS["dark_fg"],
               font=FONTS["button"], command=lambda: delete_file(), relief="flat").pack(side="left", padx=20)
 
+    # Shown while uploads run: a row per file being uploaded or next in line, and a summary of the rest.
+    upload_frame = tk.Frame(content, bg=COLORS["card_bg"])
+    upload_header = tk.Frame(upload_frame, bg=COLORS["card_bg"])
+    upload_header.pack(fill="x")
+    upload_status = tk.Label(upload_header, font=FONTS["small"], bg=COLORS["card_bg"], anchor="w")
+    upload_status.pack(side="left", fill="x", expand=True)
+    tk.Button(upload_header, text="Cancel Uploads", bg=COLORS["danger"], fg=COLORS["dark_fg"],
+              font=FONTS["button"], command=lambda: app.uploads.cancel(batch["jobs"]),
+              relief="flat").pack(side="right")
+    upload_rows = []
+    for _ in range(UPLOAD_ROWS):
+        row = tk.Frame(upload_frame, bg=COLORS["card_bg"])
+        name = tk.Label(row, width=40, font=FONTS["small"], bg=COLORS["card_bg"], anchor="w")
+        name.pack(side="left")
+        bar = ttk.Progressbar(row, length=300, maximum=100)
+        bar.pack(side="left", padx=10)
+        percent = tk.Label(row, width=8, font=FONTS["small"], bg=COLORS["card_bg"], anchor="w")
+        percent.pack(side="left")
+        upload_rows.append((row, name, bar, percent))
+    # The jobs live on the app, so a frame evicted mid-upload and rebuilt picks them up again.
+    batch = app.upload_jobs
+    uploads = {"shown": set(), "poll": None}
+
     tree_frame = tk.Frame(content, bg=COLORS["card_bg"], bd=0, highlightthickness=2, highlightbackground=COLORS["border"])
     tree_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
     columns = ("ID", "File Name", "File Size", "Created At", "Updated At")
-    tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=15)
-    tree.heading("ID", text="ID")
-    tree.heading("File Name", text="File Name")
-    tree.heading("File Size", text="File Size (Bytes)")
-    tree.heading("Created At", text="Created At")
-    tree.heading("Updated At", text="Updated At")
-    tree.column("ID", width=50)
-    tree.column("File Name", width=200)
-    tree.column("File Size", width=150)
-    tree.column("Created At", width=150)
-    tree.column("Updated At", width=150)
-
-    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-    tree.configure(yscrollcommand=scrollbar.set)
-    tree.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    def on_row_select(event):
-        selected_item = tree.selection()
-        if selected_item:
-            item = tree.item(selected_item)
-            entry_file.delete(0, tk.END)
-            entry_file.insert(0, item["values"][1])  # File Name
-
-    tree.bind("<<TreeviewSelect>>", on_row_select)
-
-    def browse_file():
-        file_path = filedialog.askopenfilename()
-        if file_path:
-            entry_file.delete(0, tk.END)
-            entry_file.insert(0, os.path.basename(file_path))
-
-    def upload_file():
-        file_name = entry_file.get().strip()
-        if not file_name:
-            messagebox.showerror("Error", "Please select a file to upload.")
+    table = VirtualTable(tree_frame, app, columns,
+                         fetch=lambda **params: app.executor.run(
+                             "load_files", lambda db: app.repos.files.list(db=db, **params)),
+                         key=lambda file: (file[3], file[0]), descending=True,
+                         format_row=lambda file: (
+                             file[0],
+                             truncate_text(file[1]),
+                             file[2],
+                             file[3],
+                             file[4]
+                         ),
+                         owner=frame, on_error=lambda e: load_failed(e), height=15)
+    table.pack(fill="both", expand=True)
+    table.heading("ID", text="ID")
+    table.heading("File Name", text="File Name")
+    table.heading("File Size", text="File Size (Bytes)")
+    table.heading("Created At", text="Created At")
+    table.heading("Updated At", text="Updated At")
+    table.column("ID", width=50)
+    table.column("File Name", width=200)
+    table.column("File Size", width=150)
+    table.column("Created At", width=150)
+    table.column("Updated At", width=150)
+
+    def upload_files():
+        paths = filedialog.askopenfilenames()
+        if paths:
+            enqueue([(path, os.path.basename(path)) for path in paths])
+
+    def upload_folder():
+        folder = filedialog.askdirectory()
+        if not folder:
             return
-
-        file_path = filedialog.askopenfilename(initialfile=file_name)
-        if not file_path:
-            return
-
-        try:
-            with open(file_path, "rb") as f:
-                file_data = f.read()
-            encrypted_data = cipher.encrypt(file_data)
-            file_size = len(file_data)
-            max_retries = 3
-            retry_count = 0
-            loading = show_loading(frame)
-            while retry_count < max_retries:
-                try:
-                    db = app.db_pool.get_connection()
-                    cursor = db.cursor()
-                    db.start_transaction()
-                    cursor.execute("CALL AddFile(%s, %s, %s, %s)",
-                                   (app.current_user_id, file_name, encrypted_data, file_size))
-                    db.commit()
-                    load_files()
-                    entry_file.delete(0, tk.END)
-                    messagebox.showinfo("Success", "File uploaded successfully!")
-                    break
-                except mysql.connector.Error as e:
-                    logging.error(f"Upload file error (attempt {retry_count + 1}): {e}")
-                    if 'db' in locals():
-                        db.rollback()
-                    retry_count += 1
-                    if retry_count == max_retries:
-                        messagebox.showerror("Error", f"Failed to upload file after retries: {e}")
-                finally:
-                    hide_loading(loading)
-                    if 'cursor' in locals():
-                        cursor.close()
-                    if 'db' in locals():
-                        db.close()
-        except Exception as e:
-            logging.error(f"File read error: {e}")
-            messagebox.showerror("Error", "Failed to read file.")
+        # Stored names keep the folder's own name and the layout beneath it.
+        parent = os.path.dirname(os.path.abspath(folder))
+
+        def work():
+            return [(path, os.path.relpath(path, parent).replace(os.sep, "/"))
+                    for directory, _, names in os.walk(folder) for path in
+                    (os.path.join(directory, name) for name in sorted(names)) if os.path.isfile(path)]
+
+        def done(files):
+            if not files:
+                messagebox.showinfo("Upload Folder", "The folder has no files to upload.")
+                return
+            enqueue(files)
+
+        def failed(e):
+            logging.error(f"Folder listing error: {e}")
+            messagebox.showerror("Error", f"Failed to read folder: {e}")
+
+        app.tasks.submit(work, done, failed, loading=frame)
+
+    def enqueue(files):
+        if not batch["jobs"]:
+            batch["started"] = time.monotonic()
+        batch["jobs"].extend(app.uploads.submit(app.current_user_id, files))
+        resume_uploads()
+
+    def resume_uploads():
+        if batch["jobs"] and uploads["poll"] is None:
+            upload_frame.pack(fill="x", padx=20, before=tree_frame)
+            show_uploads()
+
+    def show_uploads():
+        if not frame.winfo_exists():
+            return  # evicted; the uploads carry on and the rebuilt frame resumes polling
+        jobs = batch["jobs"]
+        for job in jobs:
+            if job.status == "done" and job.row is not None and job not in uploads["shown"]:
+                table.upsert(job.row)
+                uploads["shown"].add(job)
+        unfinished = [job for job in jobs if not job.finished]
+        visible = sorted(unfinished, key=lambda job: job.status != "uploading")[:UPLOAD_ROWS]
+        for (row, name, bar, percent), job in zip(upload_rows, visible + [None] * UPLOAD_ROWS):
+            if job is None:
+                row.pack_forget()
+                continue
+            name.config(text=truncate_text(job.name))
+            bar["value"] = 100 * job.done / job.size if job.size else 0
+            percent.config(text="queued" if job.status == "queued" else f"{bar['value']:.0f}%")
+            row.pack(fill="x", pady=2)
+        done_bytes = sum(job.done for job in jobs)
+        elapsed = max(time.monotonic() - batch["started"], 1e-6)
+        upload_status.config(text=f"Uploading: {len(jobs) - len(unfinished)} of {len(jobs)} files done, "
+                                  f"{done_bytes / elapsed / 1024 / 1024:.1f} MB/s")
+        if unfinished:
+            # Scheduled on the root, which outlives this frame.
+            uploads["poll"] = app.root.after(UPLOAD_POLL_MS, show_uploads)
+        else:
+            uploads["poll"] = None
+            uploads_finished(jobs)
+
+    def uploads_finished(jobs):
+        batch["jobs"], uploads["shown"] = [], set()
+        upload_frame.pack_forget()
+        uploaded = [job for job in jobs if job.status == "done"]
+        failed = [job for job in jobs if job.status == "failed"]
+        cancelled = len(jobs) - len(uploaded) - len(failed)
+        for job in failed:
+            logging.error(f"Upload file error: {job.name}: {job.error}")
+        if app.current_user_id is None:
+            return  # logged out meanwhile
+        if any(job.row is None for job in uploaded):
+            load_files()  # some rows were not read back after a retried commit
+        read = sum(job.summary["bytes"] for job in uploaded if job.summary)
+        stored = sum(job.summary["bytes_stored"] for job in uploaded if job.summary)
+        message = f"{len(uploaded)} of {len(jobs)} files uploaded, {read / 1024:.1f} KB stored as {stored / 1024:.1f} KB."
+        if cancelled:
+            message += f"\n{cancelled} cancelled."
+        if failed:
+            details = "\n".join(f"{truncate_text(job.name)}: {job.error}" for job in failed[:5])
+            more = f"\n...and {len(failed) - 5} more." if len(failed) > 5 else ""
+            messagebox.showerror("Error", f"{message}\nFailed to upload {len(failed)}:\n{details}{more}")
+        elif uploaded:
+            messagebox.showinfo("Success", message)
 
     def download_file():
-        selected_item = tree.selection()
-        if not selected_item:
+        file = table.selected_row()
+        if file is None:
             messagebox.showerror("Error", "Please select a file to download.")
             return
 
-        file_id = tree.item(selected_item)["values"][0]  # ID
-        file_name = tree.item(selected_item)["values"][1]  # File Name
+        file_id, file_name = file[0], file[1]
         save_path = filedialog.asksaveasfilename(defaultextension=os.path.splitext(file_name)[1], initialfile=file_name)
         if not save_path:
             return
 
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(frame)
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("SELECT encrypted_data FROM file_vault WHERE id=%s AND user_id=%s",
-                               (file_id, app.current_user_id))
-                result = cursor.fetchone()
-                if result:
-                    encrypted_data = result[0]
-                    decrypted_data = cipher.decrypt(encrypted_data)
-                    with open(save_path, "wb") as f:
-                        f.write(decrypted_data)
-                    db.commit()
-                    messagebox.showinfo("Success", "File downloaded successfully!")
-                    break
-                else:
-                    db.rollback()
-                    messagebox.showerror("Error", "File not found or unauthorized.")
-                    break
-            except mysql.connector.Error as e:
-                logging.error(f"Download file error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    messagebox.showerror("Error", f"Failed to download file after retries: {e}")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        user_id = app.current_user_id
+
+        def work():
+            return app.executor.run("download_file", lambda db: app.vault.download(
+                user_id, file_id, save_path, db=db))
+
+        def done(found):
+            if found:
+                messagebox.showinfo("Success", "File downloaded successfully!")
+            else:
+                messagebox.showerror("Error", "File not found or unauthorized.")
+
+        def failed(e):
+            logging.error(f"Download file error: {e}")
+            messagebox.showerror("Error", f"Failed to download file: {e}")
+
+        app.tasks.submit(work, done, failed, loading=frame)
 
     def delete_file():
-        selected_item = tree.selection()
-        if not selected_item:
+        file = table.selected_row()
+        if file is None:
             messagebox.showerror("Error", "Please select a file to delete.")
             return
 
-        file_id = tree.item(selected_item)["values"][0]  # ID
-        file_name = tree.item(selected_item)["values"][1]  # File Name
+        file_id, file_name = file[0], file[1]
         if messagebox.askyesno("Confirm", f"Are you sure you want to delete file '{file_name}'?"):
-            max_retries = 3
-            retry_count = 0
-            loading = show_loading(frame)
-            while retry_count < max_retries:
-                try:
-                    db = app.db_pool.get_connection()
-                    cursor = db.cursor()
-                    db.start_transaction()
-                    cursor.execute("CALL DeleteFile(%s, %s)", (file_id, app.current_user_id))
-                    db.commit()
-                    load_files()
-                    entry_file.delete(0, tk.END)
-                    messagebox.showinfo("Success", "File deleted successfully!")
-                    break
-                except mysql.connector.Error as e:
-                    logging.error(f"Delete file error (attempt {retry_count + 1}): {e}")
-                    if 'db' in locals():
-                        db.rollback()
-                    retry_count += 1
-                    if retry_count == max_retries:
-                        messagebox.showerror("Error", f"Failed to delete file after retries: {e}")
-                finally:
-                    hide_loading(loading)
-                    if 'cursor' in locals():
-                        cursor.close()
-                    if 'db' in locals():
-                        db.close()
+            user_id = app.current_user_id
+
+            def done(deleted):
+                if not deleted:
+                    messagebox.showerror("Error", "No file found or unauthorized.")
+                    return
+                table.remove(file_id)
+                messagebox.showinfo("Success", "File deleted successfully!")
+
+            def failed(e):
+                logging.error(f"Delete file error: {e}")
+                messagebox.showerror("Error", f"Failed to delete file: {e}")
+
+            app.tasks.submit(lambda: app.executor.run(
+                "delete_file", lambda db: app.repos.files.delete(file_id, user_id, db=db), write=True
+            ), done, failed, loading=frame)
+
+    def load():
+        load_files()
+        resume_uploads()  # after an eviction, uploads started from the old frame
 
     def load_files():
-        for item in tree.get_children():
-            tree.delete(item)
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(frame)
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("""
-                    SELECT id, file_name, file_size, created_at, updated_at
-                    FROM file_vault
-                    WHERE user_id = %s
-                    ORDER BY created_at DESC
-                """, (app.current_user_id,))
-                files = cursor.fetchall()
-                for file in files:
-                    tree.insert("", "end", values=(
-                        file[0],
-                        truncate_text(file[1]),
-                        file[2],
-                        file[3],
-                        file[4]
-                    ))
-                db.commit()
-                break
-            except mysql.connector.Error as e:
-                logging.error(f"Load files error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    messagebox.showerror("Error", f"Failed to load files after retries: {e}")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        table.reload(user_id=app.current_user_id)
+
+    def load_failed(e):
+        logging.error(f"Load files error: {e}")
+        messagebox.showerror("Error", f"Failed to load files: {e}")
 
     return frame
\ No newline at end of file
@@ -4,7 +4,8 @@ import logging
 import re
 from datetime import datetime
 from constants import COLORS, FONTS
-from utils import truncate_text, show_loading, hide_loading
+from utils import truncate_text
+from virtual_table import VirtualTable
 
 def create_password_manager_frame(parent, app):
     frame = tk.Frame(parent, bg=COLORS["background"])
@@ -45,51 +46,45 @@ def create_password_manager_frame(parent, app):
                           highlightbackground=COLORS["border"])
     tree_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-    tree = ttk.Treeview(tree_frame, columns=("Service", "Username", "Password", "Expiry Date", "Strength", "Created At", "Updated At"), show="headings",
-                        style="Treeview")
-    tree.heading("Service", text="Service")
-    tree.heading("Username", text="Username")
-    tree.heading("Password", text="Password")
-    tree.heading("Expiry Date", text="Expiry Date")
-    tree.heading("Strength", text="Strength")
-    tree.heading("Created At", text="Created At")
-    tree.heading("Updated At", text="Updated At")
-    tree.column("Service", width=150)
-    tree.column("Username", width=150)
-    tree.column("Password", width=150)
-    tree.column("Expiry Date", width=150)
-    tree.column("Strength", width=100)
-    tree.column("Created At", width=150)
-    tree.column("Updated At", width=150)
-
-    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-    tree.configure(yscrollcommand=scrollbar.set)
-    tree.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    def on_row_select(event):
-        selected_item = tree.selection()
-        if selected_item:
-            item = tree.item(selected_item)
-            entry_service.delete(0, tk.END)
-            entry_service.insert(0, item["values"][0])
-            entry_username.delete(0, tk.END)
-            entry_username.insert(0, item["values"][1])
-            entry_password.delete(0, tk.END)
-            entry_password.insert(0, item["values"][2])
-            entry_expiration.delete(0, tk.END)
-            entry_expiration.insert(0, item["values"][3])
-
-    tree.bind("<<TreeviewSelect>>", on_row_select)
-
-    def alternate_row_colors():
-        for i, item in enumerate(tree.get_children()):
-            if i % 2 == 0:
-                tree.item(item, tags=("even",))
-            else:
-                tree.item(item, tags=("odd",))
-        tree.tag_configure("even", background=COLORS["table_bg"])
-        tree.tag_configure("odd", background=COLORS["table_alt"])
+    table = VirtualTable(tree_frame, app, ("Service", "Username", "Password", "Expiry Date", "Strength", "Created At", "Updated At"),
+                         fetch=lambda **params: app.executor.run(
+                             "load_passwords", lambda db: app.repos.passwords.list(db=db, **params)),
+                         key=lambda row: (row[0], row[1], row[7]),
+                         format_row=lambda row: (
+                             truncate_text(row[0]),
+                             truncate_text(row[1]),
+                             "*" * 8,
+                             truncate_text(str(row[3]) if row[3] else "N/A"),
+                             truncate_text(row[4]),
+                             truncate_text(str(row[5])),
+                             truncate_text(str(row[6]))
+                         ),
+                         owner=frame, on_select=lambda row: on_row_select(row), on_error=lambda e: load_failed(e))
+    table.pack(fill="both", expand=True)
+    table.heading("Service", text="Service")
+    table.heading("Username", text="Username")
+    table.heading("Password", text="Password")
+    table.heading("Expiry Date", text="Expiry Date")
+    table.heading("Strength", text="Strength")
+    table.heading("Created At", text="Created At")
+    table.heading("Updated At", text="Updated At")
+    table.column("Service", width=150)
+    table.column("Username", width=150)
+    table.column("Password", width=150)
+    table.column("Expiry Date", width=150)
+    table.column("Strength", width=100)
+    table.column("Created At", width=150)
+    table.column("Updated At", width=150)
+
+    def on_row_select(row):
+        entry_service.delete(0, tk.END)
+        entry_service.insert(0, row[0])
+        entry_username.delete(0, tk.END)
+        entry_username.insert(0, row[1] or "")
+        entry_password.delete(0, tk.END)
+        entry_password.insert(0, "*" * 8)
+        entry_expiration.delete(0, tk.END)
+        entry_expiration.insert(0, str(row[3]) if row[3] else "")
 
     def calculate_password_strength(password):
         length = len(password)
@@ -124,93 +119,54 @@ def create_password_manager_frame(parent, app):
             return
 
         password_strength = calculate_password_strength(password)
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        user_id = app.current_user_id
 
-        loading = show_loading(frame)
-        try:
-            db = app.db_pool.get_connection()
-            cursor = db.cursor()
-            cursor.execute(
-                "INSERT INTO passwords (user_id, service, username, password, expiration_date, password_strength, created_at, updated_at) "
-                "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
-                (app.current_user_id, service, username, password, expiration_date or None, password_strength, current_time, current_time)
-            )
-            db.commit()
-            load_passwords()
+        def done(row):
+            table.upsert(row)
             entry_service.delete(0, tk.END)
             entry_username.delete(0, tk.END)
             entry_password.delete(0, tk.END)
             entry_expiration.delete(0, tk.END)
             messagebox.showinfo("Success", "Password added successfully!")
-        except Exception as e:
+
+        def failed(e):
             logging.error(f"Add password error: {e}")
             messagebox.showerror("Error", "Failed to add password.")
-        finally:
-            hide_loading(loading)
-            if 'db' in locals():
-                db.close()
+
+        app.tasks.submit(lambda: app.repos.passwords.add(user_id, service, username, password,
+                                                         expiration_date or None, password_strength),
+                         done, failed, loading=frame)
 
     def delete_record():
-        selected_item = tree.selection()
-        if not selected_item:
+        row = table.selected_row()
+        if row is None:
             messagebox.showerror("Error", "Please select a password to delete.")
             return
 
-        service = tree.item(selected_item)["values"][0]
-        username = tree.item(selected_item)["values"][1]
+        service, password_id = row[0], row[7]
         if messagebox.askyesno("Confirm", f"Are you sure you want to delete password for '{service}'?"):
-            loading = show_loading(frame)
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                cursor.execute(
-                    "DELETE FROM passwords WHERE user_id=%s AND service=%s AND username=%s",
-                    (app.current_user_id, service, username)
-                )
-                db.commit()
-                load_passwords()
+            user_id = app.current_user_id
+
+            def done(deleted):
+                table.remove(password_id)
                 entry_service.delete(0, tk.END)
                 entry_username.delete(0, tk.END)
                 entry_password.delete(0, tk.END)
                 entry_expiration.delete(0, tk.END)
                 messagebox.showinfo("Success", "Password deleted successfully!")
-            except Exception as e:
+
+            def failed(e):
                 logging.error(f"Delete password error: {e}")
                 messagebox.showerror("Error", "Failed to delete password.")
-            finally:
-                hide_loading(loading)
-                if 'db' in locals():
-                    db.close()
+
+            app.tasks.submit(lambda: app.repos.passwords.delete(user_id, password_id),
+                             done, failed, loading=frame)
 
     def load_passwords():
-        for item in tree.get_children():
-            tree.delete(item)
-        loading = show_loading(frame)
-        try:
-            db = app.db_pool.get_connection()
-            cursor = db.cursor()
-            cursor.execute(
-                "SELECT service, username, password, expiration_date, password_strength, created_at, updated_at "
-                "FROM passwords WHERE user_id=%s",
-                (app.current_user_id,)
-            )
-            for row in cursor.fetchall():
-                tree.insert("", "end", values=(
-                    truncate_text(row[0]),
-                    truncate_text(row[1]),
-                    "*" * 8,
-                    truncate_text(str(row[3]) if row[3] else "N/A"),
-                    truncate_text(row[4]),
-                    truncate_text(str(row[5])),
-                    truncate_text(str(row[6]))
-                ))
-            alternate_row_colors()
-        except Exception as e:
-            logging.error(f"Load passwords error: {e}")
-            messagebox.showerror("Error", "Failed to load passwords.")
-        finally:
-            hide_loading(loading)
-            if 'db' in locals():
-                db.close()
+        table.reload(user_id=app.current_user_id)
+
+    def load_failed(e):
+        logging.error(f"Load passwords error: {e}")
+        messagebox.showerror("Error", "Failed to load passwords.")
 
     return frame
\ No newline at end of file
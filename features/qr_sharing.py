@@ -1,9 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
-from datetime import datetime
 from constants import COLORS, FONTS
-from utils import truncate_text, show_loading, hide_loading
+from utils import truncate_text
+from virtual_table import VirtualTable
 
 def create_qr_sharing_frame(parent, app):
     frame = tk.Frame(parent, bg=COLORS["background"])
@@ -40,45 +40,37 @@ def create_qr_sharing_frame(parent, app):
                           highlightbackground=COLORS["border"])
     tree_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-    tree = ttk.Treeview(tree_frame, columns=("Service", "Username", "QR Code Data", "Created At", "Updated At"), show="headings",
-                        style="Treeview")
-    tree.heading("Service", text="Service")
-    tree.heading("Username", text="Username")
-    tree.heading("QR Code Data", text="QR Code Data")
-    tree.heading("Created At", text="Created At")
-    tree.heading("Updated At", text="Updated At")
-    tree.column("Service", width=150)
-    tree.column("Username", width=150)
-    tree.column("QR Code Data", width=150)
-    tree.column("Created At", width=150)
-    tree.column("Updated At", width=150)
-
-    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-    tree.configure(yscrollcommand=scrollbar.set)
-    tree.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    def on_row_select(event):
-        selected_item = tree.selection()
-        if selected_item:
-            item = tree.item(selected_item)
-            entry_service.delete(0, tk.END)
-            entry_service.insert(0, item["values"][0])
-            entry_username.delete(0, tk.END)
-            entry_username.insert(0, item["values"][1])
-            entry_qr_code_data.delete(0, tk.END)
-            entry_qr_code_data.insert(0, item["values"][2])
-
-    tree.bind("<<TreeviewSelect>>", on_row_select)
-
-    def alternate_row_colors():
-        for i, item in enumerate(tree.get_children()):
-            if i % 2 == 0:
-                tree.item(item, tags=("even",))
-            else:
-                tree.item(item, tags=("odd",))
-        tree.tag_configure("even", background=COLORS["table_bg"])
-        tree.tag_configure("odd", background=COLORS["table_alt"])
+    table = VirtualTable(tree_frame, app, ("Service", "Username", "QR Code Data", "Created At", "Updated At"),
+                         fetch=lambda **params: app.executor.run(
+                             "load_qr_codes", lambda db: app.repos.qr_codes.list(db=db, **params)),
+                         key=lambda row: (row[0], row[1], row[5]),
+                         format_row=lambda row: (
+                             truncate_text(row[0]),
+                             truncate_text(row[1]),
+                             truncate_text(row[2] or "N/A"),
+                             truncate_text(str(row[3])),
+                             truncate_text(str(row[4]))
+                         ),
+                         owner=frame, on_select=lambda row: on_row_select(row), on_error=lambda e: load_failed(e))
+    table.pack(fill="both", expand=True)
+    table.heading("Service", text="Service")
+    table.heading("Username", text="Username")
+    table.heading("QR Code Data", text="QR Code Data")
+    table.heading("Created At", text="Created At")
+    table.heading("Updated At", text="Updated At")
+    table.column("Service", width=150)
+    table.column("Username", width=150)
+    table.column("QR Code Data", width=150)
+    table.column("Created At", width=150)
+    table.column("Updated At", width=150)
+
+    def on_row_select(row):
+        entry_service.delete(0, tk.END)
+        entry_service.insert(0, row[0])
+        entry_username.delete(0, tk.END)
+        entry_username.insert(0, row[1] or "")
+        entry_qr_code_data.delete(0, tk.END)
+        entry_qr_code_data.insert(0, row[2] or "")
 
     def generate_qr():
         service = entry_service.get().strip()
@@ -89,89 +81,51 @@ def create_qr_sharing_frame(parent, app):
             messagebox.showerror("Error", "Service, Username, and QR Code Data are required.")
             return
 
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        loading = show_loading(frame)
-        try:
-            db = app.db_pool.get_connection()
-            cursor = db.cursor()
-            cursor.execute(
-                "INSERT INTO qr_codes (user_id, service, username, qr_code_data, created_at, updated_at) "
-                "VALUES (%s, %s, %s, %s, %s, %s)",
-                (app.current_user_id, service, username, qr_code_data, current_time, current_time)
-            )
-            db.commit()
-            load_qr_codes()
+        user_id = app.current_user_id
+
+        def done(row):
+            table.upsert(row)
             entry_service.delete(0, tk.END)
             entry_username.delete(0, tk.END)
             entry_qr_code_data.delete(0, tk.END)
             messagebox.showinfo("Success", "QR code generated!")
-        except Exception as e:
+
+        def failed(e):
             logging.error(f"Generate QR error: {e}")
             messagebox.showerror("Error", "Failed to generate QR code.")
-        finally:
-            hide_loading(loading)
-            if 'db' in locals():
-                db.close()
+
+        app.tasks.submit(lambda: app.repos.qr_codes.add(user_id, service, username, qr_code_data),
+                         done, failed, loading=frame)
 
     def delete_record():
-        selected_item = tree.selection()
-        if not selected_item:
+        row = table.selected_row()
+        if row is None:
             messagebox.showerror("Error", "Please select a QR code to delete.")
             return
 
-        service = tree.item(selected_item)["values"][0]
-        username = tree.item(selected_item)["values"][1]
+        service, qr_id = row[0], row[5]
         if messagebox.askyesno("Confirm", f"Are you sure you want to delete QR code for '{service}'?"):
-            loading = show_loading(frame)
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                cursor.execute(
-                    "DELETE FROM qr_codes WHERE user_id=%s AND service=%s AND username=%s",
-                    (app.current_user_id, service, username)
-                )
-                db.commit()
-                load_qr_codes()
+            user_id = app.current_user_id
+
+            def done(deleted):
+                table.remove(qr_id)
                 entry_service.delete(0, tk.END)
                 entry_username.delete(0, tk.END)
                 entry_qr_code_data.delete(0, tk.END)
                 messagebox.showinfo("Success", "QR code deleted successfully!")
-            except Exception as e:
+
+            def failed(e):
                 logging.error(f"Delete QR code error: {e}")
                 messagebox.showerror("Error", "Failed to delete QR code.")
-            finally:
-                hide_loading(loading)
-                if 'db' in locals():
-                    db.close()
+
+            app.tasks.submit(lambda: app.repos.qr_codes.delete(user_id, qr_id),
+                             done, failed, loading=frame)
 
     def load_qr_codes():
-        for item in tree.get_children():
-            tree.delete(item)
-        loading = show_loading(frame)
-        try:
-            db = app.db_pool.get_connection()
-            cursor = db.cursor()
-            cursor.execute(
-                "SELECT service, username, qr_code_data, created_at, updated_at "
-                "FROM qr_codes WHERE user_id=%s",
-                (app.current_user_id,)
-            )
-            for row in cursor.fetchall():
-                tree.insert("", "end", values=(
-                    truncate_text(row[0]),
-                    truncate_text(row[1]),
-                    truncate_text(row[2] or "N/A"),
-                    truncate_text(str(row[3])),
-                    truncate_text(str(row[4]))
-                ))
-            alternate_row_colors()
-        except Exception as e:
-            logging.error(f"Load QR codes error: {e}")
-            messagebox.showerror("Error", "Failed to load QR codes.")
-        finally:
-            hide_loading(loading)
-            if 'db' in locals():
-                db.close()
+        table.reload(user_id=app.current_user_id)
+
+    def load_failed(e):
+        logging.error(f"Load QR codes error: {e}")
+        messagebox.showerror("Error", "Failed to load QR codes.")
 
     return frame
\ No newline at end of file
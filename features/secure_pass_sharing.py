@@ -1,9 +1,9 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import logging
-from datetime import datetime
 from constants import COLORS, FONTS
-from utils import truncate_text, show_loading, hide_loading
+from utils import truncate_text
+from virtual_table import VirtualTable
 
 def create_secure_pass_sharing_frame(parent, app):
     frame = tk.Frame(parent, bg=COLORS["background"])
@@ -40,47 +40,40 @@ def create_secure_pass_sharing_frame(parent, app):
                           highlightbackground=COLORS["border"])
     tree_frame.pack(fill="both", expand=True, padx=20, pady=20)
 
-    tree = ttk.Treeview(tree_frame, columns=("Service", "Recipient", "Shared Date", "Share Status", "Created At", "Updated At"), show="headings",
-                        style="Treeview")
-    tree.heading("Service", text="Service")
-    tree.heading("Recipient", text="Recipient")
-    tree.heading("Shared Date", text="Shared Date")
-    tree.heading("Share Status", text="Share Status")
-    tree.heading("Created At", text="Created At")
-    tree.heading("Updated At", text="Updated At")
-    tree.column("Service", width=150)
-    tree.column("Recipient", width=150)
-    tree.column("Shared Date", width=150)
-    tree.column("Share Status", width=150)
-    tree.column("Created At", width=150)
-    tree.column("Updated At", width=150)
-
-    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
-    tree.configure(yscrollcommand=scrollbar.set)
-    tree.pack(side="left", fill="both", expand=True)
-    scrollbar.pack(side="right", fill="y")
-
-    def on_row_select(event):
-        selected_item = tree.selection()
-        if selected_item:
-            item = tree.item(selected_item)
-            entry_service.delete(0, tk.END)
-            entry_service.insert(0, item["values"][0])
-            entry_recipient.delete(0, tk.END)
-            entry_recipient.insert(0, item["values"][1])
-            entry_share_status.delete(0, tk.END)
-            entry_share_status.insert(0, item["values"][3])
-
-    tree.bind("<<TreeviewSelect>>", on_row_select)
-
-    def alternate_row_colors():
-        for i, item in enumerate(tree.get_children()):
-            if i % 2 == 0:
-                tree.item(item, tags=("even",))
-            else:
-                tree.item(item, tags=("odd",))
-        tree.tag_configure("even", background=COLORS["table_bg"])
-        tree.tag_configure("odd", background=COLORS["table_alt"])
+    table = VirtualTable(tree_frame, app, ("Service", "Recipient", "Shared Date", "Share Status", "Created At", "Updated At"),
+                         fetch=lambda **params: app.executor.run(
+                             "load_shared_passwords", lambda db: app.repos.shared_passwords.list(db=db, **params)),
+                         key=lambda row: (row[0], row[1], row[6]),
+                         format_row=lambda row: (
+                             truncate_text(row[0]),
+                             truncate_text(row[1]),
+                             truncate_text(str(row[2])),
+                             truncate_text(row[3]),
+                             truncate_text(str(row[4])),
+                             truncate_text(str(row[5]))
+                         ),
+                         owner=frame, on_select=lambda row: on_row_select(row), on_error=lambda e: load_failed(e))
+    table.pack(fill="both", expand=True)
+    table.heading("Service", text="Service")
+    table.heading("Recipient", text="Recipient")
+    table.heading("Shared Date", text="Shared Date")
+    table.heading("Share Status", text="Share Status")
+    table.heading("Created At", text="Created At")
+    table.heading("Updated At", text="Updated At")
+    table.column("Service", width=150)
+    table.column("Recipient", width=150)
+    table.column("Shared Date", width=150)
+    table.column("Share Status", width=150)
+    table.column("Created At", width=150)
+    table.column("Updated At", width=150)
+
+    def on_row_select(row):
+        entry_service.delete(0, tk.END)
+        entry_service.insert(0, row[0])
+        entry_recipient.delete(0, tk.END)
+        entry_recipient.insert(0, row[1] or "")
+        entry_share_status.delete(0, tk.END)
+        entry_share_status.insert(0, row[3] or "")
 
     def share_password():
         service = entry_service.get().strip()
@@ -91,90 +84,51 @@ def create_secure_pass_sharing_frame(parent, app):
             messagebox.showerror("Error", "Service and Recipient are required.")
             return
 
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        loading = show_loading(frame)
-        try:
-            db = app.db_pool.get_connection()
-            cursor = db.cursor()
-            cursor.execute(
-                "INSERT INTO shared_passwords (user_id, service, recipient, shared_date, share_status, created_at, updated_at) "
-                "VALUES (%s, %s, %s, %s, %s, %s, %s)",
-                (app.current_user_id, service, recipient, current_time, share_status, current_time, current_time)
-            )
-            db.commit()
-            load_shared_passwords()
+        user_id = app.current_user_id
+
+        def done(row):
+            table.upsert(row)
             entry_service.delete(0, tk.END)
             entry_recipient.delete(0, tk.END)
             entry_share_status.delete(0, tk.END)
             messagebox.showinfo("Success", "Password shared successfully!")
-        except Exception as e:
+
+        def failed(e):
             logging.error(f"Share password error: {e}")
             messagebox.showerror("Error", "Failed to share password.")
-        finally:
-            hide_loading(loading)
-            if 'db' in locals():
-                db.close()
+
+        app.tasks.submit(lambda: app.repos.shared_passwords.add(user_id, service, recipient, share_status),
+                         done, failed, loading=frame)
 
     def delete_record():
-        selected_item = tree.selection()
-        if not selected_item:
+        row = table.selected_row()
+        if row is None:
             messagebox.showerror("Error", "Please select a shared password to delete.")
             return
 
-        service = tree.item(selected_item)["values"][0]
-        recipient = tree.item(selected_item)["values"][1]
+        service, share_id = row[0], row[6]
         if messagebox.askyesno("Confirm", f"Are you sure you want to delete shared password for '{service}'?"):
-            loading = show_loading(frame)
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                cursor.execute(
-                    "DELETE FROM shared_passwords WHERE user_id=%s AND service=%s AND recipient=%s",
-                    (app.current_user_id, service, recipient)
-                )
-                db.commit()
-                load_shared_passwords()
+            user_id = app.current_user_id
+
+            def done(deleted):
+                table.remove(share_id)
                 entry_service.delete(0, tk.END)
                 entry_recipient.delete(0, tk.END)
                 entry_share_status.delete(0, tk.END)
                 messagebox.showinfo("Success", "Shared password deleted successfully!")
-            except Exception as e:
+
+            def failed(e):
                 logging.error(f"Delete shared password error: {e}")
                 messagebox.showerror("Error", "Failed to delete shared password.")
-            finally:
-                hide_loading(loading)
-                if 'db' in locals():
-                    db.close()
+
+            app.tasks.submit(lambda: app.repos.shared_passwords.delete(user_id, share_id),
+                             done, failed, loading=frame)
 
     def load_shared_passwords():
-        for item in tree.get_children():
-            tree.delete(item)
-        loading = show_loading(frame)
-        try:
-            db = app.db_pool.get_connection()
-            cursor = db.cursor()
-            cursor.execute(
-                "SELECT service, recipient, shared_date, share_status, created_at, updated_at "
-                "FROM shared_passwords WHERE user_id=%s",
-                (app.current_user_id,)
-            )
-            for row in cursor.fetchall():
-                tree.insert("", "end", values=(
-                    truncate_text(row[0]),
-                    truncate_text(row[1]),
-                    truncate_text(str(row[2])),
-                    truncate_text(row[3]),
-                    truncate_text(str(row[4])),
-                    truncate_text(str(row[5]))
-                ))
-            alternate_row_colors()
-        except Exception as e:
-            logging.error(f"Load shared passwords error: {e}")
-            messagebox.showerror("Error", "Failed to load shared passwords.")
-        finally:
-            hide_loading(loading)
-            if 'db' in locals():
-                db.close()
+        table.reload(user_id=app.current_user_id)
+
+    def load_failed(e):
+        logging.error(f"Load shared passwords error: {e}")
+        messagebox.showerror("Error", "Failed to load shared passwords.")
 
     return frame
\ No newline at end of file
@@ -0,0 +1,244 @@
+import hashlib
+import hmac
+import logging
+import os
+import struct
+import threading
+import time
+import zlib
+import mysql.connector
+import chunking
+
+# Vault files are split by content-defined chunking (see chunking.py) and each
+# distinct chunk is stored once per user in vault_chunks, sealed with
+# AES-256-GCM under a fresh random nonce; file_chunks lists a file's chunks in
+# order and vault_chunks.refcount counts the listings. Chunks are found by a
+# digest of their plaintext keyed by the user's index key, so an upload only
+# encrypts and sends the chunks the user does not have yet. Each upload seals
+# its new chunks with a data key of its own, kept wrapped in vault_keys (see
+# envelope.py). A file passes through a buffer of a few chunks in either
+# direction, so memory use does not grow with file size.
+#
+# A chunk's associated data is its owner and digest, so sealed data moved to
+# another row fails to decrypt. The file row keeps a MAC over the file id and
+# its ordered digests, which catches chunks reordered, dropped or swapped in
+# from another file.
+#
+# New chunks may be compressed before they are sealed. The first byte of the
+# sealed plaintext names the codec, so chunks shared between files need not
+# agree on it; a chunk that does not shrink is stored as it is.
+
+STORAGE_FORMAT = 1  # file_vault.storage_format of files written here; 0 marks the unreadable ones from before
+
+CODECS = {"none": 0, "zlib": 1, "lzma": 2}
+
+# Extensions of formats that are compressed already; compressing them again costs time and saves nothing.
+INCOMPRESSIBLE = frozenset({
+    ".7z", ".aac", ".avi", ".bz2", ".docx", ".flac", ".gif", ".gz", ".heic", ".jpeg", ".jpg", ".m4a", ".mkv",
+    ".mov", ".mp3", ".mp4", ".odp", ".ods", ".odt", ".ogg", ".png", ".pptx", ".rar", ".tgz", ".webm", ".webp",
+    ".xlsx", ".xz", ".zip", ".zst",
+})
+
+# If the first new chunk of a file shrinks by less than this, the rest are stored uncompressed.
+MIN_SAVING = 0.05
+
+
+class VaultError(Exception):
+    """A vault file that cannot be stored or read back as it was written."""
+
+
+def _subkey(key, purpose):
+    return hmac.new(key, purpose, hashlib.sha256).digest()
+
+
+def _associated_data(user_id, digest):
+    return struct.pack(">Q", user_id) + digest
+
+
+def _compress(codec, data, level):
+    if codec == "zlib":
+        return zlib.compress(data, level)
+    import lzma
+    return lzma.compress(data, preset=level)
+
+
+def _decompress(tag, payload):
+    if tag == CODECS["none"]:
+        return payload
+    if tag == CODECS["zlib"]:
+        return zlib.decompress(payload)
+    if tag == CODECS["lzma"]:
+        import lzma
+        return lzma.decompress(payload)
+    raise ValueError(f"unknown codec {tag}")
+
+
+class FileVault:
+    """Streams files into and out of the file vault, chunk by chunk.
+
+    upload() and download() take the pooled connection of the caller's unit of
+    work (see retry.RetryExecutor), so a file's row, its chunks and their
+    reference counts are written in one transaction and a failed upload leaves
+    nothing behind.
+    """
+
+    def __init__(self, repos, keyring, min_chunk=16 * 1024, avg_chunk=64 * 1024, max_chunk=256 * 1024, compression="zlib",
+                 compression_level=6):
+        if compression not in CODECS:
+            raise ValueError(f"compression must be one of {', '.join(CODECS)}")
+        self.repos = repos
+        self.keyring = keyring
+        self.chunking = {"min_size": min_chunk, "avg_size": avg_chunk, "max_size": max_chunk}
+        self.compression = compression
+        self.compression_level = compression_level
+        self._lock = threading.Lock()
+        self._counters = {"uploads": 0, "downloads": 0, "bytes_in": 0, "bytes_out": 0, "bytes_deduplicated": 0,
+                          "bytes_stored": 0, "chunks_written": 0, "chunks_reused": 0, "chunks_read": 0,
+                          "seconds": 0.0}
+
+    def upload(self, user_id, path, file_name, db, progress=None):
+        """Encrypt the file at path into the vault.
+
+        Returns (row, summary): the file's row as FileVaultRepo.list() shows
+        it, and a dict of the upload's bytes, bytes_stored (after
+        deduplication and compression), bytes_deduplicated, codec, chunks,
+        chunks_reused and seconds. progress(read, sent), if given, is called
+        after each chunk with its plaintext length and the bytes sent to the
+        database for it; an exception it raises abandons the upload.
+        """
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        index_key = self.keyring.index_key(user_id)
+        digest_key = _subkey(index_key, b"chunk index")
+        gear = chunking.gear_table(_subkey(index_key, b"chunk boundaries"))
+        files = self.repos.files
+        key_id = aead = None  # the data key is made with the upload's first new chunk
+        codec = "none" if os.path.splitext(file_name)[1].lower() in INCOMPRESSIBLE else self.compression
+        probed = codec == "none"
+        started = time.perf_counter()
+        read = stored = deduplicated = chunk_count = reused = 0
+        with open(path, "rb") as f:
+            file_size = os.fstat(f.fileno()).st_size
+            file_id = files.create(user_id, file_name, file_size, STORAGE_FORMAT, db=db)
+            manifest = hmac.new(digest_key, struct.pack(">Q", file_id), hashlib.sha256)
+            for seq, data in enumerate(chunking.chunks(f, gear, **self.chunking)):
+                digest = hmac.new(digest_key, data, hashlib.sha256).digest()
+                sent = 0
+                if files.reuse_chunk(user_id, digest, db=db):
+                    reused += 1
+                    deduplicated += len(data)
+                else:
+                    tag, payload = self._encode(codec, data)
+                    if not probed:
+                        probed = True
+                        if len(payload) > len(data) * (1 - MIN_SAVING):
+                            codec = "none"
+                    if aead is None:
+                        key_id, data_key = self.keyring.new_data_key(user_id, db=db)
+                        aead = AESGCM(data_key)
+                    if self._store(aead, key_id, user_id, digest, bytes([tag]) + payload, db):
+                        sent = len(payload)
+                        stored += sent
+                    else:
+                        reused += 1
+                        deduplicated += len(data)
+                files.link_chunk(file_id, seq, user_id, digest, db=db)
+                manifest.update(digest)
+                read += len(data)
+                chunk_count += 1
+                if progress is not None:
+                    progress(len(data), sent)
+        if read != file_size:
+            raise VaultError(f"{file_name} changed while it was being uploaded.")
+        files.finish(file_id, chunk_count, manifest.digest(), codec, db=db)
+        elapsed = time.perf_counter() - started
+        self._count(uploads=1, bytes_in=read, bytes_deduplicated=deduplicated, bytes_stored=stored,
+                    chunks_written=chunk_count - reused, chunks_reused=reused, seconds=elapsed)
+        logging.info(f"Uploaded {file_name}: {read} bytes stored as {stored} ({codec}, {reused} of {chunk_count} "
+                     f"chunks already stored) in {elapsed * 1000:.0f} ms, {read / max(elapsed, 1e-6) / 1e6:.1f} MB/s")
+        summary = {"bytes": read, "bytes_stored": stored, "bytes_deduplicated": deduplicated, "codec": codec,
+                   "chunks": chunk_count, "chunks_reused": reused, "seconds": elapsed}
+        return files.row(file_id, db=db), summary
+
+    def _encode(self, codec, data):
+        """(codec tag, payload) for a new chunk, compressed if that makes it smaller."""
+        if codec != "none" and data:
+            packed = _compress(codec, data, self.compression_level)
+            if len(packed) < len(data):
+                return CODECS[codec], packed
+        return CODECS["none"], data
+
+    def _store(self, aead, key_id, user_id, digest, plaintext, db):
+        """Seal and store a chunk the user does not have; False if a concurrent upload stored it first."""
+        files = self.repos.files
+        nonce = os.urandom(12)
+        try:
+            sealed = aead.encrypt(nonce, plaintext, _associated_data(user_id, digest))
+            files.add_chunk(user_id, digest, key_id, nonce, sealed, db=db)
+        except mysql.connector.IntegrityError:
+            # A concurrent upload stored the same chunk first.
+            if not files.reuse_chunk(user_id, digest, db=db):
+                raise
+            return False
+        return True
+
+    def download(self, user_id, file_id, save_path, db):
+        """Decrypt a file to save_path; False if the user has no such file.
+
+        The plaintext is written next to save_path and moved into place once
+        the whole file has been verified, so a failed download leaves no partial file.
+        """
+        from cryptography.exceptions import InvalidTag
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        file = self.repos.files.get(file_id, user_id, db=db)
+        if file is None:
+            return False
+        file_name, file_size, storage_format, chunk_count, expected_manifest = file
+        if storage_format != STORAGE_FORMAT:
+            raise VaultError(f"{file_name} was stored in an older format whose key was not kept.")
+        manifest = hmac.new(_subkey(self.keyring.index_key(user_id), b"chunk index"), struct.pack(">Q", file_id),
+                            hashlib.sha256)
+        aeads = {}
+        started = time.perf_counter()
+        partial = f"{save_path}.{os.getpid()}.part"
+        written = 0
+        try:
+            with open(partial, "wb") as f:
+                for seq in range(chunk_count):
+                    chunk = self.repos.files.chunk(file_id, seq, db=db)
+                    if chunk is None:
+                        raise VaultError(f"{file_name} is missing chunk {seq}.")
+                    digest, key_id, nonce, sealed = chunk
+                    digest = bytes(digest)
+                    aead = aeads.get(key_id)
+                    if aead is None:
+                        aead = aeads[key_id] = AESGCM(self.keyring.data_key(user_id, key_id, db=db))
+                    try:
+                        plaintext = aead.decrypt(bytes(nonce), bytes(sealed), _associated_data(user_id, digest))
+                    except InvalidTag:
+                        raise VaultError(f"{file_name} failed verification at chunk {seq}.") from None
+                    data = _decompress(plaintext[0], plaintext[1:])
+                    manifest.update(digest)
+                    f.write(data)
+                    written += len(data)
+            if expected_manifest is None or not hmac.compare_digest(manifest.digest(), bytes(expected_manifest)):
+                raise VaultError(f"{file_name} failed verification: its chunks are not the ones uploaded.")
+            if written != file_size:
+                raise VaultError(f"{file_name} decrypted to {written} bytes, expected {file_size}.")
+            os.replace(partial, save_path)
+        except BaseException:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            raise
+        self._count(downloads=1, bytes_out=written, chunks_read=chunk_count, seconds=time.perf_counter() - started)
+        return True
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self._counters[name] += amount
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
@@ -0,0 +1,79 @@
+import logging
+import time
+from collections import OrderedDict
+
+
+def count_widgets(widget):
+    """The widget and all of its descendants."""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+
+class FrameRegistry:
+    """Dashboard frames that are built the first time they are shown.
+
+    register(name, build) records how to make a frame; build(parent) runs on
+    the first get(name) and the frame is kept in frames, the dict the rest of
+    the app reads as app.frames. Frames put into frames directly are pinned:
+    they are built eagerly and never evicted. on_build(frame) runs after each
+    build.
+
+    With max_widgets set, registered frames are evicted least recently shown
+    first once together they hold more widgets than that, and are rebuilt
+    when next shown. on_evict(frame) runs just before a frame is destroyed.
+    """
+
+    def __init__(self, parent, max_widgets=None, on_build=None, on_evict=None):
+        self.parent = parent
+        self.max_widgets = max_widgets
+        self.on_build = on_build
+        self.on_evict = on_evict
+        self.frames = {}
+        self._builders = {}
+        # Widget count of each built registered frame, least recently shown first.
+        self._sizes = OrderedDict()
+        self._counters = {"builds": 0, "evictions": 0, "build_seconds": 0.0}
+
+    def register(self, name, build):
+        self._builders[name] = build
+
+    def registered(self):
+        """Names of the registered frames, built or not."""
+        return list(self._builders)
+
+    def get(self, name):
+        """The frame called name, built now if it has not been yet."""
+        if name not in self.frames:
+            started = time.perf_counter()
+            frame = self._builders[name](self.parent)
+            if self.on_build is not None:
+                self.on_build(frame)
+            elapsed = time.perf_counter() - started
+            self.frames[name] = frame
+            self._sizes[name] = count_widgets(frame)
+            self._counters["builds"] += 1
+            self._counters["build_seconds"] += elapsed
+            logging.info(f"Built {name} frame in {elapsed * 1000:.1f} ms ({self._sizes[name]} widgets)")
+        if name in self._sizes:
+            self._sizes.move_to_end(name)
+            self._evict()
+        return self.frames[name]
+
+    def _evict(self):
+        if self.max_widgets is None:
+            return
+        # The frame just shown is last and is never evicted, however large.
+        while len(self._sizes) > 1 and sum(self._sizes.values()) > self.max_widgets:
+            name, _ = self._sizes.popitem(last=False)
+            frame = self.frames.pop(name)
+            if self.on_evict is not None:
+                self.on_evict(frame)
+            frame.destroy()
+            self._counters["evictions"] += 1
+            logging.info(f"Evicted {name} frame")
+
+    def stats(self):
+        snapshot = dict(self._counters)
+        snapshot["registered"] = len(self._builders)
+        snapshot["built"] = len(self._sizes)
+        snapshot["resident_widgets"] = sum(count_widgets(frame) for frame in self.frames.values())
+        return snapshot
@@ -0,0 +1,57 @@
+import mysql.connector
+
+# Declared secondary indexes for the per-user hot paths, as (table, name, columns).
+# The schema setup reconciles these by checksum, so adding or changing an entry
+# here is enough to have it built on the next start.
+INDEXES = [
+    # Activity History / Audit Logs / dashboard recent activity: WHERE user_id ORDER BY timestamp
+    ("audit_logs", "idx_audit_logs_user_time", ("user_id", "timestamp")),
+    # Activity History action filter
+    ("audit_logs", "idx_audit_logs_user_action_time", ("user_id", "action", "timestamp")),
+    # Backup lists and restore dialogs: WHERE record_id ORDER BY backup_time (covering with table_name)
+    ("backup_logs", "idx_backup_logs_record_time", ("record_id", "backup_time", "table_name")),
+    # Notification dialog: WHERE user_id ORDER BY created_at
+    ("notifications", "idx_notifications_user_created", ("user_id", "created_at")),
+    # Keyed deletes and lookups on (user_id, service, username/recipient)
+    ("passwords", "idx_passwords_user_service_username", ("user_id", "service", "username")),
+    ("passwords", "idx_passwords_user_expiration", ("user_id", "expiration_date")),
+    # Rotation reminders: WHERE user_id AND updated_at range, ORDER BY updated_at
+    ("passwords", "idx_passwords_user_updated", ("user_id", "updated_at")),
+    ("qr_codes", "idx_qr_codes_user_service_username", ("user_id", "service", "username")),
+    ("shared_passwords", "idx_shared_passwords_user_service_recipient", ("user_id", "service", "recipient")),
+    ("connected_devices", "idx_connected_devices_user_device", ("user_id", "device_name")),
+    ("access_logs", "idx_access_logs_user_device_time", ("user_id", "device_name", "access_time")),
+    # Also the upsert key of RefreshExpirationAlerts, hence unique (see UNIQUE_INDEXES)
+    ("expiration_alerts", "idx_expiration_alerts_user_password", ("user_id", "password_id")),
+    # File Manager listing: WHERE user_id ORDER BY created_at
+    ("file_vault", "idx_file_vault_user_created", ("user_id", "created_at")),
+    # Vault chunk lookup by content (unique: one stored copy per user), the sweep
+    # of chunks no file refers to any more, and the foreign key from file_chunks
+    ("vault_chunks", "idx_vault_chunks_user_digest", ("user_id", "digest")),
+    ("vault_chunks", "idx_vault_chunks_user_refcount", ("user_id", "refcount")),
+    ("file_chunks", "idx_file_chunks_chunk", ("chunk_id",)),
+    # Data keys: the per-user sweep of keys no chunk uses, and the foreign key from vault_chunks
+    ("vault_keys", "idx_vault_keys_user", ("user_id",)),
+    ("vault_chunks", "idx_vault_chunks_key", ("key_id",)),
+]
+
+INDEX_TABLES = {name: table for table, name, columns in INDEXES}
+
+UNIQUE_INDEXES = {"idx_expiration_alerts_user_password", "idx_vault_chunks_user_digest"}
+
+
+def index_objects():
+    """Return the catalogue as (kind, name, sql) schema objects for the migration engine."""
+    return [
+        ("INDEX", name,
+         f"CREATE {'UNIQUE ' if name in UNIQUE_INDEXES else ''}INDEX {name} ON {table} ({', '.join(columns)})")
+        for table, name, columns in INDEXES
+    ]
+
+
+def drop_index(cursor, name):
+    try:
+        cursor.execute(f"DROP INDEX {name} ON {INDEX_TABLES[name]}")
+    except mysql.connector.Error as err:
+        if err.errno != 1091:  # ER_CANT_DROP_FIELD_OR_KEY: index does not exist yet
+            raise
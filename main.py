@@ -1,29 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import mysql.connector
 import logging
-from constants import COLORS, FONTS
+import dependencies
+
+# Report a missing package and exit, before the imports below would fail on it.
+dependencies.require()
+
+from constants import COLORS, FONTS, ASSET_CONFIG, FILE_VAULT_CONFIG, KEYRING_CONFIG, UPLOAD_QUEUE_CONFIG
 from ui import create_login_frame, create_signup_frame, create_dashboard_frame
-from db import DatabaseConnectionPool
-from utils import validate_email, show_loading, hide_loading
-
-try:
-    import bcrypt
-except ImportError:
-    import sys
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "bcrypt"])
-    import importlib
-    bcrypt = importlib.import_module("bcrypt")
-
-# Ensure cryptography is installed before importing anything that uses it
-try:
-    from cryptography.fernet import Fernet
-except ImportError:
-    import sys
-    import subprocess
-    subprocess.check_call([sys.executable, "-m", "pip", "install", "cryptography"])
-    from cryptography.fernet import Fernet
+from db import DatabaseConnectionPool, RETRY_CONFIG, AUDIT_WRITER_CONFIG, SCHEDULER_CONFIG, CACHE_CONFIG
+import assets
+import audit
+import cache
+import envelope
+import file_vault
+import scheduler
+import theme
+import upload_queue
+from repositories import Repositories
+from retry import RetryExecutor
+from tasks import TaskRunner
+from utils import validate_email
 
 class PasswordManagerApp:
     def __init__(self, root):
@@ -31,7 +28,32 @@ class PasswordManagerApp:
         self.root.title("PassVault")
         self.root.geometry("1440x900")
         self.db_pool = DatabaseConnectionPool()
+        self.repos = Repositories(self.db_pool)
+        # Rarely changing per-user reads are served from memory until a write invalidates them.
+        self.cache = cache.ReadThroughCache(**CACHE_CONFIG)
+        cache.install(self.cache)
+        self.executor = RetryExecutor(self.db_pool, **RETRY_CONFIG)
+        # Writes go straight to the primary pool: the writer runs off the Tk thread.
+        self.audit_writer = audit.AuditWriter(self.db_pool.pool, **AUDIT_WRITER_CONFIG)
+        audit.install(self.audit_writer)
+        self.scheduler = scheduler.ExpiryScheduler(self.repos, self.executor, **SCHEDULER_CONFIG)
+        scheduler.install(self.scheduler)
+        # Vault keys are unwrapped at login and forgotten at logout.
+        self.keyring = envelope.KeyRing(self.repos, **KEYRING_CONFIG)
+        self.vault = file_vault.FileVault(self.repos, self.keyring, **FILE_VAULT_CONFIG)
+        self.uploads = upload_queue.UploadQueue(self.vault, self.executor,
+                                                concurrent_writes=self.db_pool.pool.dialect.concurrent_writes,
+                                                **UPLOAD_QUEUE_CONFIG)
+        # The file manager's current uploads, kept here because its frame may be evicted while they run.
+        self.upload_jobs = {"jobs": [], "started": None}
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.current_user_id = None
+        # Database and crypto work runs on worker threads; results come back on the Tk thread.
+        self.tasks = TaskRunner(self.root)
+
+        # ttk styles are defined once here and redefined only when the theme changes.
+        self.theme = theme.Theme(self.root)
+        self.assets = assets.AssetCache(**ASSET_CONFIG)
 
         # Main container
         self.container = tk.Frame(self.root)
@@ -49,20 +71,40 @@ class PasswordManagerApp:
         logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s',
                             filename='passvault.log')
 
+    def on_close(self):
+        self.tasks.close()
+        self.uploads.close()
+        self.scheduler.close()
+        self.audit_writer.close()
+        self.root.destroy()
+
     def switch_to_login(self):
+        if self.current_user_id is not None:
+            self.scheduler.untrack(self.current_user_id)
+            self.uploads.cancel()
+            self.upload_jobs["jobs"] = []
+            self.keyring.lock(self.current_user_id)
+        for frame in getattr(self, "frames", {}).values():
+            self.tasks.cancel(frame)
         self.current_user_id = None
+        # The cache lives for one session.
+        self.cache.clear()
         self.signup_frame.pack_forget()
         self.dashboard_frame.pack_forget()
+        self.theme.apply(self.login_frame)
         self.login_frame.pack(fill="both", expand=True)
 
     def switch_to_signup(self):
         self.login_frame.pack_forget()
         self.dashboard_frame.pack_forget()
+        self.theme.apply(self.signup_frame)
         self.signup_frame.pack(fill="both", expand=True)
 
     def switch_to_dashboard(self):
         self.login_frame.pack_forget()
         self.signup_frame.pack_forget()
+        # Pages inside the dashboard are restyled by show_frame as they are opened.
+        self.theme.apply(self.dashboard_frame, skip=list(self.frames.values()))
         self.dashboard_frame.pack(fill="both", expand=True)
 
     def login(self):
@@ -73,40 +115,36 @@ class PasswordManagerApp:
             messagebox.showerror("Error", "All fields are required.")
             return
 
-        max_retries = 3
-        retry_count = 0
-        while retry_count < max_retries:
-            try:
-                db = self.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("SELECT id, password FROM users WHERE username = %s", (username,))
-                user = cursor.fetchone()
-                if user and bcrypt.checkpw(password.encode('utf-8'), user[1].encode('utf-8')):
-                    self.current_user_id = user[0]
-                    db.commit()
-                    self.switch_to_dashboard()
-                    messagebox.showinfo("Success", "Login successful!")
-                    return
-                else:
-                    db.rollback()
-                    messagebox.showerror("Error", "Invalid username or password.")
-                    return
-            except mysql.connector.Error as e:
-                logging.error(f"Login error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to login. Try restoring from backup?"):
-                        self.restore_backup()
-                    else:
-                        messagebox.showerror("Error", f"Failed to login after retries: {e}")
-            finally:
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        def authenticate():
+            # bcrypt is imported on first use, on the worker, to keep it off the startup path.
+            import bcrypt
+            user = self.executor.run("login", lambda db: self.repos.users.get_credentials(username, db=db))
+            if user and bcrypt.checkpw(password.encode('utf-8'), user[1].encode('utf-8')):
+                self.executor.run("record_login",
+                                  lambda db: self.repos.stats.record_login(user[0], db=db), write=True)
+                # The password is at hand only now; the keys it unwraps stay in memory until logout.
+                self.executor.run("unlock_keys",
+                                  lambda db: self.keyring.unlock(user[0], password, db=db), write=True)
+                return user[0]
+            return None
+
+        def logged_in(user_id):
+            if user_id is None:
+                messagebox.showerror("Error", "Invalid username or password.")
+                return
+            self.current_user_id = user_id
+            self.scheduler.track(self.current_user_id)
+            self.switch_to_dashboard()
+            messagebox.showinfo("Success", "Login successful!")
+
+        def failed(e):
+            logging.error(f"Login error: {e}")
+            if messagebox.askyesno("Error", "Failed to login. Try restoring from backup?"):
+                self.restore_backup()
+            else:
+                messagebox.showerror("Error", f"Failed to login: {e}")
+
+        self.tasks.submit(authenticate, logged_in, failed, loading=self.login_frame)
 
     def signup(self):
         username = self.signup_entry_user.get().strip()
@@ -123,44 +161,35 @@ class PasswordManagerApp:
             messagebox.showerror("Error", "Password must be at least 8 characters.")
             return
 
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-
-        max_retries = 3
-        retry_count = 0
-        while retry_count < max_retries:
-            try:
-                db = self.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("CALL BackupUserData(%s)", (0,))  # 0 for new user
-                cursor.execute("SELECT id FROM users WHERE username = %s OR email = %s", (username, email))
-                if cursor.fetchone():
-                    db.rollback()
-                    messagebox.showerror("Error", "Username or email already exists.")
-                    return
-                cursor.execute("INSERT INTO users (username, email, password) VALUES (%s, %s, %s)",
-                               (username, email, hashed_password))
-                user_id = cursor.lastrowid
-                cursor.execute("CALL UpdateUserSettings(%s, %s, %s)", (user_id, False, True))
-                db.commit()
-                messagebox.showinfo("Success", "Account created! Please login.")
-                self.switch_to_login()
+        def work():
+            import bcrypt
+            hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+            def create_account(db):
+                self.repos.backups.backup_user(0, db=db)  # 0 for new user
+                if self.repos.users.exists(username, email, db=db):
+                    return False
+                user_id = self.repos.users.create(username, email, hashed_password, db=db)
+                self.repos.settings.save(user_id, False, True, db=db)
+                return True
+
+            return self.executor.run("signup", create_account, write=True)
+
+        def done(created):
+            if created is False:
+                messagebox.showerror("Error", "Username or email already exists.")
                 return
-            except mysql.connector.Error as e:
-                logging.error(f"Signup error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to create account. Try restoring from backup?"):
-                        self.restore_backup()
-                    else:
-                        messagebox.showerror("Error", f"Failed to create account after retries: {e}")
-            finally:
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+            messagebox.showinfo("Success", "Account created! Please login.")
+            self.switch_to_login()
+
+        def failed(e):
+            logging.error(f"Signup error: {e}")
+            if messagebox.askyesno("Error", "Failed to create account. Try restoring from backup?"):
+                self.restore_backup()
+            else:
+                messagebox.showerror("Error", f"Failed to create account: {e}")
+
+        self.tasks.submit(work, done, failed, loading=self.signup_frame)
 
     def change_password(self):
         dialog = tk.Toplevel(self.root)
@@ -206,42 +235,39 @@ class PasswordManagerApp:
                 messagebox.showerror("Error", "New password must be at least 8 characters.", parent=dialog)
                 return
 
-            max_retries = 3
-            retry_count = 0
-            while retry_count < max_retries:
-                try:
-                    db = self.db_pool.get_connection()
-                    cursor = db.cursor()
-                    db.start_transaction()
-                    cursor.execute("CALL BackupUserData(%s)", (self.current_user_id,))
-                    cursor.execute("SELECT password FROM users WHERE id = %s", (self.current_user_id,))
-                    stored_password = cursor.fetchone()[0]
+            user_id = self.current_user_id
+
+            def work():
+                import bcrypt
+                hashed_new_password = bcrypt.hashpw(new.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+
+                def update_password(db):
+                    self.repos.backups.backup_user(user_id, db=db)
+                    stored_password = self.repos.users.get_password_hash(user_id, db=db)
                     if not bcrypt.checkpw(current.encode('utf-8'), stored_password.encode('utf-8')):
-                        db.rollback()
-                        messagebox.showerror("Error", "Current password is incorrect.", parent=dialog)
-                        return
-                    hashed_new_password = bcrypt.hashpw(new.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                    cursor.execute("UPDATE users SET password = %s WHERE id = %s",
-                                   (hashed_new_password, self.current_user_id))
-                    db.commit()
-                    messagebox.showinfo("Success", "Password changed successfully!", parent=dialog)
-                    dialog.destroy()
+                        return False
+                    # The vault keys are wrapped by a key derived from the password; re-wrap them for the new one.
+                    self.keyring.rotate(user_id, current, new, db=db)
+                    self.repos.users.update_password(user_id, hashed_new_password, db=db)
+                    return True
+
+                return self.executor.run("change_password", update_password, write=True)
+
+            def done(changed):
+                if changed is False:
+                    messagebox.showerror("Error", "Current password is incorrect.", parent=dialog)
                     return
-                except mysql.connector.Error as e:
-                    logging.error(f"Change password error (attempt {retry_count + 1}): {e}")
-                    if 'db' in locals():
-                        db.rollback()
-                    retry_count += 1
-                    if retry_count == max_retries:
-                        if messagebox.askyesno("Error", "Failed to change password. Try restoring from backup?", parent=dialog):
-                            self.restore_backup()
-                        else:
-                            messagebox.showerror("Error", f"Failed to change password after retries: {e}", parent=dialog)
-                finally:
-                    if 'cursor' in locals():
-                        cursor.close()
-                    if 'db' in locals():
-                        db.close()
+                messagebox.showinfo("Success", "Password changed successfully!", parent=dialog)
+                dialog.destroy()
+
+            def failed(e):
+                logging.error(f"Change password error: {e}")
+                if messagebox.askyesno("Error", "Failed to change password. Try restoring from backup?", parent=dialog):
+                    self.restore_backup()
+                else:
+                    messagebox.showerror("Error", f"Failed to change password: {e}", parent=dialog)
+
+            self.tasks.submit(work, done, failed, loading=card)
 
         tk.Button(card, text="Submit", bg=COLORS["primary"], fg=COLORS["dark_fg"],
                   font=FONTS["button"], width=15, command=submit, relief="flat").pack(pady=10)
@@ -249,144 +275,103 @@ class PasswordManagerApp:
                   font=FONTS["button"], width=15, command=dialog.destroy, relief="flat").pack(pady=5)
 
     def restore_backup(self):
-        max_retries = 3
-        retry_count = 0
-        while retry_count < max_retries:
-            try:
-                db = self.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("""
-                    SELECT id, table_name, backup_time
-                    FROM backup_logs
-                    WHERE record_id = %s
-                    ORDER BY backup_time DESC
-                    LIMIT 5
-                """, (self.current_user_id or 0,))
-                backups = cursor.fetchall()
-                if not backups:
-                    messagebox.showinfo("Info", "No backups available.")
-                    db.rollback()
-                    return
-                backup_options = [f"ID: {b[0]} | Table: {b[1]} | Time: {b[2]}" for b in backups]
-                selected = tk.StringVar()
-                dialog = tk.Toplevel(self.root)
-                dialog.title("Select Backup")
-                dialog.geometry("400x300")
-                tk.Label(dialog, text="Select a backup to restore:", font=FONTS["body"]).pack(pady=10)
-                combo = ttk.Combobox(dialog, textvariable=selected, values=backup_options, state="readonly")
-                combo.pack(pady=10)
-                def confirm_restore():
-                    if not selected.get():
-                        messagebox.showerror("Error", "Please select a backup.", parent=dialog)
-                        return
-                    backup_id = int(selected.get().split(" | ")[0].replace("ID: ", ""))
-                    try:
-                        cursor.execute("CALL RestoreUserData(%s)", (backup_id,))
-                        db.commit()
-                        messagebox.showinfo("Success", "Backup restored successfully!", parent=dialog)
-                        dialog.destroy()
-                    except mysql.connector.Error as e:
-                        db.rollback()
-                        messagebox.showerror("Error", f"Failed to restore backup: {e}", parent=dialog)
-                        dialog.destroy()
-                tk.Button(dialog, text="Restore", command=confirm_restore, bg=COLORS["primary"],
-                          fg=COLORS["dark_fg"], font=FONTS["button"]).pack(pady=10)
-                tk.Button(dialog, text="Cancel", command=dialog.destroy, bg=COLORS["secondary"],
-                          fg=COLORS["dark_fg"], font=FONTS["button"]).pack(pady=10)
-                dialog.transient(self.root)
-                dialog.grab_set()
-                self.root.wait_window(dialog)
-                break
-            except mysql.connector.Error as e:
-                logging.error(f"Restore backup error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    messagebox.showerror("Error", f"Failed to load backups after retries: {e}")
-            finally:
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        user_id = self.current_user_id or 0
+
+        def failed(e):
+            logging.error(f"Restore backup error: {e}")
+            messagebox.showerror("Error", f"Failed to load backups: {e}")
+
+        self.tasks.submit(
+            lambda: self.executor.run("list_backups", lambda db: self.repos.backups.list(user_id, limit=5, db=db)),
+            self.show_restore_dialog, failed
+        )
+
+    def show_restore_dialog(self, backups):
+        if not backups:
+            messagebox.showinfo("Info", "No backups available.")
+            return
+        backup_options = [f"ID: {b[0]} | Table: {b[1]} | Time: {b[3]}" for b in backups]
+        selected = tk.StringVar()
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Select Backup")
+        dialog.geometry("400x300")
+        tk.Label(dialog, text="Select a backup to restore:", font=FONTS["body"]).pack(pady=10)
+        combo = ttk.Combobox(dialog, textvariable=selected, values=backup_options, state="readonly")
+        combo.pack(pady=10)
+        def confirm_restore():
+            if not selected.get():
+                messagebox.showerror("Error", "Please select a backup.", parent=dialog)
+                return
+            backup_id = int(selected.get().split(" | ")[0].replace("ID: ", ""))
+
+            def done(result):
+                messagebox.showinfo("Success", "Backup restored successfully!", parent=dialog)
+                dialog.destroy()
+
+            def failed(e):
+                messagebox.showerror("Error", f"Failed to restore backup: {e}", parent=dialog)
+                dialog.destroy()
+
+            self.tasks.submit(
+                lambda: self.executor.run("restore_backup", lambda db: self.repos.backups.restore(backup_id, db=db),
+                                          write=True),
+                done, failed, loading=dialog
+            )
+        tk.Button(dialog, text="Restore", command=confirm_restore, bg=COLORS["primary"],
+                  fg=COLORS["dark_fg"], font=FONTS["button"]).pack(pady=10)
+        tk.Button(dialog, text="Cancel", command=dialog.destroy, bg=COLORS["secondary"],
+                  fg=COLORS["dark_fg"], font=FONTS["button"]).pack(pady=10)
+        dialog.transient(self.root)
+        dialog.grab_set()
+        self.root.wait_window(dialog)
 
     def create_backup(self):
         if not self.current_user_id:
             messagebox.showerror("Error", "You must be logged in to create a backup.")
             return
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(self.frames.get("home", self.container))
-        while retry_count < max_retries:
-            try:
-                db = self.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("CALL BackupUserData(%s)", (self.current_user_id,))
-                db.commit()
-                messagebox.showinfo("Success", "Backup created successfully!")
-                self.load_backups()  # Refresh the backups list
-                break
-            except mysql.connector.Error as e:
-                logging.error(f"Create backup error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    messagebox.showerror("Error", f"Failed to create backup after retries: {e}")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        user_id = self.current_user_id
+
+        def done(result):
+            messagebox.showinfo("Success", "Backup created successfully!")
+            self.load_backups()  # Refresh the backups list
+
+        def failed(e):
+            logging.error(f"Create backup error: {e}")
+            messagebox.showerror("Error", f"Failed to create backup: {e}")
+
+        self.tasks.submit(
+            lambda: self.executor.run("create_backup", lambda db: self.repos.backups.backup_user(user_id, db=db),
+                                      write=True),
+            done, failed, loading=self.frames.get("home", self.container)
+        )
 
     def load_backups(self):
-        if not hasattr(self, 'backups_tree'):
-            logging.warning("Backups Treeview not initialized.")
+        # Not built yet (or evicted): the frame loads its list when it is next shown.
+        if "backups" not in self.frames:
             return
         tree = self.backups_tree
-        for item in tree.get_children():
-            tree.delete(item)
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(self.frames.get("backups", self.container))
-        while retry_count < max_retries:
-            try:
-                db = self.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("""
-                    SELECT id, table_name, record_id, backup_time
-                    FROM backup_logs
-                    WHERE record_id = %s
-                    ORDER BY backup_time DESC
-                    LIMIT 50
-                """, (self.current_user_id,))
-                backups = cursor.fetchall()
-                for backup in backups:
-                    tree.insert("", "end", values=(
-                        backup[0],
-                        backup[1],
-                        backup[2],
-                        backup[3]
-                    ))
-                db.commit()
-                break
-            except mysql.connector.Error as e:
-                logging.error(f"Load backups error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    messagebox.showerror("Error", f"Failed to load backups after retries: {e}")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        user_id = self.current_user_id
+        owner = self.frames.get("backups", self.container)
+
+        def show(backups):
+            for item in tree.get_children():
+                tree.delete(item)
+            for backup in backups:
+                tree.insert("", "end", values=(
+                    backup[0],
+                    backup[1],
+                    backup[2],
+                    backup[3]
+                ))
+
+        def failed(e):
+            logging.error(f"Load backups error: {e}")
+            messagebox.showerror("Error", f"Failed to load backups: {e}")
+
+        self.tasks.submit(
+            lambda: self.executor.run("load_backups", lambda db: self.repos.backups.list(user_id, db=db)),
+            show, failed, owner=owner, loading=owner
+        )
 
     def generate_password_dialog(self):
         dialog = tk.Toplevel(self.root)
@@ -0,0 +1,833 @@
+import hashlib
+import logging
+import mysql.connector
+from indexes import index_objects, drop_index
+
+# Versioned schema migrations. Each entry is (version, name, statements) and
+# must never be edited once released; add a new version instead. The applied
+# checksum of every version is recorded in schema_version and verified on start.
+#
+# MySQL commits every DDL statement on its own, so a migration that fails part
+# way is left half applied, unrecorded, and is run again from the top on the
+# next start. Every statement must therefore be safe to repeat: DDL that is not
+# (DROP FOREIGN KEY, ADD COLUMN, ...) is wrapped in unless(), which skips it
+# when information_schema shows it has already taken effect.
+
+
+def unless(applied, statement):
+    """statement, skipped when the applied query returns a nonzero count."""
+    return (statement, applied)
+
+
+def column_exists(table, column):
+    return ("SELECT COUNT(*) FROM information_schema.COLUMNS "
+            f"WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = '{table}' AND COLUMN_NAME = '{column}'")
+
+
+MIGRATIONS = [
+    (1, "initial_schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(255) UNIQUE NOT NULL,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_profiles (
+            user_id INT PRIMARY KEY,
+            username VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            full_name VARCHAR(255),
+            phone VARCHAR(20),
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_settings (
+            user_id INT PRIMARY KEY,
+            dark_mode BOOLEAN DEFAULT FALSE,
+            notifications_enabled BOOLEAN DEFAULT TRUE,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_preferences (
+            user_id INT PRIMARY KEY,
+            password_length INT DEFAULT 16,
+            auto_lock_timeout INT DEFAULT 10,
+            require_uppercase BOOLEAN DEFAULT TRUE,
+            require_numbers BOOLEAN DEFAULT TRUE,
+            require_special_chars BOOLEAN DEFAULT TRUE,
+            default_sharing_method ENUM('qr_code', 'secure_link') DEFAULT 'qr_code',
+            password_check_interval INT DEFAULT 30,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS passwords (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT,
+            service VARCHAR(255) NOT NULL,
+            username VARCHAR(255),
+            password VARCHAR(255) NOT NULL,
+            expiration_date DATE,
+            password_strength VARCHAR(50),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS qr_codes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT,
+            service VARCHAR(255) NOT NULL,
+            username VARCHAR(255),
+            qr_code_data VARCHAR(255),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS access_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT,
+            device_name VARCHAR(255) NOT NULL,
+            ip_address VARCHAR(45),
+            access_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+            location VARCHAR(100),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS shared_passwords (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT,
+            service VARCHAR(255) NOT NULL,
+            recipient VARCHAR(255),
+            shared_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            share_status VARCHAR(50) DEFAULT 'Pending',
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS connected_devices (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT,
+            device_name VARCHAR(255) NOT NULL,
+            device_type VARCHAR(50),
+            status VARCHAR(50) DEFAULT 'Active',
+            last_seen DATETIME DEFAULT CURRENT_TIMESTAMP,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS expiration_alerts (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT,
+            password_id INT,
+            service VARCHAR(255),
+            expiration_date DATE,
+            status VARCHAR(50),
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (password_id) REFERENCES passwords(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            table_name VARCHAR(255) NOT NULL,
+            action ENUM('INSERT', 'UPDATE', 'DELETE') NOT NULL,
+            record_id INT NOT NULL,
+            user_id INT,
+            change_details TEXT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS backup_logs (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            table_name VARCHAR(255) NOT NULL,
+            record_id INT NOT NULL,
+            data TEXT NOT NULL,
+            backup_time DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS file_vault (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT,
+            file_name VARCHAR(255) NOT NULL,
+            encrypted_data LONGBLOB NOT NULL,
+            file_size BIGINT NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            title VARCHAR(255) NOT NULL,
+            message TEXT NOT NULL,
+            is_read BOOLEAN DEFAULT FALSE,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+    ]),
+    (2, "schema_objects_track_indexes", [
+        "ALTER TABLE schema_routines MODIFY kind VARCHAR(20) NOT NULL",
+    ]),
+    (3, "idempotency_keys", [
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            idem_key CHAR(32) PRIMARY KEY,
+            operation VARCHAR(64) NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            KEY idx_idempotency_keys_created (created_at)
+        )
+        """,
+    ]),
+    # Version 4 partitioned audit_logs by month. That rewrites the whole table,
+    # so it is no longer run at startup but once, by hand (see audit_retention.py).
+    # Audit rows for updates now come from the application (audit.py). The
+    # passwords trigger only bumped updated_at, by updating its own table,
+    # which MySQL rejects (error 1442); the column attribute does it instead.
+    (5, "application_side_audit", [
+        "DROP TRIGGER IF EXISTS passwords_after_update",
+        "DELETE FROM schema_routines WHERE name = 'passwords_after_update'",
+        "ALTER TABLE passwords MODIFY updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP",
+    ]),
+    # idx_expiration_alerts_user_password becomes unique in the index catalogue;
+    # drop duplicates left by the old delete-and-reinsert refresh first.
+    (6, "dedupe_expiration_alerts", [
+        """
+        DELETE a FROM expiration_alerts a
+        JOIN expiration_alerts b
+          ON a.user_id = b.user_id AND a.password_id = b.password_id AND a.id < b.id
+        """,
+    ]),
+    # Dashboard summary, one row per user. The counters are kept current by the
+    # user_stats_* triggers below and checked by UserStatsRepo.reconcile.
+    (7, "user_stats", [
+        """
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INT PRIMARY KEY,
+            password_count INT NOT NULL DEFAULT 0,
+            file_count INT NOT NULL DEFAULT 0,
+            file_bytes BIGINT NOT NULL DEFAULT 0,
+            last_login DATETIME NULL,
+            last_backup DATETIME NULL,
+            security_score TINYINT AS (
+                IF(password_count > 0, 50, 0) + IF(last_login IS NOT NULL, 30, 0)
+            ) STORED,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        INSERT INTO user_stats (user_id, password_count, file_count, file_bytes, last_backup)
+        SELECT u.id,
+               (SELECT COUNT(*) FROM passwords p WHERE p.user_id = u.id),
+               (SELECT COUNT(*) FROM file_vault f WHERE f.user_id = u.id),
+               (SELECT COALESCE(SUM(f.file_size), 0) FROM file_vault f WHERE f.user_id = u.id),
+               (SELECT MAX(b.backup_time) FROM backup_logs b WHERE b.record_id = u.id)
+        FROM users u
+        """,
+    ]),
+    # Vault files are stored as content-defined chunks, deduplicated per user
+    # and sealed with data keys wrapped by a key derived from the user's
+    # password (see file_vault.py and envelope.py); encrypted_data stays empty.
+    # storage_format 0 marks the rows written before: their blobs were
+    # encrypted with a key generated per run and never kept, so no one can
+    # read them. They are deleted (apply_migration logs how many), and
+    # user_stats is recounted from what is left. FileVaultRepo replaces the
+    # AddFile and DeleteFile procedures.
+    (8, "vault_chunks", [
+        unless(column_exists("file_vault", "storage_format"), """
+        ALTER TABLE file_vault
+            ADD COLUMN storage_format TINYINT NOT NULL DEFAULT 0,
+            ADD COLUMN chunk_count INT NOT NULL DEFAULT 0,
+            ADD COLUMN manifest BINARY(32) NULL,
+            ADD COLUMN codec VARCHAR(8) NOT NULL DEFAULT 'none'
+        """),
+        "DELETE FROM file_vault WHERE storage_format = 0",
+        """
+        CREATE TABLE IF NOT EXISTS user_keys (
+            user_id INT PRIMARY KEY,
+            salt BINARY(16) NOT NULL,
+            kdf_n INT NOT NULL,
+            wrapped_index_key BINARY(40) NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS vault_keys (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            wrapped_key BINARY(40) NOT NULL,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS vault_chunks (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            user_id INT NOT NULL,
+            digest BINARY(32) NOT NULL,
+            key_id BIGINT NOT NULL,
+            stored_size INT NOT NULL,
+            nonce BINARY(12) NOT NULL,
+            data MEDIUMBLOB NOT NULL,
+            refcount INT NOT NULL DEFAULT 1,
+            FOREIGN KEY (user_id) REFERENCES users(id),
+            FOREIGN KEY (key_id) REFERENCES vault_keys(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS file_chunks (
+            file_id INT NOT NULL,
+            seq INT NOT NULL,
+            chunk_id BIGINT NOT NULL,
+            PRIMARY KEY (file_id, seq),
+            FOREIGN KEY (file_id) REFERENCES file_vault(id) ON DELETE CASCADE,
+            FOREIGN KEY (chunk_id) REFERENCES vault_chunks(id)
+        )
+        """,
+        unless(column_exists("user_stats", "stored_bytes"),
+               "ALTER TABLE user_stats ADD COLUMN stored_bytes BIGINT NOT NULL DEFAULT 0"),
+        """
+        UPDATE user_stats SET
+            file_count = (SELECT COUNT(*) FROM file_vault f WHERE f.user_id = user_stats.user_id),
+            file_bytes = (SELECT COALESCE(SUM(f.file_size), 0) FROM file_vault f WHERE f.user_id = user_stats.user_id)
+        """,
+        "DROP PROCEDURE IF EXISTS AddFile",
+        "DROP PROCEDURE IF EXISTS DeleteFile",
+        "DELETE FROM schema_routines WHERE name IN ('AddFile', 'DeleteFile')",
+    ]),
+    # The single-row procedures were superseded by repository SQL (which audits
+    # and runs in the caller's unit of work) and nothing calls them any more.
+    (9, "drop_unused_procedures", [
+        "DROP PROCEDURE IF EXISTS AddPassword",
+        "DROP PROCEDURE IF EXISTS DeletePassword",
+        "DROP PROCEDURE IF EXISTS AddQRCode",
+        "DROP PROCEDURE IF EXISTS DeleteQRCode",
+        "DROP PROCEDURE IF EXISTS AddAccessLog",
+        "DROP PROCEDURE IF EXISTS DeleteAccessLog",
+        "DROP PROCEDURE IF EXISTS SharePassword",
+        "DROP PROCEDURE IF EXISTS DeleteSharedPassword",
+        "DROP PROCEDURE IF EXISTS AddConnectedDevice",
+        "DROP PROCEDURE IF EXISTS DeleteConnectedDevice",
+        "DROP PROCEDURE IF EXISTS SetExpirationAlert",
+        "DROP PROCEDURE IF EXISTS DeleteExpirationAlert",
+        """
+        DELETE FROM schema_routines WHERE name IN (
+            'AddPassword', 'DeletePassword', 'AddQRCode', 'DeleteQRCode',
+            'AddAccessLog', 'DeleteAccessLog', 'SharePassword', 'DeleteSharedPassword',
+            'AddConnectedDevice', 'DeleteConnectedDevice', 'SetExpirationAlert', 'DeleteExpirationAlert'
+        )
+        """,
+    ]),
+]
+
+# Triggers and stored procedures are tracked separately: they are recreated
+# only when the checksum of their definition changes, instead of on every launch.
+ROUTINES = [
+    ("TRIGGER", "expiration_alerts_after_insert", """
+        CREATE TRIGGER expiration_alerts_after_insert
+        AFTER INSERT ON expiration_alerts
+        FOR EACH ROW
+        BEGIN
+            DECLARE notif_title VARCHAR(255);
+            DECLARE notif_msg TEXT;
+            SET notif_title = CONCAT('Password ', NEW.status);
+            SET notif_msg = CONCAT(
+                "Your password for '", NEW.service, "' is ",
+                LOWER(NEW.status), " (expires on ",
+                DATE_FORMAT(NEW.expiration_date, '%Y-%m-%d'), ")."
+            );
+            INSERT INTO notifications (user_id, title, message)
+            VALUES (NEW.user_id, notif_title, notif_msg);
+        END
+    """),
+    ("TRIGGER", "expiration_alerts_after_update", """
+        CREATE TRIGGER expiration_alerts_after_update
+        AFTER UPDATE ON expiration_alerts
+        FOR EACH ROW
+        BEGIN
+            DECLARE notif_title VARCHAR(255);
+            DECLARE notif_msg TEXT;
+            IF NOT (OLD.status <=> NEW.status) THEN
+                SET notif_title = CONCAT('Password ', NEW.status);
+                SET notif_msg = CONCAT(
+                    "Your password for '", NEW.service, "' is ",
+                    LOWER(NEW.status), " (expires on ",
+                    DATE_FORMAT(NEW.expiration_date, '%Y-%m-%d'), ")."
+                );
+                INSERT INTO notifications (user_id, title, message)
+                VALUES (NEW.user_id, notif_title, notif_msg);
+            END IF;
+        END
+    """),
+    ("TRIGGER", "users_after_insert", """
+        CREATE TRIGGER users_after_insert
+        AFTER INSERT ON users
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO user_settings (user_id, dark_mode, notifications_enabled)
+            VALUES (NEW.id, FALSE, TRUE);
+            INSERT INTO user_preferences (
+                user_id, password_length, auto_lock_timeout, require_uppercase,
+                require_numbers, require_special_chars, default_sharing_method, password_check_interval
+            )
+            VALUES (NEW.id, 16, 10, TRUE, TRUE, TRUE, 'qr_code', 30);
+            INSERT INTO user_stats (user_id) VALUES (NEW.id);
+            INSERT INTO audit_logs (table_name, action, record_id, user_id, change_details)
+            VALUES ('users', 'INSERT', NEW.id, NEW.id, JSON_OBJECT(
+                'username', NEW.username, 'email', NEW.email
+            ));
+        END
+    """),
+    ("TRIGGER", "user_profiles_before_update", """
+        CREATE TRIGGER user_profiles_before_update
+        BEFORE UPDATE ON user_profiles
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO backup_logs (table_name, record_id, data)
+            VALUES ('user_profiles', OLD.user_id, JSON_OBJECT(
+                'username', OLD.username, 'email', OLD.email,
+                'full_name', OLD.full_name, 'phone', OLD.phone
+            ));
+        END
+    """),
+    ("TRIGGER", "user_settings_before_update", """
+        CREATE TRIGGER user_settings_before_update
+        BEFORE UPDATE ON user_settings
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO backup_logs (table_name, record_id, data)
+            VALUES ('user_settings', OLD.user_id, JSON_OBJECT(
+                'dark_mode', OLD.dark_mode, 'notifications_enabled', OLD.notifications_enabled
+            ));
+        END
+    """),
+    ("TRIGGER", "user_preferences_before_update", """
+        CREATE TRIGGER user_preferences_before_update
+        BEFORE UPDATE ON user_preferences
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO backup_logs (table_name, record_id, data)
+            VALUES ('user_preferences', OLD.user_id, JSON_OBJECT(
+                'password_length', OLD.password_length,
+                'auto_lock_timeout', OLD.auto_lock_timeout,
+                'require_uppercase', OLD.require_uppercase,
+                'require_numbers', OLD.require_numbers,
+                'require_special_chars', OLD.require_special_chars,
+                'default_sharing_method', OLD.default_sharing_method,
+                'password_check_interval', OLD.password_check_interval
+            ));
+        END
+    """),
+    ("TRIGGER", "file_vault_before_delete", """
+        CREATE TRIGGER file_vault_before_delete
+        BEFORE DELETE ON file_vault
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO audit_logs (table_name, action, record_id, user_id, change_details)
+            VALUES ('file_vault', 'DELETE', OLD.id, OLD.user_id, JSON_OBJECT(
+                'file_name', OLD.file_name, 'file_size', OLD.file_size
+            ));
+        END
+    """),
+    ("TRIGGER", "user_stats_passwords_after_insert", """
+        CREATE TRIGGER user_stats_passwords_after_insert
+        AFTER INSERT ON passwords
+        FOR EACH ROW
+        UPDATE user_stats SET password_count = password_count + 1 WHERE user_id = NEW.user_id
+    """),
+    ("TRIGGER", "user_stats_passwords_after_delete", """
+        CREATE TRIGGER user_stats_passwords_after_delete
+        AFTER DELETE ON passwords
+        FOR EACH ROW
+        UPDATE user_stats SET password_count = password_count - 1 WHERE user_id = OLD.user_id
+    """),
+    ("TRIGGER", "user_stats_file_vault_after_insert", """
+        CREATE TRIGGER user_stats_file_vault_after_insert
+        AFTER INSERT ON file_vault
+        FOR EACH ROW
+        UPDATE user_stats
+        SET file_count = file_count + 1, file_bytes = file_bytes + NEW.file_size
+        WHERE user_id = NEW.user_id
+    """),
+    ("TRIGGER", "user_stats_file_vault_after_delete", """
+        CREATE TRIGGER user_stats_file_vault_after_delete
+        AFTER DELETE ON file_vault
+        FOR EACH ROW
+        UPDATE user_stats
+        SET file_count = file_count - 1, file_bytes = file_bytes - OLD.file_size
+        WHERE user_id = OLD.user_id
+    """),
+    ("TRIGGER", "user_stats_vault_chunks_after_insert", """
+        CREATE TRIGGER user_stats_vault_chunks_after_insert
+        AFTER INSERT ON vault_chunks
+        FOR EACH ROW
+        UPDATE user_stats SET stored_bytes = stored_bytes + NEW.stored_size WHERE user_id = NEW.user_id
+    """),
+    ("TRIGGER", "user_stats_vault_chunks_after_delete", """
+        CREATE TRIGGER user_stats_vault_chunks_after_delete
+        AFTER DELETE ON vault_chunks
+        FOR EACH ROW
+        UPDATE user_stats SET stored_bytes = stored_bytes - OLD.stored_size WHERE user_id = OLD.user_id
+    """),
+    ("TRIGGER", "user_stats_backup_logs_after_insert", """
+        CREATE TRIGGER user_stats_backup_logs_after_insert
+        AFTER INSERT ON backup_logs
+        FOR EACH ROW
+        UPDATE user_stats
+        SET last_backup = GREATEST(COALESCE(last_backup, NEW.backup_time), NEW.backup_time)
+        WHERE user_id = NEW.record_id
+    """),
+    # Procedures run in the caller's transaction: none of them starts, commits or
+    # rolls back one, so a CALL is part of the unit of work around it.
+    ("PROCEDURE", "UpdateUserProfile", """
+        CREATE PROCEDURE UpdateUserProfile(
+            IN p_user_id INT,
+            IN p_username VARCHAR(255),
+            IN p_email VARCHAR(255),
+            IN p_full_name VARCHAR(255),
+            IN p_phone VARCHAR(20)
+        )
+        BEGIN
+            INSERT INTO user_profiles (user_id, username, email, full_name, phone)
+            VALUES (p_user_id, p_username, p_email, p_full_name, p_phone)
+            ON DUPLICATE KEY UPDATE
+                username = p_username,
+                email = p_email,
+                full_name = p_full_name,
+                phone = p_phone;
+        END
+    """),
+    ("PROCEDURE", "UpdateUserSettings", """
+        CREATE PROCEDURE UpdateUserSettings(
+            IN p_user_id INT,
+            IN p_dark_mode BOOLEAN,
+            IN p_notifications_enabled BOOLEAN
+        )
+        BEGIN
+            INSERT INTO user_settings (user_id, dark_mode, notifications_enabled)
+            VALUES (p_user_id, p_dark_mode, p_notifications_enabled)
+            ON DUPLICATE KEY UPDATE
+                dark_mode = p_dark_mode,
+                notifications_enabled = p_notifications_enabled;
+        END
+    """),
+    ("PROCEDURE", "UpdateUserPreferences", """
+        CREATE PROCEDURE UpdateUserPreferences(
+            IN p_user_id INT,
+            IN p_password_length INT,
+            IN p_auto_lock_timeout INT,
+            IN p_require_uppercase BOOLEAN,
+            IN p_require_numbers BOOLEAN,
+            IN p_require_special_chars BOOLEAN,
+            IN p_default_sharing_method ENUM('qr_code', 'secure_link'),
+            IN p_password_check_interval INT
+        )
+        BEGIN
+            INSERT INTO user_preferences (
+                user_id, password_length, auto_lock_timeout, require_uppercase,
+                require_numbers, require_special_chars, default_sharing_method, password_check_interval
+            )
+            VALUES (
+                p_user_id, p_password_length, p_auto_lock_timeout, p_require_uppercase,
+                p_require_numbers, p_require_special_chars, p_default_sharing_method, p_password_check_interval
+            )
+            ON DUPLICATE KEY UPDATE
+                password_length = p_password_length,
+                auto_lock_timeout = p_auto_lock_timeout,
+                require_uppercase = p_require_uppercase,
+                require_numbers = p_require_numbers,
+                require_special_chars = p_require_special_chars,
+                default_sharing_method = p_default_sharing_method,
+                password_check_interval = p_password_check_interval;
+        END
+    """),
+    # Set-based refresh of one user's alerts: drops alerts whose password left the
+    # window and upserts only rows that are new or whose status, date or service
+    # changed. The alert triggers turn inserts and status changes into notifications.
+    ("PROCEDURE", "RefreshExpirationAlerts", """
+        CREATE PROCEDURE RefreshExpirationAlerts(
+            IN p_user_id INT,
+            IN p_today DATE,
+            IN p_window_days INT
+        )
+        BEGIN
+            DELETE a FROM expiration_alerts a
+            LEFT JOIN passwords p ON p.id = a.password_id
+            WHERE a.user_id = p_user_id
+              AND (p.id IS NULL
+                   OR p.expiration_date IS NULL
+                   OR p.expiration_date > p_today + INTERVAL p_window_days DAY);
+            INSERT INTO expiration_alerts (user_id, password_id, service, expiration_date, status)
+            SELECT p.user_id, p.id, p.service, p.expiration_date,
+                   IF(p.expiration_date <= p_today, 'Expired', 'Expiring Soon')
+            FROM passwords p
+            LEFT JOIN expiration_alerts a ON a.user_id = p.user_id AND a.password_id = p.id
+            WHERE p.user_id = p_user_id
+              AND p.expiration_date IS NOT NULL
+              AND p.expiration_date <= p_today + INTERVAL p_window_days DAY
+              AND (a.id IS NULL
+                   OR NOT (a.status <=> IF(p.expiration_date <= p_today, 'Expired', 'Expiring Soon'))
+                   OR NOT (a.expiration_date <=> p.expiration_date)
+                   OR NOT (a.service <=> p.service))
+            ON DUPLICATE KEY UPDATE
+                service = VALUES(service),
+                expiration_date = VALUES(expiration_date),
+                status = VALUES(status),
+                updated_at = CURRENT_TIMESTAMP;
+        END
+    """),
+    ("PROCEDURE", "BackupUserData", """
+        CREATE PROCEDURE BackupUserData(
+            IN p_user_id INT
+        )
+        BEGIN
+            INSERT INTO backup_logs (table_name, record_id, data)
+            SELECT 'user_profiles', user_id, JSON_OBJECT(
+                'username', username, 'email', email,
+                'full_name', full_name, 'phone', phone
+            )
+            FROM user_profiles WHERE user_id = p_user_id;
+            INSERT INTO backup_logs (table_name, record_id, data)
+            SELECT 'user_settings', user_id, JSON_OBJECT(
+                'dark_mode', dark_mode, 'notifications_enabled', notifications_enabled
+            )
+            FROM user_settings WHERE user_id = p_user_id;
+            INSERT INTO backup_logs (table_name, record_id, data)
+            SELECT 'user_preferences', user_id, JSON_OBJECT(
+                'password_length', password_length,
+                'auto_lock_timeout', auto_lock_timeout,
+                'require_uppercase', require_uppercase,
+                'require_numbers', require_numbers,
+                'require_special_chars', require_special_chars,
+                'default_sharing_method', default_sharing_method,
+                'password_check_interval', password_check_interval
+            )
+            FROM user_preferences WHERE user_id = p_user_id;
+        END
+    """),
+    ("PROCEDURE", "RestoreUserData", """
+        CREATE PROCEDURE RestoreUserData(
+            IN p_backup_id INT
+        )
+        BEGIN
+            DECLARE v_table_name VARCHAR(255);
+            DECLARE v_record_id INT;
+            DECLARE v_data JSON;
+            SELECT table_name, record_id, data
+            INTO v_table_name, v_record_id, v_data
+            FROM backup_logs WHERE id = p_backup_id;
+            IF v_table_name = 'user_profiles' THEN
+                INSERT INTO user_profiles (user_id, username, email, full_name, phone)
+                VALUES (
+                    v_record_id,
+                    JSON_UNQUOTE(JSON_EXTRACT(v_data, '$.username')),
+                    JSON_UNQUOTE(JSON_EXTRACT(v_data, '$.email')),
+                    JSON_UNQUOTE(JSON_EXTRACT(v_data, '$.full_name')),
+                    JSON_UNQUOTE(JSON_EXTRACT(v_data, '$.phone'))
+                )
+                ON DUPLICATE KEY UPDATE
+                    username = JSON_UNQUOTE(JSON_EXTRACT(v_data, '$.username')),
+                    email = JSON_UNQUOTE(JSON_EXTRACT(v_data, '$.email')),
+                    full_name = JSON_UNQUOTE(JSON_EXTRACT(v_data, '$.full_name')),
+                    phone = JSON_UNQUOTE(JSON_EXTRACT(v_data, '$.phone'));
+            ELSEIF v_table_name = 'user_settings' THEN
+                INSERT INTO user_settings (user_id, dark_mode, notifications_enabled)
+                VALUES (
+                    v_record_id,
+                    JSON_EXTRACT(v_data, '$.dark_mode'),
+                    JSON_EXTRACT(v_data, '$.notifications_enabled')
+                )
+                ON DUPLICATE KEY UPDATE
+                    dark_mode = JSON_EXTRACT(v_data, '$.dark_mode'),
+                    notifications_enabled = JSON_EXTRACT(v_data, '$.notifications_enabled');
+            ELSEIF v_table_name = 'user_preferences' THEN
+                INSERT INTO user_preferences (
+                    user_id, password_length, auto_lock_timeout, require_uppercase,
+                    require_numbers, require_special_chars, default_sharing_method, password_check_interval
+                )
+                VALUES (
+                    v_record_id,
+                    JSON_EXTRACT(v_data, '$.password_length'),
+                    JSON_EXTRACT(v_data, '$.auto_lock_timeout'),
+                    JSON_EXTRACT(v_data, '$.require_uppercase'),
+                    JSON_EXTRACT(v_data, '$.require_numbers'),
+                    JSON_EXTRACT(v_data, '$.require_special_chars'),
+                    JSON_UNQUOTE(JSON_EXTRACT(v_data, '$.default_sharing_method')),
+                    JSON_EXTRACT(v_data, '$.password_check_interval')
+                )
+                ON DUPLICATE KEY UPDATE
+                    password_length = JSON_EXTRACT(v_data, '$.password_length'),
+                    auto_lock_timeout = JSON_EXTRACT(v_data, '$.auto_lock_timeout'),
+                    require_uppercase = JSON_EXTRACT(v_data, '$.require_uppercase'),
+                    require_numbers = JSON_EXTRACT(v_data, '$.require_numbers'),
+                    require_special_chars = JSON_EXTRACT(v_data, '$.require_special_chars'),
+                    default_sharing_method = JSON_UNQUOTE(JSON_EXTRACT(v_data, '$.default_sharing_method')),
+                    password_check_interval = JSON_EXTRACT(v_data, '$.password_check_interval');
+            END IF;
+        END
+    """),
+]
+
+# Everything reconciled by checksum: routines plus the declared index catalogue.
+SCHEMA_OBJECTS = ROUTINES + index_objects()
+
+MIGRATION_LOCK = "passvault_schema_migration"
+MIGRATION_LOCK_TIMEOUT = 30
+
+
+class MigrationError(Exception):
+    pass
+
+
+def checksum(sql):
+    """Checksum a statement, ignoring indentation and blank lines."""
+    normalized = "\n".join(line.strip() for line in sql.strip().splitlines() if line.strip())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def migration_checksum(statements):
+    return checksum("\n;\n".join(
+        statement if isinstance(statement, str) else "\n".join(statement) for statement in statements
+    ))
+
+
+def read_schema_state(cursor):
+    """Return ({version: checksum}, {routine: checksum}) in a single round trip,
+    or None when the tracking tables do not exist yet."""
+    try:
+        cursor.execute("""
+            SELECT 'migration', CAST(version AS CHAR), checksum FROM schema_version
+            UNION ALL
+            SELECT 'routine', name, checksum FROM schema_routines
+        """)
+    except mysql.connector.ProgrammingError as err:
+        if err.errno == 1146:  # ER_NO_SUCH_TABLE
+            return None
+        raise
+    versions, routines = {}, {}
+    for kind, key, digest in cursor.fetchall():
+        if kind == "migration":
+            versions[int(key)] = digest
+        else:
+            routines[key] = digest
+    return versions, routines
+
+
+def pending_work(state, all_migrations=MIGRATIONS, schema_objects=SCHEMA_OBJECTS):
+    """Return (migrations, routines) that still need to be applied for the given state."""
+    if state is None:
+        return list(all_migrations), list(schema_objects)
+    versions, routines = state
+    for version, name, statements in all_migrations:
+        if version in versions and versions[version] != migration_checksum(statements):
+            raise MigrationError(f"Migration {version} ({name}) was modified after it was applied.")
+    migrations = [m for m in all_migrations if m[0] not in versions]
+    changed = [r for r in schema_objects if routines.get(r[1]) != checksum(r[2])]
+    return migrations, changed
+
+
+def create_tracking_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INT PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_routines (
+            name VARCHAR(64) PRIMARY KEY,
+            kind ENUM('TRIGGER', 'PROCEDURE') NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def apply_migration(cursor, version, name, statements):
+    logging.info(f"Applying schema migration {version}: {name}")
+    for statement in statements:
+        if not isinstance(statement, str):
+            statement, applied = statement
+            cursor.execute(applied)
+            if cursor.fetchone()[0]:
+                logging.info(f"Migration {version}: skipping a statement that already took effect")
+                continue
+        cursor.execute(statement)
+        if statement.lstrip().startswith("DELETE FROM") and cursor.rowcount > 0:
+            logging.warning(f"Migration {version} ({name}) deleted {cursor.rowcount} row(s): "
+                            f"{' '.join(statement.split())}")
+    cursor.execute(
+        "INSERT INTO schema_version (version, name, checksum) VALUES (%s, %s, %s)",
+        (version, name, migration_checksum(statements))
+    )
+
+
+def apply_routine(cursor, kind, name, sql):
+    logging.info(f"Recreating {kind.lower()} {name} (definition changed)")
+    if kind == "INDEX":
+        drop_index(cursor, name)
+    else:
+        cursor.execute(f"DROP {kind} IF EXISTS {name}")
+    cursor.execute(sql)
+    cursor.execute(
+        "INSERT INTO schema_routines (name, kind, checksum) VALUES (%s, %s, %s) "
+        "ON DUPLICATE KEY UPDATE kind = VALUES(kind), checksum = VALUES(checksum), applied_at = CURRENT_TIMESTAMP",
+        (name, kind, checksum(sql))
+    )
+
+
+def migrate(db):
+    """Bring the schema up to date. A warm start with nothing to do costs one query."""
+    cursor = db.cursor()
+    try:
+        migrations, routines = pending_work(read_schema_state(cursor))
+        if not migrations and not routines:
+            logging.info("Database schema is up to date.")
+            return False
+
+        # Serialize concurrent clients; re-read the state once the lock is held
+        # since another client may have finished the work while we waited.
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+        if cursor.fetchone()[0] != 1:
+            raise MigrationError("Timed out waiting for the schema migration lock.")
+        try:
+            create_tracking_tables(cursor)
+            migrations, routines = pending_work(read_schema_state(cursor))
+            for version, name, statements in migrations:
+                apply_migration(cursor, version, name, statements)
+                db.commit()
+            for kind, name, sql in routines:
+                apply_routine(cursor, kind, name, sql)
+                db.commit()
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+            cursor.fetchone()
+        logging.info(f"Applied {len(migrations)} migration(s) and {len(routines)} routine update(s).")
+        return True
+    finally:
+        cursor.close()
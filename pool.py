@@ -0,0 +1,291 @@
+import threading
+import time
+import logging
+from collections import deque, OrderedDict
+import mysql.connector
+from mysql.connector.errors import PoolError
+from dialects import MYSQL
+
+
+class PooledConnection:
+    """Proxy handed out by ElasticConnectionPool; close() returns it to the pool."""
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+        self._after_commit = []
+
+    @property
+    def dialect(self):
+        return self._pool.dialect
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise PoolError("Connection has already been returned to the pool.")
+        return getattr(self._connection, name)
+
+    def prepared_cursor(self, sql):
+        """Server-side prepared cursor for sql, reused across checkouts of this connection."""
+        if self._connection is None:
+            raise PoolError("Connection has already been returned to the pool.")
+        return self._pool.prepared_cursor(self._connection, sql)
+
+    def after_commit(self, callback):
+        """Run callback once the current transaction commits; dropped on rollback."""
+        self._after_commit.append(callback)
+
+    def commit(self):
+        if self._connection is None:
+            raise PoolError("Connection has already been returned to the pool.")
+        self._connection.commit()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logging.error(f"After-commit callback failed: {e}")
+
+    def rollback(self):
+        self._after_commit = []
+        if self._connection is None:
+            raise PoolError("Connection has already been returned to the pool.")
+        self._connection.rollback()
+
+    def close(self):
+        self._after_commit = []
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+
+class ElasticConnectionPool:
+    """Connection pool that grows between min_size and max_size on demand.
+
+    Callers that find the pool exhausted wait in a bounded queue for up to
+    checkout_timeout seconds instead of failing immediately. Connections idle
+    for longer than ping_after seconds are pinged before being handed out, and
+    a reaper closes connections idle for longer than idle_timeout while the
+    pool is above min_size.
+
+    connector(**connect_args) opens a raw connection (mysql.connector.connect
+    by default) and dialect describes the engine behind it.
+    """
+
+    def __init__(self, connect_args, min_size=2, max_size=10, checkout_timeout=10.0,
+                 max_waiters=32, idle_timeout=300.0, ping_after=30.0, statement_cache_size=64,
+                 connector=mysql.connector.connect, dialect=MYSQL):
+        self.connect_args = connect_args
+        self.connector = connector
+        self.dialect = dialect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.max_waiters = max_waiters
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+        self.statement_cache_size = statement_cache_size
+
+        self._lock = threading.Condition()
+        self._idle = deque()  # (connection, returned_at), most recently used on the right
+        self._size = 0
+        self._waiters = 0
+        self._closed = False
+        self._statements = {}  # raw connection -> OrderedDict(sql -> prepared cursor)
+        self._counters = {
+            "checkouts": 0,
+            "checkout_ms_total": 0.0,
+            "checkout_ms_max": 0.0,
+            "waits": 0,
+            "wait_ms_total": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "reaped": 0,
+            "ping_failures": 0,
+            "statement_cache_hits": 0,
+            "statement_cache_misses": 0,
+        }
+
+        for _ in range(min_size):
+            connection = self._connect()
+            with self._lock:
+                self._size += 1
+                self._idle.append((connection, time.monotonic()))
+
+        self._reaper = threading.Thread(target=self._reap_loop, name="db-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def _connect(self):
+        connection = self.connector(**self.connect_args)
+        with self._lock:
+            self._counters["created"] += 1
+        return connection
+
+    def _discard(self, connection):
+        with self._lock:
+            self._statements.pop(connection, None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._counters["discarded"] += 1
+            self._lock.notify()
+
+    def get_connection(self, timeout=None):
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        while True:
+            connection, idle_since, waited = self._acquire_slot(deadline)
+            if connection is None:
+                try:
+                    connection = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._size -= 1
+                        self._lock.notify()
+                    raise
+            elif time.monotonic() - idle_since > self.ping_after and not self._ping(connection):
+                self._discard(connection)
+                continue
+            elapsed_ms = (time.monotonic() - started) * 1000
+            with self._lock:
+                self._counters["checkouts"] += 1
+                self._counters["checkout_ms_total"] += elapsed_ms
+                self._counters["checkout_ms_max"] = max(self._counters["checkout_ms_max"], elapsed_ms)
+                if waited:
+                    self._counters["waits"] += 1
+                    self._counters["wait_ms_total"] += waited * 1000
+            return PooledConnection(self, connection)
+
+    def _acquire_slot(self, deadline):
+        """Return (idle connection or None to create one, idle_since, seconds waited)."""
+        waited = 0.0
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise PoolError("Connection pool is closed.")
+                if self._idle:
+                    connection, idle_since = self._idle.pop()
+                    return connection, idle_since, waited
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None, waited
+                if self._waiters >= self.max_waiters:
+                    self._counters["timeouts"] += 1
+                    raise PoolError("Connection pool exhausted and wait queue is full.")
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._counters["timeouts"] += 1
+                    raise PoolError(f"Timed out waiting for a database connection "
+                                    f"(pool size {self._size}, max {self.max_size}).")
+                self._waiters += 1
+                wait_started = time.monotonic()
+                try:
+                    self._lock.wait(remaining)
+                finally:
+                    self._waiters -= 1
+                    waited += time.monotonic() - wait_started
+
+    def _ping(self, connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Exception as e:
+            logging.warning(f"Discarding dead pooled connection: {e}")
+            with self._lock:
+                self._counters["ping_failures"] += 1
+            return False
+
+    def prepared_cursor(self, connection, sql):
+        # Only the thread holding the connection touches its own cache, so the lock guards
+        # the shared map of caches and the counters, not the cache itself.
+        with self._lock:
+            cache = self._statements.setdefault(connection, OrderedDict())
+        cursor = cache.get(sql)
+        if cursor is not None:
+            cache.move_to_end(sql)
+            with self._lock:
+                self._counters["statement_cache_hits"] += 1
+            return cursor
+        cursor = connection.cursor(prepared=True)
+        cache[sql] = cursor
+        if len(cache) > self.statement_cache_size:
+            _, evicted = cache.popitem(last=False)
+            try:
+                evicted.close()  # deallocates the server-side statement
+            except Exception:
+                pass
+        with self._lock:
+            self._counters["statement_cache_misses"] += 1
+        return cursor
+
+    def release(self, connection):
+        try:
+            if connection.in_transaction:
+                connection.rollback()
+        except Exception:
+            self._discard(connection)
+            return
+        with self._lock:
+            if self._closed:
+                self._size -= 1
+                connection.close()
+                return
+            self._idle.append((connection, time.monotonic()))
+            self._lock.notify()
+
+    def _reap_loop(self):
+        interval = max(1.0, self.idle_timeout / 2)
+        while True:
+            time.sleep(interval)
+            if self._closed:
+                return
+            self.reap_idle()
+
+    def reap_idle(self):
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = []
+        with self._lock:
+            # Oldest connections sit on the left of the deque.
+            while self._idle and self._size > self.min_size and self._idle[0][1] < cutoff:
+                connection = self._idle.popleft()[0]
+                expired.append(connection)
+                self._statements.pop(connection, None)
+                self._size -= 1
+                self._counters["reaped"] += 1
+        for connection in expired:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        if expired:
+            logging.info(f"Reaped {len(expired)} idle database connection(s).")
+
+    def stats(self):
+        """Snapshot of pool counters and gauges, safe to call from any thread."""
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot["size"] = self._size
+            snapshot["idle"] = len(self._idle)
+            snapshot["in_use"] = self._size - len(self._idle)
+            snapshot["waiting"] = self._waiters
+        checkouts = snapshot["checkouts"] or 1
+        snapshot["checkout_ms_avg"] = snapshot["checkout_ms_total"] / checkouts
+        snapshot["wait_ms_avg"] = snapshot["wait_ms_total"] / (snapshot["waits"] or 1)
+        return snapshot
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._statements.clear()
+            self._lock.notify_all()
+        for connection, _ in idle:
+            try:
+                connection.close()
+            except Exception:
+                pass
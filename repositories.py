@@ -0,0 +1,756 @@
+from contextlib import contextmanager
+from datetime import date, datetime
+from itertools import product
+from utils import format_audit_log
+from audit_retention import retention_cutoff
+from db import AUDIT_RETENTION
+import cache
+import scheduler
+
+
+class Repository:
+    """Base class for table repositories.
+
+    Statements go through the pooled connection's prepared-statement cache, so
+    each distinct SQL string is parsed once per connection and then executed
+    over the binary protocol. Pass db to run inside a caller's transaction;
+    otherwise a connection is borrowed from the pool and committed per call,
+    with plain reads eligible for the read replica.
+
+    Reads of rarely changing per-user rows go through the read-through cache
+    (see cache.py); the writes that change them read the row they replace
+    uncached, for its audit entry, and invalidate the cache on commit.
+    """
+
+    # Rows per keyset page for the list() methods behind scrolling tables.
+    PAGE_SIZE = 100
+
+    def __init__(self, db_pool):
+        self.db_pool = db_pool
+
+    @contextmanager
+    def connection(self, db=None, read_only=False):
+        if db is not None:
+            yield db
+            return
+        db = self.db_pool.get_connection(read_only=read_only)
+        try:
+            yield db
+            db.commit()
+            if not read_only:
+                self.db_pool.record_write()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _fetchall(self, sql, params=(), db=None):
+        with self.connection(db, read_only=True) as conn:
+            cursor = conn.prepared_cursor(sql)
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _fetchone(self, sql, params=(), db=None):
+        rows = self._fetchall(sql, params, db)
+        return rows[0] if rows else None
+
+    def _execute(self, sql, params=(), db=None):
+        """Run a write and return (rowcount, lastrowid)."""
+        with self.connection(db) as conn:
+            cursor = conn.prepared_cursor(sql)
+            cursor.execute(sql, params)
+            return cursor.rowcount, cursor.lastrowid
+
+    def _page(self, first_sql, next_sql, user_id, after, limit, db):
+        """Fetch one keyset page of a user's rows.
+
+        first_sql starts from the beginning; next_sql continues strictly past
+        after, the sort key of the last row already shown, written out as
+        (a > %s OR (a = %s AND (... id > %s))) so it maps onto an index range.
+        Every key column but the last is therefore bound twice. Key columns
+        are never NULL in rows the app writes.
+        """
+        if after is None:
+            return self._fetchall(first_sql, (user_id, limit), db)
+        key = [value for column in after[:-1] for value in (column, column)] + [after[-1]]
+        return self._fetchall(next_sql, (user_id, *key, limit), db)
+
+    def _call(self, procedure, params=(), db=None):
+        """Run a stored procedure, or the backend's equivalent of it."""
+        with self.connection(db) as conn:
+            conn.dialect.call_procedure(conn, procedure, params)
+
+    def _audit(self, conn, table_name, action, record_id, user_id, details):
+        """Queue an audit entry once conn's transaction commits, keeping the write out of it."""
+        conn.after_commit(lambda: format_audit_log(table_name, action, record_id, details, user_id))
+
+    @staticmethod
+    def _changes(columns, old, new):
+        details = {}
+        for column, old_value, new_value in zip(columns, old, new):
+            details[f"old_{column}"] = old_value
+            details[f"new_{column}"] = new_value
+        return details
+
+
+class UserRepo(Repository):
+    def get_username(self, user_id, db=None):
+        identity = self.get_identity(user_id, db)
+        return identity[0] if identity else None
+
+    def get_identity(self, user_id, db=None):
+        return cache.get_or_load(("identity", user_id), lambda: self._fetchone(
+            "SELECT username, email FROM users WHERE id = %s", (user_id,), db))
+
+    def get_credentials(self, username, db=None):
+        return self._fetchone("SELECT id, password FROM users WHERE username = %s", (username,), db)
+
+    def get_password_hash(self, user_id, db=None):
+        row = self._fetchone("SELECT password FROM users WHERE id = %s", (user_id,), db)
+        return row[0] if row else None
+
+    def exists(self, username, email, exclude_id=0, db=None):
+        return self._fetchone(
+            "SELECT id FROM users WHERE (username = %s OR email = %s) AND id != %s",
+            (username, email, exclude_id), db
+        ) is not None
+
+    def create(self, username, email, password_hash, db=None):
+        return self._execute(
+            "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)",
+            (username, email, password_hash), db
+        )[1]
+
+    def update_identity(self, user_id, username, email, db=None):
+        with self.connection(db) as conn:
+            self._execute("UPDATE users SET username = %s, email = %s WHERE id = %s", (username, email, user_id), conn)
+            conn.after_commit(lambda: cache.invalidate(("identity", user_id)))
+
+    def update_password(self, user_id, password_hash, db=None):
+        self._execute("UPDATE users SET password = %s WHERE id = %s", (password_hash, user_id), db)
+
+
+class UserProfileRepo(Repository):
+    ROW_SQL = "SELECT username, email, full_name, phone FROM user_profiles WHERE user_id = %s"
+
+    def get(self, user_id, db=None):
+        return cache.get_or_load(("profile", user_id), lambda: self._fetchone(self.ROW_SQL, (user_id,), db))
+
+    COLUMNS = ("username", "email", "full_name", "phone")
+
+    def save(self, user_id, username, email, full_name, phone, db=None):
+        with self.connection(db) as conn:
+            old = self._fetchone(self.ROW_SQL, (user_id,), conn)  # not the cached copy
+            self._call("UpdateUserProfile", (user_id, username, email, full_name, phone), conn)
+            conn.after_commit(lambda: cache.invalidate(("profile", user_id)))
+            if old is not None:
+                self._audit(conn, "user_profiles", "UPDATE", user_id, user_id,
+                            self._changes(self.COLUMNS, old, (username, email, full_name, phone)))
+
+
+class UserSettingsRepo(Repository):
+    ROW_SQL = "SELECT dark_mode, notifications_enabled FROM user_settings WHERE user_id = %s"
+
+    def get(self, user_id, db=None):
+        return cache.get_or_load(("settings", user_id), lambda: self._fetchone(self.ROW_SQL, (user_id,), db))
+
+    COLUMNS = ("dark_mode", "notifications_enabled")
+
+    def save(self, user_id, dark_mode, notifications_enabled, db=None):
+        with self.connection(db) as conn:
+            old = self._fetchone(self.ROW_SQL, (user_id,), conn)  # not the cached copy
+            self._call("UpdateUserSettings", (user_id, dark_mode, notifications_enabled), conn)
+            conn.after_commit(lambda: cache.invalidate(("settings", user_id)))
+            if old is not None:
+                self._audit(conn, "user_settings", "UPDATE", user_id, user_id,
+                            self._changes(self.COLUMNS, old, (dark_mode, notifications_enabled)))
+
+
+class UserPreferencesRepo(Repository):
+    DEFAULTS = (16, 10, True, True, True, "qr_code", 30)
+    COLUMNS = ("password_length", "auto_lock_timeout", "require_uppercase", "require_numbers",
+               "require_special_chars", "default_sharing_method", "password_check_interval")
+
+    ROW_SQL = """
+        SELECT password_length, auto_lock_timeout, require_uppercase, require_numbers,
+               require_special_chars, default_sharing_method, password_check_interval
+        FROM user_preferences WHERE user_id = %s
+    """
+
+    def get(self, user_id, db=None):
+        return cache.get_or_load(("preferences", user_id), lambda: self._fetchone(self.ROW_SQL, (user_id,), db))
+
+    def save(self, user_id, password_length, auto_lock_timeout, require_uppercase, require_numbers,
+             require_special_chars, default_sharing_method, password_check_interval, db=None):
+        new = (password_length, auto_lock_timeout, require_uppercase, require_numbers,
+               require_special_chars, default_sharing_method, password_check_interval)
+        with self.connection(db) as conn:
+            old = self._fetchone(self.ROW_SQL, (user_id,), conn)  # not the cached copy
+            self._call("UpdateUserPreferences", (user_id,) + new, conn)
+            conn.after_commit(lambda: cache.invalidate(("preferences", user_id)))
+            if old is not None:
+                self._audit(conn, "user_preferences", "UPDATE", user_id, user_id,
+                            self._changes(self.COLUMNS, old, new))
+            conn.after_commit(lambda: scheduler.rearm(user_id))
+
+
+class UserStatsRepo(Repository):
+    """The per-user dashboard summary row.
+
+    The user_stats_* triggers adjust the counters and last backup time as
+    passwords, files, vault chunks and backups are written. file_bytes is the
+    files' logical size and stored_bytes what their deduplicated chunks take
+    up in the vault; security_score is a generated
+    column. reconcile() recounts from the base tables to repair any drift.
+    """
+
+    def get(self, user_id, db=None):
+        """(password_count, file_count, file_bytes, stored_bytes, last_login, last_backup, security_score), or None."""
+        return self._fetchone(
+            "SELECT password_count, file_count, file_bytes, stored_bytes, last_login, last_backup, security_score "
+            "FROM user_stats WHERE user_id = %s",
+            (user_id,), db
+        )
+
+    def record_login(self, user_id, when=None, db=None):
+        self._execute("UPDATE user_stats SET last_login = %s WHERE user_id = %s",
+                      (when or datetime.now(), user_id), db)
+
+    def reconcile(self, user_id, db=None):
+        """Recount user_id's summary from the base tables; True if the stored row was wrong."""
+        with self.connection(db) as conn:
+            password_count = self._fetchone(
+                "SELECT COUNT(*) FROM passwords WHERE user_id = %s", (user_id,), conn)[0]
+            file_count, file_bytes = self._fetchone(
+                "SELECT COUNT(*), COALESCE(SUM(file_size), 0) FROM file_vault WHERE user_id = %s",
+                (user_id,), conn)
+            stored_bytes = self._fetchone(
+                "SELECT COALESCE(SUM(stored_size), 0) FROM vault_chunks WHERE user_id = %s", (user_id,), conn)[0]
+            row = self._fetchone(
+                "SELECT backup_time FROM backup_logs WHERE record_id = %s ORDER BY backup_time DESC LIMIT 1",
+                (user_id,), conn)
+            actual = (password_count, file_count, int(file_bytes), int(stored_bytes), row[0] if row else None)
+            stored = self._fetchone(
+                "SELECT password_count, file_count, file_bytes, stored_bytes, last_backup "
+                "FROM user_stats WHERE user_id = %s",
+                (user_id,), conn)
+            if stored is None:
+                self._execute(
+                    "INSERT INTO user_stats (user_id, password_count, file_count, file_bytes, stored_bytes, last_backup) "
+                    "VALUES (%s, %s, %s, %s, %s, %s)",
+                    (user_id, *actual), conn)
+                return True
+            if tuple(stored) == actual:
+                return False
+            self._execute(
+                "UPDATE user_stats SET password_count = %s, file_count = %s, file_bytes = %s, stored_bytes = %s, "
+                "last_backup = %s "
+                "WHERE user_id = %s",
+                (*actual, user_id), conn)
+            return True
+
+
+class PasswordRepo(Repository):
+    def list(self, user_id, after=None, limit=Repository.PAGE_SIZE, db=None):
+        """One page in (service, username, id) order; after is the key of the previous page's last row."""
+        return self._page(
+            "SELECT service, username, password, expiration_date, password_strength, created_at, updated_at, id "
+            "FROM passwords WHERE user_id = %s "
+            "ORDER BY service, username, id LIMIT %s",
+            "SELECT service, username, password, expiration_date, password_strength, created_at, updated_at, id "
+            "FROM passwords WHERE user_id = %s "
+            "AND (service > %s OR (service = %s AND (username > %s OR (username = %s AND id > %s)))) "
+            "ORDER BY service, username, id LIMIT %s",
+            user_id, after, limit, db
+        )
+
+    def next_expiration(self, user_id, after, db=None):
+        """Earliest expiration date later than after, or None."""
+        row = self._fetchone(
+            "SELECT expiration_date FROM passwords WHERE user_id = %s AND expiration_date > %s "
+            "ORDER BY expiration_date LIMIT 1",
+            (user_id, after), db
+        )
+        return row[0] if row else None
+
+    def changed_before(self, user_id, cutoff, since=None, db=None):
+        """(service, updated_at) of passwords last changed at or before cutoff, and after since if given."""
+        if since is None:
+            return self._fetchall(
+                "SELECT service, updated_at FROM passwords WHERE user_id = %s AND updated_at <= %s",
+                (user_id, cutoff), db
+            )
+        return self._fetchall(
+            "SELECT service, updated_at FROM passwords WHERE user_id = %s AND updated_at > %s AND updated_at <= %s",
+            (user_id, since, cutoff), db
+        )
+
+    def next_changed_after(self, user_id, cutoff, db=None):
+        """Oldest change time later than cutoff, or None."""
+        row = self._fetchone(
+            "SELECT updated_at FROM passwords WHERE user_id = %s AND updated_at > %s ORDER BY updated_at LIMIT 1",
+            (user_id, cutoff), db
+        )
+        return row[0] if row else None
+
+    def get(self, user_id, password_id, db=None):
+        """A single row in the shape list() returns, or None."""
+        return self._fetchone(
+            "SELECT service, username, password, expiration_date, password_strength, created_at, updated_at, id "
+            "FROM passwords WHERE id = %s AND user_id = %s",
+            (password_id, user_id), db
+        )
+
+    def add(self, user_id, service, username, password, expiration_date, password_strength, db=None):
+        """Insert a password and return its row as list() shows it."""
+        with self.connection(db) as conn:
+            conn.after_commit(lambda: scheduler.rearm(user_id))
+            password_id = self._execute(
+                "INSERT INTO passwords (user_id, service, username, password, expiration_date, password_strength) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (user_id, service, username, password, expiration_date, password_strength), conn
+            )[1]
+            return self.get(user_id, password_id, db=conn)
+
+    def delete(self, user_id, password_id, db=None):
+        with self.connection(db) as conn:
+            conn.after_commit(lambda: scheduler.rearm(user_id))
+            # The password's expiration alert refers to it and goes in the same transaction.
+            self._execute(
+                "DELETE FROM expiration_alerts WHERE user_id = %s AND password_id = %s",
+                (user_id, password_id), conn
+            )
+            return self._execute(
+                "DELETE FROM passwords WHERE id = %s AND user_id = %s",
+                (password_id, user_id), conn
+            )[0]
+
+
+class QRCodeRepo(Repository):
+    def list(self, user_id, after=None, limit=Repository.PAGE_SIZE, db=None):
+        """One page in (service, username, id) order."""
+        return self._page(
+            "SELECT service, username, qr_code_data, created_at, updated_at, id FROM qr_codes WHERE user_id = %s "
+            "ORDER BY service, username, id LIMIT %s",
+            "SELECT service, username, qr_code_data, created_at, updated_at, id FROM qr_codes WHERE user_id = %s "
+            "AND (service > %s OR (service = %s AND (username > %s OR (username = %s AND id > %s)))) "
+            "ORDER BY service, username, id LIMIT %s",
+            user_id, after, limit, db
+        )
+
+    def get(self, user_id, qr_id, db=None):
+        return self._fetchone(
+            "SELECT service, username, qr_code_data, created_at, updated_at, id FROM qr_codes "
+            "WHERE id = %s AND user_id = %s",
+            (qr_id, user_id), db
+        )
+
+    def add(self, user_id, service, username, qr_code_data, db=None):
+        with self.connection(db) as conn:
+            qr_id = self._execute(
+                "INSERT INTO qr_codes (user_id, service, username, qr_code_data) VALUES (%s, %s, %s, %s)",
+                (user_id, service, username, qr_code_data), conn
+            )[1]
+            return self.get(user_id, qr_id, db=conn)
+
+    def delete(self, user_id, qr_id, db=None):
+        return self._execute("DELETE FROM qr_codes WHERE id = %s AND user_id = %s", (qr_id, user_id), db)[0]
+
+
+class AccessLogRepo(Repository):
+    def list(self, user_id, after=None, limit=Repository.PAGE_SIZE, db=None):
+        """One page in (device_name, access_time, id) order."""
+        return self._page(
+            "SELECT device_name, ip_address, access_time, location, created_at, updated_at, id "
+            "FROM access_logs WHERE user_id = %s "
+            "ORDER BY device_name, access_time, id LIMIT %s",
+            "SELECT device_name, ip_address, access_time, location, created_at, updated_at, id "
+            "FROM access_logs WHERE user_id = %s "
+            "AND (device_name > %s OR (device_name = %s AND (access_time > %s OR (access_time = %s AND id > %s)))) "
+            "ORDER BY device_name, access_time, id LIMIT %s",
+            user_id, after, limit, db
+        )
+
+    def get(self, user_id, log_id, db=None):
+        return self._fetchone(
+            "SELECT device_name, ip_address, access_time, location, created_at, updated_at, id "
+            "FROM access_logs WHERE id = %s AND user_id = %s",
+            (log_id, user_id), db
+        )
+
+    def add(self, user_id, device_name, ip_address, location, db=None):
+        with self.connection(db) as conn:
+            log_id = self._execute(
+                "INSERT INTO access_logs (user_id, device_name, ip_address, location) VALUES (%s, %s, %s, %s)",
+                (user_id, device_name, ip_address, location), conn
+            )[1]
+            return self.get(user_id, log_id, db=conn)
+
+    def delete(self, user_id, log_id, db=None):
+        return self._execute("DELETE FROM access_logs WHERE id = %s AND user_id = %s", (log_id, user_id), db)[0]
+
+
+class SharedPasswordRepo(Repository):
+    def list(self, user_id, after=None, limit=Repository.PAGE_SIZE, db=None):
+        """One page in (service, recipient, id) order."""
+        return self._page(
+            "SELECT service, recipient, shared_date, share_status, created_at, updated_at, id "
+            "FROM shared_passwords WHERE user_id = %s "
+            "ORDER BY service, recipient, id LIMIT %s",
+            "SELECT service, recipient, shared_date, share_status, created_at, updated_at, id "
+            "FROM shared_passwords WHERE user_id = %s "
+            "AND (service > %s OR (service = %s AND (recipient > %s OR (recipient = %s AND id > %s)))) "
+            "ORDER BY service, recipient, id LIMIT %s",
+            user_id, after, limit, db
+        )
+
+    def get(self, user_id, share_id, db=None):
+        return self._fetchone(
+            "SELECT service, recipient, shared_date, share_status, created_at, updated_at, id "
+            "FROM shared_passwords WHERE id = %s AND user_id = %s",
+            (share_id, user_id), db
+        )
+
+    def add(self, user_id, service, recipient, share_status, db=None):
+        with self.connection(db) as conn:
+            share_id = self._execute(
+                "INSERT INTO shared_passwords (user_id, service, recipient, share_status) VALUES (%s, %s, %s, %s)",
+                (user_id, service, recipient, share_status), conn
+            )[1]
+            return self.get(user_id, share_id, db=conn)
+
+    def delete(self, user_id, share_id, db=None):
+        return self._execute(
+            "DELETE FROM shared_passwords WHERE id = %s AND user_id = %s", (share_id, user_id), db
+        )[0]
+
+
+class ConnectedDeviceRepo(Repository):
+    def list(self, user_id, after=None, limit=Repository.PAGE_SIZE, db=None):
+        """One page in (device_name, id) order."""
+        return self._page(
+            "SELECT device_name, device_type, status, last_seen, created_at, updated_at, id "
+            "FROM connected_devices WHERE user_id = %s "
+            "ORDER BY device_name, id LIMIT %s",
+            "SELECT device_name, device_type, status, last_seen, created_at, updated_at, id "
+            "FROM connected_devices WHERE user_id = %s "
+            "AND (device_name > %s OR (device_name = %s AND id > %s)) "
+            "ORDER BY device_name, id LIMIT %s",
+            user_id, after, limit, db
+        )
+
+    def get(self, user_id, device_id, db=None):
+        return self._fetchone(
+            "SELECT device_name, device_type, status, last_seen, created_at, updated_at, id "
+            "FROM connected_devices WHERE id = %s AND user_id = %s",
+            (device_id, user_id), db
+        )
+
+    def add(self, user_id, device_name, device_type, status, db=None):
+        with self.connection(db) as conn:
+            device_id = self._execute(
+                "INSERT INTO connected_devices (user_id, device_name, device_type, status) VALUES (%s, %s, %s, %s)",
+                (user_id, device_name, device_type, status), conn
+            )[1]
+            return self.get(user_id, device_id, db=conn)
+
+    def delete(self, user_id, device_id, db=None):
+        return self._execute(
+            "DELETE FROM connected_devices WHERE id = %s AND user_id = %s", (device_id, user_id), db
+        )[0]
+
+
+class ExpirationAlertRepo(Repository):
+    def list(self, user_id, after=None, limit=Repository.PAGE_SIZE, db=None):
+        """One page in password_id order; there is one alert per password, so it is the whole key."""
+        return self._page(
+            "SELECT service, expiration_date, status, password_id, created_at, updated_at "
+            "FROM expiration_alerts WHERE user_id = %s "
+            "ORDER BY password_id LIMIT %s",
+            "SELECT service, expiration_date, status, password_id, created_at, updated_at "
+            "FROM expiration_alerts WHERE user_id = %s AND password_id > %s "
+            "ORDER BY password_id LIMIT %s",
+            user_id, after, limit, db
+        )
+
+    WINDOW_DAYS = 7
+
+    def refresh(self, user_id, today=None, window_days=None, db=None):
+        """Bring the user's alerts up to date with set-based statements.
+
+        Passwords expiring on or before today are 'Expired', those within
+        window_days 'Expiring Soon'. Only new or changed alerts are written,
+        so notifications fire on real transitions and an unchanged vault costs
+        two index range scans.
+        """
+        window_days = self.WINDOW_DAYS if window_days is None else window_days
+        self._call("RefreshExpirationAlerts", (user_id, today or date.today(), window_days), db)
+
+    def delete(self, user_id, password_id, db=None):
+        return self._execute(
+            "DELETE FROM expiration_alerts WHERE user_id = %s AND password_id = %s",
+            (user_id, password_id), db
+        )[0]
+
+
+class AuditRepo(Repository):
+    # audit_logs is partitioned by month; every read carries a lower bound on
+    # timestamp so that partitions past retention are never scanned. Rows older
+    # than that have been archived, so the bound hides nothing still in the table.
+
+    def since(self):
+        return retention_cutoff(AUDIT_RETENTION["retention_months"])
+
+    @staticmethod
+    def list_sql(action=False, end_date=False, after=False):
+        """The statement list() runs for a combination of filters.
+
+        One fixed statement per combination keeps the prepared-statement cache
+        effective; check_query_plans.py explains each of them.
+        """
+        query = """
+            SELECT id, table_name, action, record_id, change_details, timestamp
+            FROM audit_logs
+            WHERE user_id = %s AND timestamp >= %s"""
+        if action:
+            query += " AND action = %s"
+        if end_date:
+            query += " AND timestamp <= %s"
+        if after:
+            query += " AND (timestamp < %s OR (timestamp = %s AND id < %s))"
+        return query + " ORDER BY timestamp DESC, id DESC LIMIT %s"
+
+    @classmethod
+    def list_statements(cls):
+        return [cls.list_sql(*flags) for flags in product((False, True), repeat=3)]
+
+    def list(self, user_id, action=None, start_date=None, end_date=None, after=None,
+             limit=Repository.PAGE_SIZE, db=None):
+        # Newest first; after is the (timestamp, id) of the previous page's last row.
+        params = [user_id, start_date or self.since()]
+        if action:
+            params.append(action)
+        if end_date:
+            params.append(end_date)
+        if after:
+            params.extend((after[0], after[0], after[1]))
+        params.append(limit)
+        return self._fetchall(self.list_sql(bool(action), bool(end_date), bool(after)), params, db)
+
+    def recent(self, user_id, limit=5, db=None):
+        return self._fetchall(
+            "SELECT change_details, timestamp FROM audit_logs WHERE user_id = %s AND timestamp >= %s "
+            "ORDER BY timestamp DESC LIMIT %s",
+            (user_id, self.since(), limit), db
+        )
+
+    def clear(self, user_id, db=None):
+        return self._execute("DELETE FROM audit_logs WHERE user_id = %s", (user_id,), db)[0]
+
+
+class BackupRepo(Repository):
+    def list(self, user_id, limit=50, db=None):
+        return self._fetchall("""
+            SELECT id, table_name, record_id, backup_time
+            FROM backup_logs
+            WHERE record_id = %s
+            ORDER BY backup_time DESC
+            LIMIT %s
+        """, (user_id, limit), db)
+
+    def list_with_data(self, user_id, limit=10, db=None):
+        return self._fetchall("""
+            SELECT id, table_name, record_id, backup_time, data
+            FROM backup_logs
+            WHERE record_id = %s
+            ORDER BY backup_time DESC
+            LIMIT %s
+        """, (user_id, limit), db)
+
+    def backup_user(self, user_id, db=None):
+        self._call("BackupUserData", (user_id,), db)
+
+    def restore(self, backup_id, db=None):
+        with self.connection(db) as conn:
+            self._call("RestoreUserData", (backup_id,), conn)
+            # A restore rewrites most of a user's rows; drop everything rather than track which.
+            conn.after_commit(cache.clear)
+
+
+class KeyRepo(Repository):
+    """Wrapped encryption keys (see envelope.py); unwrapped keys never reach the database."""
+
+    def user_key(self, user_id, db=None):
+        """(salt, kdf_n, wrapped_index_key) of the user's key-encryption key, or None before their first unlock."""
+        return self._fetchone("SELECT salt, kdf_n, wrapped_index_key FROM user_keys WHERE user_id = %s",
+                              (user_id,), db)
+
+    def create_user_key(self, user_id, salt, kdf_n, wrapped_index_key, db=None):
+        self._execute("INSERT INTO user_keys (user_id, salt, kdf_n, wrapped_index_key) VALUES (%s, %s, %s, %s)",
+                      (user_id, salt, kdf_n, wrapped_index_key), db)
+
+    def update_user_key(self, user_id, salt, kdf_n, wrapped_index_key, db=None):
+        self._execute("UPDATE user_keys SET salt = %s, kdf_n = %s, wrapped_index_key = %s WHERE user_id = %s",
+                      (salt, kdf_n, wrapped_index_key, user_id), db)
+
+    def add_data_key(self, user_id, wrapped_key, db=None):
+        return self._execute("INSERT INTO vault_keys (user_id, wrapped_key) VALUES (%s, %s)",
+                             (user_id, wrapped_key), db)[1]
+
+    def data_key(self, user_id, key_id, db=None):
+        row = self._fetchone("SELECT wrapped_key FROM vault_keys WHERE id = %s AND user_id = %s",
+                             (key_id, user_id), db)
+        return row[0] if row else None
+
+    def data_keys(self, user_id, db=None):
+        """(id, wrapped_key) of all of the user's data keys."""
+        return self._fetchall("SELECT id, wrapped_key FROM vault_keys WHERE user_id = %s", (user_id,), db)
+
+    def update_data_key(self, key_id, wrapped_key, db=None):
+        self._execute("UPDATE vault_keys SET wrapped_key = %s WHERE id = %s", (wrapped_key, key_id), db)
+
+
+class FileVaultRepo(Repository):
+    def list(self, user_id, after=None, limit=Repository.PAGE_SIZE, db=None):
+        """One page, newest first, in (created_at, id) descending order."""
+        return self._page("""
+            SELECT id, file_name, file_size, created_at, updated_at
+            FROM file_vault
+            WHERE user_id = %s
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+        """, """
+            SELECT id, file_name, file_size, created_at, updated_at
+            FROM file_vault
+            WHERE user_id = %s AND (created_at < %s OR (created_at = %s AND id < %s))
+            ORDER BY created_at DESC, id DESC
+            LIMIT %s
+        """, user_id, after, limit, db)
+
+    def get(self, file_id, user_id, db=None):
+        """(file_name, file_size, storage_format, chunk_count, manifest) of one of the user's files, or None."""
+        return self._fetchone(
+            "SELECT file_name, file_size, storage_format, chunk_count, manifest FROM file_vault "
+            "WHERE id = %s AND user_id = %s",
+            (file_id, user_id), db
+        )
+
+    def create(self, user_id, file_name, file_size, storage_format, db=None):
+        """Add the row for a chunked file, before its chunks; returns the new id."""
+        with self.connection(db) as conn:
+            file_id = self._execute("""
+                INSERT INTO file_vault (user_id, file_name, encrypted_data, file_size, storage_format)
+                VALUES (%s, %s, %s, %s, %s)
+            """, (user_id, file_name, b"", file_size, storage_format), conn)[1]
+            self._audit(conn, "file_vault", "INSERT", file_id, user_id,
+                        {"file_name": file_name, "file_size": file_size})
+            return file_id
+
+    def finish(self, file_id, chunk_count, manifest, codec, db=None):
+        self._execute("UPDATE file_vault SET chunk_count = %s, manifest = %s, codec = %s WHERE id = %s",
+                      (chunk_count, manifest, codec, file_id), db)
+
+    def reuse_chunk(self, user_id, digest, db=None):
+        """Count one more reference to the user's stored chunk with this digest; False if there is none."""
+        # An UPDATE rather than a SELECT: it locks the row, and sees one committed by a concurrent upload.
+        return self._execute("UPDATE vault_chunks SET refcount = refcount + 1 WHERE user_id = %s AND digest = %s",
+                             (user_id, digest), db)[0] == 1
+
+    def add_chunk(self, user_id, digest, key_id, nonce, data, db=None):
+        """Store a new chunk, sealed with data key key_id, with one reference."""
+        self._execute("""
+            INSERT INTO vault_chunks (user_id, digest, key_id, stored_size, nonce, data, refcount)
+            VALUES (%s, %s, %s, %s, %s, %s, 1)
+        """, (user_id, digest, key_id, len(data), nonce, data), db)
+
+    def link_chunk(self, file_id, seq, user_id, digest, db=None):
+        """Make the user's chunk with this digest the seq'th chunk of file_id."""
+        self._execute("""
+            INSERT INTO file_chunks (file_id, seq, chunk_id)
+            SELECT %s, %s, id FROM vault_chunks WHERE user_id = %s AND digest = %s
+        """, (file_id, seq, user_id, digest), db)
+
+    def chunk(self, file_id, seq, db=None):
+        """(digest, key_id, nonce, data) of one chunk, or None. Chunks are read one at a time to keep memory flat."""
+        return self._fetchone("""
+            SELECT c.digest, c.key_id, c.nonce, c.data
+            FROM file_chunks f
+            JOIN vault_chunks c ON c.id = f.chunk_id
+            WHERE f.file_id = %s AND f.seq = %s
+        """, (file_id, seq), db)
+
+    def row(self, file_id, db=None):
+        """The file's row as list() shows it."""
+        return self._fetchone("SELECT id, file_name, file_size, created_at, updated_at FROM file_vault WHERE id = %s",
+                              (file_id,), db)
+
+    def delete(self, file_id, user_id, db=None):
+        """Delete one of the user's files, and any chunks and data keys nothing uses any more.
+
+        False if the user has no such file.
+        """
+        with self.connection(db) as conn:
+            self._execute("""
+                UPDATE vault_chunks
+                SET refcount = refcount - (
+                    SELECT COUNT(*) FROM file_chunks f WHERE f.file_id = %s AND f.chunk_id = vault_chunks.id
+                )
+                WHERE user_id = %s AND id IN (SELECT chunk_id FROM file_chunks WHERE file_id = %s)
+            """, (file_id, user_id, file_id), conn)
+            # file_chunks rows go with the file (ON DELETE CASCADE).
+            if self._execute("DELETE FROM file_vault WHERE id = %s AND user_id = %s", (file_id, user_id), conn)[0] == 0:
+                return False
+            self._execute("DELETE FROM vault_chunks WHERE user_id = %s AND refcount = 0", (user_id,), conn)
+            self._execute("""
+                DELETE FROM vault_keys
+                WHERE user_id = %s AND NOT EXISTS (SELECT 1 FROM vault_chunks c WHERE c.key_id = vault_keys.id)
+            """, (user_id,), conn)
+            return True
+
+
+class NotificationRepo(Repository):
+    def recent(self, user_id, limit=20, db=None):
+        return self._fetchall("""
+            SELECT id, title, message, is_read, created_at
+            FROM notifications
+            WHERE user_id = %s
+            ORDER BY created_at DESC
+            LIMIT %s
+        """, (user_id, limit), db)
+
+    def last_created(self, user_id, title, db=None):
+        row = self._fetchone(
+            "SELECT created_at FROM notifications WHERE user_id = %s AND title = %s "
+            "ORDER BY created_at DESC LIMIT 1",
+            (user_id, title), db
+        )
+        return row[0] if row else None
+
+    def add(self, user_id, title, message, created_at, db=None):
+        return self._execute(
+            "INSERT INTO notifications (user_id, title, message, created_at) VALUES (%s, %s, %s, %s)",
+            (user_id, title, message, created_at), db
+        )[1]
+
+
+class Repositories:
+    """One repository per table, shared by the app and every feature frame."""
+
+    def __init__(self, db_pool):
+        self.users = UserRepo(db_pool)
+        self.profiles = UserProfileRepo(db_pool)
+        self.settings = UserSettingsRepo(db_pool)
+        self.preferences = UserPreferencesRepo(db_pool)
+        self.stats = UserStatsRepo(db_pool)
+        self.passwords = PasswordRepo(db_pool)
+        self.qr_codes = QRCodeRepo(db_pool)
+        self.access_logs = AccessLogRepo(db_pool)
+        self.shared_passwords = SharedPasswordRepo(db_pool)
+        self.devices = ConnectedDeviceRepo(db_pool)
+        self.alerts = ExpirationAlertRepo(db_pool)
+        self.audit = AuditRepo(db_pool)
+        self.backups = BackupRepo(db_pool)
+        self.keys = KeyRepo(db_pool)
+        self.files = FileVaultRepo(db_pool)
+        self.notifications = NotificationRepo(db_pool)
@@ -0,0 +1,138 @@
+import logging
+import random
+import threading
+import time
+import uuid
+import mysql.connector
+
+# Errors worth retrying: the statement did not take effect (or, for the lost-connection
+# codes, may not have) and running it again can succeed.
+TRANSIENT_ERRNOS = {
+    1205,  # ER_LOCK_WAIT_TIMEOUT
+    1213,  # ER_LOCK_DEADLOCK
+    2006,  # CR_SERVER_GONE_ERROR
+    2013,  # CR_SERVER_LOST
+    2055,  # CR_SERVER_LOST_EXTENDED
+}
+
+IDEMPOTENCY_KEY_TTL_HOURS = 24
+RECORD_KEY_SQL = "INSERT INTO idempotency_keys (idem_key, operation) VALUES (%s, %s)"
+FIND_KEY_SQL = "SELECT 1 FROM idempotency_keys WHERE idem_key = %s"
+
+
+def purge_idempotency_keys(db):
+    """Drop keys old enough that no retry can still be looking for them; returns how many."""
+    cursor = db.cursor()
+    cursor.execute("DELETE FROM idempotency_keys WHERE created_at < " + db.dialect.hours_ago(IDEMPOTENCY_KEY_TTL_HOURS))
+    db.commit()
+    return cursor.rowcount
+
+
+def is_transient(err):
+    return isinstance(err, mysql.connector.Error) and err.errno in TRANSIENT_ERRNOS
+
+
+class RetryExecutor:
+    """Runs a unit of work in its own transaction, retrying transient failures.
+
+    work is called with a pooled connection and may run any number of repository
+    calls against it (pass db=...); the executor commits on success and rolls back
+    on error. Work run without write=True may be served by the read replica.
+    Retries back off exponentially with full jitter and are only made
+    for TRANSIENT_ERRNOS; any other error is raised straight away.
+
+    Writes run with write=True get an idempotency key that is stored in the same
+    transaction as the work. If the connection drops after the server committed
+    but before the client saw it, the retry finds the key and skips the work
+    instead of applying it twice. Stored procedures run in the same transaction,
+    so they are covered too.
+    """
+
+    def __init__(self, db_pool, max_attempts=3, base_delay=0.05, max_delay=2.0, sleep=time.sleep):
+        self.db_pool = db_pool
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def run(self, operation, work, write=False, idempotency_key=None):
+        if write and idempotency_key is None:
+            idempotency_key = uuid.uuid4().hex
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result, duplicate = self._attempt(operation, work, write, idempotency_key, attempt)
+            except mysql.connector.Error as err:
+                if not is_transient(err) or attempt >= self.max_attempts:
+                    self._record(operation, attempt, started, failed=True)
+                    raise
+                delay = self.backoff(attempt)
+                logging.warning(f"{operation}: transient error {err.errno} on attempt {attempt}, "
+                                f"retrying in {delay * 1000:.0f} ms: {err}")
+                self._record_backoff(operation, delay)
+                self._sleep(delay)
+                continue
+            self._record(operation, attempt, started, duplicate=duplicate)
+            return result
+
+    def _attempt(self, operation, work, write, idempotency_key, attempt):
+        db = self.db_pool.get_connection(read_only=not write, operation=operation)
+        try:
+            if idempotency_key and attempt > 1 and self._already_applied(db, idempotency_key):
+                logging.info(f"{operation}: already committed by an earlier attempt, not reapplying.")
+                db.rollback()
+                return None, True
+            result = work(db)
+            if idempotency_key:
+                db.prepared_cursor(RECORD_KEY_SQL).execute(RECORD_KEY_SQL, (idempotency_key, operation))
+            db.commit()
+            if write:
+                self.db_pool.record_write()
+            return result, False
+        except Exception:
+            try:
+                db.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            db.close()
+
+    def _already_applied(self, db, idempotency_key):
+        cursor = db.prepared_cursor(FIND_KEY_SQL)
+        cursor.execute(FIND_KEY_SQL, (idempotency_key,))
+        return bool(cursor.fetchall())
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff: uniform in [0, min(max_delay, base * 2^(attempt-1))]."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    def _entry(self, operation):
+        return self._metrics.setdefault(operation, {
+            "calls": 0, "attempts": 0, "retries": 0, "failures": 0,
+            "duplicates_skipped": 0, "backoff_ms_total": 0.0, "elapsed_ms_total": 0.0,
+        })
+
+    def _record(self, operation, attempts, started, failed=False, duplicate=False):
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            entry = self._entry(operation)
+            entry["calls"] += 1
+            entry["attempts"] += attempts
+            entry["retries"] += attempts - 1
+            entry["failures"] += failed
+            entry["duplicates_skipped"] += duplicate
+            entry["elapsed_ms_total"] += elapsed_ms
+
+    def _record_backoff(self, operation, delay):
+        with self._lock:
+            self._entry(operation)["backoff_ms_total"] += delay * 1000
+
+    def stats(self):
+        """Per-operation retry counters, safe to call from any thread."""
+        with self._lock:
+            return {operation: dict(entry) for operation, entry in self._metrics.items()}
@@ -0,0 +1,123 @@
+import threading
+import time
+import logging
+import mysql.connector
+
+
+class ReplicaRouter:
+    """Routes read-only checkouts to a replica pool and everything else to the primary.
+
+    A read stays on the primary when:
+      - no replica is configured, or its operation is listed in primary_operations;
+      - a write committed less than sticky_seconds ago, so the session reads
+        its own writes (keep sticky_seconds >= max_lag_seconds);
+      - the replica's last measured lag is unknown or above max_lag_seconds.
+        Lag is re-measured at most every lag_check_interval seconds;
+      - a replica checkout fails. The replica is then avoided until the next
+        lag check.
+    """
+
+    def __init__(self, primary, replica=None, max_lag_seconds=5.0, sticky_seconds=5.0,
+                 lag_check_interval=2.0, primary_operations=()):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.sticky_seconds = sticky_seconds
+        self.lag_check_interval = lag_check_interval
+        self.primary_operations = frozenset(primary_operations)
+
+        self._lock = threading.Lock()
+        self._last_write = None
+        self._lag_checked_at = None
+        self._replica_lag = None
+        self._replica_ok = False
+        self._counters = {
+            "writes": 0,
+            "reads_primary": 0,
+            "reads_replica": 0,
+            "primary_rule": 0,
+            "sticky_reads": 0,
+            "lag_fallbacks": 0,
+            "error_fallbacks": 0,
+            "lag_checks": 0,
+        }
+
+    def get_connection(self, timeout=None, read_only=False, operation=None):
+        if not read_only:
+            self._count("writes")
+            return self.primary.get_connection(timeout)
+        if self._use_replica(operation):
+            try:
+                db = self.replica.get_connection(timeout)
+                self._count("reads_replica")
+                return db
+            except mysql.connector.Error as err:
+                logging.warning(f"Replica checkout failed, reading from the primary: {err}")
+                with self._lock:
+                    self._replica_ok = False
+                    self._counters["error_fallbacks"] += 1
+        self._count("reads_primary")
+        return self.primary.get_connection(timeout)
+
+    def record_write(self):
+        """Start the read-your-writes window; call after a write commits."""
+        with self._lock:
+            self._last_write = time.monotonic()
+
+    def _use_replica(self, operation):
+        if self.replica is None:
+            return False
+        if operation in self.primary_operations:
+            self._count("primary_rule")
+            return False
+        with self._lock:
+            sticky = self._last_write is not None and time.monotonic() - self._last_write < self.sticky_seconds
+        if sticky:
+            self._count("sticky_reads")
+            return False
+        if not self._replica_fresh():
+            self._count("lag_fallbacks")
+            return False
+        return True
+
+    def _replica_fresh(self):
+        now = time.monotonic()
+        with self._lock:
+            if self._lag_checked_at is not None and now - self._lag_checked_at < self.lag_check_interval:
+                return self._replica_ok
+            # Claim the check so concurrent readers use the previous verdict meanwhile.
+            self._lag_checked_at = now
+            self._counters["lag_checks"] += 1
+        lag = self._measure_lag()
+        with self._lock:
+            self._replica_lag = lag
+            self._replica_ok = lag is not None and lag <= self.max_lag_seconds
+            if not self._replica_ok:
+                logging.info(f"Replica lag {lag if lag is not None else 'unknown'}s exceeds "
+                             f"{self.max_lag_seconds}s; reading from the primary.")
+            return self._replica_ok
+
+    def _measure_lag(self):
+        try:
+            db = self.replica.get_connection(timeout=1.0)
+        except mysql.connector.Error as err:
+            logging.warning(f"Replica lag check failed: {err}")
+            return None
+        try:
+            return db.dialect.replica_lag(db)
+        except mysql.connector.Error as err:
+            logging.warning(f"Replica lag check failed: {err}")
+            return None
+        finally:
+            db.close()
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot["replica_lag_seconds"] = self._replica_lag
+            snapshot["replica_ok"] = self._replica_ok
+        return snapshot
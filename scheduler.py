@@ -0,0 +1,199 @@
+import heapq
+import itertools
+import logging
+import threading
+from datetime import date, datetime, time, timedelta
+import mysql.connector
+
+# Due-time scheduler for expiration alerts, rotation reminders and dashboard
+# summary checks. Every tracked user has one deadline per job in a min-heap and
+# the thread sleeps until the earliest. Deadlines come from single index
+# lookups (the next expiry transition, the next password to go stale), never
+# from scanning a vault. Rearming bumps the generation of the user's rearmed
+# jobs; superseded heap entries are dropped when they surface instead of being
+# searched for.
+
+EXPIRY = "expiry"
+ROTATION = "rotation"
+STATS = "stats"
+JOBS = (EXPIRY, ROTATION, STATS)
+ROTATION_TITLE = "Password Rotation Due"
+
+_scheduler = None
+
+
+def install(scheduler):
+    global _scheduler
+    _scheduler = scheduler
+
+
+def rearm(user_id):
+    """Recompute a tracked user's deadlines; call after their passwords or preferences change."""
+    if _scheduler is not None:
+        _scheduler.rearm(user_id)
+
+
+def midnight(day):
+    return datetime.combine(day, time.min)
+
+
+class ExpiryScheduler:
+    """Background thread that raises alerts and reminders when they fall due.
+
+    - expiry: refreshes the user's expiration alerts at the next midnight on
+      which a password turns 'Expiring Soon' or 'Expired'. The alert triggers
+      turn those transitions into notifications.
+    - rotation: notifies once for each password that has gone
+      password_check_interval days without a change, at the moment the next
+      one crosses that age.
+    - stats: reconciles the user's user_stats row against the base tables
+      every reconcile_interval seconds, repairing drift in the counters the
+      triggers maintain. Password changes do not rearm it.
+
+    A job that fails with a database error is retried after retry_delay
+    seconds. The thread wakes at least every max_sleep seconds, so a changed
+    wall clock cannot hold a deadline back for long.
+    """
+
+    def __init__(self, repos, executor, retry_delay=300.0, max_sleep=3600.0, reconcile_interval=3600.0):
+        self.repos = repos
+        self.executor = executor
+        self.retry_delay = retry_delay
+        self.max_sleep = max_sleep
+        self.reconcile_interval = reconcile_interval
+        self._heap = []
+        self._seq = itertools.count()
+        self._tracked = set()
+        self._generations = {}
+        self._cond = threading.Condition()
+        self._stopping = False
+        self._counters = {"runs": 0, "failures": 0, "stale_entries": 0, "reminders": 0, "stats_repairs": 0}
+        self._thread = threading.Thread(target=self._run, name="expiry-scheduler", daemon=True)
+        self._thread.start()
+
+    def track(self, user_id):
+        """Start scheduling for a user; every job runs right away to catch up."""
+        with self._cond:
+            self._tracked.add(user_id)
+            self._arm(user_id, JOBS)
+
+    def untrack(self, user_id):
+        with self._cond:
+            self._tracked.discard(user_id)
+            for job in JOBS:
+                self._generations.pop((user_id, job), None)
+
+    def rearm(self, user_id):
+        with self._cond:
+            if user_id in self._tracked:
+                self._arm(user_id, (EXPIRY, ROTATION))
+
+    def _arm(self, user_id, jobs):
+        now = datetime.now()
+        for job in jobs:
+            generation = self._generations.get((user_id, job), 0) + 1
+            self._generations[(user_id, job)] = generation
+            self._push(now, user_id, job, generation)
+        self._cond.notify()
+
+    def _push(self, due, user_id, job, generation):
+        heapq.heappush(self._heap, (due, next(self._seq), user_id, job, generation))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping:
+                    wait = self.max_sleep
+                    if self._heap:
+                        wait = min(wait, (self._heap[0][0] - datetime.now()).total_seconds())
+                        if wait <= 0:
+                            break
+                    self._cond.wait(wait)
+                if self._stopping:
+                    return
+                due, _, user_id, job, generation = heapq.heappop(self._heap)
+                if self._generations.get((user_id, job)) != generation:
+                    self._counters["stale_entries"] += 1
+                    continue
+                self._counters["runs"] += 1
+            next_due = self._run_job(user_id, job)
+            with self._cond:
+                # A rearm while the job ran has already queued fresh deadlines.
+                if next_due is not None and self._generations.get((user_id, job)) == generation:
+                    self._push(next_due, user_id, job, generation)
+
+    def _run_job(self, user_id, job):
+        try:
+            if job == EXPIRY:
+                return self._check_expiry(user_id)
+            if job == STATS:
+                return self._check_stats(user_id)
+            return self._check_rotation(user_id)
+        except mysql.connector.Error as err:
+            logging.warning(f"Scheduled {job} check for user {user_id} failed: {err}")
+        except Exception as e:
+            logging.error(f"Unexpected error in scheduled {job} check for user {user_id}: {e}")
+        with self._cond:
+            self._counters["failures"] += 1
+        return datetime.now() + timedelta(seconds=self.retry_delay)
+
+    def _check_expiry(self, user_id):
+        alerts, passwords = self.repos.alerts, self.repos.passwords
+        today = date.today()
+        window = timedelta(days=alerts.WINDOW_DAYS)
+        self.executor.run("refresh_expiration_alerts",
+                          lambda db: alerts.refresh(user_id, today=today, db=db), write=True)
+        # A password turns Expired on its expiration date and Expiring Soon a window before it.
+        next_expired, next_expiring = self.executor.run("next_expiration", lambda db: (
+            passwords.next_expiration(user_id, today, db=db),
+            passwords.next_expiration(user_id, today + window, db=db)
+        ))
+        candidates = [day for day in (next_expired, next_expiring and next_expiring - window) if day]
+        return midnight(min(candidates)) if candidates else None
+
+    def _check_rotation(self, user_id):
+        passwords, notifications = self.repos.passwords, self.repos.notifications
+        preferences = self.repos.preferences.get(user_id)
+        interval = timedelta(days=(preferences or self.repos.preferences.DEFAULTS)[6])
+        now = datetime.now()
+
+        def notify(db):
+            # Passwords that went stale since the last reminder; all stale ones the first time.
+            last = notifications.last_created(user_id, ROTATION_TITLE, db=db)
+            stale = passwords.changed_before(user_id, now - interval, last and last - interval, db=db)
+            for service, updated_at in stale:
+                notifications.add(user_id, ROTATION_TITLE,
+                                  f"Your password for '{service}' has not been changed in {interval.days} days.",
+                                  now, db=db)
+            return len(stale)
+
+        sent = self.executor.run("rotation_reminders", notify, write=True)
+        if sent:
+            with self._cond:
+                self._counters["reminders"] += sent
+        next_change = self.executor.run("next_rotation",
+                                        lambda db: passwords.next_changed_after(user_id, now - interval, db=db))
+        return next_change + interval if next_change else None
+
+    def _check_stats(self, user_id):
+        repaired = self.executor.run("reconcile_user_stats",
+                                     lambda db: self.repos.stats.reconcile(user_id, db=db), write=True)
+        if repaired:
+            logging.warning(f"Repaired drifted dashboard summary for user {user_id}")
+            with self._cond:
+                self._counters["stats_repairs"] += 1
+        return datetime.now() + timedelta(seconds=self.reconcile_interval)
+
+    def close(self, timeout=5.0):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def stats(self):
+        with self._cond:
+            snapshot = dict(self._counters)
+            snapshot["tracked_users"] = len(self._tracked)
+            snapshot["queued"] = len(self._heap)
+            snapshot["next_due"] = self._heap[0][0] if self._heap else None
+        return snapshot
@@ -0,0 +1,297 @@
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from mysql.connector import errors
+
+# Embedded single-file backend. Connections present the subset of the
+# mysql.connector interface the pool, repositories and migrations rely on:
+# %s placeholders, cursor(prepared=...), in_transaction, ping(), and errors
+# raised as mysql.connector error types carrying the matching MySQL errno,
+# so retry and error handling work unchanged on either engine.
+
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(" ", "seconds"))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_converter("DATETIME", lambda raw: datetime.fromisoformat(raw.decode()))
+sqlite3.register_converter("DATE", lambda raw: datetime.fromisoformat(raw.decode()).date())
+
+
+@contextmanager
+def translate_errors():
+    try:
+        yield
+    except sqlite3.IntegrityError as err:
+        errno = 1452 if "FOREIGN KEY" in str(err) else 1062  # ER_NO_REFERENCED_ROW_2 / ER_DUP_ENTRY
+        raise errors.IntegrityError(msg=str(err), errno=errno) from err
+    except sqlite3.OperationalError as err:
+        message = str(err)
+        if "locked" in message or "busy" in message:
+            # Another writer held the database past busy_timeout; retryable like a lock wait timeout.
+            raise errors.OperationalError(msg=message, errno=1205) from err
+        if message.startswith("no such table"):
+            raise errors.ProgrammingError(msg=message, errno=1146) from err
+        raise errors.ProgrammingError(msg=message, errno=1064) from err
+    except sqlite3.Error as err:
+        raise errors.DatabaseError(msg=str(err)) from err
+
+
+class SQLiteCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, sql, params=()):
+        with translate_errors():
+            self._cursor.execute(sql.replace("%s", "?"), tuple(params))
+        return self
+
+    def fetchall(self):
+        with translate_errors():
+            return self._cursor.fetchall()
+
+    def fetchone(self):
+        with translate_errors():
+            return self._cursor.fetchone()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """A sqlite3 connection in WAL mode with a mysql.connector-like surface.
+
+    SQLite compiles and caches statements per connection on its own, so
+    cursor(prepared=True) needs no server-side handle; the pool's cursor cache
+    still saves re-wrapping them.
+    """
+
+    def __init__(self, path, busy_timeout=5.0, synchronous="NORMAL", cached_statements=128):
+        self._connection = sqlite3.connect(
+            path,
+            timeout=busy_timeout,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,  # pooled connections move between threads, one holder at a time
+            cached_statements=cached_statements,
+        )
+        with translate_errors():
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute(f"PRAGMA synchronous = {synchronous}")
+            self._connection.execute("PRAGMA foreign_keys = ON")
+
+    @property
+    def in_transaction(self):
+        return self._connection.in_transaction
+
+    def cursor(self, prepared=False):
+        return SQLiteCursor(self._connection.cursor())
+
+    def commit(self):
+        with translate_errors():
+            self._connection.commit()
+
+    def rollback(self):
+        with translate_errors():
+            self._connection.rollback()
+
+    def ping(self, reconnect=False):
+        with translate_errors():
+            self._connection.execute("SELECT 1")
+
+    def close(self):
+        self._connection.close()
+
+
+def connect(path, busy_timeout=5.0, synchronous="NORMAL", cached_statements=128):
+    return SQLiteConnection(path, busy_timeout, synchronous, cached_statements)
+
+
+# Equivalents of the MySQL stored procedures. Like them, they run inside the
+# caller's transaction, so a CALL is atomic with the rest of the unit of work.
+
+def _execute(db, sql, params=()):
+    cursor = db.prepared_cursor(sql)
+    cursor.execute(sql, params)
+    return cursor
+
+
+def update_user_profile(db, user_id, username, email, full_name, phone):
+    _execute(db, """
+        INSERT INTO user_profiles (user_id, username, email, full_name, phone)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (user_id) DO UPDATE SET
+            username = excluded.username,
+            email = excluded.email,
+            full_name = excluded.full_name,
+            phone = excluded.phone
+    """, (user_id, username, email, full_name, phone))
+
+
+def update_user_settings(db, user_id, dark_mode, notifications_enabled):
+    _execute(db, """
+        INSERT INTO user_settings (user_id, dark_mode, notifications_enabled)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (user_id) DO UPDATE SET
+            dark_mode = excluded.dark_mode,
+            notifications_enabled = excluded.notifications_enabled
+    """, (user_id, dark_mode, notifications_enabled))
+
+
+def update_user_preferences(db, user_id, password_length, auto_lock_timeout, require_uppercase,
+                            require_numbers, require_special_chars, default_sharing_method,
+                            password_check_interval):
+    _execute(db, """
+        INSERT INTO user_preferences (
+            user_id, password_length, auto_lock_timeout, require_uppercase,
+            require_numbers, require_special_chars, default_sharing_method, password_check_interval
+        )
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON CONFLICT (user_id) DO UPDATE SET
+            password_length = excluded.password_length,
+            auto_lock_timeout = excluded.auto_lock_timeout,
+            require_uppercase = excluded.require_uppercase,
+            require_numbers = excluded.require_numbers,
+            require_special_chars = excluded.require_special_chars,
+            default_sharing_method = excluded.default_sharing_method,
+            password_check_interval = excluded.password_check_interval
+    """, (user_id, password_length, auto_lock_timeout, require_uppercase, require_numbers,
+          require_special_chars, default_sharing_method, password_check_interval))
+
+
+def refresh_expiration_alerts(db, user_id, today, window_days):
+    threshold = today + timedelta(days=window_days)
+    _execute(db, """
+        DELETE FROM expiration_alerts
+        WHERE user_id = %s AND password_id NOT IN (
+            SELECT id FROM passwords
+            WHERE user_id = %s AND expiration_date IS NOT NULL AND expiration_date <= %s
+        )
+    """, (user_id, user_id, threshold))
+    _execute(db, """
+        INSERT INTO expiration_alerts (user_id, password_id, service, expiration_date, status)
+        SELECT p.user_id, p.id, p.service, p.expiration_date,
+               CASE WHEN p.expiration_date <= %s THEN 'Expired' ELSE 'Expiring Soon' END
+        FROM passwords p
+        LEFT JOIN expiration_alerts a ON a.user_id = p.user_id AND a.password_id = p.id
+        WHERE p.user_id = %s
+          AND p.expiration_date IS NOT NULL
+          AND p.expiration_date <= %s
+          AND (a.id IS NULL
+               OR a.status IS NOT CASE WHEN p.expiration_date <= %s THEN 'Expired' ELSE 'Expiring Soon' END
+               OR a.expiration_date IS NOT p.expiration_date
+               OR a.service IS NOT p.service)
+        ON CONFLICT (user_id, password_id) DO UPDATE SET
+            service = excluded.service,
+            expiration_date = excluded.expiration_date,
+            status = excluded.status,
+            updated_at = datetime('now', 'localtime')
+    """, (today, user_id, threshold, today))
+
+
+def backup_user_data(db, user_id):
+    _execute(db, """
+        INSERT INTO backup_logs (table_name, record_id, data)
+        SELECT 'user_profiles', user_id, json_object(
+            'username', username, 'email', email, 'full_name', full_name, 'phone', phone
+        )
+        FROM user_profiles WHERE user_id = %s
+    """, (user_id,))
+    _execute(db, """
+        INSERT INTO backup_logs (table_name, record_id, data)
+        SELECT 'user_settings', user_id, json_object(
+            'dark_mode', dark_mode, 'notifications_enabled', notifications_enabled
+        )
+        FROM user_settings WHERE user_id = %s
+    """, (user_id,))
+    _execute(db, """
+        INSERT INTO backup_logs (table_name, record_id, data)
+        SELECT 'user_preferences', user_id, json_object(
+            'password_length', password_length,
+            'auto_lock_timeout', auto_lock_timeout,
+            'require_uppercase', require_uppercase,
+            'require_numbers', require_numbers,
+            'require_special_chars', require_special_chars,
+            'default_sharing_method', default_sharing_method,
+            'password_check_interval', password_check_interval
+        )
+        FROM user_preferences WHERE user_id = %s
+    """, (user_id,))
+
+
+RESTORE_SQL = {
+    "user_profiles": """
+        INSERT INTO user_profiles (user_id, username, email, full_name, phone)
+        SELECT record_id, json_extract(data, '$.username'), json_extract(data, '$.email'),
+               json_extract(data, '$.full_name'), json_extract(data, '$.phone')
+        FROM backup_logs WHERE id = %s
+        ON CONFLICT (user_id) DO UPDATE SET
+            username = excluded.username,
+            email = excluded.email,
+            full_name = excluded.full_name,
+            phone = excluded.phone
+    """,
+    "user_settings": """
+        INSERT INTO user_settings (user_id, dark_mode, notifications_enabled)
+        SELECT record_id, json_extract(data, '$.dark_mode'), json_extract(data, '$.notifications_enabled')
+        FROM backup_logs WHERE id = %s
+        ON CONFLICT (user_id) DO UPDATE SET
+            dark_mode = excluded.dark_mode,
+            notifications_enabled = excluded.notifications_enabled
+    """,
+    "user_preferences": """
+        INSERT INTO user_preferences (
+            user_id, password_length, auto_lock_timeout, require_uppercase,
+            require_numbers, require_special_chars, default_sharing_method, password_check_interval
+        )
+        SELECT record_id,
+               json_extract(data, '$.password_length'),
+               json_extract(data, '$.auto_lock_timeout'),
+               json_extract(data, '$.require_uppercase'),
+               json_extract(data, '$.require_numbers'),
+               json_extract(data, '$.require_special_chars'),
+               json_extract(data, '$.default_sharing_method'),
+               json_extract(data, '$.password_check_interval')
+        FROM backup_logs WHERE id = %s
+        ON CONFLICT (user_id) DO UPDATE SET
+            password_length = excluded.password_length,
+            auto_lock_timeout = excluded.auto_lock_timeout,
+            require_uppercase = excluded.require_uppercase,
+            require_numbers = excluded.require_numbers,
+            require_special_chars = excluded.require_special_chars,
+            default_sharing_method = excluded.default_sharing_method,
+            password_check_interval = excluded.password_check_interval
+    """,
+}
+
+
+def restore_user_data(db, backup_id):
+    row = _execute(db, "SELECT table_name FROM backup_logs WHERE id = %s", (backup_id,)).fetchone()
+    if row and row[0] in RESTORE_SQL:
+        # The WHERE clause also keeps INSERT ... SELECT ... ON CONFLICT unambiguous for the parser.
+        _execute(db, RESTORE_SQL[row[0]], (backup_id,))
+
+
+PROCEDURES = {
+    "UpdateUserProfile": update_user_profile,
+    "UpdateUserSettings": update_user_settings,
+    "UpdateUserPreferences": update_user_preferences,
+    "RefreshExpirationAlerts": refresh_expiration_alerts,
+    "BackupUserData": backup_user_data,
+    "RestoreUserData": restore_user_data,
+}
+
+
+def call_procedure(db, name, params):
+    procedure = PROCEDURES.get(name)
+    if procedure is None:
+        raise errors.ProgrammingError(msg=f"PROCEDURE {name} does not exist", errno=1305)  # ER_SP_DOES_NOT_EXIST
+    procedure(db, *params)
@@ -0,0 +1,499 @@
+import logging
+from indexes import index_objects
+from migrations import checksum, read_schema_state, pending_work, apply_migration
+
+# SQLite counterpart of migrations.py. Versions are numbered independently of
+# the MySQL ones; the same rule applies: never edit a released entry.
+SQLITE_MIGRATIONS = [
+    (1, "initial_schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username VARCHAR(255) UNIQUE NOT NULL,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_profiles (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id),
+            username VARCHAR(255) NOT NULL,
+            email VARCHAR(255) NOT NULL,
+            full_name VARCHAR(255),
+            phone VARCHAR(20)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_settings (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id),
+            dark_mode BOOLEAN DEFAULT 0,
+            notifications_enabled BOOLEAN DEFAULT 1
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_preferences (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id),
+            password_length INTEGER DEFAULT 16,
+            auto_lock_timeout INTEGER DEFAULT 10,
+            require_uppercase BOOLEAN DEFAULT 1,
+            require_numbers BOOLEAN DEFAULT 1,
+            require_special_chars BOOLEAN DEFAULT 1,
+            default_sharing_method TEXT DEFAULT 'qr_code'
+                CHECK (default_sharing_method IN ('qr_code', 'secure_link')),
+            password_check_interval INTEGER DEFAULT 30
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS passwords (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER REFERENCES users(id),
+            service VARCHAR(255) NOT NULL,
+            username VARCHAR(255),
+            password VARCHAR(255) NOT NULL,
+            expiration_date DATE,
+            password_strength VARCHAR(50),
+            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            updated_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS qr_codes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER REFERENCES users(id),
+            service VARCHAR(255) NOT NULL,
+            username VARCHAR(255),
+            qr_code_data VARCHAR(255),
+            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            updated_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS access_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER REFERENCES users(id),
+            device_name VARCHAR(255) NOT NULL,
+            ip_address VARCHAR(45),
+            access_time DATETIME DEFAULT (datetime('now', 'localtime')),
+            location VARCHAR(100),
+            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            updated_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS shared_passwords (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER REFERENCES users(id),
+            service VARCHAR(255) NOT NULL,
+            recipient VARCHAR(255),
+            shared_date DATETIME DEFAULT (datetime('now', 'localtime')),
+            share_status VARCHAR(50) DEFAULT 'Pending',
+            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            updated_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS connected_devices (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER REFERENCES users(id),
+            device_name VARCHAR(255) NOT NULL,
+            device_type VARCHAR(50),
+            status VARCHAR(50) DEFAULT 'Active',
+            last_seen DATETIME DEFAULT (datetime('now', 'localtime')),
+            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            updated_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS expiration_alerts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER REFERENCES users(id),
+            password_id INTEGER REFERENCES passwords(id),
+            service VARCHAR(255),
+            expiration_date DATE,
+            status VARCHAR(50),
+            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            updated_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS audit_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name VARCHAR(255) NOT NULL,
+            action TEXT NOT NULL CHECK (action IN ('INSERT', 'UPDATE', 'DELETE')),
+            record_id INTEGER NOT NULL,
+            user_id INTEGER REFERENCES users(id),
+            change_details TEXT,
+            timestamp DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS backup_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name VARCHAR(255) NOT NULL,
+            record_id INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            backup_time DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS file_vault (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER REFERENCES users(id),
+            file_name VARCHAR(255) NOT NULL,
+            encrypted_data BLOB NOT NULL,
+            file_size BIGINT NOT NULL,
+            created_at DATETIME DEFAULT (datetime('now', 'localtime')),
+            updated_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS notifications (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            title VARCHAR(255) NOT NULL,
+            message TEXT NOT NULL,
+            is_read BOOLEAN DEFAULT 0,
+            created_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS idempotency_keys (
+            idem_key CHAR(32) PRIMARY KEY,
+            operation VARCHAR(64) NOT NULL,
+            created_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created ON idempotency_keys (created_at)",
+    ]),
+    # No partitioning here: retention is a range delete on the timestamp index.
+    (2, "audit_logs_retention", [
+        "CREATE INDEX IF NOT EXISTS idx_audit_logs_timestamp ON audit_logs (timestamp)",
+        """
+        CREATE TABLE IF NOT EXISTS audit_logs_archive (
+            id INTEGER PRIMARY KEY,
+            table_name VARCHAR(255) NOT NULL,
+            action TEXT NOT NULL,
+            record_id INTEGER NOT NULL,
+            user_id INTEGER,
+            change_details TEXT,
+            timestamp DATETIME
+        )
+        """,
+    ]),
+    (3, "dedupe_expiration_alerts", [
+        """
+        DELETE FROM expiration_alerts WHERE id NOT IN (
+            SELECT MAX(id) FROM expiration_alerts GROUP BY user_id, password_id
+        )
+        """,
+    ]),
+    (4, "user_stats", [
+        """
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id),
+            password_count INTEGER NOT NULL DEFAULT 0,
+            file_count INTEGER NOT NULL DEFAULT 0,
+            file_bytes BIGINT NOT NULL DEFAULT 0,
+            last_login DATETIME,
+            last_backup DATETIME,
+            security_score INTEGER GENERATED ALWAYS AS (
+                (CASE WHEN password_count > 0 THEN 50 ELSE 0 END) +
+                (CASE WHEN last_login IS NOT NULL THEN 30 ELSE 0 END)
+            ) STORED
+        )
+        """,
+        """
+        INSERT INTO user_stats (user_id, password_count, file_count, file_bytes, last_backup)
+        SELECT u.id,
+               (SELECT COUNT(*) FROM passwords p WHERE p.user_id = u.id),
+               (SELECT COUNT(*) FROM file_vault f WHERE f.user_id = u.id),
+               (SELECT COALESCE(SUM(f.file_size), 0) FROM file_vault f WHERE f.user_id = u.id),
+               (SELECT b.backup_time FROM backup_logs b WHERE b.record_id = u.id
+                ORDER BY b.backup_time DESC LIMIT 1)
+        FROM users u
+        """,
+    ]),
+    # Chunked, deduplicated, envelope-keyed vault files (MySQL migration 8).
+    # Files written before were encrypted with a key that was never kept; they
+    # are deleted and user_stats recounted.
+    (5, "vault_chunks", [
+        "ALTER TABLE file_vault ADD COLUMN storage_format INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE file_vault ADD COLUMN chunk_count INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE file_vault ADD COLUMN manifest BLOB",
+        "ALTER TABLE file_vault ADD COLUMN codec VARCHAR(8) NOT NULL DEFAULT 'none'",
+        "DELETE FROM file_vault WHERE storage_format = 0",
+        """
+        CREATE TABLE IF NOT EXISTS user_keys (
+            user_id INTEGER PRIMARY KEY REFERENCES users(id),
+            salt BLOB NOT NULL,
+            kdf_n INTEGER NOT NULL,
+            wrapped_index_key BLOB NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS vault_keys (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            wrapped_key BLOB NOT NULL,
+            created_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS vault_chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL REFERENCES users(id),
+            digest BLOB NOT NULL,
+            key_id INTEGER NOT NULL REFERENCES vault_keys(id),
+            stored_size INTEGER NOT NULL,
+            nonce BLOB NOT NULL,
+            data BLOB NOT NULL,
+            refcount INTEGER NOT NULL DEFAULT 1
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS file_chunks (
+            file_id INTEGER NOT NULL REFERENCES file_vault(id) ON DELETE CASCADE,
+            seq INTEGER NOT NULL,
+            chunk_id INTEGER NOT NULL REFERENCES vault_chunks(id),
+            PRIMARY KEY (file_id, seq)
+        )
+        """,
+        "ALTER TABLE user_stats ADD COLUMN stored_bytes BIGINT NOT NULL DEFAULT 0",
+        """
+        UPDATE user_stats SET
+            file_count = (SELECT COUNT(*) FROM file_vault f WHERE f.user_id = user_stats.user_id),
+            file_bytes = (SELECT COALESCE(SUM(f.file_size), 0) FROM file_vault f WHERE f.user_id = user_stats.user_id)
+        """,
+    ]),
+    # passwords_after_update bumped updated_at by updating its own table; MySQL
+    # migration 5 dropped its counterpart in favour of the column attribute.
+    # SQLite has no such attribute, and the app never updates a password row.
+    (6, "drop_passwords_after_update", [
+        "DROP TRIGGER IF EXISTS passwords_after_update",
+        "DELETE FROM schema_routines WHERE name = 'passwords_after_update'",
+    ]),
+]
+
+# Trigger equivalents of migrations.ROUTINES. The stored procedures live in
+# sqlite_backend.PROCEDURES since SQLite has no procedural SQL.
+SQLITE_TRIGGERS = [
+    ("TRIGGER", "expiration_alerts_after_insert", """
+        CREATE TRIGGER expiration_alerts_after_insert
+        AFTER INSERT ON expiration_alerts
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO notifications (user_id, title, message)
+            VALUES (NEW.user_id, 'Password ' || NEW.status,
+                    'Your password for ''' || NEW.service || ''' is ' || lower(NEW.status) ||
+                    ' (expires on ' || date(NEW.expiration_date) || ').');
+        END
+    """),
+    ("TRIGGER", "expiration_alerts_after_update", """
+        CREATE TRIGGER expiration_alerts_after_update
+        AFTER UPDATE ON expiration_alerts
+        FOR EACH ROW WHEN OLD.status IS NOT NEW.status
+        BEGIN
+            INSERT INTO notifications (user_id, title, message)
+            VALUES (NEW.user_id, 'Password ' || NEW.status,
+                    'Your password for ''' || NEW.service || ''' is ' || lower(NEW.status) ||
+                    ' (expires on ' || date(NEW.expiration_date) || ').');
+        END
+    """),
+    ("TRIGGER", "users_after_insert", """
+        CREATE TRIGGER users_after_insert
+        AFTER INSERT ON users
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO user_settings (user_id, dark_mode, notifications_enabled)
+            VALUES (NEW.id, 0, 1);
+            INSERT INTO user_preferences (
+                user_id, password_length, auto_lock_timeout, require_uppercase,
+                require_numbers, require_special_chars, default_sharing_method, password_check_interval
+            )
+            VALUES (NEW.id, 16, 10, 1, 1, 1, 'qr_code', 30);
+            INSERT INTO user_stats (user_id) VALUES (NEW.id);
+            INSERT INTO audit_logs (table_name, action, record_id, user_id, change_details)
+            VALUES ('users', 'INSERT', NEW.id, NEW.id, json_object(
+                'username', NEW.username, 'email', NEW.email
+            ));
+        END
+    """),
+    ("TRIGGER", "user_profiles_before_update", """
+        CREATE TRIGGER user_profiles_before_update
+        BEFORE UPDATE ON user_profiles
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO backup_logs (table_name, record_id, data)
+            VALUES ('user_profiles', OLD.user_id, json_object(
+                'username', OLD.username, 'email', OLD.email,
+                'full_name', OLD.full_name, 'phone', OLD.phone
+            ));
+        END
+    """),
+    ("TRIGGER", "user_settings_before_update", """
+        CREATE TRIGGER user_settings_before_update
+        BEFORE UPDATE ON user_settings
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO backup_logs (table_name, record_id, data)
+            VALUES ('user_settings', OLD.user_id, json_object(
+                'dark_mode', OLD.dark_mode, 'notifications_enabled', OLD.notifications_enabled
+            ));
+        END
+    """),
+    ("TRIGGER", "user_preferences_before_update", """
+        CREATE TRIGGER user_preferences_before_update
+        BEFORE UPDATE ON user_preferences
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO backup_logs (table_name, record_id, data)
+            VALUES ('user_preferences', OLD.user_id, json_object(
+                'password_length', OLD.password_length,
+                'auto_lock_timeout', OLD.auto_lock_timeout,
+                'require_uppercase', OLD.require_uppercase,
+                'require_numbers', OLD.require_numbers,
+                'require_special_chars', OLD.require_special_chars,
+                'default_sharing_method', OLD.default_sharing_method,
+                'password_check_interval', OLD.password_check_interval
+            ));
+        END
+    """),
+    ("TRIGGER", "user_stats_passwords_after_insert", """
+        CREATE TRIGGER user_stats_passwords_after_insert
+        AFTER INSERT ON passwords
+        FOR EACH ROW
+        BEGIN
+            UPDATE user_stats SET password_count = password_count + 1 WHERE user_id = NEW.user_id;
+        END
+    """),
+    ("TRIGGER", "user_stats_passwords_after_delete", """
+        CREATE TRIGGER user_stats_passwords_after_delete
+        AFTER DELETE ON passwords
+        FOR EACH ROW
+        BEGIN
+            UPDATE user_stats SET password_count = password_count - 1 WHERE user_id = OLD.user_id;
+        END
+    """),
+    ("TRIGGER", "user_stats_file_vault_after_insert", """
+        CREATE TRIGGER user_stats_file_vault_after_insert
+        AFTER INSERT ON file_vault
+        FOR EACH ROW
+        BEGIN
+            UPDATE user_stats
+            SET file_count = file_count + 1, file_bytes = file_bytes + NEW.file_size
+            WHERE user_id = NEW.user_id;
+        END
+    """),
+    ("TRIGGER", "user_stats_file_vault_after_delete", """
+        CREATE TRIGGER user_stats_file_vault_after_delete
+        AFTER DELETE ON file_vault
+        FOR EACH ROW
+        BEGIN
+            UPDATE user_stats
+            SET file_count = file_count - 1, file_bytes = file_bytes - OLD.file_size
+            WHERE user_id = OLD.user_id;
+        END
+    """),
+    ("TRIGGER", "user_stats_vault_chunks_after_insert", """
+        CREATE TRIGGER user_stats_vault_chunks_after_insert
+        AFTER INSERT ON vault_chunks
+        FOR EACH ROW
+        BEGIN
+            UPDATE user_stats SET stored_bytes = stored_bytes + NEW.stored_size WHERE user_id = NEW.user_id;
+        END
+    """),
+    ("TRIGGER", "user_stats_vault_chunks_after_delete", """
+        CREATE TRIGGER user_stats_vault_chunks_after_delete
+        AFTER DELETE ON vault_chunks
+        FOR EACH ROW
+        BEGIN
+            UPDATE user_stats SET stored_bytes = stored_bytes - OLD.stored_size WHERE user_id = OLD.user_id;
+        END
+    """),
+    ("TRIGGER", "user_stats_backup_logs_after_insert", """
+        CREATE TRIGGER user_stats_backup_logs_after_insert
+        AFTER INSERT ON backup_logs
+        FOR EACH ROW
+        BEGIN
+            UPDATE user_stats
+            SET last_backup = max(coalesce(last_backup, NEW.backup_time), NEW.backup_time)
+            WHERE user_id = NEW.record_id;
+        END
+    """),
+    ("TRIGGER", "file_vault_before_delete", """
+        CREATE TRIGGER file_vault_before_delete
+        BEFORE DELETE ON file_vault
+        FOR EACH ROW
+        BEGIN
+            INSERT INTO audit_logs (table_name, action, record_id, user_id, change_details)
+            VALUES ('file_vault', 'DELETE', OLD.id, OLD.user_id, json_object(
+                'file_name', OLD.file_name, 'file_size', OLD.file_size
+            ));
+        END
+    """),
+]
+
+SQLITE_SCHEMA_OBJECTS = SQLITE_TRIGGERS + index_objects()
+
+
+def create_tracking_tables(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name VARCHAR(255) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_routines (
+            name VARCHAR(64) PRIMARY KEY,
+            kind VARCHAR(20) NOT NULL,
+            checksum CHAR(64) NOT NULL,
+            applied_at DATETIME DEFAULT (datetime('now', 'localtime'))
+        )
+    """)
+
+
+def apply_object(cursor, kind, name, sql):
+    logging.info(f"Recreating {kind.lower()} {name} (definition changed)")
+    cursor.execute(f"DROP {kind} IF EXISTS {name}")
+    cursor.execute(sql)
+    cursor.execute(
+        "INSERT INTO schema_routines (name, kind, checksum) VALUES (%s, %s, %s) "
+        "ON CONFLICT (name) DO UPDATE SET kind = excluded.kind, checksum = excluded.checksum, "
+        "applied_at = datetime('now', 'localtime')",
+        (name, kind, checksum(sql))
+    )
+
+
+def migrate(db):
+    """Bring the SQLite schema up to date in one write transaction.
+
+    BEGIN IMMEDIATE takes the database write lock up front, which serializes
+    concurrent clients the way GET_LOCK does on MySQL; unlike MySQL, SQLite DDL
+    is transactional, so a failed upgrade leaves the file untouched.
+    """
+    cursor = db.cursor()
+    try:
+        migrations, objects = pending_work(read_schema_state(cursor), SQLITE_MIGRATIONS, SQLITE_SCHEMA_OBJECTS)
+        if not migrations and not objects:
+            logging.info("Database schema is up to date.")
+            return False
+
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            create_tracking_tables(cursor)
+            migrations, objects = pending_work(read_schema_state(cursor), SQLITE_MIGRATIONS, SQLITE_SCHEMA_OBJECTS)
+            for version, name, statements in migrations:
+                apply_migration(cursor, version, name, statements)
+            for kind, name, sql in objects:
+                apply_object(cursor, kind, name, sql)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        logging.info(f"Applied {len(migrations)} migration(s) and {len(objects)} routine update(s).")
+        return True
+    finally:
+        cursor.close()
@@ -0,0 +1,106 @@
+import logging
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from utils import show_loading, hide_loading
+
+
+class Task:
+    def __init__(self, owner, on_success, on_error):
+        self.owner = owner
+        self.on_success = on_success
+        self.on_error = on_error
+        self.cancelled = False
+        self.future = None
+        self.spinner = None
+
+
+class TaskRunner:
+    """Runs database and crypto work on worker threads, off the Tk main loop.
+
+    Workers never touch widgets. Each outcome is put on a queue that the Tk
+    thread drains with root.after while tasks are outstanding, and the task's
+    on_success(result) or on_error(exception) callback runs there.
+
+    cancel(owner) drops an owner's tasks, e.g. a frame's loads when the user
+    navigates away. A task that has not started never runs; one already
+    running finishes, but its callbacks are skipped. Writes are submitted
+    without an owner so a click is never lost to navigation.
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=20):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._results = queue.Queue()
+        self._pending = set()
+        self._drain_id = None
+        self._counters = {"submitted": 0, "completed": 0, "failed": 0, "cancelled": 0}
+
+    def submit(self, work, on_success=None, on_error=None, owner=None, loading=None):
+        """Run work() on a worker; loading is a widget to show the spinner over meanwhile."""
+        task = Task(owner, on_success, on_error)
+        if loading is not None:
+            task.spinner = show_loading(loading)
+        task.future = self._pool.submit(self._execute, task, work)
+        self._pending.add(task)
+        self._counters["submitted"] += 1
+        if self._drain_id is None:
+            self._drain_id = self.root.after(self.poll_interval, self._drain)
+        return task
+
+    def _execute(self, task, work):
+        if task.cancelled:
+            return
+        try:
+            self._results.put((task, work(), None))
+        except Exception as e:
+            self._results.put((task, None, e))
+
+    def cancel(self, owner=None):
+        """Cancel the owner's outstanding tasks, or every task if owner is None."""
+        for task in list(self._pending):
+            if owner is None or task.owner is owner:
+                task.cancelled = True
+                task.future.cancel()
+                hide_loading(task.spinner)
+                self._pending.discard(task)
+                self._counters["cancelled"] += 1
+
+    def _drain(self):
+        self._drain_id = None
+        while True:
+            try:
+                task, result, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if task.cancelled:
+                continue
+            self._pending.discard(task)
+            hide_loading(task.spinner)
+            try:
+                if error is None:
+                    self._counters["completed"] += 1
+                    if task.on_success is not None:
+                        task.on_success(result)
+                else:
+                    self._counters["failed"] += 1
+                    if task.on_error is not None:
+                        task.on_error(error)
+                    else:
+                        logging.error(f"Background task failed: {error}")
+            except Exception as e:
+                logging.error(f"Task callback error: {e}")
+        if self._pending:
+            self._drain_id = self.root.after(self.poll_interval, self._drain)
+
+    def close(self):
+        self.cancel()
+        if self._drain_id is not None:
+            self.root.after_cancel(self._drain_id)
+            self._drain_id = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        snapshot = dict(self._counters)
+        snapshot["pending"] = len(self._pending)
+        return snapshot
@@ -0,0 +1,59 @@
+import os
+import sys
+
+# The app is a set of flat modules run from the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import audit
+import db
+
+
+# Repository tests run against a fresh SQLite file. Set PASSVAULT_TEST_MYSQL_DATABASE
+# to the name of a scratch database on the DB_CONFIG server to run them against
+# MySQL as well; that database is dropped and recreated for every test.
+MYSQL_TEST_DATABASE = os.environ.get("PASSVAULT_TEST_MYSQL_DATABASE")
+
+
+def recreate_mysql_database(name):
+    import mysql.connector
+    config = {key: value for key, value in db.DB_CONFIG.items() if key != "database"}
+    connection = mysql.connector.connect(**config)
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"DROP DATABASE IF EXISTS `{name}`")
+        cursor.execute(f"CREATE DATABASE `{name}`")
+    finally:
+        connection.close()
+
+
+@pytest.fixture(params=["sqlite", "mysql"])
+def db_pool(request, tmp_path, monkeypatch):
+    """A migrated database behind the app's own pool, fresh for each test."""
+    if request.param == "mysql":
+        if not MYSQL_TEST_DATABASE:
+            pytest.skip("PASSVAULT_TEST_MYSQL_DATABASE is not set")
+        recreate_mysql_database(MYSQL_TEST_DATABASE)
+        monkeypatch.setattr(db, "DB_CONFIG", dict(db.DB_CONFIG, database=MYSQL_TEST_DATABASE))
+    else:
+        monkeypatch.setattr(db, "SQLITE_CONFIG", dict(db.SQLITE_CONFIG, path=str(tmp_path / "passvault.db")))
+    monkeypatch.setattr(db, "DB_BACKEND", request.param)
+    pool = db.DatabaseConnectionPool()
+    writer = audit.AuditWriter(pool.pool, flush_interval=0.01, spill_path=str(tmp_path / "audit_spill.jsonl"))
+    audit.install(writer)
+    yield pool
+    writer.close()
+    audit.install(None)
+    pool.pool.close()
+
+
+@pytest.fixture
+def repos(db_pool):
+    from repositories import Repositories
+    return Repositories(db_pool)
+
+
+@pytest.fixture
+def user_id(repos):
+    return repos.users.create("alice", "alice@example.com", "not-a-real-hash")
@@ -0,0 +1,109 @@
+from datetime import date, datetime
+
+import audit_retention
+from audit_retention import add_months, maintain_partitions, partition_table, retention_cutoff
+
+
+class ScriptedCursor:
+    """Answers queries by the first matching fragment in answers and records every statement."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.executed = []
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        self.executed.append(" ".join(sql.split()))
+        self._rows = next((rows for fragment, rows in self.answers.items() if fragment in sql), [])
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def close(self):
+        pass
+
+    def altered(self):
+        return [sql for sql in self.executed if sql.startswith("ALTER")]
+
+
+class FakeDb:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def partitions(*months):
+    return [(audit_retention.partition_name(month),) for month in months] + [("pmax",)]
+
+
+TODAY = date(2026, 10, 18)
+
+
+def test_month_arithmetic():
+    assert add_months(date(2026, 11, 1), 3) == date(2027, 2, 1)
+    assert add_months(date(2026, 1, 1), -1) == date(2025, 12, 1)
+    assert retention_cutoff(12, TODAY) == date(2025, 10, 1)
+
+
+def test_adds_future_months_and_drops_expired_ones():
+    months = audit_retention.months_through(date(2025, 8, 1), date(2026, 10, 1))
+    cursor = ScriptedCursor({"information_schema.PARTITIONS": partitions(*months)})
+    result = maintain_partitions(FakeDb(cursor), retention_months=12, future_months=3, archive=False, today=TODAY)
+    assert result["added"] == [date(2026, 11, 1), date(2026, 12, 1), date(2027, 1, 1)]
+    assert result["retired"] == [date(2025, 8, 1), date(2025, 9, 1)]
+    altered = cursor.altered()
+    assert altered[0].startswith("ALTER TABLE audit_logs REORGANIZE PARTITION pmax INTO (PARTITION p202611")
+    assert altered[1:] == ["ALTER TABLE audit_logs DROP PARTITION p202508",
+                           "ALTER TABLE audit_logs DROP PARTITION p202509"]
+
+
+def test_maintenance_never_partitions_the_table_itself():
+    for answer in ([(None,)], [("pmax",)]):
+        cursor = ScriptedCursor({"information_schema.PARTITIONS": answer})
+        assert maintain_partitions(FakeDb(cursor), today=TODAY) == {"added": [], "retired": []}
+        assert cursor.altered() == []
+
+
+def test_partition_table_rewrites_an_unpartitioned_table_once():
+    cursor = ScriptedCursor({
+        "information_schema.PARTITIONS": [(None,)],
+        "MIN(timestamp)": [(datetime(2026, 7, 9, 12, 0),)],
+        "TABLE_CONSTRAINTS": [(1,)],
+        "KEY_COLUMN_USAGE": [(0,)],
+    })
+    months = partition_table(FakeDb(cursor), future_months=1, today=TODAY)
+    assert months == [date(2026, 7, 1), date(2026, 8, 1), date(2026, 9, 1), date(2026, 10, 1), date(2026, 11, 1)]
+    drop_key, rewrite = cursor.altered()
+    assert drop_key == "ALTER TABLE audit_logs DROP FOREIGN KEY audit_logs_ibfk_1"
+    assert "ADD PRIMARY KEY (id, timestamp) PARTITION BY RANGE (TO_DAYS(timestamp)) (PARTITION p202607" in rewrite
+    assert rewrite.endswith("PARTITION pmax VALUES LESS THAN MAXVALUE)")
+
+
+def test_partition_table_resumes_after_the_key_was_changed():
+    cursor = ScriptedCursor({
+        "information_schema.PARTITIONS": [(None,)],
+        "MIN(timestamp)": [(None,)],
+        "TABLE_CONSTRAINTS": [(0,)],
+        "KEY_COLUMN_USAGE": [(1,)],
+    })
+    assert partition_table(FakeDb(cursor), future_months=0, today=TODAY) == [date(2026, 10, 1)]
+    (rewrite,) = cursor.altered()
+    assert rewrite.startswith("ALTER TABLE audit_logs PARTITION BY RANGE")
+
+
+def test_partition_table_splits_a_lone_pmax_and_leaves_partitioned_tables_alone():
+    cursor = ScriptedCursor({
+        "information_schema.PARTITIONS": [("pmax",)],
+        "MIN(timestamp)": [(datetime(2026, 9, 30),)],
+    })
+    assert partition_table(FakeDb(cursor), future_months=0, today=TODAY) == [date(2026, 9, 1), date(2026, 10, 1)]
+    assert cursor.altered()[0].startswith("ALTER TABLE audit_logs REORGANIZE PARTITION pmax")
+
+    cursor = ScriptedCursor({"information_schema.PARTITIONS": partitions(date(2026, 10, 1))})
+    assert partition_table(FakeDb(cursor), today=TODAY) == []
+    assert cursor.altered() == []
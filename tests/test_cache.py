@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+import audit
+import cache
+from cache import ReadThroughCache
+
+
+def test_hits_until_invalidated():
+    store = ReadThroughCache()
+    loads = []
+    load = lambda: loads.append(1) or "value"
+    assert store.get_or_load("k", load) == "value"
+    assert store.get_or_load("k", load) == "value"
+    store.invalidate("k")
+    store.get_or_load("k", load)
+    assert len(loads) == 2
+    stats = store.stats()
+    assert (stats["hits"], stats["misses"], stats["invalidated"]) == (1, 2, 1)
+
+
+def test_missing_rows_are_not_cached():
+    store = ReadThroughCache()
+    loads = []
+    for _ in range(2):
+        assert store.get_or_load("k", lambda: loads.append(1)) is None
+    assert len(loads) == 2
+
+
+def test_entries_expire_and_the_least_recently_used_is_evicted():
+    store = ReadThroughCache(max_entries=2, ttl=0)
+    store.get_or_load("a", lambda: 1)
+    store.get_or_load("a", lambda: 1)
+    assert store.stats()["expired"] == 1
+
+    store = ReadThroughCache(max_entries=2)
+    for key in "abc":
+        store.get_or_load(key, lambda: key)
+    assert store.stats()["evicted"] == 1
+    assert store.get_or_load("a", lambda: "reloaded") == "reloaded"
+
+
+def test_a_load_overlapping_an_invalidation_is_not_stored():
+    store = ReadThroughCache()
+
+    def load():
+        store.invalidate("k")  # a write commits while the old value is being read
+        return "old"
+
+    assert store.get_or_load("k", load) == "old"
+    assert store.get_or_load("k", lambda: "new") == "new"
+
+
+class RecordingWriter:
+    def __init__(self):
+        self.entries = []
+
+    def submit(self, entry):
+        self.entries.append(entry)
+
+
+@pytest.fixture
+def cached(repos):
+    cache.install(ReadThroughCache())
+    writer = RecordingWriter()
+    audit.install(writer)
+    yield writer
+    cache.install(None)
+
+
+def changed_behind_the_cache(repos, sql, params):
+    with repos.profiles.connection() as conn:
+        repos.profiles._execute(sql, params, conn)
+
+
+def test_saves_audit_the_row_they_replace_not_the_cached_copy(repos, user_id, cached):
+    repos.profiles.save(user_id, "alice", "alice@example.com", "Alice", "555")
+    repos.settings.save(user_id, False, True)
+    repos.preferences.save(user_id, *repos.preferences.DEFAULTS)
+    assert repos.profiles.get(user_id)[2] == "Alice"
+    assert repos.settings.get(user_id) is not None and repos.preferences.get(user_id) is not None
+
+    # Another client changes the rows; this client's cache still holds the old ones.
+    changed_behind_the_cache(repos, "UPDATE user_profiles SET full_name = %s WHERE user_id = %s", ("Alicia", user_id))
+    changed_behind_the_cache(repos, "UPDATE user_settings SET dark_mode = %s WHERE user_id = %s", (True, user_id))
+    changed_behind_the_cache(repos, "UPDATE user_preferences SET password_length = %s WHERE user_id = %s",
+                             (20, user_id))
+    cached.entries.clear()
+
+    repos.profiles.save(user_id, "alice", "alice@example.com", "Ali", "555")
+    repos.settings.save(user_id, False, True)
+    repos.preferences.save(user_id, 24, *repos.preferences.DEFAULTS[1:])
+    details = {entry["table_name"]: json.loads(entry["change_details"]) for entry in cached.entries}
+    assert details["user_profiles"]["old_full_name"] == "Alicia"
+    assert details["user_settings"]["old_dark_mode"] in (True, 1)
+    assert details["user_preferences"]["old_password_length"] == 20
+    assert repos.profiles.get(user_id)[2] == "Ali"
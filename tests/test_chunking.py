@@ -0,0 +1,64 @@
+import io
+import os
+import random
+
+import pytest
+
+import chunking
+
+GEAR = chunking.gear_table(b"k" * 32)
+SMALL = dict(min_size=64, avg_size=256, max_size=1024)
+
+
+@pytest.fixture(params=["python", "numpy"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        monkeypatch.setattr(chunking, "_np", False)
+    else:
+        monkeypatch.setattr(chunking, "_np", None)
+    return request.param
+
+
+def split(data, **sizes):
+    return list(chunking.chunks(io.BytesIO(data), GEAR, **sizes))
+
+
+def test_chunks_reassemble_within_bounds(engine):
+    data = random.Random(1).randbytes(50_000)
+    parts = split(data, **SMALL)
+    assert b"".join(parts) == data
+    assert all(SMALL["min_size"] <= len(part) <= SMALL["max_size"] for part in parts[:-1])
+    assert split(b"", **SMALL) == [b""]
+    assert split(b"abc", **SMALL) == [b"abc"]
+
+
+def test_an_insertion_only_disturbs_nearby_chunks(engine):
+    data = random.Random(2).randbytes(50_000)
+    before = split(data, **SMALL)
+    after = split(data[:1000] + b"inserted" + data[1000:], **SMALL)
+    assert len(set(before) & set(after)) >= len(before) - 3
+
+
+def test_boundaries_depend_on_the_key():
+    data = random.Random(3).randbytes(50_000)
+    other = chunking.gear_table(b"j" * 32)
+    assert split(data, **SMALL) != list(chunking.chunks(io.BytesIO(data), other, **SMALL))
+
+
+def test_numpy_finds_the_same_boundaries_as_the_loop(monkeypatch):
+    pytest.importorskip("numpy")
+    rng = random.Random(4)
+    for size in (0, 1, 63, 64, 65, 300, 5000, 70_000):
+        data = rng.randbytes(size)
+        for sizes in (SMALL, dict(min_size=16, avg_size=64, max_size=128), {}):
+            monkeypatch.setattr(chunking, "_np", None)
+            expected = split(data, **sizes)
+            monkeypatch.setattr(chunking, "_np", False)
+            assert split(data, **sizes) == expected, (size, sizes)
+    # Low-entropy data hits the max_size and min_size edges.
+    data = bytes(20_000) + os.urandom(5_000) + b"ab" * 10_000
+    monkeypatch.setattr(chunking, "_np", None)
+    expected = split(data, **SMALL)
+    monkeypatch.setattr(chunking, "_np", False)
+    assert split(data, **SMALL) == expected
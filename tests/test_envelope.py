@@ -0,0 +1,84 @@
+import pytest
+
+from envelope import KeyRing, KeyUnavailable
+from retry import RetryExecutor
+
+
+@pytest.fixture
+def executor(db_pool):
+    return RetryExecutor(db_pool)
+
+
+@pytest.fixture
+def keyring(repos):
+    return KeyRing(repos, scrypt_n=2 ** 10, cache_size=2)
+
+
+def unlock(executor, keyring, user_id, password="correct horse"):
+    executor.run("unlock", lambda db: keyring.unlock(user_id, password, db), write=True)
+
+
+def test_data_keys_are_stored_wrapped_and_unwrap_after_login(executor, keyring, repos, user_id):
+    unlock(executor, keyring, user_id)
+    index_key = keyring.index_key(user_id)
+    key_id, key = executor.run("new_key", lambda db: keyring.new_data_key(user_id, db), write=True)
+    wrapped = repos.keys.data_key(user_id, key_id)
+    assert len(key) == 32 and len(wrapped) == 40 and key not in bytes(wrapped)
+
+    keyring.lock(user_id)
+    with pytest.raises(KeyUnavailable):
+        keyring.index_key(user_id)
+    with pytest.raises(KeyUnavailable):
+        executor.run("read_key", lambda db: keyring.data_key(user_id, key_id, db))
+
+    unlock(executor, keyring, user_id)
+    assert keyring.index_key(user_id) == index_key
+    assert executor.run("read_key", lambda db: keyring.data_key(user_id, key_id, db)) == key
+    assert keyring.stats()["unwraps"] == 1
+
+
+def test_a_wrong_password_does_not_unlock(executor, keyring, user_id):
+    unlock(executor, keyring, user_id)
+    keyring.lock(user_id)
+    with pytest.raises(KeyUnavailable):
+        unlock(executor, keyring, user_id, password="wrong")
+    assert keyring.stats()["unlocked_users"] == 0
+
+
+def test_rotation_rewraps_keys_without_changing_them(executor, keyring, repos, user_id):
+    unlock(executor, keyring, user_id)
+    keys = [executor.run("new_key", lambda db: keyring.new_data_key(user_id, db), write=True) for _ in range(3)]
+    before = dict(repos.keys.data_keys(user_id))
+    rewrapped = executor.run("rotate", lambda db: keyring.rotate(user_id, "correct horse", "battery staple", db),
+                             write=True)
+    assert rewrapped == 3
+    assert all(bytes(before[key_id]) != bytes(wrapped) for key_id, wrapped in repos.keys.data_keys(user_id))
+
+    keyring.lock(user_id)
+    with pytest.raises(KeyUnavailable):
+        unlock(executor, keyring, user_id)
+    unlock(executor, keyring, user_id, password="battery staple")
+    assert [executor.run("read_key", lambda db: keyring.data_key(user_id, key_id, db)) for key_id, _ in keys] \
+        == [key for _, key in keys]
+
+
+def test_a_rolled_back_unlock_leaves_the_ring_locked(executor, keyring, user_id):
+    def work(db):
+        keyring.unlock(user_id, "correct horse", db)
+        raise RuntimeError("later step failed")
+
+    with pytest.raises(RuntimeError):
+        executor.run("unlock", work, write=True)
+    assert keyring.stats()["unlocked_users"] == 0
+
+
+def test_the_cache_keeps_the_most_recently_used_keys(executor, keyring, user_id):
+    unlock(executor, keyring, user_id)
+    key_ids = [executor.run("new_key", lambda db: keyring.new_data_key(user_id, db), write=True)[0]
+               for _ in range(3)]
+    stats = keyring.stats()
+    assert (stats["cached_keys"], stats["evictions"]) == (2, 1)
+    executor.run("read_key", lambda db: keyring.data_key(user_id, key_ids[0], db))
+    assert keyring.stats()["unwraps"] == 1
+    executor.run("read_key", lambda db: keyring.data_key(user_id, key_ids[2], db))
+    assert keyring.stats()["hits"] == 1
@@ -0,0 +1,186 @@
+import os
+import random
+
+import pytest
+
+from envelope import KeyRing
+from file_vault import CODECS, FileVault, VaultError
+from retry import RetryExecutor
+
+
+@pytest.fixture
+def executor(db_pool):
+    return RetryExecutor(db_pool)
+
+
+@pytest.fixture
+def keyring(repos):
+    return KeyRing(repos, scrypt_n=2 ** 10)
+
+
+@pytest.fixture
+def vault(repos, keyring, executor, user_id):
+    executor.run("unlock", lambda db: keyring.unlock(user_id, "correct horse", db), write=True)
+    return FileVault(repos, keyring, min_chunk=256, avg_chunk=1024, max_chunk=4096)
+
+
+@pytest.fixture
+def store(tmp_path, executor, vault, user_id):
+    """Write data to a file named name and upload it; returns (file_id, summary)."""
+
+    def run(name, data):
+        path = tmp_path / name
+        path.write_bytes(data)
+        row, summary = executor.run("upload_file", lambda db: vault.upload(user_id, str(path), name, db=db),
+                                    write=True)
+        return row[0], summary
+
+    return run
+
+
+@pytest.fixture
+def fetch(tmp_path, executor, vault, user_id):
+    """Download a file and return its contents."""
+
+    def run(file_id):
+        path = tmp_path / "downloaded"
+        assert executor.run("download_file", lambda db: vault.download(user_id, file_id, str(path), db=db))
+        return path.read_bytes()
+
+    return run
+
+
+def random_bytes(size, seed=0):
+    return random.Random(seed).randbytes(size)
+
+
+def query(repos, sql, params=()):
+    return repos.files._fetchall(sql, params)
+
+
+def test_files_round_trip(store, fetch):
+    for name, data in (("random.bin", random_bytes(50_000)), ("text.txt", b"passvault " * 5000), ("empty", b"")):
+        file_id, summary = store(name, data)
+        assert summary["bytes"] == len(data)
+        assert fetch(file_id) == data
+
+
+def test_a_second_copy_is_fully_deduplicated_and_delete_sweeps_chunks_and_keys(store, fetch, repos, user_id):
+    data = random_bytes(30_000)
+    first, summary = store("a.bin", data)
+    second, copy = store("b.bin", data)
+    assert copy["bytes_stored"] == 0 and copy["chunks_reused"] == copy["chunks"] == summary["chunks"]
+    assert query(repos, "SELECT DISTINCT refcount FROM vault_chunks") == [(2,)]
+
+    assert repos.files.delete(first, user_id)
+    assert query(repos, "SELECT DISTINCT refcount FROM vault_chunks") == [(1,)]
+    assert fetch(second) == data
+    assert repos.files.delete(second, user_id)
+    assert not repos.files.delete(second, user_id)
+    for table in ("vault_chunks", "file_chunks", "vault_keys"):
+        assert query(repos, f"SELECT COUNT(*) FROM {table}") == [(0,)]
+    assert query(repos, "SELECT file_count, file_bytes, stored_bytes FROM user_stats WHERE user_id = %s",
+                 (user_id,)) == [(0, 0, 0)]
+
+
+def test_files_stay_readable_after_a_password_change(store, fetch, executor, keyring, user_id):
+    data = random_bytes(20_000)
+    file_id, _ = store("a.bin", data)
+    executor.run("rotate", lambda db: keyring.rotate(user_id, "correct horse", "battery staple", db), write=True)
+    keyring.lock(user_id)
+    with pytest.raises(Exception):
+        fetch(file_id)
+    executor.run("unlock", lambda db: keyring.unlock(user_id, "battery staple", db), write=True)
+    assert fetch(file_id) == data
+
+
+def chunk_ids(repos, file_id):
+    return [row[0] for row in query(repos, "SELECT chunk_id FROM file_chunks WHERE file_id = %s ORDER BY seq",
+                                    (file_id,))]
+
+
+def assert_rejected(fetch, file_id, message, tmp_path):
+    with pytest.raises(VaultError, match=message):
+        fetch(file_id)
+    assert not [name for name in os.listdir(tmp_path) if name.startswith("downloaded")]
+
+
+def test_reordered_chunks_fail_the_manifest(store, fetch, repos, tmp_path):
+    file_id, _ = store("a.bin", random_bytes(20_000))
+    first, second = chunk_ids(repos, file_id)[:2]
+    repos.files._execute("UPDATE file_chunks SET chunk_id = %s WHERE file_id = %s AND seq = 0", (second, file_id))
+    repos.files._execute("UPDATE file_chunks SET chunk_id = %s WHERE file_id = %s AND seq = 1", (first, file_id))
+    assert_rejected(fetch, file_id, "not the ones uploaded", tmp_path)
+
+
+def test_a_truncated_file_fails_the_manifest(store, fetch, repos, tmp_path):
+    file_id, summary = store("a.bin", random_bytes(20_000))
+    last = summary["chunks"] - 1
+    repos.files._execute("DELETE FROM file_chunks WHERE file_id = %s AND seq = %s", (file_id, last))
+    repos.files._execute("UPDATE file_vault SET chunk_count = %s WHERE id = %s", (last, file_id))
+    assert_rejected(fetch, file_id, "not the ones uploaded", tmp_path)
+
+
+def test_a_chunk_from_another_file_fails_the_manifest(store, fetch, repos, tmp_path):
+    file_id, _ = store("a.bin", random_bytes(20_000, seed=1))
+    other, _ = store("b.bin", random_bytes(20_000, seed=2))
+    repos.files._execute("UPDATE file_chunks SET chunk_id = %s WHERE file_id = %s AND seq = 0",
+                         (chunk_ids(repos, other)[0], file_id))
+    assert_rejected(fetch, file_id, "not the ones uploaded", tmp_path)
+
+
+def test_swapped_sealed_data_fails_decryption(store, fetch, repos, tmp_path):
+    file_id, _ = store("a.bin", random_bytes(20_000))
+    first, second = chunk_ids(repos, file_id)[:2]
+    nonce, data = query(repos, "SELECT nonce, data FROM vault_chunks WHERE id = %s", (second,))[0]
+    repos.files._execute("UPDATE vault_chunks SET nonce = %s, data = %s WHERE id = %s",
+                         (bytes(nonce), bytes(data), first))
+    assert_rejected(fetch, file_id, "failed verification at chunk 0", tmp_path)
+
+
+def test_files_from_before_chunking_are_refused(fetch, repos, user_id, tmp_path):
+    _, file_id = repos.files._execute(
+        "INSERT INTO file_vault (user_id, file_name, encrypted_data, file_size) VALUES (%s, 'old', %s, 3)",
+        (user_id, b"xyz"))
+    assert_rejected(fetch, file_id, "older format", tmp_path)
+
+
+def codec_tags(repos, keyring, executor, user_id, file_id):
+    """The codec byte at the front of each of the file's sealed chunks."""
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+    from file_vault import _associated_data
+    rows = query(repos, "SELECT c.digest, c.key_id, c.nonce, c.data FROM file_chunks f "
+                        "JOIN vault_chunks c ON c.id = f.chunk_id WHERE f.file_id = %s ORDER BY f.seq", (file_id,))
+    tags = []
+    for digest, key_id, nonce, sealed in rows:
+        key = executor.run("read_key", lambda db: keyring.data_key(user_id, key_id, db))
+        plaintext = AESGCM(key).decrypt(bytes(nonce), bytes(sealed), _associated_data(user_id, bytes(digest)))
+        tags.append(plaintext[0])
+    return tags
+
+
+def test_compressible_chunks_are_stored_compressed(store, fetch, repos, keyring, executor, user_id):
+    data = b"passvault " * 5000
+    file_id, summary = store("notes.txt", data)
+    assert summary["codec"] == "zlib" and summary["bytes_stored"] < len(data) // 10
+    assert set(codec_tags(repos, keyring, executor, user_id, file_id)) == {CODECS["zlib"]}
+    assert fetch(file_id) == data
+
+
+def test_chunks_that_do_not_shrink_are_stored_raw(store, fetch, repos, keyring, executor, user_id):
+    # Compressible first, so the file keeps zlib, then random chunks that zlib would only grow.
+    data = b"a" * 8192 + random_bytes(8192)
+    file_id, summary = store("mixed.txt", data)
+    assert summary["codec"] == "zlib"
+    assert set(codec_tags(repos, keyring, executor, user_id, file_id)) == {CODECS["zlib"], CODECS["none"]}
+    assert fetch(file_id) == data
+
+    # A file whose first new chunk does not shrink is stored raw from there on.
+    file_id, summary = store("random.txt", random_bytes(20_000, seed=3))
+    assert summary["codec"] == "none"
+    assert set(codec_tags(repos, keyring, executor, user_id, file_id)) == {CODECS["none"]}
+
+    # Formats that are compressed already are not tried at all.
+    file_id, summary = store("photo.jpg", b"jpeg " * 5000)
+    assert summary["codec"] == "none" and summary["bytes_stored"] == summary["bytes"] - summary["bytes_deduplicated"]
+    assert set(codec_tags(repos, keyring, executor, user_id, file_id)) == {CODECS["none"]}
@@ -0,0 +1,98 @@
+import pytest
+import migrations
+from migrations import MigrationError, apply_migration, migration_checksum, pending_work, unless
+
+
+class RecordingCursor:
+    """Answers every guard query with the next of counts and records the statements run."""
+
+    def __init__(self, counts=()):
+        self.counts = list(counts)
+        self.executed = []
+        self.rowcount = 0
+        self._row = None
+
+    def execute(self, sql, params=()):
+        self.executed.append(sql)
+        if sql.lstrip().startswith("SELECT"):
+            self._row = (self.counts.pop(0),)
+
+    def fetchone(self):
+        return self._row
+
+
+def test_fresh_database_needs_everything():
+    pending, routines = pending_work(None)
+    assert [m[0] for m in pending] == [m[0] for m in migrations.MIGRATIONS]
+    assert len(routines) == len(migrations.SCHEMA_OBJECTS)
+
+
+def test_versions_are_unique_and_increasing():
+    versions = [m[0] for m in migrations.MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+
+def test_only_unapplied_migrations_and_changed_routines_are_pending():
+    first, second = migrations.MIGRATIONS[:2]
+    kind, name, sql = migrations.ROUTINES[0]
+    state = ({first[0]: migration_checksum(first[2])}, {name: migrations.checksum(sql)})
+    pending, routines = pending_work(state, [first, second], [(kind, name, sql), ("TRIGGER", "t", "CREATE TRIGGER t")])
+    assert pending == [second]
+    assert [r[1] for r in routines] == ["t"]
+
+
+def test_edited_migration_is_refused():
+    version, name, statements = migrations.MIGRATIONS[0]
+    with pytest.raises(MigrationError):
+        pending_work(({version: "0" * 64}, {}), [(version, name, statements)], [])
+
+
+def test_checksum_ignores_indentation():
+    assert migrations.checksum("  SELECT 1\n\n    FROM t ") == migrations.checksum("SELECT 1\nFROM t")
+
+
+def test_guard_is_part_of_the_checksum():
+    assert migration_checksum([unless("SELECT 0", "DROP x")]) != migration_checksum([unless("SELECT 1", "DROP x")])
+
+
+def test_guarded_statement_runs_only_when_not_yet_applied():
+    cursor = RecordingCursor(counts=[1, 0])
+    apply_migration(cursor, 99, "test", [
+        unless("SELECT already", "ALTER TABLE a DROP FOREIGN KEY fk"),
+        unless("SELECT not_yet", "ALTER TABLE a ADD COLUMN c INT"),
+        "DELETE FROM b",
+    ])
+    assert "ALTER TABLE a DROP FOREIGN KEY fk" not in cursor.executed
+    assert "ALTER TABLE a ADD COLUMN c INT" in cursor.executed
+    assert "DELETE FROM b" in cursor.executed
+    assert cursor.executed[-1].startswith("INSERT INTO schema_version")
+
+
+def test_rerun_after_partial_failure_skips_what_took_effect():
+    # Migration 8 failed after adding file_vault's columns: only the rest is run again.
+    version, name, statements = next(m for m in migrations.MIGRATIONS if m[0] == 8)
+    cursor = RecordingCursor(counts=[1, 0])
+    apply_migration(cursor, version, name, statements)
+    altered = [sql for sql in cursor.executed if sql.lstrip().startswith("ALTER")]
+    assert altered == ["ALTER TABLE user_stats ADD COLUMN stored_bytes BIGINT NOT NULL DEFAULT 0"]
+
+
+def test_multi_statement_ddl_migrations_are_guarded():
+    for version, name, statements in migrations.MIGRATIONS:
+        for statement in statements:
+            if isinstance(statement, str):
+                assert "ADD COLUMN" not in statement, f"migration {version} ({name}) adds a column unguarded"
+                assert "DROP FOREIGN KEY" not in statement, f"migration {version} ({name}) drops a key unguarded"
+
+
+def test_procedures_leave_transaction_control_to_the_caller():
+    for kind, name, sql in migrations.ROUTINES:
+        if kind == "PROCEDURE":
+            for keyword in ("START TRANSACTION", "COMMIT", "ROLLBACK"):
+                assert keyword not in sql, f"{name} runs {keyword}"
+
+
+def test_dropped_procedures_are_no_longer_reconciled():
+    version, name, statements = next(m for m in migrations.MIGRATIONS if m[1] == "drop_unused_procedures")
+    dropped = {sql.split()[-1] for sql in statements if sql.startswith("DROP PROCEDURE")}
+    assert dropped and not dropped & {routine[1] for routine in migrations.ROUTINES}
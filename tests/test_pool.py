@@ -0,0 +1,185 @@
+import threading
+
+import pytest
+from mysql.connector.errors import PoolError
+
+from pool import ElasticConnectionPool
+
+
+class FakeCursor:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.in_transaction = False
+        self.rolled_back = 0
+        self.alive = True
+
+    def cursor(self, prepared=False):
+        return FakeCursor()
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise OSError("gone away")
+
+    def rollback(self):
+        self.rolled_back += 1
+        self.in_transaction = False
+
+    def commit(self):
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**options):
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    options.setdefault("min_size", 1)
+    pool = ElasticConnectionPool({}, connector=connect, **options)
+    return pool, opened
+
+
+def test_grows_to_max_size_then_times_out():
+    pool, opened = make_pool(max_size=2, checkout_timeout=0.05)
+    first, second = pool.get_connection(), pool.get_connection()
+    assert len(opened) == 2
+    with pytest.raises(PoolError):
+        pool.get_connection()
+    assert pool.stats()["timeouts"] == 1
+    first.close()
+    second.close()
+    assert pool.stats()["idle"] == 2
+    pool.close()
+
+
+def test_waiter_gets_the_released_connection():
+    pool, _ = make_pool(max_size=1, checkout_timeout=5)
+    held = pool.get_connection()
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.get_connection()))
+    waiter.start()
+    threading.Timer(0.05, held.close).start()
+    waiter.join(2)
+    assert got and pool.stats()["waits"] == 1
+    got[0].close()
+    pool.close()
+
+
+def test_release_rolls_back_an_open_transaction():
+    pool, opened = make_pool()
+    connection = pool.get_connection()
+    opened[0].in_transaction = True
+    connection.close()
+    assert opened[0].rolled_back == 1
+    with pytest.raises(PoolError):
+        connection.commit()
+    pool.close()
+
+
+def test_after_commit_runs_on_commit_only():
+    pool, _ = make_pool()
+    connection = pool.get_connection()
+    ran = []
+    connection.after_commit(lambda: ran.append("first"))
+    connection.rollback()
+    connection.after_commit(lambda: ran.append("second"))
+    connection.commit()
+    assert ran == ["second"]
+    connection.close()
+    pool.close()
+
+
+def test_dead_idle_connection_is_replaced():
+    pool, opened = make_pool(ping_after=0)
+    opened[0].alive = False
+    connection = pool.get_connection()
+    assert connection._connection is opened[1]
+    assert opened[0].closed and pool.stats()["ping_failures"] == 1
+    connection.close()
+    pool.close()
+
+
+def test_prepared_statement_cache_evicts_least_recently_used():
+    pool, _ = make_pool(statement_cache_size=2)
+    connection = pool.get_connection()
+    a = connection.prepared_cursor("SELECT 1")
+    connection.prepared_cursor("SELECT 2")
+    assert connection.prepared_cursor("SELECT 1") is a
+    connection.prepared_cursor("SELECT 3")  # evicts SELECT 2
+    stats = pool.stats()
+    assert (stats["statement_cache_hits"], stats["statement_cache_misses"]) == (1, 3)
+    assert not a.closed
+    connection.close()
+    pool.close()
+
+
+def test_reaper_closes_idle_connections_above_min_size_and_forgets_their_statements():
+    pool, opened = make_pool(min_size=1, idle_timeout=0)
+    first, second = pool.get_connection(), pool.get_connection()
+    second.prepared_cursor("SELECT 1")
+    first.close()
+    second.close()
+    pool.reap_idle()
+    stats = pool.stats()
+    assert stats["size"] == 1 and stats["reaped"] == 1
+    assert opened[0].closed and not opened[1].closed
+    assert list(pool._statements) == [opened[1]]
+    pool.close()
+
+
+def test_concurrent_checkouts_and_reaping_keep_the_statement_map_consistent():
+    pool, _ = make_pool(min_size=0, max_size=4, idle_timeout=0, checkout_timeout=5)
+    errors = []
+
+    def worker():
+        try:
+            for i in range(200):
+                connection = pool.get_connection()
+                connection.prepared_cursor(f"SELECT {i % 5}")
+                connection.close()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for _ in range(200):
+        pool.reap_idle()
+    for thread in threads:
+        thread.join()
+    pool.reap_idle()
+    assert not errors
+    assert pool.stats()["size"] == 0 and not pool._statements
+    pool.close()
+
+
+def test_checkout_errors_are_raised_without_a_dialog(monkeypatch):
+    import db
+    from routing import ReplicaRouter
+
+    def showerror(*args):
+        raise AssertionError("Tk called from a worker thread")
+    monkeypatch.setattr(db.messagebox, "showerror", showerror)
+    pool = ElasticConnectionPool({}, connector=lambda **config: FakeConnection(), min_size=0, max_size=1,
+                                 checkout_timeout=0.05)
+    database = db.DatabaseConnectionPool.__new__(db.DatabaseConnectionPool)
+    database.router = ReplicaRouter(pool, None)
+    held = database.get_connection()
+    errors = []
+    worker = threading.Thread(target=lambda: errors.append(pytest.raises(PoolError, database.get_connection)))
+    worker.start()
+    worker.join()
+    assert errors
+    held.close()
@@ -0,0 +1,29 @@
+from repositories import AuditRepo
+import check_query_plans
+
+
+class RecordingAuditRepo(AuditRepo):
+    def __init__(self):
+        self.executed = []
+
+    def _fetchall(self, query, params=(), db=None):
+        self.executed.append((query, list(params)))
+        return []
+
+
+def test_list_runs_the_statement_the_builder_returns():
+    repo = RecordingAuditRepo()
+    repo.list(1)
+    repo.list(1, action="UPDATE", end_date="2026-01-31", after=("2026-01-01", 7))
+    assert repo.executed[0][0] == AuditRepo.list_sql()
+    assert repo.executed[1][0] == AuditRepo.list_sql(True, True, True)
+    # One placeholder per parameter.
+    for query, params in repo.executed:
+        assert query.count("%s") == len(params)
+
+
+def test_plan_check_covers_every_list_statement():
+    checked = {sql for source, sql in check_query_plans.collect_queries()
+               if source == "repositories.py:AuditRepo.list"}
+    assert checked == set(AuditRepo.list_statements())
+    assert len(checked) == 8
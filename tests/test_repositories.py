@@ -0,0 +1,126 @@
+import json
+import time
+from datetime import date, datetime, timedelta
+
+import pytest
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll for work done after commit by a background thread (the audit writer)."""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail("timed out")
+        time.sleep(0.01)
+
+
+def test_users(repos, user_id):
+    assert repos.users.get_identity(user_id) == ("alice", "alice@example.com")
+    assert repos.users.get_credentials("alice") == (user_id, "not-a-real-hash")
+    assert repos.users.exists("alice", "someone@example.com")
+    assert not repos.users.exists("alice", "alice@example.com", exclude_id=user_id)
+    repos.users.update_identity(user_id, "alice2", "alice2@example.com")
+    assert repos.users.get_username(user_id) == "alice2"
+
+
+def test_password_pages_and_stats(repos, user_id):
+    for service in ("c", "a", "b"):
+        repos.passwords.add(user_id, service, "alice", "secret", None, "Strong")
+    first = repos.passwords.list(user_id, limit=2)
+    rest = repos.passwords.list(user_id, after=(first[-1][0], first[-1][1], first[-1][7]), limit=2)
+    assert [row[0] for row in first + rest] == ["a", "b", "c"]
+    assert repos.stats.get(user_id)[0] == 3
+
+    repos.passwords.delete(user_id, rest[0][7])
+    assert repos.stats.get(user_id)[0] == 2
+    assert repos.stats.reconcile(user_id) is False
+
+
+def test_deleting_a_password_removes_its_expiration_alert(repos, user_id):
+    row = repos.passwords.add(user_id, "mail", "alice", "secret", date.today() + timedelta(days=2), "Strong")
+    repos.alerts.refresh(user_id)
+    assert [alert[3] for alert in repos.alerts.list(user_id)] == [row[7]]
+
+    assert repos.passwords.delete(user_id, row[7]) == 1
+    assert repos.passwords.get(user_id, row[7]) is None
+    assert repos.alerts.list(user_id) == []
+
+
+def test_alert_refresh_tracks_the_window(repos, user_id):
+    today = date.today()
+    expired = repos.passwords.add(user_id, "old", "alice", "s", today - timedelta(days=1), "Weak")
+    soon = repos.passwords.add(user_id, "soon", "alice", "s", today + timedelta(days=3), "Weak")
+    repos.passwords.add(user_id, "later", "alice", "s", today + timedelta(days=30), "Weak")
+    repos.alerts.refresh(user_id)
+    alerts = {row[3]: row[2] for row in repos.alerts.list(user_id)}
+    assert alerts == {expired[7]: "Expired", soon[7]: "Expiring Soon"}
+
+    # A week on, the second password has expired too and nothing new enters the window.
+    repos.alerts.refresh(user_id, today=today + timedelta(days=7))
+    assert {row[2] for row in repos.alerts.list(user_id)} == {"Expired"}
+    assert len(repos.notifications.recent(user_id)) == 3  # two new alerts, one status change
+
+
+def test_profile_settings_and_preferences_round_trip_and_are_audited(repos, user_id):
+    repos.profiles.save(user_id, "alice", "alice@example.com", "Alice", "555")
+    repos.profiles.save(user_id, "alice", "alice@example.com", "Alice Smith", "555")
+    repos.settings.save(user_id, True, False)
+    repos.preferences.save(user_id, *repos.preferences.DEFAULTS)
+    assert repos.profiles.get(user_id) == ("alice", "alice@example.com", "Alice Smith", "555")
+    assert tuple(map(bool, repos.settings.get(user_id))) == (True, False)
+    assert repos.preferences.get(user_id)[0] == repos.preferences.DEFAULTS[0]
+
+    updates = lambda: [row for row in repos.audit.list(user_id, action="UPDATE") if row[1] == "user_profiles"]
+    wait_for(updates)
+    (entry,) = updates()
+    details = json.loads(entry[4])
+    assert (details["old_full_name"], details["new_full_name"]) == ("Alice", "Alice Smith")
+
+
+def test_backup_and_restore(repos, user_id):
+    repos.profiles.save(user_id, "alice", "alice@example.com", "Alice", "555")
+    before = {row[1] for row in repos.backups.list(user_id)}
+    repos.backups.backup_user(user_id)
+    backups = repos.backups.list_with_data(user_id)
+    profile_backup = next(row for row in backups if row[1] == "user_profiles")
+    assert json.loads(profile_backup[4])["full_name"] == "Alice"
+    assert {row[1] for row in backups} >= before | {"user_profiles"}
+    assert repos.stats.get(user_id)[5] is not None  # last_backup
+
+    repos.profiles.save(user_id, "alice", "alice@example.com", "Mallory", "000")
+    repos.backups.restore(profile_backup[0])
+    assert repos.profiles.get(user_id) == ("alice", "alice@example.com", "Alice", "555")
+
+
+def test_a_failed_unit_of_work_leaves_nothing_behind(repos, user_id):
+    with pytest.raises(RuntimeError):
+        with repos.passwords.connection() as conn:
+            repos.profiles.save(user_id, "alice", "alice@example.com", "Alice", "555", db=conn)
+            repos.passwords.add(user_id, "mail", "alice", "secret", None, "Strong", db=conn)
+            raise RuntimeError("abandoned")
+    assert repos.profiles.get(user_id) is None
+    assert repos.passwords.list(user_id) == []
+
+
+@pytest.mark.parametrize("repo, args", [
+    ("qr_codes", ("mail", "alice", "data")),
+    ("access_logs", ("laptop", "10.0.0.1", "home")),
+    ("shared_passwords", ("mail", "bob", "Pending")),
+    ("devices", ("laptop", "Desktop", "Active")),
+])
+def test_simple_tables(repos, user_id, repo, args):
+    table = getattr(repos, repo)
+    row = table.add(user_id, *args)
+    assert table.list(user_id) == [row]
+    assert table.delete(user_id, row[-1]) == 1
+    assert table.list(user_id) == []
+
+
+def test_audit_history_is_not_cut_off_inside_retention(repos, user_id):
+    old = datetime.combine(repos.audit.since() + timedelta(days=1), datetime.min.time())
+    with repos.audit.connection() as conn:
+        repos.audit._execute(
+            "INSERT INTO audit_logs (table_name, action, record_id, user_id, change_details, timestamp) "
+            "VALUES ('passwords', 'INSERT', 1, %s, '{}', %s)", (user_id, old), conn)
+    assert old in [row[5] for row in repos.audit.list(user_id)]
+    assert old in [row[1] for row in repos.audit.recent(user_id)]
@@ -0,0 +1,113 @@
+import mysql.connector
+import pytest
+
+from retry import RetryExecutor
+
+
+def transient():
+    return mysql.connector.errors.OperationalError(msg="Deadlock found", errno=1213)
+
+
+class LosesCommit:
+    """Passes get_connection through, but the first commit's reply is lost after the server applied it."""
+
+    def __init__(self, db_pool):
+        self.db_pool = db_pool
+        self.lost = False
+
+    def get_connection(self, **kwargs):
+        return LostReplyConnection(self, self.db_pool.get_connection(**kwargs))
+
+    def record_write(self):
+        self.db_pool.record_write()
+
+
+class LostReplyConnection:
+    def __init__(self, owner, connection):
+        self._owner = owner
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def commit(self):
+        self._connection.commit()
+        if not self._owner.lost:
+            self._owner.lost = True
+            raise mysql.connector.errors.OperationalError(msg="Lost connection", errno=2013)
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def executor(db_pool, sleeps):
+    return RetryExecutor(db_pool, max_attempts=3, sleep=sleeps.append)
+
+
+def usernames(repos):
+    return [row[0] for row in repos.users._fetchall("SELECT username FROM users ORDER BY username")]
+
+
+def test_transient_errors_are_retried_after_a_backoff(executor, repos, sleeps):
+    attempts = []
+
+    def work(db):
+        attempts.append(1)
+        repos.users.create(f"user{len(attempts)}", f"user{len(attempts)}@example.com", "hash", db=db)
+        if len(attempts) == 1:
+            raise transient()
+        return "ok"
+
+    assert executor.run("create_user", work, write=True) == "ok"
+    assert usernames(repos) == ["user2"]  # the first attempt rolled back
+    assert len(sleeps) == 1 and 0 <= sleeps[0] <= executor.base_delay
+    stats = executor.stats()["create_user"]
+    assert (stats["calls"], stats["attempts"], stats["retries"], stats["failures"]) == (1, 2, 1, 0)
+
+
+def test_other_errors_are_raised_at_once(executor, repos, sleeps):
+    def work(db):
+        repos.users.create("bob", "bob@example.com", "hash", db=db)
+        repos.users.create("bob", "bob@example.com", "hash", db=db)
+
+    with pytest.raises(mysql.connector.Error) as raised:
+        executor.run("create_user", work, write=True)
+    assert raised.value.errno == 1062
+    assert sleeps == [] and usernames(repos) == []
+    assert executor.stats()["create_user"]["failures"] == 1
+
+
+def test_gives_up_after_max_attempts(executor, sleeps):
+    def work(db):
+        raise transient()
+
+    with pytest.raises(mysql.connector.Error):
+        executor.run("stuck", work)
+    assert len(sleeps) == executor.max_attempts - 1
+    assert executor.stats()["stuck"]["attempts"] == executor.max_attempts
+
+
+def test_a_write_whose_commit_reply_was_lost_is_not_applied_twice(db_pool, repos, sleeps):
+    executor = RetryExecutor(LosesCommit(db_pool), sleep=sleeps.append)
+    result = executor.run("create_user", lambda db: repos.users.create("bob", "bob@example.com", "hash", db=db),
+                          write=True)
+    assert result is None  # the attempt that committed did not get to return
+    assert usernames(repos) == ["bob"]
+    assert executor.stats()["create_user"]["duplicates_skipped"] == 1
+
+
+def test_backoff_is_capped():
+    executor = RetryExecutor(None, base_delay=0.05, max_delay=0.2)
+    assert all(0 <= executor.backoff(attempt) <= 0.05 * 2 ** (attempt - 1) for attempt in (1, 2, 3))
+    assert all(executor.backoff(10) <= 0.2 for _ in range(100))
+
+
+def test_old_idempotency_keys_are_purged_by_background_maintenance(db_pool, executor, repos):
+    executor.run("create_user", lambda db: repos.users.create("bob", "bob@example.com", "hash", db=db), write=True)
+    repos.users._execute("INSERT INTO idempotency_keys (idem_key, operation, created_at) VALUES (%s, %s, %s)",
+                         ("0" * 32, "old", "2000-01-01 00:00:00"))
+    assert db_pool.purge_idempotency_keys(db_pool.pool) == 1
+    assert repos.users._fetchall("SELECT operation FROM idempotency_keys") == [("create_user",)]
@@ -0,0 +1,65 @@
+import pytest
+from mysql.connector import errors
+
+import sqlite_backend
+import sqlite_schema
+from dialects import SQLITE
+from pool import ElasticConnectionPool
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = sqlite_backend.connect(str(tmp_path / "backend.db"))
+    sqlite_schema.migrate(connection)
+    yield connection
+    connection.close()
+
+
+def run(connection, sql, params=()):
+    cursor = connection.cursor()
+    cursor.execute(sql, params)
+    return cursor
+
+
+def test_errors_carry_mysql_errnos(conn):
+    run(conn, "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)", ("a", "a@x", "h"))
+    with pytest.raises(errors.IntegrityError) as duplicate:
+        run(conn, "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)", ("a", "b@x", "h"))
+    with pytest.raises(errors.IntegrityError) as orphan:
+        run(conn, "INSERT INTO passwords (user_id, service, username, password) VALUES (99, 's', 'u', 'p')")
+    with pytest.raises(errors.ProgrammingError) as missing:
+        run(conn, "SELECT * FROM no_such_table")
+    with pytest.raises(errors.ProgrammingError) as procedure:
+        SQLITE.call_procedure(conn, "NoSuchProcedure", ())
+    assert [e.value.errno for e in (duplicate, orphan, missing, procedure)] == [1062, 1452, 1146, 1305]
+
+
+def test_procedures_run_in_the_callers_transaction(tmp_path, conn):
+    user_id = run(conn, "INSERT INTO users (username, email, password) VALUES ('a', 'a@x', 'h')").lastrowid
+    conn.commit()
+    pool = ElasticConnectionPool({"path": str(tmp_path / "backend.db")}, min_size=1,
+                                 connector=sqlite_backend.connect, dialect=SQLITE)
+    pooled = pool.get_connection()
+    try:
+        SQLITE.call_procedure(pooled, "UpdateUserSettings", (user_id, True, False))
+        assert pooled.in_transaction
+        pooled.rollback()
+    finally:
+        pooled.close()
+        pool.close()
+    assert run(conn, "SELECT dark_mode, notifications_enabled FROM user_settings").fetchall() == [(0, 1)]
+
+
+def test_relative_time_expression(conn):
+    row = run(conn, f"SELECT {SQLITE.hours_ago(2)} < datetime('now', 'localtime')").fetchone()
+    assert row == (1,)
+
+
+def test_migrate_is_a_no_op_once_up_to_date(conn):
+    assert sqlite_schema.migrate(conn) is False
+
+
+def test_stale_passwords_trigger_is_gone(conn):
+    triggers = {row[0] for row in run(conn, "SELECT name FROM sqlite_master WHERE type = 'trigger'").fetchall()}
+    assert "passwords_after_update" not in triggers
+    assert {name for _, name, _ in sqlite_schema.SQLITE_TRIGGERS} <= triggers
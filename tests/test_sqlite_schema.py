@@ -0,0 +1,71 @@
+import pytest
+
+import sqlite_backend
+import sqlite_schema
+
+
+@pytest.fixture
+def upgrade(tmp_path, monkeypatch):
+    """Migrate a fresh database to version, run setup against it, then migrate it the rest of the way."""
+
+    def run(version, setup):
+        db = sqlite_backend.connect(str(tmp_path / "upgrade.db"))
+        with monkeypatch.context() as patch:
+            patch.setattr(sqlite_schema, "SQLITE_MIGRATIONS",
+                          [m for m in sqlite_schema.SQLITE_MIGRATIONS if m[0] <= version])
+            patch.setattr(sqlite_schema, "SQLITE_SCHEMA_OBJECTS", [])
+            sqlite_schema.migrate(db)
+        cursor = db.cursor()
+        setup(cursor)
+        db.commit()
+        sqlite_schema.migrate(db)
+        return db
+
+    return run
+
+
+def query(db, sql, params=()):
+    cursor = db.cursor()
+    cursor.execute(sql, params)
+    return cursor.fetchall()
+
+
+def add_user(cursor, name):
+    cursor.execute("INSERT INTO users (username, email, password) VALUES (%s, %s, %s)", (name, f"{name}@x", "h"))
+    user_id = cursor.lastrowid
+    cursor.execute("INSERT INTO user_stats (user_id, file_count, file_bytes) VALUES (%s, 0, 0)", (user_id,))
+    return user_id
+
+
+def test_files_written_before_chunking_are_removed_and_counted_out(upgrade, caplog):
+    def setup(cursor):
+        alice, bob = add_user(cursor, "alice"), add_user(cursor, "bob")
+        for name in ("a.txt", "b.txt"):
+            cursor.execute("INSERT INTO file_vault (user_id, file_name, encrypted_data, file_size) "
+                           "VALUES (%s, %s, %s, 10)", (alice, name, b"sealed"))
+        cursor.execute("UPDATE user_stats SET file_count = 2, file_bytes = 20 WHERE user_id = %s", (alice,))
+
+    with caplog.at_level("WARNING"):
+        db = upgrade(4, setup)
+    assert query(db, "SELECT COUNT(*) FROM file_vault") == [(0,)]
+    assert query(db, "SELECT file_count, file_bytes, stored_bytes FROM user_stats") == [(0, 0, 0), (0, 0, 0)]
+    assert "Migration 5 (vault_chunks) deleted 2 row(s): DELETE FROM file_vault WHERE storage_format = 0" \
+        in caplog.text
+    columns = {row[1]: row[3] for row in query(db, "PRAGMA table_info(vault_chunks)")}
+    assert columns["key_id"] == 1  # NOT NULL
+    for table in ("user_keys", "vault_keys", "file_chunks"):
+        assert query(db, f"SELECT COUNT(*) FROM {table}") == [(0,)]
+
+
+def test_upgrade_drops_the_stale_passwords_trigger(upgrade):
+    def setup(cursor):
+        cursor.execute("CREATE TRIGGER passwords_after_update AFTER UPDATE ON passwords FOR EACH ROW "
+                       "BEGIN UPDATE passwords SET updated_at = datetime('now') WHERE id = NEW.id; END")
+        cursor.execute("CREATE TABLE IF NOT EXISTS schema_routines (name VARCHAR(64) PRIMARY KEY, "
+                       "kind VARCHAR(20) NOT NULL, checksum CHAR(64) NOT NULL, applied_at DATETIME)")
+        cursor.execute("INSERT INTO schema_routines (name, kind, checksum) "
+                       "VALUES ('passwords_after_update', 'TRIGGER', 'x')")
+
+    db = upgrade(5, setup)
+    assert query(db, "SELECT name FROM sqlite_master WHERE name = 'passwords_after_update'") == []
+    assert query(db, "SELECT name FROM schema_routines WHERE name = 'passwords_after_update'") == []
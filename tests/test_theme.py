@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+import pytest
+
+tk = pytest.importorskip("tkinter")
+
+from constants import COLORS
+from theme import Theme
+from virtual_table import VirtualTable
+
+
+@pytest.fixture
+def root():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    yield root
+    root.destroy()
+
+
+def test_table_stripes_follow_the_mode(root):
+    app = SimpleNamespace(theme=Theme(root))
+    table = VirtualTable(root, app, ("name",), fetch=None, key=lambda row: row, format_row=lambda row: row)
+    assert table.tree.tag_configure("odd", "background") == COLORS["table_alt"]
+
+    app.theme.set_mode("dark")
+    app.theme.apply(root)
+    assert table.tree.tag_configure("even", "background") == COLORS["dark_card_bg"]
+    assert table.tree.tag_configure("odd", "background") == COLORS["dark_table_alt"]
+
+    app.theme.set_mode("light")
+    app.theme.apply(root)
+    assert table.tree.tag_configure("odd", "background") == COLORS["table_alt"]
@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+import upload_queue
+from upload_queue import TokenBucket, UploadQueue
+
+
+class FakeExecutor:
+    """Runs work straight away, noting whether a transaction is open."""
+
+    def __init__(self):
+        self.in_transaction = False
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def run(self, operation, work, write=False):
+        self.gate.wait(5)
+        self.in_transaction = True
+        try:
+            return work(None)
+        finally:
+            self.in_transaction = False
+
+
+class FakeVault:
+    def __init__(self, executor, stored_fraction=1.0):
+        self.executor = executor
+        self.stored_fraction = stored_fraction
+
+    def upload(self, user_id, path, name, db, progress=None):
+        if name == "bad":
+            raise ValueError("unreadable")
+        with open(path, "rb") as f:
+            size = len(f.read())
+        sent = int(size * self.stored_fraction)
+        progress(size, sent)
+        return (user_id, name), {"bytes": size, "bytes_stored": sent}
+
+
+def make_files(tmp_path, sizes):
+    files = []
+    for index, size in enumerate(sizes):
+        path = tmp_path / f"f{index}"
+        path.write_bytes(b"x" * size)
+        files.append((str(path), f"f{index}"))
+    return files
+
+
+def wait_idle(queue, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while queue.active():
+        if time.monotonic() > deadline:
+            pytest.fail("timed out")
+        time.sleep(0.01)
+
+
+def test_token_bucket_paces_after_the_burst():
+    bucket = TokenBucket(rate=1000)
+    assert bucket.take(1000) == 0
+    assert 0.05 <= bucket.take(100) <= 0.5
+    bucket.refund(10_000)
+    assert bucket.take(1000) == 0  # refunds never raise the balance past the burst
+
+
+def test_token_bucket_stops_waiting_when_cancelled():
+    bucket = TokenBucket(rate=10)
+    started = time.monotonic()
+    bucket.take(1000, cancelled=lambda: True)
+    assert time.monotonic() - started < 0.5
+
+
+def test_small_files_share_a_transaction(tmp_path):
+    executor = FakeExecutor()
+    queue = UploadQueue(FakeVault(executor), executor, workers=1, batch_files=3, batch_bytes=1000)
+    jobs = queue.submit(1, make_files(tmp_path, [10, 10, 10, 10, 2000]))
+    wait_idle(queue)
+    assert [job.status for job in jobs] == ["done"] * 5
+    assert [job.row for job in jobs] == [(1, f"f{index}") for index in range(5)]
+    assert queue.stats()["transactions"] == 3  # three small, then one small, then the large one alone
+    queue.close()
+
+
+def test_a_failing_file_does_not_fail_its_batch(tmp_path):
+    executor = FakeExecutor()
+    queue = UploadQueue(FakeVault(executor), executor, workers=1)
+    files = make_files(tmp_path, [10, 10, 10])
+    files[1] = (files[1][0], "bad")
+    jobs = queue.submit(1, files + [(str(tmp_path / "missing"), "missing")])
+    wait_idle(queue)
+    assert [job.status for job in jobs] == ["done", "failed", "done", "failed"]
+    stats = queue.stats()
+    assert (stats["uploaded"], stats["failed"]) == (2, 2)
+    queue.close()
+
+
+def test_cancelled_jobs_never_start(tmp_path):
+    executor = FakeExecutor()
+    executor.gate.clear()
+    queue = UploadQueue(FakeVault(executor), executor, workers=1, batch_files=1)
+    jobs = queue.submit(1, make_files(tmp_path, [10, 10, 10]))
+    queue.cancel(jobs[1:])
+    executor.gate.set()
+    wait_idle(queue)
+    assert [job.status for job in jobs] == ["done", "cancelled", "cancelled"]
+    assert queue.stats()["cancelled"] == 2
+    queue.close()
+
+
+def test_throttling_waits_outside_transactions(tmp_path, monkeypatch):
+    executor = FakeExecutor()
+    sleeps = []
+    real_sleep = time.sleep
+
+    def sleep(seconds):
+        sleeps.append(executor.in_transaction)
+        real_sleep(seconds)
+    monkeypatch.setattr(upload_queue.time, "sleep", sleep)
+    queue = UploadQueue(FakeVault(executor), executor, workers=2, batch_files=1, max_bytes_per_second=20_000)
+    jobs = queue.submit(1, make_files(tmp_path, [10_000] * 4))
+    wait_idle(queue)
+    assert [job.status for job in jobs] == ["done"] * 4
+    assert sleeps and not any(sleeps)
+    assert queue.stats()["throttled_seconds"] > 0
+    queue.close()
+
+
+def test_bytes_not_sent_are_given_back(tmp_path):
+    executor = FakeExecutor()
+    queue = UploadQueue(FakeVault(executor, stored_fraction=0), executor, workers=1, batch_files=1,
+                        max_bytes_per_second=20_000)
+    started = time.monotonic()
+    jobs = queue.submit(1, make_files(tmp_path, [20_000] * 5))
+    wait_idle(queue)
+    assert [job.status for job in jobs] == ["done"] * 5
+    assert time.monotonic() - started < 1  # deduplicated uploads cost nothing
+    queue.close()
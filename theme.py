@@ -0,0 +1,177 @@
+import weakref
+import tkinter as tk
+from tkinter import ttk
+from constants import COLORS, FONTS
+
+# Light/dark theming. Widgets are built with the light colours straight from
+# COLORS. The first time a widget is restyled, the COLORS key ("role") each of
+# its colour options was built with is recorded, and a theme maps roles to the
+# colours to use instead. Fonts and roles a theme does not mention are left
+# alone, so headings, buttons and accents keep their look in every theme.
+
+THEMES = {
+    "light": {},
+    "dark": {
+        "background": "dark_bg",
+        "card_bg": "dark_card_bg",
+        "dashboard_card": "dark_card_bg",
+        "dashboard_header": "dark_card_bg",
+        "table_bg": "dark_card_bg",
+        "table_alt": "dark_table_alt",
+        "shadow": "dark_border",
+        "border": "dark_border",
+        "text": "dark_fg",
+    },
+}
+
+_BACKGROUND_ROLES = ("background", "card_bg", "dashboard_card", "dashboard_header", "table_bg", "table_alt",
+                     "shadow", "border")
+_FOREGROUND_ROLES = ("text",)
+
+# The roles each tk option can carry, by the colour value it was built with.
+ROLE_OPTIONS = {
+    option: {COLORS[role].upper(): role for role in reversed(roles)}
+    for option, roles in (
+        ("bg", _BACKGROUND_ROLES),
+        ("activebackground", _BACKGROUND_ROLES),
+        ("highlightbackground", _BACKGROUND_ROLES),
+        ("selectcolor", _BACKGROUND_ROLES),
+        ("fg", _FOREGROUND_ROLES),
+        ("activeforeground", _FOREGROUND_ROLES),
+        ("insertbackground", _FOREGROUND_ROLES),
+    )
+}
+
+
+class Theme:
+    """Named ttk styles plus role-based restyling of classic tk widgets.
+
+    set_mode() redefines the ttk styles once, which recolours every ttk
+    widget, and marks all tk widgets stale. apply(widget) brings a widget
+    tree up to the current mode; the app calls it for what is on screen when
+    the mode changes and for each page as it is shown, so hidden pages are
+    only restyled if and when they are opened again. Subtrees already in the
+    current mode are skipped. Colours that no widget option carries, such as
+    Treeview tag backgrounds, are set by a callback given to register().
+    """
+
+    def __init__(self, root, mode="light"):
+        self.root = root
+        self.mode = mode
+        self._roles = weakref.WeakKeyDictionary()
+        # Mode each widget was last styled for, and each subtree was last fully styled for.
+        self._styled = weakref.WeakKeyDictionary()
+        self._applied = weakref.WeakKeyDictionary()
+        self._hooks = weakref.WeakKeyDictionary()
+        self._counters = {"mode_changes": 0, "widgets_restyled": 0}
+        self.style = ttk.Style()
+        self.style.theme_use("clam")
+        self.configure_styles()
+
+    def color(self, role):
+        return COLORS[THEMES[self.mode].get(role, role)]
+
+    def set_mode(self, mode):
+        if mode == self.mode:
+            return
+        self.mode = mode
+        self._counters["mode_changes"] += 1
+        self.configure_styles()
+        self.root.configure(bg=self.color("background"))
+
+    def configure_styles(self):
+        style = self.style
+        fg_color = self.color("text")
+        card_bg = self.color("card_bg")
+        gradient_start = COLORS["gradient_start"]
+        gradient_end = COLORS["gradient_end"]
+
+        # Card/Frame with shadow
+        style.configure("Card.TFrame", background=card_bg, relief="flat", borderwidth=0)
+        style.configure("Shadow.TFrame", background=gradient_start, relief="flat", borderwidth=0)
+
+        # Labels
+        style.configure("TLabel", font=FONTS["body"], background=card_bg, foreground=fg_color)
+
+        # Entries with rounded corners
+        style.configure("TEntry", padding=10, font=FONTS["body"], fieldbackground=card_bg, foreground=fg_color,
+                        borderwidth=2, relief="groove")
+
+        # Combobox
+        style.configure("TCombobox", padding=10, font=FONTS["body"], fieldbackground=card_bg, foreground=fg_color)
+
+        # Buttons with gradient and hover effects
+        style.configure("Accent.TButton", font=FONTS["button"], padding=10, background=gradient_start,
+                        foreground=COLORS["dark_fg"], borderwidth=0, relief="flat")
+        style.map("Accent.TButton",
+            background=[("active", gradient_end), ("!active", gradient_start)],
+            relief=[("pressed", "sunken"), ("!pressed", "flat")]
+        )
+        style.configure("TButton", font=FONTS["button"], padding=10, background=COLORS["secondary"],
+                        foreground=COLORS["dark_fg"], borderwidth=0, relief="flat")
+        style.map("TButton",
+            background=[("active", COLORS["secondary_hover"]), ("!active", COLORS["secondary"])],
+            relief=[("pressed", "sunken"), ("!pressed", "flat")]
+        )
+
+        # Scrollbar
+        style.configure("Vertical.TScrollbar", troughcolor=self.color("border"),
+                        background=COLORS["primary"], activebackground=COLORS["primary_hover"], width=10)
+
+        # Treeview
+        style.configure("Treeview", font=FONTS["table"], rowheight=38, background=self.color("table_bg"),
+                        fieldbackground=self.color("table_bg"), foreground=fg_color, borderwidth=0)
+        style.configure("Treeview.Heading", font=FONTS["body_bold"], background=gradient_start,
+                        foreground=COLORS["dark_fg"])
+        style.map("Treeview", background=[("selected", gradient_end)], foreground=[("selected", COLORS["dark_fg"])])
+
+    def register(self, widget, restyle):
+        """Call restyle(theme) now, and again whenever widget is restyled for another mode."""
+        self._hooks[widget] = restyle
+        restyle(self)
+
+    def apply(self, widget, skip=()):
+        """Restyle widget and its descendants for the current mode, not descending into skip."""
+        self._restyle(widget, skip)
+
+    def _restyle(self, widget, skip):
+        if widget in skip:
+            return False
+        if self._applied.get(widget) == self.mode:
+            return True
+        if self._styled.get(widget, "light") != self.mode:
+            # Roles are read off the first time, while the widget still has its built (light) colours.
+            roles = self._roles.get(widget)
+            if roles is None:
+                roles = self._roles[widget] = self._detect_roles(widget)
+            if roles:
+                widget.configure(**{option: self.color(role) for option, role in roles.items()})
+                self._counters["widgets_restyled"] += 1
+            hook = self._hooks.get(widget)
+            if hook is not None:
+                hook(self)
+            self._styled[widget] = self.mode
+        complete = all([self._restyle(child, skip) for child in widget.winfo_children()])
+        # Only a subtree with nothing skipped in it is fully current.
+        if complete:
+            self._applied[widget] = self.mode
+        return complete
+
+    @staticmethod
+    def _detect_roles(widget):
+        roles = {}
+        for option, by_value in ROLE_OPTIONS.items():
+            try:
+                value = widget.cget(option)
+            except tk.TclError:
+                continue
+            role = by_value.get(str(value).upper())
+            if role is not None:
+                roles[option] = role
+        return roles
+
+    def stats(self):
+        snapshot = dict(self._counters)
+        snapshot["mode"] = self.mode
+        snapshot["known_widgets"] = len(self._roles)
+        return snapshot
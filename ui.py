@@ -1,19 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
+import importlib
 import logging
-import mysql.connector
 import os  # Add this import to handle file opening
-from constants import COLORS, FONTS
-from utils import truncate_text, validate_email, validate_phone, show_loading, hide_loading
-from features.password_manager import create_password_manager_frame
-from features.qr_sharing import create_qr_sharing_frame
-from features.multidevice_access import create_multidevice_access_frame
-from features.secure_pass_sharing import create_secure_pass_sharing_frame
-from features.connected_devices import create_connected_devices_frame
-from features.expiration_alerts import create_expiration_alerts_frame
-from features.activity_history import create_activity_history_frame
-from features.file_manager import create_file_manager_frame
+from constants import COLORS, FONTS, FRAME_REGISTRY_CONFIG
+from frame_registry import FrameRegistry
+from utils import truncate_text, validate_email, validate_phone
+from virtual_table import VirtualTable
 
 # --- Tooltip Helper ---
 class ToolTip:
@@ -43,83 +36,22 @@ class ToolTip:
         if tw:
             tw.destroy()
 
-# --- Enhanced Theme ---
-def apply_theme(app, root):
-    style = ttk.Style()
-    style.theme_use("clam")
-    fg_color = COLORS["dark_fg"] if app.var_dark_mode.get() else COLORS["text"]
-    card_bg = COLORS["table_bg"] if app.var_dark_mode.get() else COLORS["card_bg"]
-    gradient_start = COLORS["gradient_start"]
-    gradient_end = COLORS["gradient_end"]
-    border_radius = 12
-
-    # Card/Frame with shadow
-    style.configure("Card.TFrame", background=card_bg, relief="flat", borderwidth=0)
-    style.configure("Shadow.TFrame", background=gradient_start, relief="flat", borderwidth=0)
-
-    # Labels
-    style.configure("TLabel", font=FONTS["body"], background=card_bg, foreground=fg_color)
-
-    # Entries with rounded corners
-    style.configure("TEntry", padding=10, font=FONTS["body"], fieldbackground=card_bg, foreground=fg_color,
-                    borderwidth=2, relief="groove")
-
-    # Combobox
-    style.configure("TCombobox", padding=10, font=FONTS["body"], fieldbackground=card_bg, foreground=fg_color)
-
-    # Buttons with gradient and hover effects
-    style.configure("Accent.TButton", font=FONTS["button"], padding=10, background=gradient_start,
-                    foreground=COLORS["dark_fg"], borderwidth=0, relief="flat")
-    style.map("Accent.TButton",
-        background=[("active", gradient_end), ("!active", gradient_start)],
-        relief=[("pressed", "sunken"), ("!pressed", "flat")]
-    )
-    style.configure("TButton", font=FONTS["button"], padding=10, background=COLORS["secondary"],
-                    foreground=COLORS["dark_fg"], borderwidth=0, relief="flat")
-    style.map("TButton",
-        background=[("active", COLORS["secondary_hover"]), ("!active", COLORS["secondary"])],
-        relief=[("pressed", "sunken"), ("!pressed", "flat")]
-    )
-
-    # Scrollbar
-    style.configure("Vertical.TScrollbar", troughcolor=COLORS["border"],
-                    background=COLORS["primary"], activebackground=COLORS["primary_hover"], width=10)
-
-    # Treeview
-    style.configure("Treeview", font=FONTS["table"], rowheight=38, background=COLORS["table_bg"],
-                    fieldbackground=COLORS["table_bg"], foreground=fg_color, borderwidth=0)
-    style.configure("Treeview.Heading", font=FONTS["body_bold"], background=gradient_start,
-                    foreground=COLORS["dark_fg"])
-    style.map("Treeview", background=[("selected", gradient_end)], foreground=[("selected", COLORS["dark_fg"])])
+# --- Feature frames ---
+# Feature modules are imported when their frame is first built, so their
+# dependencies (cryptography for the file manager) stay off the startup path.
+def feature_frame(module, function):
+    def create(parent, app):
+        return getattr(importlib.import_module(f"features.{module}"), function)(parent, app)
+    return create
+
+# --- Theme ---
+# Only the pages on screen are restyled when the mode changes; show_frame and the
+# app's switch_to_* methods restyle the others as they are shown.
 def update_theme(app, root):
-    bg_color = COLORS["dark_bg"] if app.var_dark_mode.get() else COLORS["background"]
-    fg_color = COLORS["dark_fg"] if app.var_dark_mode.get() else COLORS["text"]
-    card_bg = COLORS["table_bg"] if app.var_dark_mode.get() else COLORS["card_bg"]
-    root.configure(bg=bg_color)
-    apply_theme(app, root)
-    def update_widget_styles(widget):
-        if isinstance(widget, tk.Frame):
-            widget.configure(bg=card_bg if "card" in str(widget).lower() else bg_color)
-        elif isinstance(widget, tk.Label):
-            widget.configure(bg=card_bg if "card" in str(widget).lower() else bg_color, fg=fg_color, font=FONTS["body"])
-        elif isinstance(widget, tk.Checkbutton):
-            widget.configure(bg=card_bg if "card" in str(widget).lower() else bg_color, fg=fg_color, selectcolor=bg_color, font=FONTS["body"])
-        elif isinstance(widget, tk.Button):
-            widget.configure(bg=COLORS["primary"], fg=COLORS["dark_fg"], relief="flat", font=FONTS["button"], bd=0, highlightthickness=0)
-        elif isinstance(widget, (ttk.Entry, ttk.Combobox)):
-            pass  # Handled by apply_theme
-        elif isinstance(widget, tk.Canvas):
-            widget.configure(bg=card_bg)
-        if isinstance(widget, (ttk.Button, ttk.Label, ttk.Treeview, ttk.Scrollbar)):
-            pass  # Handled by ttk.Style
-        for child in widget.winfo_children():
-            update_widget_styles(child)
-    frames = [getattr(app, attr, None) for attr in ['container', 'login_frame', 'signup_frame', 'dashboard_frame']]
-    frames = [f for f in frames if f is not None]
-    for frame in frames:
-        update_widget_styles(frame)
-    for frame in app.frames.values():
-        update_widget_styles(frame)
+    app.theme.set_mode("dark" if app.var_dark_mode.get() else "light")
+    pages = [getattr(app, attr, None) for attr in ['login_frame', 'signup_frame', 'dashboard_frame']]
+    pages = [page for page in pages if page is not None] + list(app.frames.values())
+    app.theme.apply(root, skip=[page for page in pages if not page.winfo_manager()])
 
 def create_login_frame(container, app):
     frame = tk.Frame(container, bg=COLORS["background"], width=1440, height=900)
@@ -212,68 +144,39 @@ def create_audit_logs_frame(parent, app):
 
     # Treeview for audit logs
     columns = ("ID", "Table", "Action", "Record ID", "Change Details", "Timestamp")
-    tree = ttk.Treeview(content, columns=columns, show="headings", height=15)
-    tree.heading("ID", text="ID")
-    tree.heading("Table", text="Table")
-    tree.heading("Action", text="Action")
-    tree.heading("Record ID", text="Record ID")
-    tree.heading("Change Details", text="Change Details")
-    tree.heading("Timestamp", text="Timestamp")
-    tree.column("ID", width=50)
-    tree.column("Table", width=120)
-    tree.column("Action", width=80)
-    tree.column("Record ID", width=80)
-    tree.column("Change Details", width=300)
-    tree.column("Timestamp", width=150)
-    
-    scrollbar = ttk.Scrollbar(content, orient="vertical", command=tree.yview)
-    tree.configure(yscrollcommand=scrollbar.set)
-    tree.pack(side="left", fill="both", expand=True, padx=10, pady=10)
-    scrollbar.pack(side="right", fill="y")
+    def load_failed(e):
+        logging.error(f"Load audit logs error: {e}")
+        messagebox.showerror("Error", f"Failed to load audit logs: {e}")
+
+    table = VirtualTable(content, app, columns,
+                         fetch=lambda **params: app.executor.run(
+                             "load_audit_logs", lambda db: app.repos.audit.list(db=db, **params)),
+                         key=lambda log: (log[5], log[0]), descending=True,
+                         format_row=lambda log: (
+                             log[0],
+                             log[1],
+                             log[2],
+                             log[3],
+                             truncate_text(str(log[4]), 50),
+                             log[5]
+                         ),
+                         owner=frame, on_error=load_failed, height=15)
+    table.heading("ID", text="ID")
+    table.heading("Table", text="Table")
+    table.heading("Action", text="Action")
+    table.heading("Record ID", text="Record ID")
+    table.heading("Change Details", text="Change Details")
+    table.heading("Timestamp", text="Timestamp")
+    table.column("ID", width=50)
+    table.column("Table", width=120)
+    table.column("Action", width=80)
+    table.column("Record ID", width=80)
+    table.column("Change Details", width=300)
+    table.column("Timestamp", width=150)
+    table.pack(fill="both", expand=True, padx=10, pady=10)
     
     def load_audit_logs():
-        for item in tree.get_children():
-            tree.delete(item)
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(frame)
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("""
-                    SELECT id, table_name, action, record_id, change_details, timestamp
-                    FROM audit_logs
-                    WHERE user_id = %s
-                    ORDER BY timestamp DESC
-                    LIMIT 50
-                """, (app.current_user_id,))
-                logs = cursor.fetchall()
-                for log in logs:
-                    tree.insert("", "end", values=(
-                        log[0],
-                        log[1],
-                        log[2],
-                        log[3],
-                        truncate_text(str(log[4]), 50),
-                        log[5]
-                    ))
-                db.commit()
-                break
-            except mysql.connector.Error as e:
-                logging.error(f"Load audit logs error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    messagebox.showerror("Error", f"Failed to load audit logs after retries: {e}")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        table.reload(user_id=app.current_user_id)
     
     tk.Button(content, text="Refresh Logs", bg=COLORS["primary"], fg=COLORS["dark_fg"],
               font=FONTS["button"], width=15, command=load_audit_logs, relief="flat").pack(pady=10)
@@ -328,32 +231,18 @@ def create_backups_frame(parent, app):
             return
         backup_id = selected_values[0]
         logging.debug(f"Selected backup: {selected_values}")
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(frame)
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("CALL RestoreUserData(%s)", (backup_id,))
-                db.commit()
-                messagebox.showinfo("Success", "Backup restored successfully!")
-                app.load_backups()  # Refresh the list
-                break
-            except mysql.connector.Error as e:
-                logging.error(f"Restore backup error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    messagebox.showerror("Error", f"Failed to restore backup after retries: {e}")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+
+        def done(result):
+            messagebox.showinfo("Success", "Backup restored successfully!")
+            app.load_backups()  # Refresh the list
+
+        def failed(e):
+            logging.error(f"Restore backup error: {e}")
+            messagebox.showerror("Error", f"Failed to restore backup: {e}")
+
+        app.tasks.submit(lambda: app.executor.run(
+            "restore_backup", lambda db: app.repos.backups.restore(backup_id, db=db), write=True
+        ), done, failed, loading=frame)
     
     button_frame = tk.Frame(content, bg=COLORS["card_bg"])
     button_frame.pack(pady=10, fill="x")
@@ -1256,10 +1145,8 @@ def create_dashboard_frame(container, app):
     app.var_default_sharing_method = tk.StringVar(value="qr_code")
     app.var_password_check_interval = tk.StringVar(value="30")
     app.active_canvas = None
-    app.frames = {}
 
     dashboard_frame = tk.Frame(container, bg=COLORS["background"])
-    apply_theme(app, root=app.root)
 
     # --- Sidebar ---
     sidebar = tk.Frame(dashboard_frame, width=220, bg=COLORS["dark_bg"])
@@ -1269,14 +1156,11 @@ def create_dashboard_frame(container, app):
     # Sidebar: User Info (Avatar + Username)
     user_info_frame = tk.Frame(sidebar, bg=COLORS["dark_bg"])
     user_info_frame.pack(pady=(30, 10), padx=10, fill="x")
-    try:
-        avatar_img = Image.open("avatar.png")
-        avatar_img = avatar_img.resize((56, 56), Image.Resampling.LANCZOS)
-        avatar_photo = ImageTk.PhotoImage(avatar_img)
-        app.image_references = getattr(app, 'image_references', []) + [avatar_photo]
+    avatar_photo = app.assets.image("avatar.png", (56, 56), app.theme.mode)
+    if avatar_photo is not None:
         avatar_label = tk.Label(user_info_frame, image=avatar_photo, bg=COLORS["dark_bg"], bd=0)
         avatar_label.pack(side="left", padx=(0, 10))
-    except Exception:
+    else:
         avatar_label = tk.Label(user_info_frame, text="👤", font=FONTS["heading"], bg=COLORS["dark_bg"])
         avatar_label.pack(side="left", padx=(0, 10))
     app.sidebar_username_label = tk.Label(user_info_frame, text="User", font=FONTS["body_bold"], fg=COLORS["primary"], bg=COLORS["dark_bg"])
@@ -1318,14 +1202,11 @@ def create_dashboard_frame(container, app):
     navbar.pack_propagate(False)
 
     # Navbar: App Logo/Name
-    try:
-        logo_img = Image.open("logo.png")
-        logo_img = logo_img.resize((48, 48), Image.Resampling.LANCZOS)
-        logo_photo = ImageTk.PhotoImage(logo_img)
-        app.image_references = getattr(app, 'image_references', []) + [logo_photo]
+    logo_photo = app.assets.image("logo.png", (48, 48), app.theme.mode)
+    if logo_photo is not None:
         logo_label = tk.Label(navbar, image=logo_photo, bg=COLORS["gradient_start"], bd=0)
         logo_label.pack(side="left", padx=18, pady=10)
-    except Exception:
+    else:
         logo_label = tk.Label(navbar, text="PassVault", font=FONTS["heading"], fg=COLORS["primary"], bg=COLORS["gradient_start"])
         logo_label.pack(side="left", padx=18, pady=10)
 
@@ -1361,29 +1242,27 @@ def create_dashboard_frame(container, app):
             messagebox.showinfo("Notifications", "No user logged in.")
             return
 
+        user_id = app.current_user_id
+
         def load_and_display_notifications(dialog_frame):
-            # Clear previous notifications
+            app.tasks.submit(lambda: app.repos.notifications.recent(user_id),
+                             lambda notifications: display_notifications(dialog_frame, notifications),
+                             lambda e: display_error(dialog_frame, e),
+                             owner=dialog_frame, loading=dialog_frame)
+
+        def display_error(dialog_frame, e):
+            if not dialog_frame.winfo_exists():
+                return
             for widget in dialog_frame.winfo_children():
                 widget.destroy()
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                cursor.execute("""
-                    SELECT id, title, message, is_read, created_at
-                    FROM notifications
-                    WHERE user_id = %s
-                    ORDER BY created_at DESC
-                    LIMIT 20
-                """, (app.current_user_id,))
-                notifications = cursor.fetchall()
-            except Exception as e:
-                tk.Label(dialog_frame, text=f"Failed to load notifications: {e}", font=FONTS["body"], bg=COLORS["card_bg"]).pack(pady=20)
+            tk.Label(dialog_frame, text=f"Failed to load notifications: {e}", font=FONTS["body"], bg=COLORS["card_bg"]).pack(pady=20)
+
+        def display_notifications(dialog_frame, notifications):
+            if not dialog_frame.winfo_exists():
                 return
-            finally:
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+            # Clear previous notifications
+            for widget in dialog_frame.winfo_children():
+                widget.destroy()
             if not notifications:
                 tk.Label(dialog_frame, text="No notifications.", font=FONTS["body"], bg=COLORS["card_bg"]).pack(pady=20)
             else:
@@ -1412,6 +1291,7 @@ def create_dashboard_frame(container, app):
         load_and_display_notifications(frame)
         tk.Button(dialog, text="Refresh", command=lambda: load_and_display_notifications(frame), bg=COLORS["primary"], fg=COLORS["dark_fg"], font=FONTS["button"]).pack(pady=5)
         tk.Button(dialog, text="Close", command=dialog.destroy, bg=COLORS["primary"], fg=COLORS["dark_fg"], font=FONTS["button"]).pack(pady=5)
+        dialog.bind("<Destroy>", lambda e: app.tasks.cancel(frame) if e.widget is dialog else None)
 
     notif_icon.bind("<Button-1>", lambda e: show_notifications())
 
@@ -1419,23 +1299,30 @@ def create_dashboard_frame(container, app):
     main_content = tk.Frame(dashboard_frame, bg=COLORS["background"])
     main_content.pack(side="right", fill="both", expand=True)
 
+    # Feature, report and queries frames are built on first show and may be evicted again;
+    # the frames below are pinned because the app keeps references to their widgets.
+    app.frame_registry = FrameRegistry(main_content, on_evict=app.tasks.cancel, **FRAME_REGISTRY_CONFIG)
+    app.frames = app.frame_registry.frames
     app.frames["home"] = tk.Frame(main_content, bg=COLORS["background"])
     app.frames["about_us"] = tk.Frame(main_content, bg=COLORS["background"])
     app.frames["features"] = tk.Frame(main_content, bg=COLORS["background"])
     app.frames["profile"] = tk.Frame(main_content, bg=COLORS["background"])
     app.frames["settings"] = tk.Frame(main_content, bg=COLORS["background"])
-    app.frames["multidevice_access"] = create_multidevice_access_frame(main_content, app)
-    app.frames["secure_pass_sharing"] = create_secure_pass_sharing_frame(main_content, app)
-    app.frames["qr_sharing"] = create_qr_sharing_frame(main_content, app)
-    app.frames["connected_devices"] = create_connected_devices_frame(main_content, app)
-    app.frames["password_manager"] = create_password_manager_frame(main_content, app)
-    app.frames["expiration_alerts"] = create_expiration_alerts_frame(main_content, app)
-    app.frames["audit_logs"] = create_audit_logs_frame(main_content, app)
-    app.frames["backups"] = create_backups_frame(main_content, app)
-    app.frames["activity_history"] = create_activity_history_frame(main_content, app)
-    app.frames["file_manager"] = create_file_manager_frame(main_content, app)
-    app.frames["report"] = create_report_frame(main_content, app)
-    app.frames["queries"] = create_queries_frame(main_content, app)  # Add Queries frame
+    for name, create in (
+        ("multidevice_access", feature_frame("multidevice_access", "create_multidevice_access_frame")),
+        ("secure_pass_sharing", feature_frame("secure_pass_sharing", "create_secure_pass_sharing_frame")),
+        ("qr_sharing", feature_frame("qr_sharing", "create_qr_sharing_frame")),
+        ("connected_devices", feature_frame("connected_devices", "create_connected_devices_frame")),
+        ("password_manager", feature_frame("password_manager", "create_password_manager_frame")),
+        ("expiration_alerts", feature_frame("expiration_alerts", "create_expiration_alerts_frame")),
+        ("audit_logs", create_audit_logs_frame),
+        ("backups", create_backups_frame),
+        ("activity_history", feature_frame("activity_history", "create_activity_history_frame")),
+        ("file_manager", feature_frame("file_manager", "create_file_manager_frame")),
+        ("report", create_report_frame),
+        ("queries", create_queries_frame),
+    ):
+        app.frame_registry.register(name, lambda parent, create=create: create(parent, app))
 
     # --- Home Frame (Dashboard) ---
     home_frame = app.frames["home"]
@@ -1824,48 +1711,6 @@ def create_dashboard_frame(container, app):
                    font=FONTS["body"], bg=COLORS["card_bg"], command=lambda: update_theme(app, app.root)).pack(pady=12)
     tk.Checkbutton(settings_content, text="Enable Notifications", variable=app.var_notifications,
                    font=FONTS["body"], bg=COLORS["card_bg"]).pack(pady=12)
-    def save_settings():
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(app.frames["settings"])
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("CALL BackupUserData(%s)", (app.current_user_id,))
-                cursor.execute("CALL UpdateUserSettings(%s, %s, %s)",
-                               (app.current_user_id, app.var_dark_mode.get(), app.var_notifications.get()))
-                db.commit()
-                messagebox.showinfo("Success", "Settings saved!")
-                update_theme(app, app.root)
-                break
-            except mysql.connector.Error as e:
-                logging.error(f"MySQL error in save_settings (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to save settings. Try restoring from backup?"):
-                        restore_backup()
-                    else:
-                        messagebox.showerror("Error", f"Failed to save settings after retries: {e}")
-            except Exception as e:
-                logging.error(f"Unexpected error in save_settings (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to save settings. Try restoring from backup?"):
-                        restore_backup()
-                    else:
-                        messagebox.showerror("Error", f"Failed to save settings after retries: {e}")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
 
     tk.Button(settings_content, text="Save Settings", bg=COLORS["primary"], fg=COLORS["dark_fg"],
               font=FONTS["button"], width=22, command=lambda: save_settings(), relief="flat").pack(pady=20)
@@ -1874,26 +1719,24 @@ def create_dashboard_frame(container, app):
         app.active_canvas = None
         for frame in app.frames.values():
             frame.pack_forget()
-        target_frame = app.frames[frame_name]
+        target_frame = app.frame_registry.get(frame_name)
+        # Frames hidden during a theme switch, and frames just built, catch up here.
+        app.theme.apply(target_frame)
         target_frame.pack(fill="both", expand=True)
+        # Loads still running for the frames being left are dropped.
+        for name, frame in app.frames.items():
+            if name != frame_name:
+                app.tasks.cancel(frame)
         # Update sidebar/navbar username
         if hasattr(app, "current_user_id") and app.current_user_id:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                cursor.execute("SELECT username FROM users WHERE id=%s", (app.current_user_id,))
-                user = cursor.fetchone()
-                username = user[0] if user else "User"
-                app.sidebar_username_label.config(text=username)
-                app.navbar_username_label.config(text=username)
-            except Exception:
-                app.sidebar_username_label.config(text="User")
-                app.navbar_username_label.config(text="User")
-            finally:
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+            user_id = app.current_user_id
+
+            def show_username(username):
+                app.sidebar_username_label.config(text=username or "User")
+                app.navbar_username_label.config(text=username or "User")
+
+            app.tasks.submit(lambda: app.repos.users.get_username(user_id), show_username,
+                             lambda e: show_username(None), owner=target_frame)
         if frame_name == "features":
             app.active_canvas = feature_canvas
         elif frame_name == "profile":
@@ -1928,57 +1771,41 @@ def create_dashboard_frame(container, app):
             app.home_backup_label.config(text="Last: N/A")
             return
 
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(app.frames["home"])
-        try:
-            db = app.db_pool.get_connection()
-            cursor = db.cursor()
-            db.start_transaction()
+        user_id = app.current_user_id
+
+        def read_dashboard(db):
+            repos = app.repos
+            return (
+                repos.users.get_username(user_id, db=db),
+                repos.stats.get(user_id, db=db),
+                repos.audit.recent(user_id, db=db),
+            )
+
+        def show(dashboard):
+            username, stats, recent_activity = dashboard
+            # users_after_insert creates the summary row; if it is missing, the next reconcile restores it.
+            (password_count, file_count, file_bytes, stored_bytes, last_login,
+             last_backup, score) = stats or (0, 0, 0, 0, None, None, 0)
 
             # Welcome message
-            cursor.execute("SELECT username FROM users WHERE id=%s", (app.current_user_id,))
-            user = cursor.fetchone()
-            if user:
-                username = user[0]
+            if username:
                 app.home_welcome_label.config(text=f"Welcome, {username}!")
             else:
                 app.home_welcome_label.config(text="Welcome!")
 
             # Stats
-            cursor.execute("SELECT COUNT(*) FROM passwords WHERE user_id=%s", (app.current_user_id,))
-            password_count = cursor.fetchone()[0]
             app.home_stats_passwords.config(text=f"Passwords: {password_count}")
-
-            cursor.execute("SELECT COUNT(*) FROM file_vault WHERE user_id=%s", (app.current_user_id,))
-            file_count = cursor.fetchone()[0]
-            app.home_stats_files.config(text=f"Files: {file_count}")
-
-            cursor.execute("SELECT timestamp FROM audit_logs WHERE user_id=%s AND action='login' ORDER BY timestamp DESC LIMIT 1",
-                           (app.current_user_id,))
-            last_login = cursor.fetchone()
-            app.home_stats_last_login.config(text=f"Last Login: {last_login[0] if last_login else 'N/A'}")
+            app.home_stats_files.config(text=f"Files: {file_count} ({file_bytes / 1024:.1f} KB, "
+                                             f"{max(file_bytes - stored_bytes, 0) / 1024:.1f} KB saved)")
+            app.home_stats_last_login.config(text=f"Last Login: {last_login or 'N/A'}")
 
             # Recent Activity
             for item in app.home_activity_tree.get_children():
                 app.home_activity_tree.delete(item)
-            cursor.execute("""
-                SELECT change_details, timestamp
-                FROM audit_logs
-                WHERE user_id=%s
-                ORDER BY timestamp DESC
-                LIMIT 5
-            """, (app.current_user_id,))
-            for log in cursor.fetchall():
+            for log in recent_activity:
                 app.home_activity_tree.insert("", "end", values=(truncate_text(log[0], 30), log[1]))
 
-            # Security Score (simplified: based on password count and last login)
-            score = 0
-            if password_count > 0:
-                score += 50  # Base score for having passwords
-            if last_login:
-                score += 30  # Additional score for recent login
-            score = min(100, score)  # Cap at 100%
+            # Security Score (user_stats.security_score: 50 for having passwords, 30 for a recorded login)
             app.home_score_label.config(text=f"{score}%")
             app.home_score_canvas.delete("all")
             app.home_score_canvas.create_oval(10, 10, 90, 90, outline=COLORS["primary"], width=4)
@@ -1986,110 +1813,73 @@ def create_dashboard_frame(container, app):
             app.home_score_canvas.create_arc(10, 10, 90, 90, start=90, extent=-angle, fill=COLORS["primary"], outline="")
 
             # Backup Status
-            cursor.execute("SELECT backup_time FROM backup_logs WHERE record_id=%s ORDER BY backup_time DESC LIMIT 1",
-                           (app.current_user_id,))
-            last_backup = cursor.fetchone()
-            app.home_backup_label.config(text=f"Last: {last_backup[0] if last_backup else 'N/A'}")
-
-            db.commit()
-        except mysql.connector.Error as e:
-            logging.error(f"Load home error (attempt {retry_count + 1}): {e}")
-            if 'db' in locals():
-                db.rollback()
-            retry_count += 1
-            if retry_count == max_retries:
-                messagebox.showerror("Error", f"Failed to load dashboard data: {e}")
-        finally:
-            hide_loading(loading)
-            if 'cursor' in locals():
-                cursor.close()
-            if 'db' in locals():
-                db.close()
+            app.home_backup_label.config(text=f"Last: {last_backup or 'N/A'}")
+
+        def failed(e):
+            logging.error(f"Load home error: {e}")
+            messagebox.showerror("Error", f"Failed to load dashboard data: {e}")
+
+        # The summary is one primary-key lookup on user_stats; the username comes from the cache.
+        app.tasks.submit(lambda: app.executor.run("load_home", read_dashboard), show, failed,
+                         owner=app.frames["home"], loading=app.frames["home"])
 
     def load_profile():
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(app.frames["profile"])
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("SELECT username, email, full_name, phone FROM user_profiles WHERE user_id=%s",
-                               (app.current_user_id,))
-                profile = cursor.fetchone()
-                if profile:
-                    app.entry_profile_username.delete(0, tk.END)
-                    app.entry_profile_username.insert(0, profile[0])
-                    app.entry_profile_email.delete(0, tk.END)
-                    app.entry_profile_email.insert(0, profile[1])
-                    app.entry_profile_full_name.delete(0, tk.END)
-                    app.entry_profile_full_name.insert(0, profile[2] or "")
-                    app.entry_profile_phone.delete(0, tk.END)
-                    app.entry_profile_phone.insert(0, profile[3] or "")
-                else:
-                    cursor.execute("SELECT username, email FROM users WHERE id=%s", (app.current_user_id,))
-                    user = cursor.fetchone()
-                    app.entry_profile_username.delete(0, tk.END)
-                    app.entry_profile_username.insert(0, user[0])
-                    app.entry_profile_email.delete(0, tk.END)
-                    app.entry_profile_email.insert(0, user[1])
-                    app.entry_profile_full_name.delete(0, tk.END)
-                    app.entry_profile_phone.delete(0, tk.END)
-                app.entry_profile_username.configure(state="disabled")
-                app.entry_profile_email.configure(state="disabled")
-                app.entry_profile_full_name.configure(state="disabled")
-                app.entry_profile_phone.configure(state="disabled")
-                cursor.execute("""
-                    SELECT password_length, auto_lock_timeout, require_uppercase, require_numbers,
-                           require_special_chars, default_sharing_method, password_check_interval
-                    FROM user_preferences WHERE user_id=%s
-                """, (app.current_user_id,))
-                preferences = cursor.fetchone()
-                if preferences:
-                    app.var_password_length.set(str(preferences[0]))
-                    app.var_auto_lock_timeout.set(str(preferences[1]))
-                    app.var_require_uppercase.set(preferences[2])
-                    app.var_require_numbers.set(preferences[3])
-                    app.var_require_special_chars.set(preferences[4])
-                    app.var_default_sharing_method.set(preferences[5])
-                    app.var_password_check_interval.set(str(preferences[6]))
-                else:
-                    app.var_password_length.set("16")
-                    app.var_auto_lock_timeout.set("10")
-                    app.var_require_uppercase.set(True)
-                    app.var_require_numbers.set(True)
-                    app.var_require_special_chars.set(True)
-                    app.var_default_sharing_method.set("qr_code")
-                    app.var_password_check_interval.set("30")
-                    cursor.execute("""
-                        CALL UpdateUserPreferences(%s, %s, %s, %s, %s, %s, %s, %s)
-                    """, (app.current_user_id, 16, 10, True, True, True, 'qr_code', 30))
-                app.combo_password_length.configure(state="readonly")
-                app.combo_auto_lock_timeout.configure(state="readonly")
-                app.check_require_uppercase.configure(state="disabled")
-                app.check_require_numbers.configure(state="disabled")
-                app.check_require_special_chars.configure(state="disabled")
-                app.combo_default_sharing_method.configure(state="readonly")
-                app.combo_password_check_interval.configure(state="readonly")
-                db.commit()
-                break
-            except Exception as e:
-                logging.error(f"Load profile error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to load profile or preferences. Try restoring from backup?"):
-                        restore_backup()
-                    else:
-                        messagebox.showerror("Error", "Failed to load profile or preferences after retries.")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        user_id = app.current_user_id
+
+        def read(db):
+            profile = app.repos.profiles.get(user_id, db=db)
+            if not profile:
+                username, email = app.repos.users.get_identity(user_id, db=db)
+                profile = (username, email, "", "")
+            return profile, app.repos.preferences.get(user_id, db=db)
+
+        def work():
+            # The read may be served by the replica; missing defaults are saved in a write of their own.
+            profile, preferences = app.executor.run("load_profile", read)
+            if not preferences:
+                preferences = app.repos.preferences.DEFAULTS
+                app.executor.run("save_default_preferences",
+                                 lambda db: app.repos.preferences.save(user_id, *preferences, db=db), write=True)
+            return profile, preferences
+
+        def failed(e):
+            logging.error(f"Load profile error: {e}")
+            if messagebox.askyesno("Error", "Failed to load profile or preferences. Try restoring from backup?"):
+                restore_backup()
+            else:
+                messagebox.showerror("Error", "Failed to load profile or preferences.")
+
+        app.tasks.submit(work, show_profile, failed,
+                         owner=app.frames["profile"], loading=app.frames["profile"])
+
+    def show_profile(loaded):
+        profile, preferences = loaded
+        app.entry_profile_username.delete(0, tk.END)
+        app.entry_profile_username.insert(0, profile[0])
+        app.entry_profile_email.delete(0, tk.END)
+        app.entry_profile_email.insert(0, profile[1])
+        app.entry_profile_full_name.delete(0, tk.END)
+        app.entry_profile_full_name.insert(0, profile[2] or "")
+        app.entry_profile_phone.delete(0, tk.END)
+        app.entry_profile_phone.insert(0, profile[3] or "")
+        app.entry_profile_username.configure(state="disabled")
+        app.entry_profile_email.configure(state="disabled")
+        app.entry_profile_full_name.configure(state="disabled")
+        app.entry_profile_phone.configure(state="disabled")
+        app.var_password_length.set(str(preferences[0]))
+        app.var_auto_lock_timeout.set(str(preferences[1]))
+        app.var_require_uppercase.set(preferences[2])
+        app.var_require_numbers.set(preferences[3])
+        app.var_require_special_chars.set(preferences[4])
+        app.var_default_sharing_method.set(preferences[5])
+        app.var_password_check_interval.set(str(preferences[6]))
+        app.combo_password_length.configure(state="readonly")
+        app.combo_auto_lock_timeout.configure(state="readonly")
+        app.check_require_uppercase.configure(state="disabled")
+        app.check_require_numbers.configure(state="disabled")
+        app.check_require_special_chars.configure(state="disabled")
+        app.combo_default_sharing_method.configure(state="readonly")
+        app.combo_password_check_interval.configure(state="readonly")
 
     def save_profile():
         username = app.entry_profile_username.get().strip()
@@ -2107,358 +1897,317 @@ def create_dashboard_frame(container, app):
             messagebox.showerror("Error", "Invalid phone format.")
             return
 
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(app.frames["profile"])
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("CALL BackupUserData(%s)", (app.current_user_id,))
-                cursor.execute("SELECT id FROM users WHERE (username=%s OR email=%s) AND id!=%s",
-                               (username, email, app.current_user_id))
-                if cursor.fetchone():
-                    db.rollback()
-                    messagebox.showerror("Error", "Username or Email exists.")
-                    return
-                cursor.execute("UPDATE users SET username=%s, email=%s WHERE id=%s",
-                               (username, email, app.current_user_id))
-                cursor.execute("CALL UpdateUserProfile(%s, %s, %s, %s, %s)",
-                               (app.current_user_id, username, email, full_name, phone))
-                db.commit()
-                messagebox.showinfo("Success", "Profile updated!")
-                app.entry_profile_username.configure(state="disabled")
-                app.entry_profile_email.configure(state="disabled")
-                app.entry_profile_full_name.configure(state="disabled")
-                app.entry_profile_phone.configure(state="disabled")
-                break
-            except Exception as e:
-                logging.error(f"Save profile error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to save profile. Try restoring from backup?"):
-                        restore_backup()
-                    else:
-                        messagebox.showerror("Error", "Failed to save profile after retries.")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        user_id = app.current_user_id
+
+        def work(db):
+            app.repos.backups.backup_user(user_id, db=db)
+            if app.repos.users.exists(username, email, exclude_id=user_id, db=db):
+                return False
+            app.repos.users.update_identity(user_id, username, email, db=db)
+            app.repos.profiles.save(user_id, username, email, full_name, phone, db=db)
+            return True
+
+        def done(saved):
+            if saved is False:
+                messagebox.showerror("Error", "Username or Email exists.")
+                return
+            messagebox.showinfo("Success", "Profile updated!")
+            app.entry_profile_username.configure(state="disabled")
+            app.entry_profile_email.configure(state="disabled")
+            app.entry_profile_full_name.configure(state="disabled")
+            app.entry_profile_phone.configure(state="disabled")
+
+        def failed(e):
+            logging.error(f"Save profile error: {e}")
+            if messagebox.askyesno("Error", "Failed to save profile. Try restoring from backup?"):
+                restore_backup()
+            else:
+                messagebox.showerror("Error", "Failed to save profile.")
+
+        app.tasks.submit(lambda: app.executor.run("save_profile", work, write=True), done, failed,
+                         loading=app.frames["profile"])
 
     def restore_backup():
-        max_retries = 3
-        retry_count = 0
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("""
-                    SELECT id, table_name, record_id, backup_time, table_data
-                    FROM backup_logs
-                    WHERE record_id = %s
-                    ORDER BY backup_time DESC
-                    LIMIT 10
-                """, (app.current_user_id,))
-                backups = cursor.fetchall()
-                if not backups:
-                    messagebox.showinfo("Info", "No backups available for this user.")
-                    db.rollback()
-                    return
-                
-                # Create a modern dialog
-                dialog = tk.Toplevel(app.root)
-                dialog.title("Restore Data Backup")
-                dialog.geometry("680x520")
-                dialog.configure(bg=COLORS["background"])
-                dialog.resizable(False, False)
-                
-                # Add a gradient header
-                header_frame = tk.Frame(dialog, height=80, bg=COLORS["gradient_start"])
-                header_frame.pack(fill="x", pady=0)
-                
-                # Create gradient effect in header
-                header_canvas = tk.Canvas(header_frame, height=80, bg=COLORS["gradient_start"], 
-                                         highlightthickness=0)
-                header_canvas.pack(fill="x")
-                
-                # Draw gradient
-                for i in range(80):
-                    # Calculate color gradient from start to end
-                    r1, g1, b1 = int(COLORS["gradient_start"][1:3], 16), int(COLORS["gradient_start"][3:5], 16), int(COLORS["gradient_start"][5:7], 16)
-                    r2, g2, b2 = int(COLORS["gradient_end"][1:3], 16), int(COLORS["gradient_end"][3:5], 16), int(COLORS["gradient_end"][5:7], 16)
-                    r = r1 + (r2 - r1) * i // 80
-                    g = g1 + (g2 - g1) * i // 80
-                    b = b1 + (b2 - b1) * i // 80
-                    color = f'#{r:02x}{g:02x}{b:02x}'
-                    header_canvas.create_line(0, i, dialog.winfo_width(), i, fill=color)
-                
-                # Header title
-                header_title = tk.Label(header_frame, text="Restore Data Backup", font=FONTS["heading"],
-                                       fg=COLORS["dark_fg"], bg=COLORS["gradient_start"])
-                header_title.place(relx=0.5, rely=0.5, anchor="center")
-                
-                # Main content area with shadow effect
-                content_frame = tk.Frame(dialog, bg=COLORS["background"])
-                content_frame.pack(fill="both", expand=True, padx=15, pady=15)
-                
-                # Info box
-                info_frame = tk.Frame(content_frame, bg=COLORS["card_bg"], bd=0, 
-                                     highlightthickness=1, highlightbackground=COLORS["border"])
-                info_frame.pack(fill="x", pady=10, ipady=8, ipadx=8)
-                
-                # Add icon indicator
-                icon_text = "🛡️"  # Shield icon
-                icon_label = tk.Label(info_frame, text=icon_text, font=("Segoe UI Emoji", 18), 
-                                     bg=COLORS["card_bg"], fg=COLORS["info"])
-                icon_label.pack(side="left", padx=15)
-                
-                info_text = tk.Label(info_frame, text="Select a backup to restore your data to a previous state.",
-                                   font=FONTS["body"], bg=COLORS["card_bg"], justify="left",
-                                   wraplength=500)
-                info_text.pack(side="left", padx=5, pady=5)
-                
-                # Backup selection area
-                selection_frame = tk.Frame(content_frame, bg=COLORS["card_bg"], bd=0, 
-                                          highlightthickness=1, highlightbackground=COLORS["border"])
-                selection_frame.pack(fill="both", expand=True, pady=10, ipady=5, ipadx=5)
-                
-                # Title for selection area
-                selection_title = tk.Label(selection_frame, text="Available Backups", 
-                                         font=FONTS["body_bold"], bg=COLORS["card_bg"])
-                selection_title.pack(pady=10)
-                
-                # Create columns for the backup list
-                columns_frame = tk.Frame(selection_frame, bg=COLORS["card_bg"])
-                columns_frame.pack(fill="x", padx=20)
-                
-                col_id = tk.Label(columns_frame, text="ID", font=FONTS["small"], 
-                                width=6, bg=COLORS["card_bg"], fg=COLORS["subtext"])
-                col_table = tk.Label(columns_frame, text="TABLE", font=FONTS["small"], 
-                                   width=15, bg=COLORS["card_bg"], fg=COLORS["subtext"])
-                col_date = tk.Label(columns_frame, text="DATE & TIME", font=FONTS["small"], 
-                                  width=25, bg=COLORS["card_bg"], fg=COLORS["subtext"])
-                
-                col_id.pack(side="left", pady=5)
-                col_table.pack(side="left", pady=5)
-                col_date.pack(side="left", pady=5)
-                
-                # Add a separator
-                separator = tk.Frame(selection_frame, height=1, bg=COLORS["border"])
-                separator.pack(fill="x", padx=20)
-                
-                # Listbox with custom styling for backups
-                backup_frame = tk.Frame(selection_frame, bg=COLORS["card_bg"])
-                backup_frame.pack(fill="both", expand=True, padx=20, pady=10)
-                
-                # Canvas for scrolling
-                backup_canvas = tk.Canvas(backup_frame, bg=COLORS["card_bg"], 
-                                        highlightthickness=0, height=180)
-                backup_scrollbar = ttk.Scrollbar(backup_frame, orient="vertical", 
-                                               command=backup_canvas.yview)
-                
-                # Frame inside canvas for backup items
-                backup_list_frame = tk.Frame(backup_canvas, bg=COLORS["card_bg"])
-                backup_list_frame.bind("<Configure>", 
-                                     lambda e: backup_canvas.configure(scrollregion=backup_canvas.bbox("all")))
-                
-                # Create window in canvas
-                backup_canvas.create_window((0, 0), window=backup_list_frame, anchor="nw")
-                backup_canvas.configure(yscrollcommand=backup_scrollbar.set)
-                
-                # Pack scrolling elements
-                backup_canvas.pack(side="left", fill="both", expand=True)
-                backup_scrollbar.pack(side="right", fill="y")
-                
-                # Variable to store the selected backup
-                selected_backup = tk.StringVar()
-                backup_details = {}
-                
-                # Preview frame
-                preview_frame = tk.Frame(content_frame, bg=COLORS["card_bg"], bd=0, 
-                                       highlightthickness=1, highlightbackground=COLORS["border"])
-                preview_frame.pack(fill="x", pady=10, ipady=8, ipadx=8)
-                
-                preview_title = tk.Label(preview_frame, text="Backup Details", 
-                                       font=FONTS["body_bold"], bg=COLORS["card_bg"])
-                preview_title.pack(pady=(10, 5))
-                
-                preview_content = tk.Label(preview_frame, text="No backup selected", 
-                                         font=FONTS["body"], bg=COLORS["card_bg"],
-                                         wraplength=500)
-                preview_content.pack(pady=5)
-                
-                # Populate backup options with a modern look
-                def select_backup(backup_id):
-                    selected_backup.set(str(backup_id))
-                    
-                    # Unselect all others
-                    for btn in backup_buttons:
-                        if btn[0] != backup_id:
-                            btn[1].configure(bg=COLORS["card_bg"])
-                    
-                    # Update preview
-                    if backup_id in backup_details:
-                        details = backup_details[backup_id]
-                        preview_text = f"ID: {backup_id}\n"
-                        preview_text += f"Table: {details['table']}\n"
-                        preview_text += f"Record ID: {details['record_id']}\n"
-                        preview_text += f"Backup Time: {details['time']}\n"
-                        preview_text += f"Data Size: {len(str(details['data']))} bytes"
-                        preview_content.config(text=preview_text)
-                
-                # Store backup buttons for later reference
-                backup_buttons = []
-                
-                # Add backup items
-                for i, backup in enumerate(backups):
-                    backup_id, table_name, record_id, backup_time, table_data = backup
-                    
-                    # Store details for preview
-                    backup_details[backup_id] = {
-                        'table': table_name,
-                        'record_id': record_id,
-                        'time': backup_time,
-                        'data': table_data
-                    }
-                    
-                    # Create item frame with alternating background
-                    bg_color = COLORS["card_bg"] if i % 2 == 0 else COLORS["table_bg"]
-                    item_frame = tk.Frame(backup_list_frame, bg=bg_color, bd=0, height=40)
-                    item_frame.pack(fill="x", pady=1)
-                    
-                    # Create interactive selection
-                    def make_select_func(bid):
-                        return lambda e, b=bid: select_backup(b)
-                    
-                    # Make entire row clickable
-                    item_frame.bind("<Button-1>", make_select_func(backup_id))
-                    
-                    # Add content to the row
-                    id_label = tk.Label(item_frame, text=str(backup_id), bg=bg_color, width=6,
-                                      font=FONTS["body"])
-                    table_label = tk.Label(item_frame, text=table_name, bg=bg_color, width=15,
-                                        font=FONTS["body"])
-                    time_label = tk.Label(item_frame, text=str(backup_time), bg=bg_color, width=25,
-                                       font=FONTS["body"])
-                    
-                    id_label.pack(side="left", pady=8)
-                    table_label.pack(side="left", pady=8)
-                    time_label.pack(side="left", pady=8)
-                    
-                    # Make labels clickable too
-                    id_label.bind("<Button-1>", make_select_func(backup_id))
-                    table_label.bind("<Button-1>", make_select_func(backup_id))
-                    time_label.bind("<Button-1>", make_select_func(backup_id))
-                    
-                    # Store reference to frame for selection highlighting
-                    backup_buttons.append((backup_id, item_frame))
-                
-                # Button actions frame
-                action_frame = tk.Frame(content_frame, bg=COLORS["background"], height=60)
-                action_frame.pack(fill="x", pady=10)
-                
-                # Helper function for button hover effect
-                def on_enter(e, button, color):
-                    button['background'] = color
-                
-                def on_leave(e, button, color):
-                    button['background'] = color
-                
-                def confirm_restore():
-                    if not selected_backup.get():
-                        messagebox.showerror("Error", "Please select a backup to restore")
-                        return
-                    
-                    # Show confirmation dialog
-                    confirm = messagebox.askyesno(
-                        "Confirm Restore", 
-                        "Are you sure you want to restore this backup?\n\nThis will replace your current data with the backup data."
+        user_id = app.current_user_id
+
+        def failed(e):
+            logging.error(f"Restore backup error: {e}")
+            messagebox.showerror("Error", "Failed to load backups.")
+
+        app.tasks.submit(lambda: app.executor.run(
+            "list_backups", lambda db: app.repos.backups.list_with_data(user_id, limit=10, db=db)
+        ), show_restore_dialog, failed)
+
+    def show_restore_dialog(backups):
+        if not backups:
+            messagebox.showinfo("Info", "No backups available for this user.")
+            return
+        
+        # Create a modern dialog
+        dialog = tk.Toplevel(app.root)
+        dialog.title("Restore Data Backup")
+        dialog.geometry("680x520")
+        dialog.configure(bg=COLORS["background"])
+        dialog.resizable(False, False)
+        
+        # Add a gradient header
+        header_frame = tk.Frame(dialog, height=80, bg=COLORS["gradient_start"])
+        header_frame.pack(fill="x", pady=0)
+        
+        # Create gradient effect in header
+        header_canvas = tk.Canvas(header_frame, height=80, bg=COLORS["gradient_start"], 
+                                 highlightthickness=0)
+        header_canvas.pack(fill="x")
+        
+        # Draw gradient (pre-rendered at the dialog's fixed width); without Pillow the header stays solid
+        gradient = app.assets.gradient(COLORS["gradient_start"], COLORS["gradient_end"], (680, 80), app.theme.mode)
+        if gradient is not None:
+            header_canvas.create_image(0, 0, anchor="nw", image=gradient)
+        
+        # Header title
+        header_title = tk.Label(header_frame, text="Restore Data Backup", font=FONTS["heading"],
+                               fg=COLORS["dark_fg"], bg=COLORS["gradient_start"])
+        header_title.place(relx=0.5, rely=0.5, anchor="center")
+        
+        # Main content area with shadow effect
+        content_frame = tk.Frame(dialog, bg=COLORS["background"])
+        content_frame.pack(fill="both", expand=True, padx=15, pady=15)
+        
+        # Info box
+        info_frame = tk.Frame(content_frame, bg=COLORS["card_bg"], bd=0, 
+                             highlightthickness=1, highlightbackground=COLORS["border"])
+        info_frame.pack(fill="x", pady=10, ipady=8, ipadx=8)
+        
+        # Add icon indicator
+        icon_text = "🛡️"  # Shield icon
+        icon_label = tk.Label(info_frame, text=icon_text, font=("Segoe UI Emoji", 18), 
+                             bg=COLORS["card_bg"], fg=COLORS["info"])
+        icon_label.pack(side="left", padx=15)
+        
+        info_text = tk.Label(info_frame, text="Select a backup to restore your data to a previous state.",
+                           font=FONTS["body"], bg=COLORS["card_bg"], justify="left",
+                           wraplength=500)
+        info_text.pack(side="left", padx=5, pady=5)
+        
+        # Backup selection area
+        selection_frame = tk.Frame(content_frame, bg=COLORS["card_bg"], bd=0, 
+                                  highlightthickness=1, highlightbackground=COLORS["border"])
+        selection_frame.pack(fill="both", expand=True, pady=10, ipady=5, ipadx=5)
+        
+        # Title for selection area
+        selection_title = tk.Label(selection_frame, text="Available Backups", 
+                                 font=FONTS["body_bold"], bg=COLORS["card_bg"])
+        selection_title.pack(pady=10)
+        
+        # Create columns for the backup list
+        columns_frame = tk.Frame(selection_frame, bg=COLORS["card_bg"])
+        columns_frame.pack(fill="x", padx=20)
+        
+        col_id = tk.Label(columns_frame, text="ID", font=FONTS["small"], 
+                        width=6, bg=COLORS["card_bg"], fg=COLORS["subtext"])
+        col_table = tk.Label(columns_frame, text="TABLE", font=FONTS["small"], 
+                           width=15, bg=COLORS["card_bg"], fg=COLORS["subtext"])
+        col_date = tk.Label(columns_frame, text="DATE & TIME", font=FONTS["small"], 
+                          width=25, bg=COLORS["card_bg"], fg=COLORS["subtext"])
+        
+        col_id.pack(side="left", pady=5)
+        col_table.pack(side="left", pady=5)
+        col_date.pack(side="left", pady=5)
+        
+        # Add a separator
+        separator = tk.Frame(selection_frame, height=1, bg=COLORS["border"])
+        separator.pack(fill="x", padx=20)
+        
+        # Listbox with custom styling for backups
+        backup_frame = tk.Frame(selection_frame, bg=COLORS["card_bg"])
+        backup_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        
+        # Canvas for scrolling
+        backup_canvas = tk.Canvas(backup_frame, bg=COLORS["card_bg"], 
+                                highlightthickness=0, height=180)
+        backup_scrollbar = ttk.Scrollbar(backup_frame, orient="vertical", 
+                                       command=backup_canvas.yview)
+        
+        # Frame inside canvas for backup items
+        backup_list_frame = tk.Frame(backup_canvas, bg=COLORS["card_bg"])
+        backup_list_frame.bind("<Configure>", 
+                             lambda e: backup_canvas.configure(scrollregion=backup_canvas.bbox("all")))
+        
+        # Create window in canvas
+        backup_canvas.create_window((0, 0), window=backup_list_frame, anchor="nw")
+        backup_canvas.configure(yscrollcommand=backup_scrollbar.set)
+        
+        # Pack scrolling elements
+        backup_canvas.pack(side="left", fill="both", expand=True)
+        backup_scrollbar.pack(side="right", fill="y")
+        
+        # Variable to store the selected backup
+        selected_backup = tk.StringVar()
+        backup_details = {}
+        
+        # Preview frame
+        preview_frame = tk.Frame(content_frame, bg=COLORS["card_bg"], bd=0, 
+                               highlightthickness=1, highlightbackground=COLORS["border"])
+        preview_frame.pack(fill="x", pady=10, ipady=8, ipadx=8)
+        
+        preview_title = tk.Label(preview_frame, text="Backup Details", 
+                               font=FONTS["body_bold"], bg=COLORS["card_bg"])
+        preview_title.pack(pady=(10, 5))
+        
+        preview_content = tk.Label(preview_frame, text="No backup selected", 
+                                 font=FONTS["body"], bg=COLORS["card_bg"],
+                                 wraplength=500)
+        preview_content.pack(pady=5)
+        
+        # Populate backup options with a modern look
+        def select_backup(backup_id):
+            selected_backup.set(str(backup_id))
+            
+            # Unselect all others
+            for btn in backup_buttons:
+                if btn[0] != backup_id:
+                    btn[1].configure(bg=COLORS["card_bg"])
+            
+            # Update preview
+            if backup_id in backup_details:
+                details = backup_details[backup_id]
+                preview_text = f"ID: {backup_id}\n"
+                preview_text += f"Table: {details['table']}\n"
+                preview_text += f"Record ID: {details['record_id']}\n"
+                preview_text += f"Backup Time: {details['time']}\n"
+                preview_text += f"Data Size: {len(str(details['data']))} bytes"
+                preview_content.config(text=preview_text)
+        
+        # Store backup buttons for later reference
+        backup_buttons = []
+        
+        # Add backup items
+        for i, backup in enumerate(backups):
+            backup_id, table_name, record_id, backup_time, table_data = backup
+            
+            # Store details for preview
+            backup_details[backup_id] = {
+                'table': table_name,
+                'record_id': record_id,
+                'time': backup_time,
+                'data': table_data
+            }
+            
+            # Create item frame with alternating background
+            bg_color = COLORS["card_bg"] if i % 2 == 0 else COLORS["table_bg"]
+            item_frame = tk.Frame(backup_list_frame, bg=bg_color, bd=0, height=40)
+            item_frame.pack(fill="x", pady=1)
+            
+            # Create interactive selection
+            def make_select_func(bid):
+                return lambda e, b=bid: select_backup(b)
+            
+            # Make entire row clickable
+            item_frame.bind("<Button-1>", make_select_func(backup_id))
+            
+            # Add content to the row
+            id_label = tk.Label(item_frame, text=str(backup_id), bg=bg_color, width=6,
+                              font=FONTS["body"])
+            table_label = tk.Label(item_frame, text=table_name, bg=bg_color, width=15,
+                                font=FONTS["body"])
+            time_label = tk.Label(item_frame, text=str(backup_time), bg=bg_color, width=25,
+                               font=FONTS["body"])
+            
+            id_label.pack(side="left", pady=8)
+            table_label.pack(side="left", pady=8)
+            time_label.pack(side="left", pady=8)
+            
+            # Make labels clickable too
+            id_label.bind("<Button-1>", make_select_func(backup_id))
+            table_label.bind("<Button-1>", make_select_func(backup_id))
+            time_label.bind("<Button-1>", make_select_func(backup_id))
+            
+            # Store reference to frame for selection highlighting
+            backup_buttons.append((backup_id, item_frame))
+        
+        # Button actions frame
+        action_frame = tk.Frame(content_frame, bg=COLORS["background"], height=60)
+        action_frame.pack(fill="x", pady=10)
+        
+        # Helper function for button hover effect
+        def on_enter(e, button, color):
+            button['background'] = color
+        
+        def on_leave(e, button, color):
+            button['background'] = color
+        
+        def confirm_restore():
+            if not selected_backup.get():
+                messagebox.showerror("Error", "Please select a backup to restore")
+                return
+            
+            # Show confirmation dialog
+            confirm = messagebox.askyesno(
+                "Confirm Restore", 
+                "Are you sure you want to restore this backup?\n\nThis will replace your current data with the backup data."
+            )
+            
+            if confirm:
+                backup_id = int(selected_backup.get())
+
+                def done(result):
+                    messagebox.showinfo(
+                        "Success", 
+                        "Backup restored successfully!\nYour data has been restored to the previous state."
+                    )
+                    dialog.destroy()
+                    load_profile()
+                    load_settings()
+
+                def failed(e):
+                    messagebox.showerror(
+                        "Error", 
+                        f"Failed to restore backup: {e}"
                     )
-                    
-                    if confirm:
-                        backup_id = int(selected_backup.get())
-                        try:
-                            # Show loading indicator
-                            loading = show_loading(dialog)
-                            
-                            cursor.execute("CALL RestoreUserData(%s)", (backup_id,))
-                            db.commit()
-                            
-                            # Hide loading
-                            hide_loading(loading)
-                            
-                            messagebox.showinfo(
-                                "Success", 
-                                "Backup restored successfully!\nYour data has been restored to the previous state."
-                            )
-                            dialog.destroy()
-                            load_profile()
-                            load_settings()
-                        except Exception as e:
-                            db.rollback()
-                            messagebox.showerror(
-                                "Error", 
-                                f"Failed to restore backup: {e}"
-                            )
-                
-                # Modern buttons with proper spacing
-                cancel_btn = tk.Button(
-                    action_frame, text="Cancel", 
-                    bg=COLORS["secondary"], fg=COLORS["dark_fg"],
-                    font=FONTS["button"], relief="flat", 
-                    width=15, height=1, bd=0,
-                    command=dialog.destroy
-                )
-                cancel_btn.pack(side="right", padx=10)
-                
-                # Add hover effects
-                cancel_btn.bind("<Enter>", lambda e: on_enter(e, cancel_btn, COLORS["secondary_hover"]))
-                cancel_btn.bind("<Leave>", lambda e: on_leave(e, cancel_btn, COLORS["secondary"]))
-                
-                restore_btn = tk.Button(
-                    action_frame, text="Restore Backup", 
-                    bg=COLORS["primary"], fg=COLORS["dark_fg"],
-                    font=FONTS["button"], relief="flat", 
-                    width=15, height=1, bd=0,
-                    command=confirm_restore
-                )
-                restore_btn.pack(side="right", padx=10)
-                
-                # Add hover effects
-                restore_btn.bind("<Enter>", lambda e: on_enter(e, restore_btn, COLORS["primary_hover"]))
-                restore_btn.bind("<Leave>", lambda e: on_leave(e, restore_btn, COLORS["primary"]))
-                
-                dialog.transient(app.root)
-                dialog.grab_set()
-                
-                # Center the dialog
-                dialog.update_idletasks()
-                width = dialog.winfo_width()
-                height = dialog.winfo_height()
-                x = (dialog.winfo_screenwidth() // 2) - (width // 2)
-                y = (dialog.winfo_screenheight() // 2) - (height // 2)
-                dialog.geometry('{}x{}+{}+{}'.format(width, height, x, y))
-                
-                app.root.wait_window(dialog)
-                break
-            except Exception as e:
-                logging.error(f"Restore backup error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    messagebox.showerror("Error", "Failed to load backups after retries.")
-            finally:
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+
+                app.tasks.submit(lambda: app.executor.run(
+                    "restore_backup", lambda db: app.repos.backups.restore(backup_id, db=db), write=True
+                ), done, failed, loading=dialog)
+        
+        # Modern buttons with proper spacing
+        cancel_btn = tk.Button(
+            action_frame, text="Cancel", 
+            bg=COLORS["secondary"], fg=COLORS["dark_fg"],
+            font=FONTS["button"], relief="flat", 
+            width=15, height=1, bd=0,
+            command=dialog.destroy
+        )
+        cancel_btn.pack(side="right", padx=10)
+        
+        # Add hover effects
+        cancel_btn.bind("<Enter>", lambda e: on_enter(e, cancel_btn, COLORS["secondary_hover"]))
+        cancel_btn.bind("<Leave>", lambda e: on_leave(e, cancel_btn, COLORS["secondary"]))
+        
+        restore_btn = tk.Button(
+            action_frame, text="Restore Backup", 
+            bg=COLORS["primary"], fg=COLORS["dark_fg"],
+            font=FONTS["button"], relief="flat", 
+            width=15, height=1, bd=0,
+            command=confirm_restore
+        )
+        restore_btn.pack(side="right", padx=10)
+        
+        # Add hover effects
+        restore_btn.bind("<Enter>", lambda e: on_enter(e, restore_btn, COLORS["primary_hover"]))
+        restore_btn.bind("<Leave>", lambda e: on_leave(e, restore_btn, COLORS["primary"]))
+        
+        dialog.transient(app.root)
+        dialog.grab_set()
+        
+        # Center the dialog
+        dialog.update_idletasks()
+        width = dialog.winfo_width()
+        height = dialog.winfo_height()
+        x = (dialog.winfo_screenwidth() // 2) - (width // 2)
+        y = (dialog.winfo_screenheight() // 2) - (height // 2)
+        dialog.geometry('{}x{}+{}+{}'.format(width, height, x, y))
+        
+        app.root.wait_window(dialog)
 
     def save_preferences():
         try:
@@ -2468,212 +2217,141 @@ def create_dashboard_frame(container, app):
         except ValueError:
             messagebox.showerror("Error", "Invalid preference values.")
             return
+        preferences = (
+            password_length,
+            auto_lock_timeout,
+            app.var_require_uppercase.get(),
+            app.var_require_numbers.get(),
+            app.var_require_special_chars.get(),
+            app.var_default_sharing_method.get(),
+            password_check_interval
+        )
+
+        user_id = app.current_user_id
+
+        def work(db):
+            app.repos.backups.backup_user(user_id, db=db)
+            app.repos.preferences.save(user_id, *preferences, db=db)
+
+        def done(result):
+            messagebox.showinfo("Success", "Preferences saved!")
+            app.combo_password_length.configure(state="readonly")
+            app.combo_auto_lock_timeout.configure(state="readonly")
+            app.check_require_uppercase.configure(state="disabled")
+            app.check_require_numbers.configure(state="disabled")
+            app.check_require_special_chars.configure(state="disabled")
+            app.combo_default_sharing_method.configure(state="readonly")
+            app.combo_password_check_interval.configure(state="readonly")
+
+        def failed(e):
+            logging.error(f"Save preferences error: {e}")
+            if messagebox.askyesno("Error", "Failed to save preferences. Try restoring from backup?"):
+                restore_backup()
+            else:
+                messagebox.showerror("Error", "Failed to save preferences.")
 
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(app.frames["profile"])
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("CALL BackupUserData(%s)", (app.current_user_id,))
-                cursor.execute("""
-                    CALL UpdateUserPreferences(%s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    app.current_user_id,
-                    password_length,
-                    auto_lock_timeout,
-                    app.var_require_uppercase.get(),
-                    app.var_require_numbers.get(),
-                    app.var_require_special_chars.get(),
-                    app.var_default_sharing_method.get(),
-                    password_check_interval
-                ))
-                db.commit()
-                messagebox.showinfo("Success", "Preferences saved!")
-                app.combo_password_length.configure(state="readonly")
-                app.combo_auto_lock_timeout.configure(state="readonly")
-                app.check_require_uppercase.configure(state="disabled")
-                app.check_require_numbers.configure(state="disabled")
-                app.check_require_special_chars.configure(state="disabled")
-                app.combo_default_sharing_method.configure(state="readonly")
-                app.combo_password_check_interval.configure(state="readonly")
-                break
-            except Exception as e:
-                logging.error(f"Save preferences error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to save preferences. Try restoring from backup?"):
-                        restore_backup()
-                    else:
-                        messagebox.showerror("Error", "Failed to save preferences after retries.")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        app.tasks.submit(lambda: app.executor.run("save_preferences", work, write=True), done, failed,
+                         loading=app.frames["profile"])
 
     def load_settings():
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(app.frames["settings"])
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("SELECT dark_mode, notifications_enabled FROM user_settings WHERE user_id=%s",
-                               (app.current_user_id,))
-                settings = cursor.fetchone()
-                if settings:
-                    app.var_dark_mode.set(settings[0])
-                    app.var_notifications.set(settings[1])
-                else:
-                    app.var_dark_mode.set(False)
-                    app.var_notifications.set(True)
-                    cursor.execute("CALL UpdateUserSettings(%s, %s, %s)",
-                                   (app.current_user_id, False, True))
-                db.commit()
-                update_theme(app, app.root)
-                break
-            except mysql.connector.Error as e:
-                logging.error(f"MySQL error in load_settings (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to load settings. Try restoring from backup?"):
-                        restore_backup()
-                    else:
-                        messagebox.showerror("Error", f"Failed to load settings after retries: {e}")
-            except Exception as e:
-                logging.error(f"Unexpected error in load_settings (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to load settings. Try restoring frombackup?"):
-                        restore_backup()
-                    else:
-                        messagebox.showerror("Error", f"Failed to load settings after retries: {e}")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        user_id = app.current_user_id
+
+        def work():
+            settings = app.executor.run("load_settings", lambda db: app.repos.settings.get(user_id, db=db))
+            if not settings:
+                settings = (False, True)
+                app.executor.run("save_default_settings",
+                                 lambda db: app.repos.settings.save(user_id, *settings, db=db), write=True)
+            return settings
+
+        def show(settings):
+            app.var_dark_mode.set(settings[0])
+            app.var_notifications.set(settings[1])
+            update_theme(app, app.root)
+
+        def failed(e):
+            logging.error(f"MySQL error in load_settings: {e}")
+            if messagebox.askyesno("Error", "Failed to load settings. Try restoring from backup?"):
+                restore_backup()
+            else:
+                messagebox.showerror("Error", f"Failed to load settings: {e}")
+
+        app.tasks.submit(work, show, failed,
+                         owner=app.frames["settings"], loading=app.frames["settings"])
 
     def save_settings():
-        max_retries = 3
-        retry_count = 0
-        loading = show_loading(app.frames["settings"])
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("CALL BackupUserData(%s)", (app.current_user_id,))
-                cursor.execute("CALL UpdateUserSettings(%s, %s, %s)",
-                               (app.current_user_id, app.var_dark_mode.get(), app.var_notifications.get()))
-                db.commit()
-                messagebox.showinfo("Success", "Settings saved!")
-                update_theme(app, app.root)
-                break
-            except mysql.connector.Error as e:
-                logging.error(f"MySQL error in save_settings (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to save settings. Try restoring from backup?"):
-                        restore_backup()
-                    else:
-                        messagebox.showerror("Error", f"Failed to save settings after retries: {e}")
-            except Exception as e:
-                logging.error(f"Unexpected error in save_settings (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    if messagebox.askyesno("Error", "Failed to save settings. Try restoring from backup?"):
-                        restore_backup()
-                    else:
-                        messagebox.showerror("Error", f"Failed to save settings after retries: {e}")
-            finally:
-                hide_loading(loading)
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        dark_mode = app.var_dark_mode.get()
+        notifications = app.var_notifications.get()
+
+        user_id = app.current_user_id
+
+        def work(db):
+            app.repos.backups.backup_user(user_id, db=db)
+            app.repos.settings.save(user_id, dark_mode, notifications, db=db)
+
+        def done(result):
+            messagebox.showinfo("Success", "Settings saved!")
+            update_theme(app, app.root)
+
+        def failed(e):
+            logging.error(f"MySQL error in save_settings: {e}")
+            if messagebox.askyesno("Error", "Failed to save settings. Try restoring from backup?"):
+                restore_backup()
+            else:
+                messagebox.showerror("Error", f"Failed to save settings: {e}")
+
+        app.tasks.submit(lambda: app.executor.run("save_settings", work, write=True), done, failed,
+                         loading=app.frames["settings"])
 
     def restore_backup():
-        max_retries = 3
-        retry_count = 0
-        while retry_count < max_retries:
-            try:
-                db = app.db_pool.get_connection()
-                cursor = db.cursor()
-                db.start_transaction()
-                cursor.execute("""
-                    SELECT id, table_name, backup_time
-                    FROM backup_logs
-                    WHERE record_id = %s
-                    ORDER BY backup_time DESC
-                    LIMIT 5
-                """, (app.current_user_id,))
-                backups = cursor.fetchall()
-                if not backups:
-                    messagebox.showinfo("Info", "No backups available for this user.")
-                    db.rollback()
-                    return
-                backup_options = [f"ID: {b[0]} | Table: {b[1]} | Time: {b[2]}" for b in backups]
-                selected = tk.StringVar()
-                dialog = tk.Toplevel(app.root)
-                dialog.title("Select Backup")
-                dialog.geometry("400x300")
-                tk.Label(dialog, text="Select a backup to restore:", font=FONTS["body"]).pack(pady=10)
-                combo = ttk.Combobox(dialog, textvariable=selected, values=backup_options, state="readonly")
-                combo.pack(pady=10)
-                def confirm_restore():
-                    if not selected.get():
-                        messagebox.showerror("Error", "Please select a backup.")
-                        return
-                    backup_id = int(selected.get().split(" | ")[0].replace("ID: ", ""))
-                    try:
-                        cursor.execute("CALL RestoreUserData(%s)", (backup_id,))
-                        db.commit()
-                        messagebox.showinfo("Success", "Backup restored successfully!")
-                        dialog.destroy()
-                        load_profile()
-                        load_settings()
-                    except Exception as e:
-                        db.rollback()
-                        messagebox.showerror("Error", f"Failed to restore backup: {e}")
-                        dialog.destroy()
-                tk.Button(dialog, text="Restore", command=confirm_restore, bg=COLORS["primary"],
-                          fg=COLORS["dark_fg"], font=FONTS["button"]).pack(pady=10)
-                tk.Button(dialog, text="Cancel", command=dialog.destroy, bg=COLORS["secondary"],
-                          fg=COLORS["dark_fg"], font=FONTS["button"]).pack(pady=10)
-                dialog.transient(app.root)
-                dialog.grab_set()
-                app.root.wait_window(dialog)
-                break
-            except Exception as e:
-                logging.error(f"Restore backup error (attempt {retry_count + 1}): {e}")
-                if 'db' in locals():
-                    db.rollback()
-                retry_count += 1
-                if retry_count == max_retries:
-                    messagebox.showerror("Error", "Failed to load backups after retries.")
-            finally:
-                if 'cursor' in locals():
-                    cursor.close()
-                if 'db' in locals():
-                    db.close()
+        user_id = app.current_user_id
+
+        def failed(e):
+            logging.error(f"Restore backup error: {e}")
+            messagebox.showerror("Error", "Failed to load backups.")
+
+        app.tasks.submit(lambda: app.executor.run(
+            "list_backups", lambda db: app.repos.backups.list(user_id, limit=5, db=db)
+        ), show_restore_dialog, failed)
+
+    def show_restore_dialog(backups):
+        if not backups:
+            messagebox.showinfo("Info", "No backups available for this user.")
+            return
+        backup_options = [f"ID: {b[0]} | Table: {b[1]} | Time: {b[3]}" for b in backups]
+        selected = tk.StringVar()
+        dialog = tk.Toplevel(app.root)
+        dialog.title("Select Backup")
+        dialog.geometry("400x300")
+        tk.Label(dialog, text="Select a backup to restore:", font=FONTS["body"]).pack(pady=10)
+        combo = ttk.Combobox(dialog, textvariable=selected, values=backup_options, state="readonly")
+        combo.pack(pady=10)
+        def confirm_restore():
+            if not selected.get():
+                messagebox.showerror("Error", "Please select a backup.")
+                return
+            backup_id = int(selected.get().split(" | ")[0].replace("ID: ", ""))
+
+            def done(result):
+                messagebox.showinfo("Success", "Backup restored successfully!")
+                dialog.destroy()
+                load_profile()
+                load_settings()
+
+            def failed(e):
+                messagebox.showerror("Error", f"Failed to restore backup: {e}")
+                dialog.destroy()
+
+            app.tasks.submit(lambda: app.executor.run(
+                "restore_backup", lambda db: app.repos.backups.restore(backup_id, db=db), write=True
+            ), done, failed, loading=dialog)
+        tk.Button(dialog, text="Restore", command=confirm_restore, bg=COLORS["primary"],
+                  fg=COLORS["dark_fg"], font=FONTS["button"]).pack(pady=10)
+        tk.Button(dialog, text="Cancel", command=dialog.destroy, bg=COLORS["secondary"],
+                  fg=COLORS["dark_fg"], font=FONTS["button"]).pack(pady=10)
+        dialog.transient(app.root)
+        dialog.grab_set()
+        app.root.wait_window(dialog)
 
     # Navbar: User Info
     user_nav_label = tk.Label(navbar, text="User", font=FONTS["body_bold"], fg=COLORS["dark_fg"], bg=COLORS["gradient_start"])
@@ -0,0 +1,276 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Bulk uploads into the file vault. Queued files are uploaded by a pool of
+# worker threads of their own, so a long import never occupies the
+# TaskRunner workers that interactive loads run on. Small files are grouped,
+# several to a transaction, which saves a commit (and its flush to disk) per
+# file; a file larger than batch_bytes gets a transaction to itself. If a
+# grouped transaction fails, its files are retried one per transaction, so one
+# bad file does not take the others down with it.
+#
+# Hashing, compression and encryption release the GIL on chunk-sized buffers,
+# so workers overlap them with each other and with database round trips; the
+# chunk boundary search only does with numpy (see chunking.py). Where the
+# engine allows one writer at a time (SQLite), upload transactions take turns.
+#
+# Bytes sent to the database by all workers together pass through one token
+# bucket, so a bulk import leaves the database room for the user's own
+# queries. A transaction takes its files' size from the bucket before it
+# begins, so any wait happens with no transaction (and no locks) held, and
+# gets back what it did not send after it ends: chunks the vault already
+# holds send nothing and cost nothing.
+
+
+class UploadCancelled(Exception):
+    """Raised inside an upload whose job was cancelled, so its transaction rolls back."""
+
+
+class TokenBucket:
+    """Paces callers so that together they take no more than rate units per second, after an initial burst."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = rate if burst is None else burst
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    def take(self, amount, cancelled=None):
+        """Wait until amount may be sent; returns the seconds waited.
+
+        Waiting stops early once cancelled() is true.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going into debt reserves this caller's place; later callers wait behind it.
+            self._tokens -= amount
+            delay = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        deadline = time.monotonic() + delay
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or (cancelled is not None and cancelled()):
+                return delay - max(remaining, 0.0)
+            time.sleep(min(remaining, 0.1))
+
+    def refund(self, amount):
+        """Give back part of an earlier take() that was not used after all."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + amount)
+
+
+class UploadJob:
+    """One queued file. Workers update done and status; the Tk thread only reads them."""
+
+    def __init__(self, user_id, path, name):
+        self.user_id = user_id
+        self.path = path
+        self.name = name
+        self.size = 0
+        self.done = 0  # plaintext bytes read so far
+        self.status = "queued"  # then "uploading", and finally "done", "failed" or "cancelled"
+        self.cancelled = False
+        self.row = None  # the file's row, once done
+        self.summary = None  # FileVault.upload()'s summary, once done
+        self.error = None
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+
+class UploadQueue:
+    """Uploads files into the file vault on a bounded pool of worker threads.
+
+    submit() returns an UploadJob per file, which the caller polls for
+    progress and outcome; workers never touch widgets. cancel() stops jobs: a
+    queued one never starts, and one being uploaded stops at its next chunk
+    and leaves nothing behind.
+    """
+
+    def __init__(self, vault, executor, workers=3, batch_files=16, batch_bytes=1024 * 1024,
+                 max_bytes_per_second=None, concurrent_writes=True):
+        self.vault = vault
+        self.executor = executor
+        self.workers = workers
+        self.batch_files = batch_files
+        self.batch_bytes = batch_bytes
+        self._bucket = TokenBucket(max_bytes_per_second) if max_bytes_per_second else None
+        self._write_lock = None if concurrent_writes else threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="upload-worker")
+        self._lock = threading.Lock()
+        self._queued = deque()
+        self._unfinished = set()
+        self._running = 0  # worker loops started and not yet out of work
+        self._closed = False
+        self._counters = {"submitted": 0, "uploaded": 0, "failed": 0, "cancelled": 0, "transactions": 0,
+                          "bytes": 0, "bytes_stored": 0, "throttled_seconds": 0.0}
+
+    def submit(self, user_id, files):
+        """Queue (path, name) pairs for user_id; returns their UploadJobs in the same order.
+
+        A path that cannot be read fails at once.
+        """
+        jobs, failed = [], []
+        for path, name in files:
+            job = UploadJob(user_id, path, name)
+            try:
+                job.size = os.path.getsize(path)
+            except OSError as e:
+                job.status, job.error = "failed", e
+                failed.append(job)
+            jobs.append(job)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The upload queue has been closed.")
+            for job in jobs:
+                if job not in failed:
+                    self._queued.append(job)
+                    self._unfinished.add(job)
+            self._counters["submitted"] += len(jobs)
+            self._counters["failed"] += len(failed)
+            start = min(self.workers - self._running, len(self._queued))
+            self._running += start
+        for _ in range(start):
+            self._pool.submit(self._work)
+        return jobs
+
+    def cancel(self, jobs=None):
+        """Cancel the given jobs, or every unfinished one."""
+        with self._lock:
+            for job in list(self._unfinished) if jobs is None else jobs:
+                job.cancelled = True
+            dropped = [job for job in self._queued if job.cancelled]
+            for job in dropped:
+                self._queued.remove(job)
+        for job in dropped:
+            self._finish(job, "cancelled")
+
+    def active(self):
+        """Whether any submitted job is still queued or uploading."""
+        with self._lock:
+            return bool(self._unfinished)
+
+    def _work(self):
+        while True:
+            with self._lock:
+                batch = self._next_batch()
+                if not batch:
+                    self._running -= 1
+                    return
+            try:
+                self._upload(batch)
+            except Exception as e:
+                logging.error(f"Upload worker error: {e}")
+                for job in batch:
+                    if not job.finished:
+                        self._finish(job, "failed", error=e)
+
+    def _next_batch(self):
+        """The next files to upload in one transaction: one large file, or small ones of one user up to the limits."""
+        if not self._queued:
+            return []
+        batch = [self._queued.popleft()]
+        size = batch[0].size
+        while (self._queued and len(batch) < self.batch_files and self._queued[0].user_id == batch[0].user_id
+               and size + self._queued[0].size <= self.batch_bytes):
+            job = self._queued.popleft()
+            batch.append(job)
+            size += job.size
+        return batch
+
+    def _upload(self, batch):
+        reserved = sum(job.size for job in batch) if self._bucket is not None else 0
+        if reserved:
+            waited = self._bucket.take(reserved, lambda: all(job.cancelled for job in batch))
+            if waited:
+                self._count(throttled_seconds=waited)
+        sent = [0]  # bytes sent to the database, over every attempt
+
+        def work(db):
+            uploaded = []
+            for job in batch:
+                if job.cancelled:
+                    raise UploadCancelled(job.name)
+                job.done = 0  # again, if the transaction is retried
+                job.status = "uploading"
+                uploaded.append(self.vault.upload(
+                    job.user_id, job.path, job.name, db=db,
+                    progress=lambda read, sent_now, job=job: self._progress(job, read, sent_now, sent)
+                ))
+            return uploaded
+
+        try:
+            if self._write_lock is None:
+                results = self.executor.run("upload_files", work, write=True)
+            else:
+                with self._write_lock:
+                    results = self.executor.run("upload_files", work, write=True)
+        except Exception as e:
+            if reserved:
+                self._bucket.refund(max(0, reserved - sent[0]))
+            if len(batch) > 1:
+                # One file spoiled the group; give each its own transaction so the rest still go in.
+                for job in batch:
+                    job.done, job.status = 0, "queued"
+                for job in batch:
+                    if job.cancelled:
+                        self._finish(job, "cancelled")
+                    else:
+                        self._upload([job])
+                return
+            job = batch[0]
+            if isinstance(e, UploadCancelled) or job.cancelled:
+                self._finish(job, "cancelled")
+            else:
+                logging.error(f"Upload of {job.name} failed: {e}")
+                self._finish(job, "failed", error=e)
+            return
+        if reserved:
+            self._bucket.refund(max(0, reserved - sent[0]))
+        self._count(transactions=1)
+        # None when an earlier attempt had committed already and the rows were not read back.
+        for job, (row, summary) in zip(batch, results or [(None, None)] * len(batch)):
+            job.done = job.size
+            self._finish(job, "done", row=row, summary=summary)
+
+    def _progress(self, job, read, sent_now, sent):
+        if job.cancelled:
+            raise UploadCancelled(job.name)
+        job.done += read
+        sent[0] += sent_now
+
+    def _finish(self, job, status, row=None, summary=None, error=None):
+        job.row, job.summary, job.error = row, summary, error
+        job.status = status
+        with self._lock:
+            self._unfinished.discard(job)
+            self._counters["uploaded" if status == "done" else status] += 1
+            if summary is not None:
+                self._counters["bytes"] += summary["bytes"]
+                self._counters["bytes_stored"] += summary["bytes_stored"]
+
+    def _count(self, **amounts):
+        with self._lock:
+            for name, amount in amounts.items():
+                self._counters[name] += amount
+
+    def close(self):
+        """Cancel every job and stop the workers; uploads in progress roll back."""
+        with self._lock:
+            self._closed = True
+        self.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot["queued"] = len(self._queued)
+            snapshot["unfinished"] = len(self._unfinished)
+            return snapshot
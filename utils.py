@@ -4,11 +4,12 @@ import random
 import tkinter as tk
 from tkinter import messagebox
 from constants import COLORS
-from cryptography.fernet import Fernet
-import qrcode
 import base64
 import logging
 import os
+import json
+from datetime import datetime
+import audit
 
 def truncate_text(text, length=30):
     """Truncate text to a specified length, appending '...' if longer."""
@@ -60,6 +61,8 @@ def generate_password(length=16, use_uppercase=True, use_numbers=True, use_speci
 def generate_encryption_key():
     """Generate a Fernet encryption key."""
     try:
+        # cryptography and qrcode are imported where used, to keep them off the startup path.
+        from cryptography.fernet import Fernet
         return Fernet.generate_key()
     except Exception as e:
         logging.error(f"Encryption key generation error: {e}")
@@ -69,6 +72,7 @@ def generate_encryption_key():
 def encrypt_data(data, key):
     """Encrypt data using Fernet symmetric encryption."""
     try:
+        from cryptography.fernet import Fernet
         if isinstance(data, str):
             data = data.encode()
         fernet = Fernet(key)
@@ -81,6 +85,7 @@ def encrypt_data(data, key):
 def decrypt_data(encrypted_data, key):
     """Decrypt data using Fernet symmetric encryption."""
     try:
+        from cryptography.fernet import Fernet
         fernet = Fernet(key)
         decrypted = fernet.decrypt(encrypted_data)
         return decrypted.decode()
@@ -92,6 +97,7 @@ def decrypt_data(encrypted_data, key):
 def generate_qr_code(data, filename="qr_code.png"):
     """Generate a QR code from data and save it as an image."""
     try:
+        import qrcode
         qr = qrcode.QRCode(
             version=1,
             error_correction=qrcode.constants.ERROR_CORRECT_L,
@@ -108,16 +114,19 @@ def generate_qr_code(data, filename="qr_code.png"):
         messagebox.showerror("Error", "Failed to generate QR code.")
         return None
 
-def format_audit_log(table_name, action, record_id, details):
-    """Format an audit log entry for consistency."""
+def format_audit_log(table_name, action, record_id, details, user_id=None):
+    """Format an audit log entry and queue it for the background audit writer."""
     try:
-        return {
+        entry = {
             "table_name": table_name,
             "action": action,
             "record_id": record_id,
-            "change_details": truncate_text(str(details), 100),
-            "timestamp": "CURRENT_TIMESTAMP"  # Handled by SQL
+            "user_id": user_id,
+            "change_details": details if isinstance(details, str) else json.dumps(details, default=str),
+            "timestamp": datetime.now().isoformat(" ", "seconds")  # when it happened, not when it is flushed
         }
+        audit.submit(entry)
+        return entry
     except Exception as e:
         logging.error(f"Audit log formatting error: {e}")
         return None
@@ -0,0 +1,267 @@
+import tkinter as tk
+from tkinter import ttk
+from constants import COLORS
+
+
+class VirtualTable(tk.Frame):
+    """Scrolling table that pages rows in from the database as they are needed.
+
+    fetch(after=..., limit=..., **params) runs on a worker thread and returns
+    the next page of raw rows, so a repository's keyset list() method can be
+    passed as is. params are whatever the last reload() was given, e.g. the
+    user_id; after is None for the first page and otherwise key(row) of the
+    last row loaded. format_row(row) turns a raw row into displayed values.
+
+    The Treeview only ever holds as many items as fit on screen. Scrolling
+    rewrites those items' values from the loaded rows instead of moving them,
+    and even/odd striping is worked out from each row's index as it is drawn.
+    The next page is requested once the view comes within half a page of the
+    end of what has been loaded.
+
+    After a mutation, upsert(row) and remove(ident) patch the loaded rows in
+    place, keyed by ident(row) (by default the last key column, the primary
+    id), instead of reloading the listing. Items are only rewritten when their
+    values or stripe actually change. Pass descending=True when the listing
+    is in descending key order.
+    """
+
+    def __init__(self, parent, app, columns, fetch, key, format_row, ident=None, descending=False, owner=None,
+                 on_select=None, on_error=None, page_size=100, height=15, style="Treeview"):
+        super().__init__(parent, bg=COLORS["card_bg"])
+        self.app = app
+        self.fetch = fetch
+        self.key = key
+        self.format_row = format_row
+        self.ident = ident or (lambda row: key(row)[-1])
+        self.descending = descending
+        self.owner = owner
+        self.on_select = on_select
+        self.on_error = on_error
+        self.page_size = page_size
+        self.rows = []
+        self.loaded = set()
+        self.drawn = {}
+        self.top = 0
+        self.slots = height
+        self.selected = None
+        self.exhausted = True
+        self.loading = False
+        self.generation = 0
+        self.params = {}
+
+        self.tree = ttk.Treeview(self, columns=columns, show="headings", height=height, style=style,
+                                 selectmode="browse")
+        # Tag colours override the Treeview style, so they follow the theme's mode too.
+        app.theme.register(self.tree, self._stripe)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self.slots))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self.slots))
+
+    def _stripe(self, theme):
+        self.tree.tag_configure("even", background=theme.color("table_bg"))
+        self.tree.tag_configure("odd", background=theme.color("table_alt"))
+
+    def heading(self, column, **kwargs):
+        return self.tree.heading(column, **kwargs)
+
+    def column(self, column, **kwargs):
+        return self.tree.column(column, **kwargs)
+
+    def reload(self, **params):
+        """Drop the loaded rows and fetch the first page for params."""
+        self.generation += 1
+        self.params = params
+        self.rows = []
+        self.loaded = set()
+        self.top = 0
+        self.selected = None
+        self.exhausted = False
+        self.loading = False
+        self._fetch_more(loading=self.owner)
+        self._render()
+
+    def clear(self):
+        self.generation += 1
+        self.rows = []
+        self.loaded = set()
+        self.top = 0
+        self.selected = None
+        self.exhausted = True
+        self.loading = False
+        self._render()
+
+    def selected_row(self):
+        """The raw row behind the selection, or None."""
+        return self.rows[self.selected] if self.selected is not None else None
+
+    def _fetch_more(self, loading=None):
+        if self.loading or self.exhausted:
+            return
+        self.loading = True
+        generation = self.generation
+        after = self.key(self.rows[-1]) if self.rows else None
+        limit = self.page_size
+        params = self.params
+
+        def done(rows):
+            if generation != self.generation:
+                return
+            self.loading = False
+            self.exhausted = len(rows) < limit
+            # A row upserted ahead of its page may come round again; keep the copy already shown.
+            rows = [row for row in rows if self.ident(row) not in self.loaded]
+            self.rows.extend(rows)
+            self.loaded.update(self.ident(row) for row in rows)
+            self._render()
+
+        def failed(e):
+            if generation != self.generation:
+                return
+            # Stop paging until the next reload rather than retrying on every scroll.
+            self.loading = False
+            self.exhausted = True
+            if self.on_error is not None:
+                self.on_error(e)
+
+        self.app.tasks.submit(lambda: self.fetch(after=after, limit=limit, **params), done, failed, owner=self.owner, loading=loading)
+
+    def upsert(self, row):
+        """Insert row, or replace the loaded row with the same ident, at its sorted position."""
+        self._discard(self.ident(row))
+        index = self._position(row)
+        # Past the end of a partial listing the row belongs to a page not fetched yet.
+        if index < len(self.rows) or self.exhausted:
+            self.rows.insert(index, row)
+            self.loaded.add(self.ident(row))
+            if self.selected is not None and index <= self.selected:
+                self.selected += 1
+        self._render()
+
+    def remove(self, ident):
+        self._discard(ident)
+        self._render()
+
+    def _discard(self, ident):
+        if ident not in self.loaded:
+            return
+        index = next(i for i, row in enumerate(self.rows) if self.ident(row) == ident)
+        del self.rows[index]
+        self.loaded.discard(ident)
+        if self.selected == index:
+            self.selected = None
+        elif self.selected is not None and index < self.selected:
+            self.selected -= 1
+
+    def _sort_key(self, row):
+        # SQL sorts NULL first; None is not comparable in Python, so order on (is not None, value).
+        return tuple((value is not None, value) for value in self.key(row))
+
+    def _position(self, row):
+        """Index of the first loaded row that sorts after row."""
+        target = self._sort_key(row)
+        low, high = 0, len(self.rows)
+        while low < high:
+            middle = (low + high) // 2
+            current = self._sort_key(self.rows[middle])
+            if (current < target) if self.descending else (current > target):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def _on_resize(self, event):
+        rowheight = ttk.Style().lookup(self.tree.cget("style") or "Treeview", "rowheight")
+        rowheight = int(rowheight) if rowheight else 20
+        # The heading row takes about one row's height.
+        slots = max(1, event.height // rowheight - 1)
+        if slots != self.slots:
+            self.slots = slots
+            self._render()
+
+    def _render(self):
+        self.top = max(0, min(self.top, len(self.rows) - self.slots))
+        visible = self.rows[self.top:self.top + self.slots]
+        items = self.tree.get_children()
+        for item in items[len(visible):]:
+            self.tree.delete(item)
+            self.drawn.pop(item, None)
+        selection = ()
+        for offset, row in enumerate(visible):
+            index = self.top + offset
+            values = self.format_row(row)
+            tags = ("even",) if index % 2 == 0 else ("odd",)
+            if offset < len(items):
+                item = items[offset]
+                if self.drawn.get(item) != (values, tags):
+                    self.tree.item(item, values=values, tags=tags)
+            else:
+                item = self.tree.insert("", "end", values=values, tags=tags)
+            self.drawn[item] = (values, tags)
+            if index == self.selected:
+                selection = (item,)
+        if tuple(self.tree.selection()) != selection:
+            self.tree.selection_set(selection)
+        self._update_scrollbar()
+        if len(self.rows) - (self.top + self.slots) < self.page_size // 2:
+            self._fetch_more()
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total <= self.slots:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.slots) / total)
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")."""
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * len(self.rows))
+            self._render()
+        elif args[0] == "scroll":
+            step = int(args[1])
+            self.scroll(step * self.slots if args[2] == "pages" else step)
+
+    def scroll(self, rows):
+        self.top += rows
+        self._render()
+        return "break"
+
+    def _on_wheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def _on_tree_select(self, event):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        index = self.top + self.tree.index(selection[0])
+        # Redrawing re-selects the same row's item; only a new row is a user selection.
+        if index == self.selected or index >= len(self.rows):
+            return
+        self.selected = index
+        if self.on_select is not None:
+            self.on_select(self.rows[index])
+
+    def _move_selection(self, step):
+        if not self.rows:
+            return "break"
+        current = self.top if self.selected is None else self.selected
+        index = max(0, min(len(self.rows) - 1, current + step))
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.slots:
+            self.top = index - self.slots + 1
+        self.selected = index
+        self._render()
+        if self.on_select is not None:
+            self.on_select(self.rows[index])
+        return "break"